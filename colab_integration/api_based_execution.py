@@ -13,6 +13,8 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from google.oauth2 import service_account
 
+from .package_installer import packages_for_code
+
 class APIBasedGPUExecutor:
     """Execute code on GPU using direct APIs - no browser needed!"""
     
@@ -285,19 +287,8 @@ class ZeroConfigAPIBridge:
         return self.executor.execute(code, requirements)
     
     def _detect_packages(self, code: str) -> list:
-        """Auto-detect required packages from code"""
-        packages = []
-        
-        if 'torch' in code or 'pytorch' in code:
-            packages.append('torch')
-        if 'tensorflow' in code or 'tf.' in code:
-            packages.append('tensorflow')
-        if 'numpy' in code or 'np.' in code:
-            packages.append('numpy')
-        if 'pandas' in code or 'pd.' in code:
-            packages.append('pandas')
-        
-        return packages
+        """Auto-detect required packages from the code's imports"""
+        return packages_for_code(code)
 
 # VS Code Extension Interface
 class VSCodeAPIBridge:
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Result Artifacts
+Plots and other binary outputs are stored next to the results as
+content-addressed files (artifact_<sha256>.<ext>) instead of inline base64
+in the result JSON. Results only carry references, identical outputs are
+uploaded once, and clients download (and cache) them when they need them.
+Artifacts nobody has used for the retention window are deleted again.
+"""
+
+import io
+import os
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from googleapiclient.http import MediaIoBaseUpload
+
+from .drive_io import RESUMABLE_THRESHOLD
+
+ARTIFACT_PREFIX = 'artifact_'
+
+FORMAT_MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'jpg': 'image/jpeg',
+}
+MIMETYPE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/svg+xml': '.svg',
+    'image/webp': '.webp',
+    'image/jpeg': '.jpg',
+}
+
+DEFAULT_PLOT_FORMAT = 'png'
+DEFAULT_PLOT_DPI = 150
+
+# Artifacts unused for this long (seconds) are deleted by collect_garbage()
+DEFAULT_RETENTION = 24 * 60 * 60
+
+
+def artifact_name(sha256, mimetype):
+    return f"{ARTIFACT_PREFIX}{sha256}{MIMETYPE_EXTENSIONS.get(mimetype, '.bin')}"
+
+
+def render_figure(fig, fmt=DEFAULT_PLOT_FORMAT, dpi=DEFAULT_PLOT_DPI):
+    """Render a matplotlib figure; returns (bytes, mimetype). Output is deterministic so identical plots dedupe"""
+    import matplotlib
+    fmt = fmt.lower()
+    if fmt not in FORMAT_MIMETYPES:
+        raise ValueError(f"Unsupported plot format: {fmt} (use one of {', '.join(sorted(FORMAT_MIMETYPES))})")
+
+    buf = io.BytesIO()
+    # SVG embeds a date and random element IDs unless told otherwise
+    metadata = {'Date': None} if fmt == 'svg' else None
+    with matplotlib.rc_context({'svg.hashsalt': 'colab-bridge'}):
+        fig.savefig(buf, format=fmt, bbox_inches='tight', dpi=dpi, metadata=metadata)
+    return buf.getvalue(), FORMAT_MIMETYPES[fmt]
+
+
+class ArtifactStore:
+    """Processor side: uploads artifacts to the Drive folder, once per content hash"""
+
+    def __init__(self, service_getter, folder_id, capacity=1024, retention=None):
+        self.service_getter = service_getter
+        self.folder_id = folder_id
+        self.capacity = capacity
+        self.retention = float(retention or os.environ.get('COLAB_PROCESSOR_ARTIFACT_RETENTION') or DEFAULT_RETENTION)
+        self.uploads = 0
+        self.dedup_hits = 0
+        self.deleted = 0
+        self._ids = OrderedDict()  # sha256 -> Drive file ID
+        self._last_used = {}  # Drive file ID -> (sha256, time it was last referenced or first seen)
+        self._hash_locks = {}  # sha256 -> [lock, holders]: one lookup/upload per hash at a time
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked_hash(self, sha256):
+        with self._lock:
+            entry = self._hash_locks.setdefault(sha256, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._hash_locks[sha256]
+
+    def _cached(self, sha256):
+        """File ID of an artifact this store already knows (lock held)"""
+        file_id = self._ids.get(sha256)
+        if file_id:
+            self._ids.move_to_end(sha256)
+            self._last_used[file_id] = (sha256, time.time())
+            self.dedup_hits += 1
+        return file_id
+
+    def put(self, data, mimetype):
+        """Store data; returns its reference {'id', 'sha256', 'size', 'type'}"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        ref = {'sha256': sha256, 'size': len(data), 'type': mimetype}
+
+        with self._lock:
+            file_id = self._cached(sha256)
+        if file_id:
+            return {'id': file_id, **ref}
+
+        # Concurrent puts of one plot would each see no file and upload a copy
+        with self._locked_hash(sha256):
+            with self._lock:
+                file_id = self._cached(sha256)
+            if file_id:
+                return {'id': file_id, **ref}
+
+            service = self.service_getter()
+            name = artifact_name(sha256, mimetype)
+            # Uploaded before this processor started (or by another worker)?
+            existing = service.files().list(
+                q=f"name = '{name}' and '{self.folder_id}' in parents and trashed=false",
+                fields="files(id)"
+            ).execute().get('files', [])
+            if existing:
+                file_id = existing[0]['id']
+                self.dedup_hits += 1
+            else:
+                media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype,
+                                          resumable=len(data) > RESUMABLE_THRESHOLD)
+                file_id = service.files().create(
+                    body={'name': name, 'parents': [self.folder_id]},
+                    media_body=media,
+                    fields='id'
+                ).execute()['id']
+                self.uploads += 1
+
+            with self._lock:
+                self._ids[sha256] = file_id
+                self._last_used[file_id] = (sha256, time.time())
+                while len(self._ids) > self.capacity:
+                    self._ids.popitem(last=False)
+        return {'id': file_id, **ref}
+
+    def collect_garbage(self, now=None):
+        """
+        Delete artifacts of the folder that no result referenced for the
+        retention window. Files this store did not upload or reuse count from
+        when it first lists them. Returns the number deleted.
+        """
+        now = time.time() if now is None else now
+        service = self.service_getter()
+        query = f"'{self.folder_id}' in parents and name contains '{ARTIFACT_PREFIX}' and trashed=false"
+        listed, page_token = {}, None
+        while True:
+            response = service.files().list(q=query, fields="nextPageToken, files(id, name)",
+                                            pageToken=page_token).execute()
+            for file in response.get('files', []):
+                if file['name'].startswith(ARTIFACT_PREFIX):
+                    listed[file['id']] = file['name'][len(ARTIFACT_PREFIX):].split('.')[0]
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        with self._lock:
+            for file_id in set(self._last_used) - set(listed):
+                del self._last_used[file_id]  # Deleted elsewhere
+            for file_id, sha256 in listed.items():
+                self._last_used.setdefault(file_id, (sha256, now))
+            expired = [(file_id, sha256) for file_id, (sha256, used) in self._last_used.items()
+                       if now - used >= self.retention]
+
+        deleted = 0
+        for file_id, sha256 in expired:
+            # Not while a put of the same content may be handing out this file
+            with self._locked_hash(sha256):
+                with self._lock:
+                    if now - self._last_used.get(file_id, (sha256, now))[1] < self.retention:
+                        continue  # Referenced again meanwhile
+                    self._last_used.pop(file_id, None)
+                    if self._ids.get(sha256) == file_id:
+                        del self._ids[sha256]
+                try:
+                    service.files().delete(fileId=file_id).execute()
+                    deleted += 1
+                except Exception as e:
+                    print(f"⚠️ Could not delete artifact {file_id}: {e}")
+        self.deleted += deleted
+        return deleted
+
+
+class VisualCapture:
+    """
+    How one command's visual outputs are encoded: rendered in the requested
+    format/DPI, then either referenced as artifacts (clients that accept
+    them) or inlined as base64 (older clients).
+    """
+
+    def __init__(self, fmt=None, dpi=None, store=None):
+        self.format = (fmt or os.environ.get('COLAB_PROCESSOR_PLOT_FORMAT') or DEFAULT_PLOT_FORMAT).lower()
+        self.dpi = int(dpi or os.environ.get('COLAB_PROCESSOR_PLOT_DPI') or DEFAULT_PLOT_DPI)
+        self.store = store
+
+    @classmethod
+    def for_command(cls, command, store):
+        return cls(command.get('plot_format'), command.get('plot_dpi'),
+                   store if command.get('accept_artifacts') else None)
+
+    def figure(self, fig):
+        data, mimetype = render_figure(fig, self.format, self.dpi)
+        return self.entry(data, mimetype)
+
+    def entry(self, data, mimetype):
+        """Visualization entry for the result"""
+        if self.store is not None:
+            return {'type': mimetype, 'artifact': self.store.put(data, mimetype)}
+        return {'type': mimetype, 'data': base64.b64encode(data).decode('utf-8')}
+
+
+def default_cache_dir():
+    return Path.home() / ".colab-bridge" / "artifacts"
+
+
+class ArtifactCache:
+    """Client side: downloaded artifacts by content hash (they never change)"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+
+    def _path(self, sha256):
+        return self.cache_dir / sha256[:2] / sha256
+
+    def get(self, sha256):
+        try:
+            return self._path(sha256).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, sha256, data):
+        path = self._path(sha256)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # Caching is best effort
@@ -6,15 +6,18 @@ Handles notebook upload and execution automatically
 
 import os
 import json
+import inspect
 import time
 import requests
 import webbrowser
 from typing import Dict, Any, Optional
 from pathlib import Path
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 
+from .drive_client import get_drive_service
+from . import envelope
+from .protocol import get_protocol
+
 class AutoColabManager:
     """Automatically manage Colab notebooks"""
     
@@ -26,11 +29,7 @@ class AutoColabManager:
         
     def initialize(self):
         """Initialize Google Drive service"""
-        credentials = service_account.Credentials.from_service_account_file(
-            self.sa_path,
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.drive_service = get_drive_service(self.sa_path)
         print("✅ Auto Colab Manager initialized")
         
     def upload_notebook(self, notebook_path: str) -> str:
@@ -92,6 +91,7 @@ class AutoColabManager:
     
     def create_auto_processor_notebook(self) -> str:
         """Create a notebook that auto-runs the processor"""
+        protocol = get_protocol()
         notebook_content = {
             "cells": [
                 {
@@ -123,6 +123,18 @@ class AutoColabManager:
                         "print('✅ Dependencies installed')"
                     ]
                 },
+                {
+                    "cell_type": "code",
+                    "execution_count": None,
+                    "metadata": {
+                        "cellView": "form",
+                        "id": "envelope-cell"
+                    },
+                    "outputs": [],
+                    # Result envelope codec (stdlib-only), embedded verbatim
+                    "source": ["#@title Result Encoding { display-mode: \"form\" }\n",
+                               *inspect.getsource(envelope).splitlines(keepends=True)]
+                },
                 {
                     "cell_type": "code", 
                     "execution_count": None,
@@ -145,6 +157,10 @@ class AutoColabManager:
                         "\\n",
                         "# Configuration\\n",
                         "FOLDER_ID = '" + self.folder_id + "'\\n",
+                        "# File naming shared with the bridge (colab_integration/protocol.py)\\n",
+                        "COMMAND_PREFIX = '" + protocol.command_prefix + "'\\n",
+                        "RESULT_PREFIX = '" + protocol.result_prefix + "'\\n",
+                        "FILE_SUFFIX = '" + protocol.suffix + "'\\n",
                         "\\n",
                         "class ColabProcessor:\\n",
                         "    def __init__(self, folder_id):\\n",
@@ -172,31 +188,32 @@ class AutoColabManager:
                         "            sys.stdout = old_stdout\\n",
                         "    \\n",
                         "    def list_requests(self):\\n",
-                        "        query = f\\\"'{self.folder_id}' in parents and name contains 'request_' and trashed=false\\\"\\n",
+                        "        query = f\\\"'{self.folder_id}' in parents and name contains '{COMMAND_PREFIX}' and trashed=false\\\"\\n",
                         "        results = self.drive_service.files().list(q=query, fields='files(id, name)').execute()\\n",
-                        "        return [f for f in results.get('files', []) if f['name'].endswith('.json') and f['id'] not in self.processed_requests]\\n",
+                        "        return [f for f in results.get('files', []) if f['name'].endswith(FILE_SUFFIX) and f['id'] not in self.processed_requests]\\n",
                         "    \\n",
                         "    def read_request(self, file_id):\\n",
                         "        content = self.drive_service.files().get_media(fileId=file_id).execute()\\n",
-                        "        return json.loads(content.decode('utf-8'))\\n",
+                        "        return unpack(content)\\n",
                         "    \\n",
-                        "    def write_response(self, request_id, response_data):\\n",
-                        "        response_name = f'response_{request_id}.json'\\n",
+                        "    def write_response(self, request_id, response_data, request_data=None):\\n",
+                        "        response_name = f'{RESULT_PREFIX}{request_id}{FILE_SUFFIX}'\\n",
                         "        file_metadata = {'name': response_name, 'parents': [self.folder_id]}\\n",
-                        "        media = MediaIoBaseUpload(io.BytesIO(json.dumps(response_data, indent=2).encode('utf-8')), mimetype='application/json')\\n",
+                        "        payload, mimetype = encode_reply(response_data, request_data or {})\\n",
+                        "        media = MediaIoBaseUpload(io.BytesIO(payload), mimetype=mimetype)\\n",
                         "        self.drive_service.files().create(body=file_metadata, media_body=media).execute()\\n",
                         "        print(f'✅ Response written: {response_name}')\\n",
                         "    \\n",
                         "    def process_request(self, request_file):\\n",
-                        "        request_id = request_file['name'].replace('request_', '').replace('.json', '')\\n",
+                        "        request_id = request_file['name'][len(COMMAND_PREFIX):-len(FILE_SUFFIX)]\\n",
                         "        print(f'📋 Processing: {request_id}')\\n",
                         "        try:\\n",
                         "            request_data = self.read_request(request_file['id'])\\n",
-                        "            if request_data['type'] == 'execute_code':\\n",
+                        "            if request_data['type'] in ('execute', 'execute_code'):\\n",
                         "                result = self.execute_code(request_data['code'])\\n",
                         "            else:\\n",
                         "                result = {'status': 'error', 'error': f\\\"Unknown request type: {request_data['type']}\\\"}\\n",
-                        "            self.write_response(request_id, result)\\n",
+                        "            self.write_response(request_id, result, request_data)\\n",
                         "            self.processed_requests.add(request_file['id'])\\n",
                         "        except Exception as e:\\n",
                         "            print(f'❌ Error: {e}')\\n",
@@ -9,11 +9,12 @@ import json
 import time
 import tempfile
 from pathlib import Path
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 import hashlib
 
+from .drive_client import get_drive_service
+from .protocol import get_protocol
+
 class AutoColabSetup:
     """Zero-config Colab setup - just needs service account key"""
     
@@ -91,11 +92,7 @@ class AutoColabSetup:
     
     def _init_drive(self):
         """Initialize Drive service"""
-        credentials = service_account.Credentials.from_service_account_file(
-            self.service_account_path,
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        return build('drive', 'v3', credentials=credentials)
+        return get_drive_service(self.service_account_path)
     
     def _create_or_find_folder(self, drive_service):
         """Create or find the colab-bridge folder"""
@@ -135,6 +132,7 @@ class AutoColabSetup:
             return notebook_id
         
         # Create processor notebook
+        protocol = get_protocol()
         notebook_content = {
             "cells": [
                 {
@@ -176,6 +174,11 @@ class AutoColabSetup:
                         "from datetime import datetime\\n",
                         "from io import StringIO\\n",
                         "\\n",
+                        "# File naming shared with the bridge (colab_integration/protocol.py)\\n",
+                        "COMMAND_PREFIX = '" + protocol.command_prefix + "'\\n",
+                        "RESULT_PREFIX = '" + protocol.result_prefix + "'\\n",
+                        "FILE_SUFFIX = '" + protocol.suffix + "'\\n",
+                        "\\n",
                         "# Find the colab-bridge folder\\n",
                         "base_paths = [\\n",
                         "    '/content/drive/MyDrive/colab-bridge-auto',\\n",
@@ -204,7 +207,7 @@ class AutoColabSetup:
                         "        try:\\n",
                         "            # Look for command files\\n",
                         "            for file in os.listdir(base_path):\\n",
-                        "                if file.startswith('cmd_') and file.endswith('.json'):\\n",
+                        "                if file.startswith(COMMAND_PREFIX) and file.endswith(FILE_SUFFIX):\\n",
                         "                    cmd_path = os.path.join(base_path, file)\\n",
                         "                    \\n",
                         "                    # Read command\\n",
@@ -238,7 +241,7 @@ class AutoColabSetup:
                         "                        sys.stdout = old_stdout\\n",
                         "                    \\n",
                         "                    # Write result\\n",
-                        "                    result_path = cmd_path.replace('cmd_', 'result_')\\n",
+                        "                    result_path = os.path.join(base_path, f'{RESULT_PREFIX}{cmd[\"id\"]}{FILE_SUFFIX}')\\n",
                         "                    with open(result_path, 'w') as f:\\n",
                         "                        json.dump(result, f)\\n",
                         "                    \\n",
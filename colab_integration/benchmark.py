@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+End-to-End Bridge Benchmark
+Runs each bridge variant against a real EnhancedColabProcessor over a
+LocalDriveService directory (with a Drive-like latency profile) and
+reports throughput, p50/p99 command latency and Drive API calls per
+command on the bridge and processor side.
+"""
+
+import io
+import math
+import time
+import tempfile
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .drive_changes import DriveChangesWatcher
+from .enhanced_processor import EnhancedColabProcessor
+from .fake_drive import latency_profile
+from .local_drive import LocalDriveService
+from .optimized_bridge import OptimizedColabBridge, SmartBatchBridge
+from .universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'benchmark-folder'
+
+
+def _poll_bridge(tool_name):
+    return UniversalColabBridge(tool_name=tool_name, result_delivery='poll')
+
+
+def _changes_bridge(tool_name):
+    return UniversalColabBridge(tool_name=tool_name, result_delivery='changes')
+
+
+def _optimized_bridge(tool_name):
+    return OptimizedColabBridge(tool_name=tool_name)
+
+
+def _batch_bridge(tool_name):
+    return SmartBatchBridge(tool_name=tool_name, poll_interval=0.1)
+
+
+# Variant name -> bridge factory
+BRIDGE_VARIANTS = {
+    'poll': _poll_bridge,
+    'changes': _changes_bridge,
+    'optimized': _optimized_bridge,
+    'batch': _batch_bridge,
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _attach(bridge, service):
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+    return bridge
+
+
+def _run_commands(variant, service, code, commands, concurrency, timeout):
+    """Run the workload; returns (per-command latencies, statuses)"""
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def record(started, result):
+        with lock:
+            latencies.append(time.time() - started)
+            statuses.append(result.get('status'))
+
+    if variant == 'batch':
+        # Batching needs many commands in flight on one bridge
+        bridge = _attach(BRIDGE_VARIANTS[variant](f"bench_{variant}"), service)
+        try:
+            pending = [(time.time(), bridge.submit_code(code, timeout=timeout)) for _ in range(commands)]
+            for started, future in pending:
+                record(started, future.result())
+        finally:
+            bridge.stop_batching = True
+        return latencies, statuses
+
+    # Everything else: one bridge per caller thread, like separate tools sharing a folder
+    local = threading.local()
+
+    def call(i):
+        bridge = getattr(local, 'bridge', None)
+        if bridge is None:
+            bridge = local.bridge = _attach(BRIDGE_VARIANTS[variant](f"bench_{variant}_{i}"), service)
+        started = time.time()
+        record(started, bridge.execute_code(code, timeout=timeout))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(commands)))
+    return latencies, statuses
+
+
+def run_variant(variant, commands=20, concurrency=4, profile='drive', scale=0.05,
+                code="print('ok')", timeout=120, root=None, quiet=True):
+    """Benchmark one bridge variant end to end; returns a stats dict"""
+    if variant not in BRIDGE_VARIANTS:
+        raise ValueError(f"Unknown bridge variant '{variant}' (use one of {', '.join(BRIDGE_VARIANTS)})")
+
+    with contextlib.ExitStack() as stack:
+        if root is None:
+            root = stack.enter_context(tempfile.TemporaryDirectory(prefix="colab-bridge-bench-"))
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        DriveChangesWatcher.reset_shared()
+        bridge_service = LocalDriveService(root, **latency_profile(profile, scale))
+        processor_service = LocalDriveService(root, **latency_profile(profile, scale))
+
+        processor = EnhancedColabProcessor(service=processor_service, folder_id=FOLDER_ID)
+        stop_event = threading.Event()
+        processor_thread = threading.Thread(
+            target=processor.run, kwargs={'poll_interval': 0.05, 'stop_event': stop_event,
+                                          'max_idle_interval': 0.2},
+            daemon=True)
+        processor_thread.start()
+
+        start = time.time()
+        try:
+            latencies, statuses = _run_commands(variant, bridge_service, code, commands, concurrency, timeout)
+        finally:
+            wall = time.time() - start
+            stop_event.set()
+            processor_thread.join(timeout=5)
+
+    return {
+        'variant': variant,
+        'commands': commands,
+        'ok': statuses.count('success'),
+        'wall': wall,
+        'throughput': commands / wall if wall else 0.0,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'bridge_calls': bridge_service.total_calls / commands,
+        'processor_calls': processor_service.total_calls / commands,
+        'bridge_call_breakdown': dict(bridge_service.calls),
+    }
+
+
+def format_table(rows):
+    lines = [f"{'variant':<11}{'ok':>5}{'cmd/s':>8}{'p50 (s)':>9}{'p99 (s)':>9}{'bridge/cmd':>12}{'proc/cmd':>10}"]
+    for row in rows:
+        lines.append(f"{row['variant']:<11}{row['ok']:>5}{row['throughput']:>8.2f}{row['p50']:>9.2f}"
+                     f"{row['p99']:>9.2f}{row['bridge_calls']:>12.1f}{row['processor_calls']:>10.1f}")
+    return "\n".join(lines)
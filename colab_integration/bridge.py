@@ -8,11 +8,13 @@ import os
 import json
 import time
 from pathlib import Path
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseDownload
 import io
 
+from .drive_io import upload_json
+from .drive_client import get_drive_service
+from .protocol import get_protocol
+
 class ClaudeColabBridge:
     """Simple bridge for Claude to execute code in Google Colab"""
     
@@ -21,6 +23,7 @@ class ClaudeColabBridge:
         self.drive_service = None
         self.folder_id = self.config.get('google_drive_folder_id')
         self.instance_id = f"claude_{int(time.time())}"
+        self.protocol = get_protocol()
         
     def _load_config(self, config_path):
         """Load configuration from environment or file"""
@@ -36,11 +39,7 @@ class ClaudeColabBridge:
         if not self.config['service_account_path']:
             raise ValueError("SERVICE_ACCOUNT_PATH environment variable required")
         
-        credentials = service_account.Credentials.from_service_account_file(
-            self.config['service_account_path'],
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.drive_service = get_drive_service(self.config['service_account_path'])
         print(f"✅ Claude Tools bridge initialized: {self.instance_id}")
         
     def execute_code(self, code, timeout=30):
@@ -57,36 +56,20 @@ class ClaudeColabBridge:
         }
         
         # Upload command
-        self._upload_json(f"command_{command['id']}.json", command)
+        self._upload_json(self.protocol.command_name(command['id']), command)
         
         # Wait for result
         result = self._wait_for_result(command['id'], timeout)
         return result
     
     def _upload_json(self, filename, data):
-        """Upload JSON data to Google Drive"""
-        temp_file = f"/tmp/{filename}"
-        with open(temp_file, 'w') as f:
-            json.dump(data, f)
-            
-        media = MediaFileUpload(temp_file, mimetype='application/json')
-        file_metadata = {
-            'name': filename,
-            'parents': [self.folder_id]
-        }
-        
-        self.drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
-        
-        os.remove(temp_file)
+        """Upload JSON data to Google Drive (streamed from memory)"""
+        upload_json(self.drive_service, self.folder_id, filename, data)
     
     def _wait_for_result(self, command_id, timeout):
         """Wait for command result with instant polling"""
         start_time = time.time()
-        result_filename = f"result_{command_id}.json"
+        query = self.protocol.result_query(command_id, self.folder_id)
         poll_count = 0
         
         while time.time() - start_time < timeout:
@@ -94,7 +77,7 @@ class ClaudeColabBridge:
             
             # Search for result file
             results = self.drive_service.files().list(
-                q=f"name='{result_filename}' and parents in '{self.folder_id}'",
+                q=query,
                 fields='files(id, name)'
             ).execute()
             
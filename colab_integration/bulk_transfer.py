@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Bulk File Transfer
+Packs many files into one compressed tar archive so a whole sync batch
+travels through Drive as a single binary blob plus a single command,
+instead of one base64-in-exec round trip per file.
+Shared by FileSyncManager (local side) and the processors (Colab side).
+"""
+
+import io
+import os
+import tarfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Optional: zstd is faster and smaller than gzip, but not installed on Colab by default
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ARCHIVE_EXTENSIONS = {'gzip': '.tar.gz', 'zstd': '.tar.zst'}
+ARCHIVE_MIMETYPES = {'gzip': 'application/gzip', 'zstd': 'application/zstd'}
+
+
+def available_codecs() -> List[str]:
+    """Compression codecs usable in this interpreter"""
+    return ['gzip', 'zstd'] if zstandard is not None else ['gzip']
+
+
+def _check_codec(codec: str):
+    if codec not in ARCHIVE_EXTENSIONS:
+        raise ValueError(f"Unknown archive codec: {codec}")
+    if codec == 'zstd' and zstandard is None:
+        raise RuntimeError("zstd archives require the 'zstandard' package (pip install zstandard)")
+
+
+def pack_files(base_dir, rel_paths: List[str], codec: str = 'gzip', extra_files: Optional[Dict[str, bytes]] = None) -> bytes:
+    """
+    Pack files under base_dir into one compressed tar archive.
+
+    Args:
+        base_dir: Directory the relative paths are resolved against
+        rel_paths: Files to include (stored under their relative path)
+        codec: 'gzip' or 'zstd'
+        extra_files: In-memory files to add, {archive_name: content}
+    """
+    _check_codec(codec)
+    base_dir = Path(base_dir)
+    buffer = io.BytesIO()
+
+    mode = 'w:gz' if codec == 'gzip' else 'w'
+    with tarfile.open(fileobj=buffer, mode=mode) as tar:
+        for rel_path in rel_paths:
+            tar.add(str(base_dir / rel_path), arcname=rel_path, recursive=False)
+        for name, content in (extra_files or {}).items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+
+    data = buffer.getvalue()
+    if codec == 'zstd':
+        data = zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _open_archive(data: bytes, codec: str) -> tarfile.TarFile:
+    _check_codec(codec)
+    if codec == 'zstd':
+        data = zstandard.ZstdDecompressor().decompress(data)
+        return tarfile.open(fileobj=io.BytesIO(data), mode='r')
+    return tarfile.open(fileobj=io.BytesIO(data), mode='r:gz')
+
+
+def _safe_members(candidates: List[tarfile.TarInfo], target_dir: Path) -> List[tarfile.TarInfo]:
+    """Only regular files and directories that stay inside target_dir"""
+    members = []
+    for member in candidates:
+        if not (member.isfile() or member.isdir()):
+            raise ValueError(f"Refusing to extract special archive member: {member.name}")
+        destination = (target_dir / member.name).resolve()
+        if destination != target_dir and target_dir not in destination.parents:
+            raise ValueError(f"Refusing to extract outside target directory: {member.name}")
+        members.append(member)
+    return members
+
+
+def unpack_archive(data: bytes, target_dir, codec: str = 'gzip') -> List[str]:
+    """
+    Extract an archive produced by pack_files into target_dir.
+    File modification times are preserved. Returns the relative paths written.
+    """
+    written, _ = unpack_archive_with_reserved(data, target_dir, codec)
+    return written
+
+
+def unpack_archive_with_reserved(data: bytes, target_dir, codec: str = 'gzip',
+                                 reserved_prefix: Optional[str] = None) -> Tuple[List[str], Dict[str, bytes]]:
+    """
+    Like unpack_archive, but members under reserved_prefix (transfer metadata
+    such as delta chunks) are returned in memory instead of being extracted.
+    Returns (written_paths, {reserved_name: content}).
+    """
+    target_dir = Path(target_dir).resolve()
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    with _open_archive(data, codec) as tar:
+        reserved = {}
+        members = []
+        for member in tar.getmembers():
+            if reserved_prefix and member.name.startswith(reserved_prefix):
+                if member.isfile():
+                    reserved[member.name] = tar.extractfile(member).read()
+            else:
+                members.append(member)
+
+        members = _safe_members(members, target_dir)
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(str(target_dir), members=members, filter='data')
+        else:
+            tar.extractall(str(target_dir), members=members)
+        return [m.name for m in members if m.isfile()], reserved
+
+
+def is_excluded(path: str, sync_patterns: Dict[str, List[str]]) -> bool:
+    """Whether a path (file or directory) matches one of FileSyncManager's exclude patterns"""
+    return any(pattern in path for pattern in sync_patterns["exclude"])
+
+
+def should_sync_path(file_path: str, sync_patterns: Dict[str, List[str]]) -> bool:
+    """FileSyncManager's include/exclude rules, usable on either side of the transfer"""
+    file_name = os.path.basename(file_path)
+    if file_name.startswith('.') or is_excluded(file_path, sync_patterns):
+        return False
+    return any(pattern == "*" or file_name.endswith(pattern.replace("*", ""))
+               for pattern in sync_patterns["include"])
+
+
+def select_newer_files(base_dir, known_files: Dict[str, float],
+                       sync_patterns: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+    """
+    Walk base_dir and return files that are new or newer than known_files
+    (relative path -> modification time on the other side). With
+    sync_patterns, only files the other side would sync are considered.
+    """
+    base_dir = str(base_dir)
+    selected = []
+    if not os.path.isdir(base_dir):
+        return selected
+
+    for root, dirs, files in os.walk(base_dir):
+        if sync_patterns is not None:
+            dirs[:] = [d for d in dirs if not is_excluded(os.path.join(root, d), sync_patterns)]
+        for name in files:
+            file_path = os.path.join(root, name)
+            if sync_patterns is not None and not should_sync_path(file_path, sync_patterns):
+                continue
+            rel_path = os.path.relpath(file_path, base_dir)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            known_mtime = known_files.get(rel_path)
+            if known_mtime is None or stat.st_mtime > known_mtime:
+                selected.append({'rel_path': rel_path, 'size': stat.st_size, 'modified': stat.st_mtime})
+    return selected
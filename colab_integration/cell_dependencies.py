@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Cell Dependency Analysis
+Static (AST) analysis of which top-level names each notebook cell defines
+and reads, used by LocalColabNotebook to re-run only the cells whose
+source or upstream state changed.
+
+The analysis is conservative where Python is too dynamic to follow:
+cells that do not parse (shell escapes, cell magics), star-imports and
+exec/eval/globals() make a cell "opaque" - it depends on every earlier
+cell and every later cell depends on it. Mutation through a method call
+is only seen for statement-level calls (``model.fit(X)`` marks ``model``
+as defined); mutation hidden inside other expressions is not tracked.
+"""
+
+import ast
+import hashlib
+from functools import lru_cache
+
+# Calls that can read or write arbitrary globals
+DYNAMIC_CALLS = {'exec', 'eval', 'globals', 'locals', 'vars', '__import__'}
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda,
+           ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+class CellInfo:
+    """Names a cell defines and reads at notebook (module) level"""
+
+    __slots__ = ('defines', 'reads', 'opaque')
+
+    def __init__(self, defines=(), reads=(), opaque=False):
+        self.defines = frozenset(defines)
+        self.reads = frozenset(reads)
+        self.opaque = opaque
+
+    def __repr__(self):
+        if self.opaque:
+            return "CellInfo(opaque)"
+        return f"CellInfo(defines={sorted(self.defines)}, reads={sorted(self.reads)})"
+
+
+def _strip_magics(source):
+    """Blank out IPython line magics/shell escapes; None for cell magics"""
+    lines = source.split('\n')
+    first = next((line.strip() for line in lines if line.strip()), '')
+    if first.startswith('%%'):
+        return None
+    stripped = []
+    for line in lines:
+        body = line.lstrip()
+        if body.startswith(('%', '!')):
+            line = line[:len(line) - len(body)] + 'pass'
+        stripped.append(line)
+    return '\n'.join(stripped)
+
+
+def _bound_names(node):
+    """Module-level names a statement binds (or mutates) outside nested scopes"""
+    names = set()
+
+    def visit(child, top):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if top:
+                names.add(child.name)
+            # 'global x' inside a function makes calls to it write x
+            for inner in ast.walk(child):
+                if isinstance(inner, ast.Global):
+                    names.update(inner.names)
+            return
+        if isinstance(child, _SCOPES):
+            return
+        if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            names.add(child.id)
+        elif isinstance(child, (ast.Attribute, ast.Subscript)) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            base = child.value
+            while isinstance(base, (ast.Attribute, ast.Subscript)):
+                base = base.value
+            if isinstance(base, ast.Name):
+                names.add(base.id)  # df['x'] = ..., obj.attr = ...
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            for alias in child.names:
+                names.add(alias.asname or alias.name.split('.')[0])
+        for grandchild in ast.iter_child_nodes(child):
+            visit(grandchild, False)
+
+    visit(node, True)
+    if isinstance(node, ast.Expr):
+        call = node.value.value if isinstance(node.value, ast.Await) else node.value
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute):
+            base = call.func.value
+            while isinstance(base, (ast.Attribute, ast.Subscript)):
+                base = base.value
+            if isinstance(base, ast.Name):
+                names.add(base.id)  # model.fit(X), items.append(x)
+    return names
+
+
+@lru_cache(maxsize=1024)
+def analyze_cell(source):
+    """CellInfo for a cell's source"""
+    code = _strip_magics(source)
+    if code is None:
+        return CellInfo(opaque=True)
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return CellInfo(opaque=True)
+
+    defines, reads = set(), set()
+    for statement in tree.body:
+        loaded = set()
+        for node in ast.walk(statement):
+            if isinstance(node, ast.ImportFrom) and any(alias.name == '*' for alias in node.names):
+                return CellInfo(opaque=True)
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                if node.id in DYNAMIC_CALLS:
+                    return CellInfo(opaque=True)
+                loaded.add(node.id)
+        # Names this cell already defined earlier are not upstream reads
+        reads.update(loaded - defines)
+        defines.update(_bound_names(statement))
+    return CellInfo(defines, reads)
+
+
+def find_providers(sources):
+    """For each cell, the indices of earlier cells whose state it depends on"""
+    last_definer = {}
+    last_opaque = None
+    providers = []
+    for index, source in enumerate(sources):
+        info = analyze_cell(source)
+        if info.opaque:
+            upstream = set(last_definer.values())
+        else:
+            upstream = {last_definer[name] for name in info.reads if name in last_definer}
+        if last_opaque is not None:
+            upstream.add(last_opaque)
+        providers.append(upstream)
+
+        if info.opaque:
+            last_opaque = index
+        for name in info.defines:
+            last_definer[name] = index
+    return providers
+
+
+def cell_key(source, upstream_states):
+    """Cache key of a cell: its source plus the run state of the cells it depends on"""
+    digest = hashlib.sha256(source.encode('utf-8'))
+    for state in sorted(str(state) for state in upstream_states):
+        digest.update(b'\0' + state.encode('utf-8'))
+    return digest.hexdigest()
@@ -27,6 +27,13 @@ def main():
     execute_parser.add_argument("--tool", "-t", default="cli", help="Tool name (default: cli)")
     execute_parser.add_argument("--timeout", type=int, default=60, help="Timeout in seconds")
     execute_parser.add_argument("--output", "-o", choices=["json", "text"], default="text", help="Output format")
+    execute_parser.add_argument("--stream", "-s", action="store_true", help="Print output while the code runs")
+    
+    # Cancel command
+    cancel_parser = subparsers.add_parser("cancel", help="Interrupt a running command in Colab")
+    cancel_parser.add_argument("command_id", help="Command ID (the Request ID of a queued execution)")
+    cancel_parser.add_argument("--tool", "-t", default="cli", help="Tool name (default: cli)")
+    cancel_parser.add_argument("--timeout", type=int, default=30, help="Timeout in seconds")
     
     # Setup command
     setup_parser = subparsers.add_parser("setup", help="Setup Colab Bridge")
@@ -41,6 +48,12 @@ def main():
     notebook_parser = subparsers.add_parser("notebook", help="Manage Colab notebooks")
     notebook_parser.add_argument("action", choices=["upload", "open", "list"], help="Notebook action")
     
+    # Daemon command
+    daemon_parser = subparsers.add_parser("daemon", help="Run a persistent JSON-RPC bridge daemon")
+    daemon_parser.add_argument("--tool", "-t", default="daemon", help="Tool name (default: daemon)")
+    daemon_parser.add_argument("--socket", help="Unix socket path (default: stdio)")
+    daemon_parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -49,12 +62,16 @@ def main():
     
     if args.command == "execute":
         execute_command(args)
+    elif args.command == "cancel":
+        cancel_command(args)
     elif args.command == "setup":
         setup_command(args)
     elif args.command == "status":
         status_command(args)
     elif args.command == "notebook":
         notebook_command(args)
+    elif args.command == "daemon":
+        daemon_command(args)
 
 def execute_command(args=None):
     """Execute code in Colab"""
@@ -66,6 +83,7 @@ def execute_command(args=None):
         parser.add_argument("--tool", "-t", default="cli", help="Tool name")
         parser.add_argument("--timeout", type=int, default=60, help="Timeout in seconds")
         parser.add_argument("--output", "-o", choices=["json", "text"], default="text", help="Output format")
+        parser.add_argument("--stream", "-s", action="store_true", help="Print output while the code runs")
         args = parser.parse_args()
     
     # Get code to execute
@@ -86,8 +104,32 @@ def execute_command(args=None):
         bridge = UniversalColabBridge(tool_name=args.tool)
         bridge.initialize()
         
+        # The id is shown while the code runs, for `colab-bridge cancel` from another terminal
+        submitted = []
+        def show_id(command_id):
+            submitted.append(command_id)
+            print(f"Command ID: {command_id} (stop it with: colab-bridge cancel {command_id})", file=sys.stderr)
+        
         # Execute code
-        result = bridge.execute_code(code, timeout=args.timeout)
+        streaming = getattr(args, 'stream', False)
+        try:
+            if streaming:
+                def show_chunk(chunk):
+                    # Text mode renders output as it arrives; JSON mode prints the final result only
+                    if args.output == "text":
+                        sys.stdout.write(chunk['stdout'])
+                        sys.stderr.write(chunk['stderr'])
+                        sys.stdout.flush()
+                result = bridge.execute_code(code, timeout=args.timeout, on_output=show_chunk, on_submit=show_id)
+            else:
+                result = bridge.execute_code(code, timeout=args.timeout, on_submit=show_id)
+        except KeyboardInterrupt:
+            # Ctrl-C stops the remote command too, not just this process
+            # (without an id yet, the bridge cancels its latest in-flight command)
+            print("\n🛑 Cancelling the remote command...", file=sys.stderr)
+            cancelled = bridge.cancel(submitted[-1] if submitted else None)
+            print(cancelled.get('output', '').rstrip() or f"Cancel: {cancelled.get('status')}", file=sys.stderr)
+            sys.exit(130)
         
         # Output result
         if args.output == "json":
@@ -95,7 +137,7 @@ def execute_command(args=None):
         else:
             if result.get('status') == 'success':
                 print("✅ Success!")
-                if result.get('output'):
+                if result.get('output') and not streaming:
                     print("\nOutput:")
                     print("-" * 40)
                     print(result['output'])
@@ -113,6 +155,25 @@ def execute_command(args=None):
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+def cancel_command(args):
+    """Interrupt a command running (or queued) on the processor"""
+    try:
+        bridge = UniversalColabBridge(tool_name=args.tool)
+        bridge.initialize()
+        result = bridge.cancel(args.command_id, timeout=args.timeout)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if result.get('status') == 'success':
+        print(result.get('output', '').rstrip() or f"🛑 Cancelled {args.command_id}")
+    elif result.get('status') == 'pending':
+        print("⏳ Cancel request queued - is the Colab processor running?")
+        sys.exit(1)
+    else:
+        print(f"❌ Error: {result.get('error', 'Unknown error')}")
+        sys.exit(1)
+
 def setup_command(args):
     """Setup Colab Bridge configuration"""
     config_file = Path.home() / ".colab-bridge" / "config.json"
@@ -162,7 +223,7 @@ def status_command(args):
         print(f"Instance ID: {bridge.instance_id}")
         
         # Check pending requests
-        query = f"'{bridge.folder_id}' in parents and name contains 'command_' and trashed=false"
+        query = bridge.protocol.commands_query(bridge.folder_id)
         results = bridge.drive_service.files().list(q=query, fields="files(id, name)").execute()
         pending = len(results.get('files', []))
         
@@ -173,6 +234,11 @@ def status_command(args):
         print(f"❌ Error: {e}")
         sys.exit(1)
 
+def daemon_command(args):
+    """Run the persistent bridge daemon"""
+    from .daemon import run_daemon
+    run_daemon(tool_name=args.tool, socket_path=args.socket, workers=args.workers)
+
 def notebook_command(args):
     """Manage Colab notebooks"""
     if args.action == "open":
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Processor Command Discovery
+Finds new command files without re-listing the whole folder on every poll:
+Drive processors follow the changes feed from a single cursor, mounted-folder
+processors reuse their last directory listing while the directory is
+unchanged. Processed IDs are kept in a bounded LRU so memory stays flat over
+long sessions, and IdleBackoff stretches the poll interval while nothing
+happens, snapping back on activity.
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+# Remember this many processed files/commands (enough to outlive any feed lag)
+DEFAULT_PROCESSED_CAPACITY = 4096
+
+# Longest pause between polls of an idle processor
+DEFAULT_MAX_IDLE_INTERVAL = 30.0
+
+# Safety-net full listing for changes the feed did not report
+DEFAULT_RECONCILE_INTERVAL = 300.0
+
+# First retry of a command file whose claim failed; doubles per attempt up to the max
+DEFAULT_RETRY_DELAY = 1.0
+DEFAULT_MAX_RETRY_DELAY = 60.0
+
+COMMAND_CHANGES_FIELDS = "nextPageToken,newStartPageToken,changes(fileId,removed,file(id,name,parents,trashed))"
+
+
+class ProcessedIds:
+    """Set of recently processed IDs that forgets the oldest beyond capacity"""
+
+    def __init__(self, capacity=DEFAULT_PROCESSED_CAPACITY):
+        self.capacity = capacity
+        self._ids = OrderedDict()
+
+    def add(self, item):
+        self._ids[item] = None
+        self._ids.move_to_end(item)
+        while len(self._ids) > self.capacity:
+            self._ids.popitem(last=False)
+
+    def __contains__(self, item):
+        return item in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class IdleBackoff:
+    """Poll interval that grows while idle and resets on activity"""
+
+    def __init__(self, min_interval, max_interval=None, factor=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval if max_interval is not None else float(
+            os.environ.get('COLAB_PROCESSOR_MAX_IDLE_INTERVAL', DEFAULT_MAX_IDLE_INTERVAL)))
+        self.factor = factor
+        self.delay = min_interval
+
+    def activity(self):
+        self.delay = self.min_interval
+
+    def idle(self):
+        self.delay = min(self.max_interval, self.delay * self.factor)
+
+    def wait(self, stop_event=None):
+        """Sleep for the current interval (returns early when stop_event is set)"""
+        if stop_event is not None:
+            stop_event.wait(self.delay)
+        else:
+            time.sleep(self.delay)
+
+
+class DriveCommandFeed:
+    """
+    New command_* files in a Drive folder, from the changes feed.
+    The first poll lists the folder once (commands queued before the
+    processor started); after that each poll is a single changes().list.
+    Callers mark files processed once claimed; a file whose claim failed is
+    handed back with retry_later and returned again by a later poll, with
+    backoff, instead of waiting for the next reconcile listing.
+    """
+
+    def __init__(self, service_getter, folder_id, prefix='command_',
+                 reconcile_interval=DEFAULT_RECONCILE_INTERVAL, capacity=DEFAULT_PROCESSED_CAPACITY,
+                 retry_delay=DEFAULT_RETRY_DELAY, max_retry_delay=DEFAULT_MAX_RETRY_DELAY):
+        self.service_getter = service_getter
+        self.folder_id = folder_id
+        self.prefix = prefix
+        self.reconcile_interval = reconcile_interval
+        self.processed = ProcessedIds(capacity)
+        self.page_token = None
+        self.last_reconcile = 0.0
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._retries = OrderedDict()  # file id -> (file, attempts, due time)
+
+    def poll(self):
+        """Metadata of command files not processed yet, oldest first"""
+        service = self.service_getter()
+        if self.page_token is None:
+            # Take the cursor before listing so nothing falls in between
+            self.page_token = service.changes().getStartPageToken().execute()['startPageToken']
+            return self.reconcile()
+
+        found = OrderedDict()
+        token = self.page_token
+        while token:
+            response = service.changes().list(
+                pageToken=token,
+                fields=COMMAND_CHANGES_FIELDS,
+                pageSize=1000,
+                spaces='drive'
+            ).execute()
+            for change in response.get('changes', []):
+                file = change.get('file')
+                if change.get('removed') or not file:
+                    found.pop(change.get('fileId'), None)
+                elif self._is_new_command(file):
+                    found[file['id']] = file
+                else:
+                    found.pop(file['id'], None)
+            if 'newStartPageToken' in response:
+                self.page_token = response['newStartPageToken']
+                break
+            token = response.get('nextPageToken')
+
+        if time.time() - self.last_reconcile >= self.reconcile_interval:
+            for file in self.reconcile():
+                found.setdefault(file['id'], file)
+        now = time.time()
+        for file_id, (file, attempts, due) in self._retries.items():
+            if due <= now:
+                found.setdefault(file_id, file)
+        return list(found.values())
+
+    def reconcile(self):
+        """Full listing of pending command files"""
+        self.last_reconcile = time.time()
+        query = f"'{self.folder_id}' in parents and name contains '{self.prefix}' and trashed=false"
+        files, page_token = [], None
+        while True:
+            response = self.service_getter().files().list(
+                q=query,
+                fields="nextPageToken, files(id, name, parents)",
+                orderBy='createdTime',
+                pageToken=page_token
+            ).execute()
+            files.extend(f for f in response.get('files', []) if self._is_new_command(f))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                # Files that are gone (claimed elsewhere, deleted) need no more retries
+                listed = {f['id'] for f in files}
+                for file_id in [file_id for file_id in self._retries if file_id not in listed]:
+                    del self._retries[file_id]
+                return files
+
+    def mark_processed(self, file_id):
+        self.processed.add(file_id)
+        self._retries.pop(file_id, None)
+
+    def retry_later(self, file):
+        """Return a file whose claim or download failed from a later poll, backing off per attempt"""
+        if file['id'] in self.processed:
+            return
+        attempts = self._retries[file['id']][1] if file['id'] in self._retries else 0
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** attempts)
+        self._retries[file['id']] = (file, attempts + 1, time.time() + delay)
+
+    def _is_new_command(self, file):
+        return (file.get('name', '').startswith(self.prefix)
+                and not file.get('trashed')
+                and self.folder_id in file.get('parents', [self.folder_id])
+                and file['id'] not in self.processed)
+
+
+class LocalCommandFeed:
+    """
+    New command_*.json files in a mounted folder (e.g. Drive under
+    /content/drive). The directory is only re-listed when its mtime changed,
+    or every relist_interval since mounts may not update it for remote writes.
+    A file that could not be claimed yet (still being written) is handed back
+    with retry_later and returned again by a later poll, with backoff, even
+    while the listing is reused.
+    """
+
+    def __init__(self, folder, prefix='command_', suffix='.json',
+                 relist_interval=30.0, capacity=DEFAULT_PROCESSED_CAPACITY,
+                 retry_delay=DEFAULT_RETRY_DELAY, max_retry_delay=DEFAULT_MAX_RETRY_DELAY):
+        self.folder = folder
+        self.prefix = prefix
+        self.suffix = suffix
+        self.relist_interval = relist_interval
+        self.processed = ProcessedIds(capacity)
+        self.listing_count = 0
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._retries = OrderedDict()  # name -> (attempts, due time)
+        self._dir_mtime_ns = None
+        self._listed_at_ns = 0
+
+    def poll(self):
+        """Names of command files not processed yet"""
+        mtime_ns = os.stat(self.folder).st_mtime_ns
+        now_ns = time.time_ns()
+        if (mtime_ns == self._dir_mtime_ns
+                # A listing in the same second as the change may have missed it
+                and self._listed_at_ns - mtime_ns >= 1_000_000_000
+                and now_ns - self._listed_at_ns < self.relist_interval * 1e9):
+            return self._due_retries()
+
+        self.listing_count += 1
+        self._dir_mtime_ns, self._listed_at_ns = mtime_ns, now_ns
+        with os.scandir(self.folder) as entries:
+            names = sorted(entry.name for entry in entries
+                           if entry.name.startswith(self.prefix) and entry.name.endswith(self.suffix))
+        # Files that are gone (claimed elsewhere, deleted) need no more retries
+        for name in [name for name in self._retries if name not in names]:
+            del self._retries[name]
+        due = set(self._due_retries())
+        return [name for name in names
+                if name not in self.processed and (name not in self._retries or name in due)]
+
+    def mark_processed(self, name):
+        self.processed.add(name)
+        self._retries.pop(name, None)
+
+    def retry_later(self, name):
+        """Return a file whose claim failed from a later poll, backing off per attempt"""
+        if name in self.processed:
+            return
+        attempts = self._retries[name][0] if name in self._retries else 0
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** attempts)
+        self._retries[name] = (attempts + 1, time.time() + delay)
+
+    def _due_retries(self):
+        now = time.time()
+        return [name for name, (attempts, due) in self._retries.items() if due <= now]
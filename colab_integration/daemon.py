@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Colab Bridge Daemon
+Long-lived process holding one initialized UniversalColabBridge, serving
+JSON-RPC 2.0 requests (one JSON object per line) over stdio or a Unix socket.
+IDE integrations start it once instead of spawning python per execute/poll.
+"""
+
+import os
+import sys
+import json
+import queue
+import inspect
+import base64
+import argparse
+import threading
+import traceback
+import socketserver
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from .universal_bridge import UniversalColabBridge
+
+JSONRPC_VERSION = "2.0"
+
+# Standard JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+# How long shutdown waits for the processor to acknowledge each cancel
+SHUTDOWN_CANCEL_TIMEOUT = 5
+
+
+class JsonRpcError(Exception):
+    """Error reported back to the client as a JSON-RPC error object"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class BridgeDaemon:
+    """Dispatches JSON-RPC requests to a shared, already-initialized bridge"""
+
+    def __init__(self, tool_name="daemon", max_workers=4):
+        self.tool_name = tool_name
+        self.bridge = None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.shutdown_event = threading.Event()
+        self._local = threading.local()
+        # Line queues of the connections being served, woken on shutdown
+        self._inboxes = set()
+        self._inboxes_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        # Ids of commands whose results a worker is still waiting for
+        self._running = set()
+        self._running_lock = threading.Lock()
+
+        self.methods = {
+            'initialize': self.rpc_initialize,
+            'execute': self.rpc_execute,
+            'execute_stream': self.rpc_execute_stream,
+            'get_result': self.rpc_get_result,
+            'get_artifact': self.rpc_get_artifact,
+            'cancel': self.rpc_cancel,
+            'status': self.rpc_status,
+            'ping': self.rpc_ping,
+            'shutdown': self.rpc_shutdown,
+        }
+
+    # Bridge management ---------------------------------------------------
+
+    def _ensure_bridge(self):
+        """Initialize the shared bridge once; credentials are reused afterwards"""
+        with self._init_lock:
+            if self.bridge is None:
+                bridge = UniversalColabBridge(tool_name=self.tool_name)
+                bridge.initialize()
+                self.bridge = bridge
+            return self.bridge
+
+    def _thread_bridge(self):
+        """Per-thread clone of the shared bridge (own Drive service, same credentials)"""
+        shared = self._ensure_bridge()
+        bridge = getattr(self._local, 'bridge', None)
+        if bridge is None:
+            bridge = shared.clone_for_thread()
+            self._local.bridge = bridge
+        return bridge
+
+    @contextmanager
+    def _tracking(self, stream_id=None, command_id=None):
+        """
+        on_submit callback for one request: records its command as running
+        (cancelled on shutdown) and tells the client which command id to
+        cancel for stream_id
+        """
+        notify = getattr(self._local, 'notify', None)
+        submitted = []
+
+        def on_submit(command_id):
+            submitted.append(command_id)
+            with self._running_lock:
+                self._running.add(command_id)
+            if notify is not None and stream_id is not None:
+                notify('submitted', {'stream_id': stream_id, 'command_id': command_id})
+
+        if command_id is not None:
+            on_submit(command_id)
+        try:
+            yield on_submit
+        finally:
+            with self._running_lock:
+                self._running.difference_update(submitted)
+
+    def _cancel_running(self):
+        """Interrupt the commands workers are still waiting for, so shutdown does not wait them out"""
+        with self._running_lock:
+            running = list(self._running)
+        for command_id in running:
+            try:
+                self._thread_bridge().cancel(command_id, timeout=SHUTDOWN_CANCEL_TIMEOUT)
+            except Exception as e:
+                print(f"⚠️ Could not cancel {command_id}: {e}", file=sys.stderr)
+
+    # RPC methods ---------------------------------------------------------
+
+    def rpc_initialize(self, service_account_path=None, folder_id=None, tool_name=None):
+        """(Re)initialize the bridge, optionally with new settings"""
+        if service_account_path:
+            os.environ['SERVICE_ACCOUNT_PATH'] = service_account_path
+        if folder_id:
+            os.environ['GOOGLE_DRIVE_FOLDER_ID'] = folder_id
+        with self._init_lock:
+            if tool_name:
+                self.tool_name = tool_name
+            self.bridge = None
+            self._local = threading.local()
+        bridge = self._ensure_bridge()
+        return {'instance_id': bridge.instance_id, 'folder_id': bridge.folder_id}
+
+    def rpc_execute(self, code, timeout=30, stream_id=None):
+        """Execute code; returns the result, or a 'pending' marker on timeout"""
+        with self._tracking(stream_id) as on_submit:
+            return self._thread_bridge().execute_code(code, timeout=timeout, on_submit=on_submit)
+
+    def rpc_execute_stream(self, code, timeout=300, stream_id=None, session=None):
+        """Execute code, sending 'output' notifications while it runs; returns the result"""
+        notify = getattr(self._local, 'notify', None)
+        result = None
+        with self._tracking(stream_id) as on_submit:
+            for event in self._thread_bridge().stream_code(code, timeout=timeout, session=session,
+                                                           on_submit=on_submit):
+                if event['type'] == 'output':
+                    if notify:
+                        notify('output', {'stream_id': stream_id, 'seq': event['seq'],
+                                          'stdout': event['stdout'], 'stderr': event['stderr']})
+                else:
+                    result = event['result']
+        return result
+
+    def rpc_get_result(self, request_id, timeout=30):
+        """Keep waiting for the result of a command that came back 'pending'"""
+        bridge = self._thread_bridge()
+        try:
+            with self._tracking(command_id=request_id):
+                return bridge._wait_for_result(request_id, timeout)
+        except TimeoutError:
+            return {'status': 'pending', 'request_id': request_id}
+
+    def rpc_get_artifact(self, artifact):
+        """Content of a plot/artifact reference from a result, base64-encoded"""
+        data = self._thread_bridge().fetch_artifact(artifact)
+        return {'type': artifact.get('type'), 'data': base64.b64encode(data).decode('utf-8')}
+
+    def rpc_cancel(self, command_id=None, timeout=30):
+        """Interrupt one command on the processor, by the id from its 'submitted' notification"""
+        if not command_id:
+            raise JsonRpcError(INVALID_PARAMS, "cancel needs the command_id of the execution to stop")
+        return self._thread_bridge().cancel(command_id, timeout=timeout)
+
+    def rpc_status(self):
+        bridge = self.bridge
+        return {
+            'initialized': bridge is not None,
+            'tool_name': self.tool_name,
+            'instance_id': bridge.instance_id if bridge else None,
+            'folder_id': bridge.folder_id if bridge else None,
+            'pid': os.getpid(),
+        }
+
+    def rpc_ping(self):
+        return 'pong'
+
+    def rpc_shutdown(self):
+        self.shutdown_event.set()
+        with self._inboxes_lock:
+            for inbox in self._inboxes:
+                inbox.put(None)  # Stop serving without waiting for another request line
+        return True
+
+    # Dispatch ------------------------------------------------------------
+
+    def handle_message(self, line):
+        """Handle one JSON-RPC message; returns the response dict (None for notifications)"""
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return self._error_response(None, PARSE_ERROR, f"Parse error: {e}")
+
+        if not isinstance(message, dict) or 'method' not in message:
+            return self._error_response(message.get('id') if isinstance(message, dict) else None,
+                                        INVALID_REQUEST, "Invalid request")
+
+        request_id = message.get('id')
+        try:
+            result = self.dispatch(message['method'], message.get('params'))
+        except JsonRpcError as e:
+            return self._error_response(request_id, e.code, e.message)
+        except Exception as e:
+            if os.environ.get('COLAB_BRIDGE_DEBUG'):
+                traceback.print_exc(file=sys.stderr)
+            return self._error_response(request_id, SERVER_ERROR, str(e))
+
+        if request_id is None:
+            return None
+        return {'jsonrpc': JSONRPC_VERSION, 'id': request_id, 'result': result}
+
+    def dispatch(self, method_name, params):
+        method = self.methods.get(method_name)
+        if method is None:
+            raise JsonRpcError(METHOD_NOT_FOUND, f"Method not found: {method_name}")
+        args, kwargs = ([], params) if isinstance(params, dict) else (params or [], {})
+        # Checked up front: a TypeError raised while the method runs is an internal error
+        try:
+            inspect.signature(method).bind(*args, **kwargs)
+        except TypeError as e:
+            raise JsonRpcError(INVALID_PARAMS, f"Invalid params for {method_name}: {e}")
+        return method(*args, **kwargs)
+
+    @staticmethod
+    def _error_response(request_id, code, message):
+        return {'jsonrpc': JSONRPC_VERSION, 'id': request_id, 'error': {'code': code, 'message': message}}
+
+    # Transports ----------------------------------------------------------
+
+    def serve_lines(self, lines, write):
+        """
+        Serve a stream of request lines. Each request runs on the worker pool,
+        so responses stream back as they complete (matched by id).
+        """
+        write_lock = threading.Lock()
+
+        def notify(method, params):
+            with write_lock:
+                write(json.dumps({'jsonrpc': JSONRPC_VERSION, 'method': method, 'params': params}) + "\n")
+
+        def respond(line):
+            if self.shutdown_event.is_set():
+                return  # Queued before shutdown: not worth starting now
+            # Lets streaming methods push notifications on this connection
+            self._local.notify = notify
+            response = self.handle_message(line)
+            if response is not None:
+                with write_lock:
+                    write(json.dumps(response) + "\n")
+
+        write(json.dumps({'jsonrpc': JSONRPC_VERSION, 'method': 'ready',
+                          'params': {'pid': os.getpid()}}) + "\n")
+
+        # Lines are read on their own thread, so a shutdown request ends this loop
+        # right away instead of after the next line arrives on a silent client
+        inbox = queue.Queue()
+        with self._inboxes_lock:
+            self._inboxes.add(inbox)
+
+        def read():
+            try:
+                for line in lines:
+                    inbox.put(line)
+            finally:
+                inbox.put(None)
+
+        threading.Thread(target=read, name="rpc-reader", daemon=True).start()
+        try:
+            while not self.shutdown_event.is_set():
+                line = inbox.get()
+                if line is None:
+                    break
+                line = line.strip()
+                if line:
+                    self.executor.submit(respond, line)
+        finally:
+            with self._inboxes_lock:
+                self._inboxes.discard(inbox)
+
+    def serve_stdio(self):
+        """Serve JSON-RPC on stdin/stdout"""
+        protocol_out = sys.stdout
+        # Anything the bridge prints must not corrupt the protocol stream
+        sys.stdout = sys.stderr
+
+        def write(text):
+            protocol_out.write(text)
+            protocol_out.flush()
+
+        try:
+            self.serve_lines(sys.stdin, write)
+        finally:
+            # The client is gone (EOF) or asked to stop: drop queued requests,
+            # free the workers of running ones and return without waiting
+            self.shutdown_event.set()
+            self._cancel_running()
+            self.executor.shutdown(wait=False)
+
+    def serve_socket(self, socket_path):
+        """Serve JSON-RPC on a Unix domain socket (one line-delimited stream per connection)"""
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                def write(text):
+                    self.wfile.write(text.encode('utf-8'))
+                    self.wfile.flush()
+                lines = (raw.decode('utf-8') for raw in self.rfile)
+                daemon.serve_lines(lines, write)
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        # Keep bridge chatter off the terminal that launched us
+        sys.stdout = sys.stderr
+        server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        server.daemon_threads = True
+        watcher = threading.Thread(target=lambda: (self.shutdown_event.wait(), server.shutdown()), daemon=True)
+        watcher.start()
+        print(f"🔌 Colab Bridge daemon listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self._cancel_running()
+            self.executor.shutdown(wait=False)
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main(argv=None):
+    """Run the daemon (python -m colab_integration.daemon)"""
+    parser = argparse.ArgumentParser(description="Colab Bridge JSON-RPC daemon", prog="colab-bridge daemon")
+    parser.add_argument("--tool", "-t", default="daemon", help="Tool name reported to the processor")
+    parser.add_argument("--socket", help="Serve on this Unix socket path instead of stdio")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    args = parser.parse_args(argv)
+    run_daemon(args.tool, args.socket, args.workers)
+
+
+def run_daemon(tool_name="daemon", socket_path=None, workers=4):
+    daemon = BridgeDaemon(tool_name=tool_name, max_workers=workers)
+    if socket_path:
+        daemon.serve_socket(socket_path)
+    else:
+        daemon.serve_stdio()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Delta Sync for Large Files
+Content-defined chunking (gear rolling hash, FastCDC-style) splits large
+files into chunks whose boundaries survive inserts and edits. Each side
+keeps a persisted chunk manifest of the version the other side has, so a
+changed dataset only ships the chunks that are actually new.
+
+Boundaries are found with numpy when it is installed (always, on Colab);
+the pure-Python loop finds the same ones, only slower.
+"""
+
+import os
+import json
+import random
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Archive members under this prefix carry delta metadata/chunks, not workspace files
+DELTA_PREFIX = ".colab-bridge-delta/"
+DELTA_INDEX = DELTA_PREFIX + "index.json"
+DELTA_CHUNKS = DELTA_PREFIX + "chunks/"
+
+# Files at least this large are chunked and delta-synced
+DEFAULT_DELTA_THRESHOLD = 8 * 1024 * 1024
+
+# Chunk size targets: boundaries land every ~256 KiB, never below/above min/max
+AVG_CHUNK_SIZE = 256 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+
+_READ_SIZE = 4 * 1024 * 1024
+_HASH_MASK = (1 << 64) - 1
+# Bytes hashed per numpy pass while looking for a boundary
+_SCAN_BLOCK = 64 * 1024
+
+# Fixed table: chunk boundaries must be stable across runs and machines
+_rng = random.Random(0x5EED_C0DE)
+GEAR = [_rng.getrandbits(64) for _ in range(256)]
+del _rng
+_GEAR_ARRAY = numpy.array(GEAR, dtype=numpy.uint64) if numpy is not None else None
+
+
+def _boundary_mask(avg_size: int) -> int:
+    """Mask over the high hash bits (they depend on the last 64 bytes)"""
+    bits = avg_size.bit_length() - 1
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def _cut_point(data, min_size: int, max_size: int, mask: int) -> int:
+    """Length of the next chunk at the start of data (bytes or memoryview)"""
+    length = len(data)
+    if length <= min_size:
+        return length
+    limit = min(length, max_size)
+    if _GEAR_ARRAY is not None:
+        return _cut_point_numpy(data, min_size, limit, mask)
+
+    # Bytes before min_size can never end a chunk, so they are not hashed
+    h = 0
+    gear = GEAR
+    position = min_size
+    for byte in data[min_size:limit]:
+        h = ((h << 1) + gear[byte]) & _HASH_MASK
+        position += 1
+        if not h & mask:
+            return position
+    return limit
+
+
+def _cut_point_numpy(data, min_size: int, limit: int, mask: int) -> int:
+    """
+    _cut_point over numpy arrays. The hash after byte i is the sum of
+    GEAR[byte i - k] << k over the last 64 bytes (older ones are shifted
+    out), which log2(64) shifted adds compute for a whole block at once.
+    """
+    mask = numpy.uint64(mask)
+    start = min_size
+    while start < limit:
+        end = min(start + _SCAN_BLOCK, limit)
+        # The bytes before the block still count, but hashing starts at min_size
+        context = min(63, start - min_size)
+        block = numpy.frombuffer(data, dtype=numpy.uint8, count=end - start + context, offset=start - context)
+        h = _GEAR_ARRAY[block]
+        shift = 1
+        while shift < 64:
+            h[shift:] += h[:-shift] << numpy.uint64(shift)
+            shift *= 2
+        hits = numpy.flatnonzero((h[context:] & mask) == 0)
+        if hits.size:
+            return start + int(hits[0]) + 1
+        start = end
+    return limit
+
+
+def iter_chunks(file_obj, avg_size: int = AVG_CHUNK_SIZE, min_size: int = MIN_CHUNK_SIZE,
+                max_size: int = MAX_CHUNK_SIZE):
+    """Yield (offset, chunk_bytes) for a binary stream, reading it incrementally"""
+    mask = _boundary_mask(avg_size)
+    buffer = b''
+    position = 0  # Start of the unchunked bytes in buffer
+    offset = 0
+    eof = False
+
+    while True:
+        if not eof and len(buffer) - position < max_size:
+            # Only the tail is copied, once per read rather than once per chunk
+            buffer = buffer[position:]
+            position = 0
+            while not eof and len(buffer) < max_size:
+                block = file_obj.read(_READ_SIZE)
+                if block:
+                    buffer += block
+                else:
+                    eof = True
+        if position == len(buffer):
+            return
+
+        cut = _cut_point(memoryview(buffer)[position:], min_size, max_size, mask)
+        yield offset, buffer[position:position + cut]
+        offset += cut
+        position += cut
+
+
+def chunk_file(path, **sizes) -> List[Tuple[str, int]]:
+    """Chunk a file, returning its manifest: [(sha256, length), ...]"""
+    with open(path, 'rb') as f:
+        return [(hashlib.sha256(chunk).hexdigest(), len(chunk)) for _, chunk in iter_chunks(f, **sizes)]
+
+
+def manifest_digest(chunks) -> str:
+    """Identity of one file version, used to check both sides agree on the base"""
+    digest = hashlib.sha256()
+    for chunk_hash, length in chunks:
+        digest.update(f"{chunk_hash}:{length};".encode('ascii'))
+    return digest.hexdigest()
+
+
+def read_chunks(path, chunks, wanted) -> Dict[str, bytes]:
+    """Read the bytes of the wanted chunk hashes out of a file with the given manifest"""
+    found = {}
+    offset = 0
+    with open(path, 'rb') as f:
+        for chunk_hash, length in chunks:
+            if chunk_hash in wanted and chunk_hash not in found:
+                f.seek(offset)
+                found[chunk_hash] = f.read(length)
+            offset += length
+    return found
+
+
+class ManifestStore:
+    """
+    Persisted chunk manifests of one synced directory, stored as JSON:
+    {rel_path: {"size": int, "mtime": float, "chunks": [[sha256, length], ...]}}
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @classmethod
+    def for_directory(cls, directory, root=None):
+        """Store for a synced directory, kept under ~/.colab-bridge/manifests"""
+        root = Path(root) if root else Path.home() / ".colab-bridge" / "manifests"
+        key = hashlib.sha1(str(Path(directory).resolve()).encode('utf-8')).hexdigest()[:16]
+        return cls(root / f"{key}.json")
+
+    def get(self, rel_path) -> Optional[Dict]:
+        return self.entries.get(rel_path)
+
+    def set(self, rel_path, chunks, size, mtime):
+        self.entries[rel_path] = {'size': size, 'mtime': mtime, 'chunks': [list(c) for c in chunks]}
+
+    def discard(self, rel_path):
+        self.entries.pop(rel_path, None)
+
+    def save(self):
+        """Atomically write the manifests to disk"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(self.path.parent), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(temp_path, self.path)
+
+
+def target_path(target_dir, rel_path) -> Path:
+    """Where rel_path lives under target_dir; refuses absolute paths and paths leaving it"""
+    target_dir = Path(target_dir).resolve()
+    destination = (target_dir / rel_path).resolve()
+    if Path(rel_path).is_absolute() or '..' in Path(rel_path).parts or target_dir not in destination.parents:
+        raise ValueError(f"Refusing to write outside target directory: {rel_path}")
+    return destination
+
+
+def build_delta(path, rel_path, base_entry, chunks=None) -> Tuple[Dict, Dict[str, bytes], List]:
+    """
+    Prepare a delta for one large file against the version the remote has.
+
+    Returns (descriptor, new_chunk_bytes, new_manifest). The descriptor lists
+    the full new chunk sequence; only chunks missing from the base are shipped.
+    chunks is the file's manifest, if already known.
+    """
+    if chunks is None:
+        chunks = chunk_file(path)
+    known = {chunk_hash for chunk_hash, _ in base_entry['chunks']}
+    missing = {chunk_hash for chunk_hash, _ in chunks if chunk_hash not in known}
+    new_chunks = read_chunks(path, chunks, missing) if missing else {}
+
+    stat = os.stat(path)
+    descriptor = {
+        'rel_path': rel_path,
+        'base': manifest_digest(base_entry['chunks']),
+        'chunks': [list(c) for c in chunks],
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+    }
+    return descriptor, new_chunks, chunks
+
+
+def apply_delta(target_dir, descriptor, chunk_blobs: Dict[str, bytes], store: ManifestStore) -> bool:
+    """
+    Rebuild a file from its current version plus shipped chunks (Colab side).
+    Returns False when the local file is not the base the delta was built
+    against - the sender then re-sends the whole file.
+    """
+    rel_path = descriptor['rel_path']
+    file_path = target_path(target_dir, rel_path)
+    entry = store.get(rel_path)
+
+    if entry is None or manifest_digest(entry['chunks']) != descriptor['base']:
+        return False
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    if stat.st_size != entry['size'] or stat.st_mtime != entry['mtime']:
+        return False  # Modified on this side since the manifest was recorded
+
+    needed = {h for h, _ in descriptor['chunks'] if h not in chunk_blobs}
+    local_chunks = read_chunks(file_path, entry['chunks'], needed)
+    if needed - set(local_chunks):
+        return False
+
+    fd, temp_path = tempfile.mkstemp(dir=str(file_path.parent), suffix='.delta')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk_hash, length in descriptor['chunks']:
+                data = chunk_blobs.get(chunk_hash)
+                if data is None:
+                    data = local_chunks[chunk_hash]
+                if len(data) != length:
+                    raise ValueError(f"Chunk {chunk_hash} has unexpected length")
+                out.write(data)
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    os.utime(file_path, (descriptor['mtime'], descriptor['mtime']))
+    stat = os.stat(file_path)
+    store.set(rel_path, descriptor['chunks'], stat.st_size, stat.st_mtime)
+    return True
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Drive Changes Watcher
+One shared watcher per process follows the Drive changes feed and wakes
+every bridge waiting on a result file, instead of each caller polling
+files().list with 'name contains' queries
+"""
+
+import os
+import sys
+import time
+import threading
+
+from .protocol import get_protocol
+
+# Fields requested from changes().list - just enough to route result files
+CHANGES_FIELDS = "nextPageToken,newStartPageToken,changes(fileId,removed,file(id,name,parents,trashed))"
+
+
+def result_key_candidates(file_name, protocol=None):
+    """
+    Map a result file name to the command IDs it may belong to.
+    Current processors write result_<id>.json; processors deployed before
+    the shared protocol module may still write result_result_<id>.json or
+    result_<id-without-cmd_>.json.
+    """
+    protocol = get_protocol(protocol)
+    key = protocol.result_id(file_name)
+    if key is None:
+        return []
+    while key.startswith(protocol.result_prefix):
+        key = key[len(protocol.result_prefix):]
+    return [key, f"cmd_{key}"]
+
+
+class _ResultWaiter:
+    """A single in-flight command waiting for its result file"""
+
+    def __init__(self, command_id):
+        self.command_id = command_id
+        self.event = threading.Event()
+        self.file = None
+
+    def deliver(self, file):
+        if not self.event.is_set():
+            self.file = file
+            self.event.set()
+
+
+class DriveChangesWatcher:
+    """
+    Follows the Drive changes feed (startPageToken cursor) for a folder and
+    hands new result_* files to the matching waiters.
+
+    A single watcher thread serves every in-flight command in the process, so
+    API usage is one changes().list per poll interval regardless of how many
+    callers are waiting. A cheap combined files().list sweep runs every
+    reconcile_interval as a safety net for changes the feed does not report.
+    """
+
+    _watchers = {}
+    _watchers_lock = threading.Lock()
+
+    def __init__(self, folder_id, service_factory, poll_interval=0.5, reconcile_interval=10.0, protocol=None):
+        self.folder_id = folder_id
+        self.service_factory = service_factory
+        self.protocol = get_protocol(protocol)
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+
+        self.drive_service = None
+        self.page_token = None
+        self.poll_count = 0
+        self.last_reconcile = 0.0
+
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def shared(cls, folder_id, service_factory, **kwargs):
+        """Return the process-wide watcher for a Drive folder"""
+        with cls._watchers_lock:
+            watcher = cls._watchers.get(folder_id)
+            if watcher is None:
+                watcher = cls(folder_id, service_factory, **kwargs)
+                cls._watchers[folder_id] = watcher
+            return watcher
+
+    @classmethod
+    def reset_shared(cls):
+        """Forget all shared watchers (used by tests and benchmarks)"""
+        with cls._watchers_lock:
+            cls._watchers.clear()
+
+    def register(self, command_id):
+        """
+        Start waiting for a command's result.
+        Must be called BEFORE the command is uploaded, so that the feed
+        cursor predates the result file.
+        """
+        with self._lock:
+            if self.drive_service is None:
+                # The watcher thread gets its own service: httplib2 is not thread-safe
+                self.drive_service = self.service_factory()
+            if self.page_token is None:
+                response = self.drive_service.changes().getStartPageToken().execute()
+                self.page_token = response['startPageToken']
+                self.last_reconcile = time.time()
+
+            waiter = _ResultWaiter(command_id)
+            self._waiters[command_id] = waiter
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="drive-changes-watcher", daemon=True)
+                self._thread.start()
+        return waiter
+
+    def unregister(self, command_id):
+        """Stop waiting for a command (after delivery, timeout or failure)"""
+        with self._lock:
+            self._waiters.pop(command_id, None)
+
+    def wait(self, command_id, timeout):
+        """Block until the result file for command_id appears; returns its metadata or None"""
+        with self._lock:
+            waiter = self._waiters.get(command_id)
+        if waiter is None:
+            raise KeyError(f"Command {command_id} is not registered with the watcher")
+        if waiter.event.wait(timeout):
+            return waiter.file
+        return None
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return len(self._waiters)
+
+    def _run(self):
+        """Watcher loop - exits when no command is waiting"""
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    # Next registration fetches a fresh cursor rather than
+                    # replaying everything that changed while we were idle
+                    self.page_token = None
+                    self._thread = None
+                    return
+
+            try:
+                self.poll_once()
+                if time.time() - self.last_reconcile >= self.reconcile_interval:
+                    self.reconcile()
+            except Exception as e:
+                if os.environ.get('COLAB_BRIDGE_DEBUG'):
+                    print(f"⚠️ Changes watcher error: {e}", file=sys.stderr)
+
+            time.sleep(self.poll_interval)
+
+    def poll_once(self):
+        """Consume the changes feed from the current cursor"""
+        token = self.page_token
+        while token:
+            self.poll_count += 1
+            response = self.drive_service.changes().list(
+                pageToken=token,
+                fields=CHANGES_FIELDS,
+                pageSize=1000,
+                spaces='drive'
+            ).execute()
+
+            for change in response.get('changes', []):
+                file = change.get('file')
+                if change.get('removed') or not file:
+                    continue
+                self._route(file)
+
+            if 'newStartPageToken' in response:
+                self.page_token = response['newStartPageToken']
+                return
+            token = response.get('nextPageToken')
+
+    def reconcile(self):
+        """One combined listing for all waiters, in case the feed missed a file"""
+        self.last_reconcile = time.time()
+        if not self.in_flight:
+            return
+        query = self.protocol.results_query(self.folder_id)
+        results = self.drive_service.files().list(q=query, fields="files(id, name, parents)").execute()
+        for file in results.get('files', []):
+            self._route(file)
+
+    def _route(self, file):
+        """Deliver a changed file to its waiter, if it is one of our result files"""
+        if file.get('trashed') or self.folder_id not in file.get('parents', [self.folder_id]):
+            return
+        with self._lock:
+            for key in result_key_candidates(file.get('name', ''), self.protocol):
+                waiter = self._waiters.get(key)
+                if waiter is not None:
+                    waiter.deliver(file)
+                    return
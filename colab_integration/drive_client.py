@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Shared Drive Client Factory
+Process-wide source of Google Drive services: service account credentials
+are loaded once per key file and refreshed ahead of expiry in the
+background, the Drive discovery document is parsed from the bundled copy
+once, and every thread gets its own authorized HTTP transport (httplib2
+connections are not thread-safe, so sharing one serializes all bridges).
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+import google_auth_httplib2
+from google.oauth2 import service_account
+from googleapiclient.discovery import build, build_from_document
+
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive']
+
+# Refresh tokens this long before they expire, so requests never wait on it
+REFRESH_MARGIN = timedelta(minutes=5)
+RETRY_DELAY = 30
+HTTP_TIMEOUT = 60
+
+_factories = {}
+_factories_lock = threading.Lock()
+_discovery_docs = {}
+
+
+def _discovery_document(api, version):
+    """Bundled discovery document (no network fetch), read once per process"""
+    if (api, version) not in _discovery_docs:
+        try:
+            from googleapiclient.discovery_cache import get_static_doc
+            _discovery_docs[(api, version)] = get_static_doc(api, version)
+        except ImportError:
+            _discovery_docs[(api, version)] = None
+    return _discovery_docs[(api, version)]
+
+
+def _utcnow():
+    # google-auth stores expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class DriveClientFactory:
+    """Credentials for one service account key plus per-thread Drive services"""
+
+    def __init__(self, service_account_path, scopes=DRIVE_SCOPES):
+        self.service_account_path = str(service_account_path)
+        self.scopes = list(scopes)
+        self.credentials = service_account.Credentials.from_service_account_file(
+            self.service_account_path,
+            scopes=self.scopes
+        )
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._refresh_timer = None
+        self._started = False
+
+    def service(self):
+        """The calling thread's Drive service (googleapiclient services are not thread-safe)"""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self.new_service()
+            self._local.service = service
+        return service
+
+    def new_service(self):
+        """A new Drive service with its own authorized HTTP transport"""
+        self._start()
+        http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+        document = _discovery_document('drive', 'v3')
+        if document is None:
+            return build('drive', 'v3', http=http, cache_discovery=False)
+        return build_from_document(document, http=http)
+
+    # Token refresh -------------------------------------------------------
+
+    def _start(self):
+        """Fetch the first token in the background while the caller sets up"""
+        with self._refresh_lock:
+            if self._started:
+                return
+            self._started = True
+        self._schedule_refresh(0)
+
+    def needs_refresh(self):
+        expiry = self.credentials.expiry
+        return self.credentials.token is None or expiry is None or expiry - _utcnow() < REFRESH_MARGIN
+
+    def refresh(self):
+        """Refresh the access token now and schedule the next proactive refresh"""
+        with self._refresh_lock:
+            if self.needs_refresh():
+                self.credentials.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=HTTP_TIMEOUT)))
+        expiry = self.credentials.expiry
+        if expiry is not None:
+            self._schedule_refresh(max(0, (expiry - REFRESH_MARGIN - _utcnow()).total_seconds()))
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            # Requests still refresh on demand; just try again later
+            if os.environ.get('COLAB_BRIDGE_DEBUG'):
+                print(f"⚠️ Background token refresh failed: {e}", file=sys.stderr)
+            self._schedule_refresh(RETRY_DELAY)
+
+    def _schedule_refresh(self, delay):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(delay, self._refresh_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def close(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+
+def get_client_factory(service_account_path, scopes=DRIVE_SCOPES):
+    """The process-wide factory for a service account key file"""
+    key = (os.path.realpath(str(service_account_path)), tuple(scopes))
+    with _factories_lock:
+        factory = _factories.get(key)
+        if factory is None:
+            factory = DriveClientFactory(service_account_path, scopes)
+            _factories[key] = factory
+        return factory
+
+
+def get_drive_service(service_account_path, scopes=DRIVE_SCOPES):
+    """Drive service for the calling thread, sharing credentials process-wide"""
+    return get_client_factory(service_account_path, scopes).service()
+
+
+def reset_client_factories():
+    """Forget cached factories (e.g. after the key file changed)"""
+    with _factories_lock:
+        for factory in _factories.values():
+            factory.close()
+        _factories.clear()
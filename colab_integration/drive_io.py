@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Drive JSON I/O
+Serializes command/result payloads straight into an in-memory upload
+(no temp files), compactly, with optional gzip compression or as a
+protocol envelope (see envelope.py). Readers detect the encoding from the
+content, so plain, compressed and enveloped files can be mixed.
+"""
+
+import io
+import gzip
+import json
+
+from googleapiclient.http import MediaIoBaseUpload
+
+from .envelope import (
+    pack, unpack, encode_reply, ENVELOPE_MIMETYPE, COMPRESS_MIN_SIZE as GZIP_MIN_SIZE
+)
+
+# Above this size uploads use the resumable protocol
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+
+
+def encode_json(data, compress=False, envelope=None):
+    """Serialize data compactly; returns (payload_bytes, mimetype)
+
+    envelope=(codec, format) writes a protocol envelope instead.
+    """
+    if envelope:
+        return pack(data, *envelope), ENVELOPE_MIMETYPE
+    payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    if compress and len(payload) >= GZIP_MIN_SIZE:
+        return gzip.compress(payload, compresslevel=6), 'application/gzip'
+    return payload, 'application/json'
+
+
+def decode_json(content):
+    """Parse a payload written by encode_json (enveloped, gzip-compressed or plain)"""
+    return unpack(content)
+
+
+def update_json(service, file_id, data, compress=False, envelope=None):
+    """Replace the content of an existing JSON file (e.g. a heartbeat)"""
+    payload, mimetype = encode_json(data, compress, envelope)
+    media = MediaIoBaseUpload(io.BytesIO(payload), mimetype=mimetype)
+    return service.files().update(fileId=file_id, media_body=media).execute()
+
+
+def upload_json(service, folder_id, name, data, compress=False, fields='id', envelope=None):
+    """Upload data as a JSON file from memory; returns the created file's metadata"""
+    payload, mimetype = encode_json(data, compress, envelope)
+    return _upload(service, folder_id, name, payload, mimetype, fields)
+
+
+def upload_reply(service, folder_id, name, data, command, fields='id'):
+    """Upload a result encoded the way the command's sender accepts"""
+    payload, mimetype = encode_reply(data, command)
+    return _upload(service, folder_id, name, payload, mimetype, fields)
+
+
+def _upload(service, folder_id, name, payload, mimetype, fields):
+    media = MediaIoBaseUpload(io.BytesIO(payload), mimetype=mimetype,
+                              resumable=len(payload) > RESUMABLE_THRESHOLD)
+    return service.files().create(
+        body={'name': name, 'parents': [folder_id]},
+        media_body=media,
+        fields=fields
+    ).execute()
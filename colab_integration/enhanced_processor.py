@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Enhanced Colab Processor with Plot Support
-Captures both text output and matplotlib/other visualizations
+Captures both text output and matplotlib/other visualizations.
+matplotlib is only imported once user code (or the warm-up) needs it.
 """
 
 import os
@@ -10,22 +11,90 @@ import json
 import time
 import traceback
 import io
-import base64
-from contextlib import redirect_stdout, redirect_stderr
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaIoBaseUpload
 
-# Import matplotlib and configure for non-interactive backend
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+from .bulk_transfer import (
+    pack_files, unpack_archive_with_reserved, select_newer_files, ARCHIVE_EXTENSIONS, ARCHIVE_MIMETYPES
+)
+from .drive_io import upload_json, upload_reply, update_json, decode_json, RESUMABLE_THRESHOLD
+from .drive_client import get_client_factory
+from .execution_engine import (
+    CommandCanceller, ExecutionEngine, SharedExclusiveLock, capture_output, run_code_in_subprocess
+)
+from .command_feed import DriveCommandFeed, IdleBackoff, ProcessedIds
+from .protocol import get_protocol
+from .session_namespaces import SessionNamespaces
+from .output_stream import StreamingOutput, partial_file_name, stream_options
+from .artifacts import ArtifactStore, VisualCapture
+from .plot_capture import capture_visuals, open_figures
+from .delta_sync import ManifestStore, apply_delta, target_path, DELTA_PREFIX, DELTA_INDEX, DELTA_CHUNKS
+from .warmup import Warmup, load_manifest
+from .package_installer import PackageInstaller, default_cache_dir
+
+# Non-interactive matplotlib backend, applied whenever matplotlib gets imported
+os.environ['MPLBACKEND'] = 'Agg'
+if 'matplotlib' in sys.modules:
+    sys.modules['matplotlib'].use('Agg')
+
+# How often run() republishes heartbeat.json
+HEARTBEAT_INTERVAL = 10
+
+# How often run() deletes plot artifacts past their retention window
+ARTIFACT_GC_INTERVAL = 60 * 60
+
+def changes_cwd(command):
+    """Whether a command (or one in its batch) switches the working directory"""
+    if command.get('type') == 'batch':
+        return any(changes_cwd(sub_command) for sub_command in command.get('commands', []))
+    return command.get('type') == 'run_cells' and bool(command.get('workdir'))
 
 class EnhancedColabProcessor:
-    def __init__(self):
-        self.folder_id = os.environ.get('GOOGLE_DRIVE_FOLDER_ID')
-        self.service = self._init_drive_service()
-        self.processed_commands = set()
+    def __init__(self, service=None, folder_id=None, workers=None, isolation=None, protocol=None, warmup=None):
+        self.folder_id = folder_id or os.environ.get('GOOGLE_DRIVE_FOLDER_ID')
+        self.protocol = get_protocol(protocol)
+        self.client_factory = None
+        self.service = service or self._init_drive_service()
+        self.processed_commands = ProcessedIds()
+        
+        # run() executes commands on a worker pool; 'process' isolation runs
+        # code in a fresh interpreter instead of a worker thread
+        self.workers = workers
+        self.isolation = isolation or os.environ.get('COLAB_PROCESSOR_ISOLATION', 'thread')
+        self.engine = None
+        self._heartbeat_file_id = None
+        
+        # 'cancel' commands interrupt running commands through this registry
+        self.canceller = CommandCanceller()
+        
+        # run_cells with a workdir changes the process cwd: it runs alone
+        self.cwd_lock = SharedExclusiveLock()
+        
+        # Variables of commands that carry a session ID live on between commands
+        self.sessions = SessionNamespaces()
+        
+        # Plots go to content-addressed artifact files instead of inline base64
+        self.artifacts = ArtifactStore(lambda: self.service, self.folder_id)
+        
+        # Command types other than plain code execution
+        self.command_handlers = {
+            'sync_push': self.handle_sync_push,
+            'sync_pull': self.handle_sync_pull,
+            'batch': self.handle_batch,
+            'run_cells': self.handle_run_cells,
+            'session_reset': self.handle_session_reset,
+            'session_snapshot': self.handle_session_snapshot,
+            'session_restore': self.handle_session_restore,
+            'warmup': self.handle_warmup,
+            'install_package': self.handle_install_package,
+            'cancel': self.handle_cancel,
+        }
+        
+        # Pre-import modules / preload models in the background (manifest
+        # argument or COLAB_PROCESSOR_WARMUP)
+        self.warmup = Warmup(self.sessions)
+        manifest = load_manifest(warmup)
+        if manifest:
+            self.warmup.start(manifest)
         
     def _init_drive_service(self):
         """Initialize Google Drive service"""
@@ -33,65 +102,72 @@ class EnhancedColabProcessor:
         if not creds_path:
             raise ValueError("SERVICE_ACCOUNT_PATH environment variable not set")
             
-        credentials = service_account.Credentials.from_service_account_file(
-            creds_path,
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        return build('drive', 'v3', credentials=credentials)
+        self.client_factory = get_client_factory(creds_path)
+        return self.client_factory.service()
     
-    def execute_code_with_capture(self, code):
-        """Execute code and capture text output + plots"""
-        # Capture stdout and stderr
-        stdout_buffer = io.StringIO()
-        stderr_buffer = io.StringIO()
+    @property
+    def service(self):
+        """Drive service for the calling thread (workers must not share one)"""
+        if self.client_factory is not None:
+            return self.client_factory.service()
+        return self._service
+    
+    @service.setter
+    def service(self, value):
+        self._service = value
+    
+    def execute_code_with_capture(self, code, session=None, stream=None, visuals=None):
+        """Execute code and capture text output + plots (in the session's namespace, if any)
         
-        # Track matplotlib figures before execution
-        initial_figs = set(plt.get_fignums()) if 'matplotlib.pyplot' in sys.modules else set()
+        With a StreamingOutput, printed output is published as partial files
+        while the code runs and the result only carries what was not sent.
+        visuals (a VisualCapture) sets the plot format/DPI and whether plots
+        become artifact references; by default they are inline PNGs.
+        """
+        visuals = visuals or VisualCapture()
+        # Capture stdout and stderr
+        stdout_buffer = stream.stdout if stream else io.StringIO()
+        stderr_buffer = stream.stderr if stream else io.StringIO()
         
         # Also track if PIL/Pillow images are displayed
         displayed_images = []
         
-        # Monkey-patch IPython display if in Colab
-        original_display = None
-        try:
-            from IPython import display
-            original_display = display.display
-            
-            def capture_display(*args, **kwargs):
-                """Capture IPython display calls"""
-                for obj in args:
-                    # Handle PIL images
-                    if hasattr(obj, '_repr_png_'):
-                        png_data = obj._repr_png_()
-                        if png_data:
-                            displayed_images.append({
-                                'type': 'image/png',
-                                'data': base64.b64encode(png_data).decode('utf-8')
-                            })
-                    # Handle matplotlib figures
-                    elif hasattr(obj, 'figure'):
-                        fig = obj.figure
-                        buf = io.BytesIO()
-                        fig.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-                        buf.seek(0)
-                        displayed_images.append({
-                            'type': 'image/png',
-                            'data': base64.b64encode(buf.read()).decode('utf-8')
-                        })
-                # Still call original display
-                return original_display(*args, **kwargs)
-            
-            display.display = capture_display
-        except ImportError:
-            pass  # Not in IPython/Colab environment
+        def capture_display(objs):
+            """Capture this command's IPython display calls"""
+            for obj in objs:
+                # Handle PIL images
+                if hasattr(obj, '_repr_png_'):
+                    png_data = obj._repr_png_()
+                    if png_data:
+                        displayed_images.append(visuals.entry(png_data, 'image/png'))
+                # Handle matplotlib figures
+                elif hasattr(obj, 'figure'):
+                    displayed_images.append(visuals.figure(obj.figure))
         
         # Execute the code
         error = None
-        exec_globals = {'__name__': '__main__'}
+        if session is not None:
+            self.warmup.wait(session)  # Models preloaded into this session
+        # Sessionless code gets a fresh namespace: the engine runs it in parallel, unordered
+        exec_globals = self.sessions.get(session) if session is not None else SessionNamespaces.new_namespace()
         
+        cancelled = False
+        figures = []
         try:
-            with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
-                exec(code, exec_globals)
+            # Figures and display() calls are attributed to this worker thread only
+            with capture_output(stdout_buffer, stderr_buffer), capture_visuals(capture_display) as figures:
+                # Innermost, so a cancel never lands while the captures are being restored
+                with self.canceller.interruptible():
+                    # exec() of a string would flag an interrupted run as an unhandled
+                    # Ctrl-C of the whole process (exit status 130)
+                    exec(compile(code, '<string>', 'exec'), exec_globals)
+        except KeyboardInterrupt:
+            cancelled = True
+            error = {
+                'type': 'KeyboardInterrupt',
+                'message': 'Execution cancelled',
+                'traceback': traceback.format_exc()
+            }
         except Exception as e:
             error = {
                 'type': type(e).__name__,
@@ -99,47 +175,34 @@ class EnhancedColabProcessor:
                 'traceback': traceback.format_exc()
             }
         finally:
-            # Restore display if we patched it
-            if original_display:
-                try:
-                    from IPython import display
-                    display.display = original_display
-                except:
-                    pass
-        
-        # Capture any matplotlib plots created
+            # Also stops the flusher thread when the code raises SystemExit
+            streamed_chunks = stream.close() if stream else None
+        
+        session_warning = self.sessions.record_usage(session) if session is not None else None
+        
+        # Capture the matplotlib plots this command created
         plots = []
-        if 'matplotlib.pyplot' in sys.modules:
-            final_figs = set(plt.get_fignums())
-            new_figs = final_figs - initial_figs
-            
-            for fig_num in new_figs:
-                try:
-                    fig = plt.figure(fig_num)
-                    buf = io.BytesIO()
-                    fig.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-                    buf.seek(0)
-                    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-                    plots.append({
-                        'type': 'image/png',
-                        'data': img_base64
-                    })
-                    plt.close(fig)
-                except Exception as e:
-                    print(f"Error capturing figure {fig_num}: {e}")
+        for fig in open_figures(figures):
+            try:
+                plots.append(visuals.figure(fig))
+                sys.modules['matplotlib.pyplot'].close(fig)
+            except Exception as e:
+                print(f"Error capturing figure {fig.number}: {e}")
         
         # Combine all visualizations
         all_visuals = displayed_images + plots
         
         # Build result
         if error:
-            return {
+            result = {
                 'status': 'error',
                 'error': f"{error['type']}: {error['message']}",
                 'traceback': error['traceback'],
                 'output': stdout_buffer.getvalue(),
                 'stderr': stderr_buffer.getvalue()
             }
+            if cancelled:
+                result['cancelled'] = True
         else:
             result = {
                 'status': 'success',
@@ -153,19 +216,64 @@ class EnhancedColabProcessor:
                 result['output_type'] = 'rich'  # Indicates output has visuals
             else:
                 result['output_type'] = 'text'
-                
-            return result
+        
+        if session_warning:
+            result['session_warning'] = session_warning
+        if stream:
+            result['streamed_chunks'] = streamed_chunks
+        return result
+    
+    def execute_code_in_subprocess(self, code, timeout=None):
+        """Execute code isolated in a fresh interpreter (text output only)"""
+        run = run_code_in_subprocess(code, timeout=timeout, on_start=self.canceller.attach_process)
+        
+        if run['returncode'] != 0 and self.canceller.cancel_requested():
+            return {
+                'status': 'error',
+                'error': "KeyboardInterrupt: Execution cancelled",
+                'cancelled': True,
+                'output': run['stdout'],
+                'stderr': run['stderr']
+            }
+        if run['timed_out']:
+            return {
+                'status': 'error',
+                'error': f"TimeoutError: execution exceeded {timeout}s",
+                'output': run['stdout'],
+                'stderr': run['stderr']
+            }
+        if run['returncode'] != 0:
+            lines = run['stderr'].strip().splitlines()
+            return {
+                'status': 'error',
+                'error': lines[-1] if lines else f"Exited with code {run['returncode']}",
+                'traceback': run['stderr'],
+                'output': run['stdout'],
+                'stderr': run['stderr']
+            }
+        return {
+            'status': 'success',
+            'output': run['stdout'],
+            'stderr': run['stderr'],
+            'output_type': 'text'
+        }
     
     def process_command(self, command_file):
         """Process a single command file"""
-        # Read command
+        command = self.claim_command(command_file)
+        if command is not None:
+            self.run_and_respond(command)
+    
+    def claim_command(self, command_file):
+        """Read and delete a command file; returns None if it was already processed"""
         file_id = command_file['id']
         content = self.service.files().get_media(fileId=file_id).execute()
-        command = json.loads(content.decode('utf-8'))
+        command = decode_json(content)
         
         command_id = command['id']
         if command_id in self.processed_commands:
-            return  # Already processed
+            return None  # Already processed
+        self.processed_commands.add(command_id)
             
         print(f"Processing command: {command_id}")
         
@@ -174,10 +282,22 @@ class EnhancedColabProcessor:
             self.service.files().delete(fileId=file_id).execute()
         except:
             pass
-            
-        # Execute code with enhanced capture
+        return command
+    
+    def run_and_respond(self, command):
+        """Execute a claimed command and write its result file"""
+        command_id = command['id']
+        
+        # Execute code with enhanced capture (or a specialised handler)
         start_time = time.time()
-        result = self.execute_code_with_capture(command.get('code', ''))
+        with self.canceller.tracking(command_id) as live:
+            if live:
+                lock = self.cwd_lock.exclusive() if changes_cwd(command) else self.cwd_lock.shared()
+                with lock:
+                    result = self.dispatch_command(command)
+            else:
+                result = {'status': 'error', 'error': "KeyboardInterrupt: Cancelled before it started",
+                          'cancelled': True, 'output': ''}
         execution_time = time.time() - start_time
         
         # Add metadata
@@ -186,64 +306,319 @@ class EnhancedColabProcessor:
         result['timestamp'] = time.time()
         
         # Write result
-        result_filename = f"result_{command_id}.json"
-        self._write_result(result_filename, result)
-        
-        self.processed_commands.add(command_id)
+        result_filename = self.protocol.result_name(command_id)
+        self._write_result(result_filename, result, command)
         
         # Print summary
         print(f"✅ Completed {command_id} in {execution_time:.2f}s")
         if result.get('visualizations'):
             print(f"   Captured {len(result['visualizations'])} visualizations")
     
-    def _write_result(self, filename, data):
-        """Write result to Drive"""
-        import tempfile
+    def dispatch_command(self, command):
+        """Run one command through its handler (plain code execution by default)"""
+        handler = self.command_handlers.get(command.get('type'))
+        try:
+            if handler:
+                return handler(command)
+            if command.get('isolation', self.isolation) == 'process':
+                return self.execute_code_in_subprocess(command.get('code', ''), command.get('timeout'))
+            return self.execute_code_with_capture(command.get('code', ''), command.get('session'),
+                                                  self._open_stream(command),
+                                                  VisualCapture.for_command(command, self.artifacts))
+        except Exception as e:
+            return {
+                'status': 'error',
+                'error': f"{type(e).__name__}: {e}",
+                'traceback': traceback.format_exc()
+            }
+    
+    def _open_stream(self, command):
+        """StreamingOutput publishing partial_<id>_<seq>.json files, if the command asked for it"""
+        options = stream_options(command)
+        if options is None:
+            return None
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(data, f, indent=2)
-            temp_path = f.name
+        def sink(seq, chunk):
+            upload_json(self.service, self.folder_id, partial_file_name(command['id'], seq), chunk)
         
+        interval, chunk_bytes = options
+        return StreamingOutput(command['id'], sink, interval, chunk_bytes)
+    
+    def handle_batch(self, command):
+        """Run every command of a batch manifest in order, returning one combined result"""
+        results = {}
+        for sub_command in command.get('commands', []):
+            start_time = time.time()
+            if sub_command.get('type') == 'batch':
+                result = {'status': 'error', 'error': 'Nested batches are not supported'}
+            else:
+                result = self.dispatch_command(sub_command)
+            result['command_id'] = sub_command['id']
+            result['execution_time'] = time.time() - start_time
+            results[sub_command['id']] = result
+        
+        return {
+            'status': 'success',
+            'type': 'batch',
+            'results': results,
+            'output': f"📦 Ran batch of {len(results)} commands\n"
+        }
+    
+    def handle_run_cells(self, command):
+        """
+        Run notebook cells in order in one namespace (the command's session,
+        or a throwaway one), stopping at the first error. Returns per-cell
+        results and execution counts in a single result.
+        """
+        session = command.get('session') or f"cells_{command.get('id', 'anonymous')}"
+        # The cwd is process-wide: run_and_respond runs this command alone
+        previous_cwd = os.getcwd()
+        if command.get('workdir'):
+            os.chdir(command['workdir'])
+        
+        visuals = VisualCapture.for_command(command, self.artifacts)
+        execution_count = command.get('first_execution_count', 1)
+        cells = []
         try:
-            media = MediaFileUpload(temp_path, mimetype='application/json')
-            file_metadata = {
-                'name': filename,
-                'parents': [self.folder_id]
-            }
-            
-            self.service.files().create(
-                body=file_metadata,
-                media_body=media
-            ).execute()
+            for cell in command.get('cells', []):
+                start_time = time.time()
+                result = self.execute_code_with_capture(cell.get('code', ''), session, visuals=visuals)
+                result['index'] = cell.get('index', len(cells))
+                result['execution_time'] = time.time() - start_time
+                if result['status'] == 'success':
+                    result['execution_count'] = execution_count
+                    execution_count += 1
+                cells.append(result)
+                if result['status'] != 'success':
+                    break
         finally:
-            os.unlink(temp_path)
+            os.chdir(previous_cwd)
+        
+        if not command.get('session'):
+            self.sessions.reset(session)
+        failed = cells and cells[-1]['status'] != 'success'
+        summary = {
+            'status': 'error' if failed else 'success',
+            'type': 'run_cells',
+            'cells': cells,
+            'output': f"📓 Ran {len(cells)} of {len(command.get('cells', []))} cells\n"
+        }
+        if failed:
+            summary['error'] = f"Cell {cells[-1]['index']}: {cells[-1]['error']}"
+        return summary
+    
+    def handle_cancel(self, command):
+        """Interrupt a running command (or skip it, if it has not started yet)"""
+        target = command['target']
+        state = self.canceller.cancel(target)
+        messages = {
+            'interrupted': f"🛑 Interrupted {target}\n",
+            'killed': f"🛑 Killed the interpreter running {target}\n",
+            'requested': f"🛑 {target} will stop at its next interruptible point\n",
+            'pending': f"🛑 {target} will be skipped\n",
+            'finished': f"ℹ️ {target} already finished\n",
+        }
+        return {'status': 'success', 'target': target, 'state': state, 'output': messages[state]}
+    
+    def handle_session_reset(self, command):
+        """Forget every variable of a session"""
+        session = command['session']
+        existed = self.sessions.reset(session)
+        return {
+            'status': 'success',
+            'session': session,
+            'existed': existed,
+            'output': f"🔄 Session '{session}' reset\n" if existed else f"ℹ️ No session '{session}'\n"
+        }
+    
+    def handle_session_snapshot(self, command):
+        """Describe a session's variables; with persist, also pickle them to Drive"""
+        session = command['session']
+        snapshot = self.sessions.describe(session)
+        if snapshot is None:
+            return {'status': 'error', 'error': f"KeyError: no session '{session}'"}
+        
+        result = {'status': 'success', 'snapshot': snapshot,
+                  'output': f"📸 Session '{session}': {len(snapshot['variables'])} variables, "
+                            f"~{snapshot['size'] // 1024} KB\n"}
+        if command.get('persist'):
+            data, skipped = self.sessions.dump(session)
+            media = MediaIoBaseUpload(io.BytesIO(data), mimetype='application/octet-stream',
+                                      resumable=len(data) > RESUMABLE_THRESHOLD)
+            file = self.service.files().create(
+                body={'name': f"session_{session}_{command['id']}.pkl", 'parents': [self.folder_id]},
+                media_body=media,
+                fields='id'
+            ).execute()
+            result['snapshot_file_id'] = file['id']
+            result['skipped'] = skipped
+        return result
+    
+    def handle_session_restore(self, command):
+        """Load variables pickled by a persisted snapshot into a session"""
+        session = command['session']
+        data = self.service.files().get_media(fileId=command['snapshot_file_id']).execute()
+        restored = self.sessions.load(session, data)
+        return {
+            'status': 'success',
+            'session': session,
+            'restored': restored,
+            'output': f"♻️ Restored {len(restored)} variables into session '{session}'\n"
+        }
+    
+    def handle_warmup(self, command):
+        """Start a warm-up manifest (or just report warm-up progress without one)"""
+        if command.get('manifest'):
+            self.warmup.start(command['manifest'])
+        if command.get('wait'):
+            self.warmup.wait(timeout=command.get('wait_timeout'))
+        
+        status = self.warmup.describe()
+        loaded = [name for name, info in {**status['modules'], **status['models']}.items()
+                  if info['status'] == 'ready']
+        return {
+            'status': 'success',
+            'warmup': status,
+            'output': f"🔥 Warm-up {status['state']}: {len(loaded)} ready, {status['errors']} failed\n"
+        }
+    
+    def handle_install_package(self, command):
+        """pip-install a package list in one resolve, skipping what is already installed"""
+        result = PackageInstaller(command.get('wheel_cache') or default_cache_dir()).install(command['packages'])
+        return {
+            'status': 'success' if result['success'] else 'error',
+            'installed': result['installed'],
+            'skipped': result['skipped'],
+            'from_cache': result['from_cache'],
+            'output': f"📦 {result['output']}\n" if result['success'] else '',
+            **({'error': result['error']} if result['error'] else {})
+        }
     
-    def run(self, poll_interval=1):
+    def handle_sync_push(self, command):
+        """Unpack a bulk file archive uploaded by FileSyncManager into the workspace"""
+        codec = command.get('codec', 'gzip')
+        archive_id = command['archive_file_id']
+        target_dir = command['target_dir']
+        data = self.service.files().get_media(fileId=archive_id).execute()
+        written, reserved = unpack_archive_with_reserved(data, target_dir, codec, DELTA_PREFIX)
+        
+        try:
+            self.service.files().delete(fileId=archive_id).execute()
+        except Exception:
+            pass
+        
+        # Large files may arrive as chunk deltas against our previous version
+        delta_failed = []
+        if DELTA_INDEX in reserved:
+            index = json.loads(reserved[DELTA_INDEX].decode('utf-8'))
+            store = ManifestStore.for_directory(target_dir)
+            chunk_blobs = {name[len(DELTA_CHUNKS):]: content for name, content in reserved.items()
+                           if name.startswith(DELTA_CHUNKS)}
+            
+            for descriptor in index.get('deltas', []):
+                if apply_delta(target_dir, descriptor, chunk_blobs, store):
+                    written.append(descriptor['rel_path'])
+                else:
+                    delta_failed.append(descriptor['rel_path'])
+            
+            # Whole large files: remember their manifests for the next delta
+            for rel_path, chunks in index.get('manifests', {}).items():
+                stat = os.stat(target_path(target_dir, rel_path))
+                store.set(rel_path, chunks, stat.st_size, stat.st_mtime)
+            store.save()
+        
+        return {
+            'status': 'success',
+            'transfer': 'bulk',
+            'files_written': written,
+            'delta_failed': delta_failed,
+            'output': f"📤 Unpacked {len(written)} files into {target_dir}\n"
+        }
+    
+    def handle_sync_pull(self, command):
+        """Pack new/modified workspace files into one archive for FileSyncManager"""
+        codec = command.get('codec', 'gzip')
+        target_dir = command['target_dir']
+        files = select_newer_files(target_dir, command.get('known_files', {}), command.get('sync_patterns'))
+        
+        result = {'status': 'success', 'transfer': 'bulk', 'files': files, 'codec': codec}
+        if not files:
+            result['output'] = "✅ No new files to download\n"
+            return result
+        
+        data = pack_files(target_dir, [f['rel_path'] for f in files], codec)
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=ARCHIVE_MIMETYPES[codec],
+                                  resumable=len(data) > RESUMABLE_THRESHOLD)
+        archive = self.service.files().create(
+            body={
+                'name': f"syncpull_{command['id']}{ARCHIVE_EXTENSIONS[codec]}",
+                'parents': [self.folder_id]
+            },
+            media_body=media,
+            fields='id'
+        ).execute()
+        
+        result['archive_file_id'] = archive['id']
+        result['output'] = f"📥 Packed {len(files)} files ({len(data)} bytes)\n"
+        return result
+    
+    def _write_result(self, filename, data, command):
+        """Write result to Drive in the best encoding the client accepts (envelope, gzip or JSON)"""
+        upload_reply(self.service, self.folder_id, filename, data, command)
+    
+    def run(self, poll_interval=1, stop_event=None, max_idle_interval=None):
         """Main processing loop"""
         print("🚀 Enhanced Colab Processor Started")
         print(f"📁 Monitoring folder: {self.folder_id}")
         print("🎨 Plot capture enabled")
         print("-" * 50)
         
-        while True:
+        self.engine = ExecutionEngine(self.run_and_respond, max_workers=self.workers)
+        print(f"🧵 {self.engine.max_workers} workers ({self.isolation} isolation)")
+        last_heartbeat = 0
+        last_gc = time.time()  # Nothing can have expired right after a start
+        
+        # One changes().list per poll instead of a folder query; polls slow
+        # down while idle and snap back as soon as commands arrive
+        feed = DriveCommandFeed(lambda: self.service, self.folder_id, prefix=self.protocol.command_prefix)
+        backoff = IdleBackoff(poll_interval, max_idle_interval)
+        
+        while stop_event is None or not stop_event.is_set():
             try:
-                # Look for command files
-                query = f"'{self.folder_id}' in parents and name contains 'command_' and trashed=false"
-                results = self.service.files().list(
-                    q=query,
-                    fields="files(id, name)"
-                ).execute()
+                if time.time() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.write_heartbeat()
+                    last_heartbeat = time.time()
+                
+                if time.time() - last_gc >= ARTIFACT_GC_INTERVAL:
+                    last_gc = time.time()
+                    self.artifacts.collect_garbage()
                 
-                files = results.get('files', [])
+                # Look for new command files
+                files = feed.poll()
                 
                 for file in files:
                     try:
-                        self.process_command(file)
+                        command = self.claim_command(file)
+                        feed.mark_processed(file['id'])
+                        if command is not None and command.get('type') == 'cancel':
+                            # Not queued behind the workers it is meant to free
+                            self.run_and_respond(command)
+                        elif command is not None:
+                            future = self.engine.submit(command)
+                            future.add_done_callback(self._report_failure)
                     except Exception as e:
                         print(f"Error processing {file['name']}: {e}")
                         traceback.print_exc()
+                        # Transient Drive errors: try again soon, not at the next reconcile
+                        feed.retry_later(file)
                 
-                time.sleep(poll_interval)
+                # Running commands often lead to follow-ups - stay responsive
+                queue = self.engine.metrics()
+                if files or queue['running'] or queue['queued']:
+                    backoff.activity()
+                else:
+                    backoff.idle()
+                backoff.wait(stop_event)
                 
             except KeyboardInterrupt:
                 print("\n👋 Processor stopped")
@@ -251,11 +626,39 @@ class EnhancedColabProcessor:
             except Exception as e:
                 print(f"Error in main loop: {e}")
                 time.sleep(5)
+        
+        self.engine.shutdown(wait=False)
+    
+    def _report_failure(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            error = future.exception()
+            print(f"Error processing command: {error}")
+            traceback.print_exception(type(error), error, error.__traceback__)
+    
+    def write_heartbeat(self):
+        """Publish liveness and worker queue metrics to heartbeat.json"""
+        heartbeat = {
+            'timestamp': time.time(),
+            'status': 'running',
+            'processor': 'enhanced',
+            'isolation': self.isolation,
+            'queue': self.engine.metrics() if self.engine else None,
+            'warmup': self.warmup.describe()
+        }
+        try:
+            if self._heartbeat_file_id:
+                update_json(self.service, self._heartbeat_file_id, heartbeat)
+            else:
+                file = upload_json(self.service, self.folder_id, 'heartbeat.json', heartbeat)
+                self._heartbeat_file_id = file['id']
+        except Exception as e:
+            print(f"⚠️ Could not write heartbeat: {e}")
+            self._heartbeat_file_id = None
 
 # For Colab notebook
-def start_processor():
-    """Start the processor (for Colab notebook)"""
-    processor = EnhancedColabProcessor()
+def start_processor(warmup=None):
+    """Start the processor (for Colab notebook); warmup is a manifest dict or JSON file path"""
+    processor = EnhancedColabProcessor(warmup=warmup)
     processor.run()
 
 if __name__ == '__main__':
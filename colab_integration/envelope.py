@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Protocol Envelope
+Versioned binary container for command/result files: a 16-byte header
+(magic, envelope version, codec, format, raw payload length) followed by
+the payload, compressed with zstd or gzip and serialized as msgpack or
+JSON. Peers advertise `protocol`, `accept_encoding` and `accept_formats`,
+so processors and bridges that predate the envelope keep exchanging
+plain JSON.
+
+Only the standard library is required (zstandard and msgpack are used
+when installed), so generated processor notebooks embed this module's
+source as-is.
+"""
+
+import gzip
+import json
+import struct
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PROTOCOL_VERSION = 2
+
+ENVELOPE_MAGIC = b'CBEv'
+ENVELOPE_VERSION = 1
+ENVELOPE_MIMETYPE = 'application/x-colab-bridge-envelope'
+GZIP_MAGIC = b'\x1f\x8b'
+
+# magic, envelope version, codec, format, (pad), raw payload length
+_HEADER = struct.Struct('>4sBBBxQ')
+
+CODECS = {'none': 0, 'gzip': 1, 'zstd': 2}
+FORMATS = {'json': 0, 'msgpack': 1}
+_CODEC_NAMES = {v: k for k, v in CODECS.items()}
+_FORMAT_NAMES = {v: k for k, v in FORMATS.items()}
+
+# Payloads smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+
+def supported_encodings():
+    """Codecs this side can read, best first"""
+    return ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+
+
+def supported_formats():
+    """Serializations this side can read, best first"""
+    return ['msgpack', 'json'] if msgpack is not None else ['json']
+
+
+def negotiate(accept_encoding=None, accept_formats=None):
+    """Best (codec, format) that both this side and the peer support"""
+    codec = next((c for c in supported_encodings() if c in (accept_encoding or [])), 'none')
+    fmt = next((f for f in supported_formats() if f in (accept_formats or ['json'])), 'json')
+    return codec, fmt
+
+
+def pack(data, codec='gzip', fmt='json'):
+    """Serialize data into an envelope"""
+    if fmt == 'msgpack':
+        raw = msgpack.packb(data, use_bin_type=True)
+    else:
+        raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    if len(raw) < COMPRESS_MIN_SIZE:
+        codec = 'none'
+    if codec == 'zstd':
+        payload = zstandard.ZstdCompressor(level=3).compress(raw)
+    elif codec == 'gzip':
+        payload = gzip.compress(raw, compresslevel=6)
+    else:
+        payload = raw
+    return _HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, CODECS[codec], FORMATS[fmt], len(raw)) + payload
+
+
+def unpack(content):
+    """Decode an envelope, a gzip-compressed JSON file or plain JSON"""
+    if content[:4] == ENVELOPE_MAGIC:
+        _magic, version, codec, fmt, length = _HEADER.unpack_from(content)
+        if version > ENVELOPE_VERSION:
+            raise ValueError(f"Unsupported envelope version {version}")
+        codec, fmt = _CODEC_NAMES.get(codec), _FORMAT_NAMES.get(fmt)
+        payload = content[_HEADER.size:]
+
+        if codec == 'zstd':
+            if zstandard is None:
+                raise ValueError("zstd-compressed envelope, but zstandard is not installed")
+            raw = zstandard.ZstdDecompressor().decompress(payload, max_output_size=length)
+        elif codec == 'gzip':
+            raw = gzip.decompress(payload)
+        elif codec == 'none':
+            raw = payload
+        else:
+            raise ValueError("Unknown envelope codec")
+
+        if fmt == 'msgpack':
+            if msgpack is None:
+                raise ValueError("msgpack envelope, but msgpack is not installed")
+            return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+        if fmt != 'json':
+            raise ValueError("Unknown envelope format")
+        return json.loads(raw.decode('utf-8'))
+
+    if content[:2] == GZIP_MAGIC:
+        content = gzip.decompress(content)
+    return json.loads(content.decode('utf-8'))
+
+
+def advertise(data):
+    """Add this side's protocol capabilities to an outgoing message"""
+    return {**data, 'protocol': PROTOCOL_VERSION,
+            'accept_encoding': supported_encodings(), 'accept_formats': supported_formats()}
+
+
+def encode_reply(data, command):
+    """
+    Encode a result the way the command's sender can read it; returns
+    (payload_bytes, mimetype). Results always advertise our capabilities.
+    """
+    data = advertise(data)
+    if int(command.get('protocol') or 1) >= PROTOCOL_VERSION:
+        codec, fmt = negotiate(command.get('accept_encoding'), command.get('accept_formats'))
+        return pack(data, codec, fmt), ENVELOPE_MIMETYPE
+
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    if 'gzip' in (command.get('accept_encoding') or []) and len(raw) >= COMPRESS_MIN_SIZE:
+        return gzip.compress(raw, compresslevel=6), 'application/gzip'
+    return raw, 'application/json'
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Processor Execution Engine
+Runs Colab-side commands on a pool of workers instead of one at a time.
+Commands of the same session execute serially in arrival order, while
+independent sessions (and sessionless commands) run in parallel. Code can
+run in a worker thread (I/O-bound work, shared interpreter) or in an
+isolated subprocess. Queue metrics are exposed for the processor heartbeat.
+
+CommandCanceller interrupts running commands: thread-executed code gets a
+KeyboardInterrupt raised in its worker thread, subprocess-isolated code has
+its interpreter killed, and commands not started yet are skipped.
+SharedExclusiveLock keeps commands that change the working directory from
+running alongside any other command.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import threading
+import subprocess
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+
+
+class _ThreadLocalStream:
+    """sys.stdout/sys.stderr stand-in routing writes to the calling thread's capture buffer"""
+
+    def __init__(self, original):
+        self._original = original
+        self._local = threading.local()
+
+    def _target(self):
+        return getattr(self._local, 'target', None) or self._original
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+_install_lock = threading.Lock()
+# Every installed stream stays referenced: print() only borrows sys.stdout, so a
+# stream replaced while another thread prints to it must not be freed under it
+_installed = []
+
+
+def _thread_local_stream(name):
+    with _install_lock:
+        stream = getattr(sys, name)
+        if not isinstance(stream, _ThreadLocalStream):
+            stream = _ThreadLocalStream(stream)
+            _installed.append(stream)
+            setattr(sys, name, stream)
+        return stream
+
+
+@contextmanager
+def capture_output(stdout_buffer, stderr_buffer):
+    """Like redirect_stdout/redirect_stderr, but only for the calling thread"""
+    stdout = _thread_local_stream('stdout')
+    stderr = _thread_local_stream('stderr')
+    previous = (getattr(stdout._local, 'target', None), getattr(stderr._local, 'target', None))
+    stdout._local.target = stdout_buffer
+    stderr._local.target = stderr_buffer
+    try:
+        yield
+    finally:
+        stdout._local.target, stderr._local.target = previous
+
+
+def run_code_in_subprocess(code, timeout=None, cwd=None, on_start=None):
+    """
+    Execute code in a fresh Python interpreter.
+    Returns {'returncode', 'stdout', 'stderr', 'timed_out'}.
+    on_start(process) is called once the interpreter is running (to allow killing it).
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, cwd=cwd
+    )
+    if on_start is not None:
+        on_start(process)
+    try:
+        stdout, stderr = process.communicate(code, timeout=timeout)
+        timed_out = False
+    except subprocess.TimeoutExpired:
+        process.kill()
+        stdout, stderr = process.communicate()
+        timed_out = True
+    return {'returncode': process.returncode, 'stdout': stdout, 'stderr': stderr, 'timed_out': timed_out}
+
+
+def _set_async_exc(thread_ident, exc_type):
+    """Raise exc_type in another thread at its next bytecode (None clears a pending one)"""
+    return ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_ident),
+                                                      ctypes.py_object(exc_type) if exc_type else None)
+
+
+class CommandCanceller:
+    """
+    Registry of running commands for cancellation.
+
+    Code only receives the KeyboardInterrupt inside interruptible() blocks,
+    so result writing and bookkeeping never get interrupted. Blocking C
+    calls (time.sleep, socket reads) see it once they return; use process
+    isolation for code that must die immediately.
+    """
+
+    # Cancel requests and finished ids remembered, for late or early cancels
+    MAX_REMEMBERED = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._running = {}        # command id -> thread ident
+        self._interruptible = {}  # command id -> thread ident, while inside interruptible()
+        self._processes = {}      # command id -> Popen of its isolated interpreter
+        self._cancelled = OrderedDict()
+        self._finished = OrderedDict()
+
+    @staticmethod
+    def _remember(ids, command_id):
+        ids[command_id] = True
+        while len(ids) > CommandCanceller.MAX_REMEMBERED:
+            ids.popitem(last=False)
+
+    @contextmanager
+    def tracking(self, command_id):
+        """Register the calling thread as running command_id; yields False if it was cancelled already"""
+        with self._lock:
+            live = command_id not in self._cancelled
+            self._running[command_id] = threading.get_ident()
+        previous = getattr(self._local, 'command_id', None)
+        self._local.command_id = command_id
+        try:
+            yield live
+        finally:
+            self._local.command_id = previous
+            with self._lock:
+                self._running.pop(command_id, None)
+                self._interruptible.pop(command_id, None)
+                self._processes.pop(command_id, None)
+                self._cancelled.pop(command_id, None)
+                self._remember(self._finished, command_id)
+
+    def current(self):
+        """Command id the calling thread is running, if tracked"""
+        return getattr(self._local, 'command_id', None)
+
+    def cancel_requested(self, command_id=None):
+        command_id = command_id or self.current()
+        with self._lock:
+            return command_id in self._cancelled
+
+    @contextmanager
+    def interruptible(self):
+        """Block in which a cancel of the current command raises KeyboardInterrupt"""
+        command_id = self.current()
+        if command_id is None:
+            yield
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            if command_id in self._cancelled:
+                raise KeyboardInterrupt("Execution cancelled")
+            self._interruptible[command_id] = ident
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._interruptible.pop(command_id, None)
+                # A cancel racing with the end of the block must not fire later
+                _set_async_exc(ident, None)
+
+    def attach_process(self, process):
+        """Let cancel() kill the current command's subprocess"""
+        command_id = self.current()
+        if command_id is None:
+            return
+        with self._lock:
+            self._processes[command_id] = process
+            cancelled = command_id in self._cancelled
+        if cancelled:
+            process.kill()
+
+    def cancel(self, command_id):
+        """
+        Cancel a command. Returns 'killed' (subprocess killed), 'interrupted'
+        (KeyboardInterrupt raised), 'requested' (running, stops at its next
+        interruptible block), 'finished' (too late) or 'pending' (not started
+        yet; it will be skipped).
+        """
+        with self._lock:
+            if command_id in self._finished:
+                return 'finished'
+            self._remember(self._cancelled, command_id)
+            process = self._processes.get(command_id)
+            ident = self._interruptible.get(command_id)
+            if process is None and ident is not None:
+                _set_async_exc(ident, KeyboardInterrupt)
+                # One interrupt per block: a repeated cancel must not land in the unwinding
+                del self._interruptible[command_id]
+                return 'interrupted'
+            running = command_id in self._running
+        if process is not None:
+            process.kill()
+            return 'killed'
+        return 'requested' if running else 'pending'
+
+    def running(self):
+        with self._lock:
+            return list(self._running)
+
+
+class SharedExclusiveLock:
+    """
+    Many shared holders or one exclusive holder at a time, for commands
+    that change process-wide state (the working directory) while others
+    run on the pool. Waiting exclusive holders go before new shared ones.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting_exclusive = 0
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._exclusive or self._waiting_exclusive:
+                self._condition.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._waiting_exclusive += 1
+            try:
+                while self._exclusive or self._shared:
+                    self._condition.wait()
+            finally:
+                self._waiting_exclusive -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class ExecutionEngine:
+    """
+    Worker pool for processor commands with per-session serialization.
+    runner(command) -> result is called on a worker thread; the returned
+    Future resolves to that result.
+    """
+
+    def __init__(self, runner, max_workers=None):
+        self.runner = runner
+        self.max_workers = int(max_workers or os.environ.get('COLAB_PROCESSOR_WORKERS') or DEFAULT_WORKERS)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="colab-worker")
+        self._lock = threading.Lock()
+        self._session_queues = {}  # session -> deque of (command, future) waiting for their turn
+        self._active_sessions = set()
+        self._pending = 0          # handed to the pool, not started yet
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._started_at = time.time()
+
+    def submit(self, command):
+        future = Future()
+        session = command.get('session')
+        with self._lock:
+            if session is not None and session in self._active_sessions:
+                self._session_queues.setdefault(session, deque()).append((command, future))
+                return future
+            if session is not None:
+                self._active_sessions.add(session)
+            self._pending += 1
+        self.executor.submit(self._run, command, future)
+        return future
+
+    def _run(self, command, future):
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.runner(command))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            session = command.get('session')
+            next_item = None
+            with self._lock:
+                self._running -= 1
+                if future.cancelled() or future.exception() is not None:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+                if session is not None:
+                    queue = self._session_queues.get(session)
+                    if queue:
+                        next_item = queue.popleft()
+                        self._pending += 1
+                        if not queue:
+                            del self._session_queues[session]
+                    else:
+                        self._active_sessions.discard(session)
+
+            if next_item is not None:
+                self.executor.submit(self._run, *next_item)
+
+    def metrics(self):
+        """Queue depth and throughput counters (for the heartbeat)"""
+        with self._lock:
+            session_waiting = sum(len(q) for q in self._session_queues.values())
+            return {
+                'workers': self.max_workers,
+                'running': self._running,
+                'queued': self._pending + session_waiting,
+                'queued_behind_sessions': session_waiting,
+                'active_sessions': len(self._active_sessions),
+                'completed': self._completed,
+                'failed': self._failed,
+                'uptime': time.time() - self._started_at,
+            }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
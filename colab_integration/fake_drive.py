@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Fake Google Drive Service
+In-memory stand-in for the subset of the Drive v3 API used by the bridges,
+so the command/result protocol can be exercised and benchmarked offline
+"""
+
+import re
+import time
+import random
+import uuid
+import threading
+from collections import Counter
+
+
+# Clauses understood by the query parser, e.g.
+#   name contains 'result_'   name='command_x.json'   'FOLDER' in parents
+_QUERY_CLAUSES = [
+    (re.compile(r"^name\s*=\s*'(?P<value>.*)'$"), 'name_eq'),
+    (re.compile(r"^name\s+contains\s+'(?P<value>.*)'$"), 'name_contains'),
+    (re.compile(r"^'(?P<value>[^']*)'\s+in\s+parents$"), 'in_parents'),
+    (re.compile(r"^parents\s+in\s+'(?P<value>[^']*)'$"), 'in_parents'),
+    (re.compile(r"^trashed\s*=\s*(?P<value>true|false)$"), 'trashed'),
+    (re.compile(r"^mimeType\s*=\s*'(?P<value>.*)'$"), 'mime_eq'),
+]
+
+
+def _parse_query(query):
+    """Parse an and-joined Drive query into (kind, value) clauses"""
+    clauses = []
+    if not query:
+        return clauses
+    for raw_clause in re.split(r"\s+and\s+", query.strip()):
+        clause = raw_clause.strip()
+        for pattern, kind in _QUERY_CLAUSES:
+            match = pattern.match(clause)
+            if match:
+                clauses.append((kind, match.group('value')))
+                break
+        else:
+            raise ValueError(f"Unsupported query clause for fake Drive: {clause}")
+    return clauses
+
+
+def _matches(file, clauses):
+    """Check a stored file record against parsed query clauses"""
+    for kind, value in clauses:
+        if kind == 'name_eq' and file['name'] != value:
+            return False
+        if kind == 'name_contains' and value not in file['name']:
+            return False
+        if kind == 'in_parents' and value not in file['parents']:
+            return False
+        if kind == 'trashed' and file['trashed'] != (value == 'true'):
+            return False
+        if kind == 'mime_eq' and file['mimeType'] != value:
+            return False
+    return True
+
+
+def _read_media(media_body):
+    """Read the full payload of a MediaUpload (MediaFileUpload, MediaIoBaseUpload...)"""
+    if media_body is None:
+        return b''
+    if isinstance(media_body, bytes):
+        return media_body
+    return media_body.getbytes(0, media_body.size())
+
+
+class _FakeRequest:
+    """Mimics googleapiclient's HttpRequest: work happens on execute()"""
+
+    def __init__(self, service, operation, func):
+        self._service = service
+        self._operation = operation
+        self._func = func
+
+    def execute(self, num_retries=0):
+        self._service._record_call(self._operation)
+        return self._func()
+
+
+class _FakeFiles:
+    """The files() collection"""
+
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, q=None, fields=None, pageSize=100, pageToken=None, orderBy=None, **kwargs):
+        return _FakeRequest(self._service, 'files.list',
+                            lambda: self._service._list(q, pageSize, pageToken, orderBy))
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        return _FakeRequest(self._service, 'files.create',
+                            lambda: self._service._create(body or {}, media_body))
+
+    def update(self, fileId, body=None, media_body=None, fields=None, **kwargs):
+        return _FakeRequest(self._service, 'files.update',
+                            lambda: self._service._update(fileId, body or {}, media_body))
+
+    def get(self, fileId, fields=None, **kwargs):
+        return _FakeRequest(self._service, 'files.get',
+                            lambda: self._service._metadata(self._service._get(fileId)))
+
+    def get_media(self, fileId, **kwargs):
+        return _FakeRequest(self._service, 'files.get_media',
+                            lambda: self._service._get(fileId)['content'])
+
+    def delete(self, fileId, **kwargs):
+        return _FakeRequest(self._service, 'files.delete',
+                            lambda: self._service._delete(fileId))
+
+
+class _FakeChanges:
+    """The changes() collection"""
+
+    def __init__(self, service):
+        self._service = service
+
+    def getStartPageToken(self, **kwargs):
+        return _FakeRequest(self._service, 'changes.getStartPageToken',
+                            lambda: {'startPageToken': str(self._service._change_seq())})
+
+    def list(self, pageToken, pageSize=100, fields=None, **kwargs):
+        return _FakeRequest(self._service, 'changes.list',
+                            lambda: self._service._list_changes(pageToken, pageSize))
+
+
+# Measured Drive API timings (see optimized_bridge.py)
+DRIVE_LATENCY = {
+    'files.list': 0.4,
+    'changes.list': 0.4,
+    'changes.getStartPageToken': 0.4,
+    'files.create': 2.0,
+    'files.update': 2.0,
+    'files.get_media': 1.6,
+    'files.delete': 0.3,
+}
+
+# name -> (per-call latency, jitter as a +/- fraction of each delay)
+LATENCY_PROFILES = {
+    'instant': ({}, 0.0),
+    'drive': (DRIVE_LATENCY, 0.0),
+    'drive-jitter': (DRIVE_LATENCY, 0.5),
+}
+
+
+def latency_profile(name, scale=1.0):
+    """(latency, jitter) keyword arguments for a named profile, delays scaled by `scale`"""
+    try:
+        latency, jitter = LATENCY_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown latency profile '{name}' (use one of {', '.join(LATENCY_PROFILES)})")
+    return {'latency': {op: seconds * scale for op, seconds in latency.items()}, 'jitter': jitter}
+
+
+class FakeDriveService:
+    """
+    Thread-safe, in-memory Drive service exposing files() and changes()
+    Counts every executed API call and can inject per-call latency, e.g.
+    latency={'files.list': 0.4, 'files.create': 2.0, 'files.get_media': 1.6},
+    optionally randomized by +/- jitter (a fraction of each delay).
+    Storage goes through _load/_store/_remove/_records and the change-log
+    hooks, which LocalDriveService backs with a directory.
+    """
+
+    def __init__(self, latency=None, jitter=0.0, seed=None):
+        self.latency = latency or {}
+        self.jitter = jitter
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._files = {}
+        self._changes = []
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    # Collections ---------------------------------------------------------
+
+    def files(self):
+        return _FakeFiles(self)
+
+    def changes(self):
+        return _FakeChanges(self)
+
+    # Test helpers (not counted as API calls) -----------------------------
+
+    def add_listener(self, callback):
+        """Call callback(file_metadata) whenever a file is created"""
+        self._listeners.append(callback)
+
+    def put_file(self, name, content, parents=None, mime_type='application/json'):
+        """Create a file directly, as another Drive client would"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return self._create({'name': name, 'parents': parents or [], 'mimeType': mime_type}, content,
+                            notify=False)
+
+    def find_files(self, name_contains=''):
+        """Return metadata of live files whose name contains the given text"""
+        with self._lock:
+            return [self._metadata(f) for f in self._records()
+                    if name_contains in f['name'] and not f['trashed']]
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    # Storage (overridden by LocalDriveService) ---------------------------
+
+    def _load(self, file_id):
+        """File record (metadata plus 'content'), or None"""
+        return self._files.get(file_id)
+
+    def _store(self, file):
+        self._files[file['id']] = file
+
+    def _remove(self, file_id):
+        del self._files[file_id]
+
+    def _records(self):
+        """All file records; 'content' may be omitted when 'size' is set"""
+        return list(self._files.values())
+
+    def _append_change(self, entry):
+        self._changes.append(entry)
+
+    def _read_changes(self, start, count):
+        """(entries[start:start + count], total number of entries)"""
+        return self._changes[start:start + count], len(self._changes)
+
+    # Implementation ------------------------------------------------------
+
+    def _record_call(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+            delay = self.latency.get(operation, 0)
+            if delay and self.jitter:
+                delay *= self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def _change_seq(self):
+        with self._lock:
+            return self._read_changes(0, 0)[1] + 1
+
+    def _metadata(self, file):
+        return {
+            'id': file['id'],
+            'name': file['name'],
+            'parents': list(file['parents']),
+            'mimeType': file['mimeType'],
+            'trashed': file['trashed'],
+            'createdTime': file['createdTime'],
+            'size': str(file['size'] if 'size' in file else len(file['content'])),
+        }
+
+    def _get(self, file_id):
+        with self._lock:
+            file = self._load(file_id)
+        if file is None:
+            raise FileNotFoundError(f"File not found: {file_id}")
+        return file
+
+    def _log_change(self, file_id, removed):
+        self._append_change({'fileId': file_id, 'removed': removed, 'time': time.time()})
+
+    def _create(self, body, media_body, notify=True):
+        content = _read_media(media_body)
+        with self._lock:
+            file = {
+                'id': uuid.uuid4().hex,
+                'name': body.get('name', 'Untitled'),
+                'parents': list(body.get('parents', [])),
+                'mimeType': body.get('mimeType', 'application/octet-stream'),
+                'trashed': False,
+                'createdTime': time.time(),
+                'content': content,
+            }
+            self._store(file)
+            self._log_change(file['id'], removed=False)
+            metadata = self._metadata(file)
+        if notify:
+            for callback in self._listeners:
+                callback(metadata)
+        return {'id': metadata['id'], 'name': metadata['name']}
+
+    def _update(self, file_id, body, media_body):
+        with self._lock:
+            file = self._get(file_id)
+            if 'name' in body:
+                file['name'] = body['name']
+            if 'trashed' in body:
+                file['trashed'] = bool(body['trashed'])
+            if media_body is not None:
+                file['content'] = _read_media(media_body)
+            self._store(file)
+            self._log_change(file_id, removed=False)
+            return {'id': file_id, 'name': file['name']}
+
+    def _delete(self, file_id):
+        with self._lock:
+            self._get(file_id)
+            self._remove(file_id)
+            self._log_change(file_id, removed=True)
+        return ''
+
+    def _list(self, query, page_size, page_token, order_by):
+        clauses = _parse_query(query)
+        with self._lock:
+            files = [f for f in self._records() if _matches(f, clauses)]
+        order_field, _, direction = (order_by or 'createdTime').partition(' ')
+        files.sort(key=lambda f: f['name'] if order_field == 'name' else f['createdTime'],
+                   reverse=direction == 'desc')
+
+        start = int(page_token or 0)
+        page = files[start:start + page_size]
+        response = {'files': [self._metadata(f) for f in page]}
+        if start + page_size < len(files):
+            response['nextPageToken'] = str(start + page_size)
+        return response
+
+    def _list_changes(self, page_token, page_size):
+        with self._lock:
+            start = int(page_token) - 1
+            entries, total = self._read_changes(start, page_size)
+            changes = []
+            for entry in entries:
+                change = {'fileId': entry['fileId'], 'removed': entry['removed'], 'time': entry['time']}
+                file = self._load(entry['fileId'])
+                if file is not None and not entry['removed']:
+                    change['file'] = self._metadata(file)
+                changes.append(change)
+
+            next_index = start + len(entries)
+            response = {'changes': changes}
+            if next_index < total:
+                response['nextPageToken'] = str(next_index + 1)
+            else:
+                response['newStartPageToken'] = str(next_index + 1)
+            return response
+
+
+def attach_echo_processor(service, folder_id, delay=0.0, handler=None):
+    """
+    Simulate a Colab processor on a FakeDriveService: every command_<id>.json
+    created in folder_id is answered with result_<id>.json after `delay`
+    seconds. handler(command) -> result dict customizes the response.
+    """
+    import json
+    from .drive_io import decode_json
+    from .protocol import get_protocol
+    protocol = get_protocol()
+
+    def respond(command_file):
+        command = decode_json(service._get(command_file['id'])['content'])
+        if handler:
+            result = handler(command)
+        else:
+            result = {'status': 'success', 'output': f"ran {command.get('id')}\n"}
+        result.setdefault('command_id', command.get('id'))
+        service.put_file(protocol.result_name(command['id']), json.dumps(result), parents=[folder_id])
+
+    def on_create(file):
+        if protocol.command_id(file['name']) and folder_id in file['parents']:
+            timer = threading.Timer(delay, respond, args=(file,))
+            timer.daemon = True
+            timer.start()
+
+    service.add_listener(on_create)
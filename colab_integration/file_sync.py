@@ -7,12 +7,27 @@ Handles bidirectional sync between local files and Colab workspace
 import os
 import json
 import time
+import base64
+import fnmatch
 import hashlib
+import threading
 from typing import Dict, List, Set, Optional
 from pathlib import Path
 from datetime import datetime
 
 from .universal_bridge import UniversalColabBridge
+from .bulk_transfer import (
+    pack_files, unpack_archive, is_excluded, should_sync_path, ARCHIVE_EXTENSIONS, ARCHIVE_MIMETYPES
+)
+from .scan_index import ScanIndex
+from .fs_watch import InotifyWatcher, inotify_available
+from .delta_sync import (
+    ManifestStore, build_delta, chunk_file, DELTA_INDEX, DELTA_CHUNKS, DEFAULT_DELTA_THRESHOLD
+)
+
+# A file written more recently than this could change again without its
+# mtime moving, so the scan index does not keep its hash/manifest yet
+SETTLE_NS = 1_000_000_000
 
 
 class FileSyncManager:
@@ -21,11 +36,27 @@ class FileSyncManager:
     Provides seamless file access for hybrid local/cloud development
     """
     
-    def __init__(self, local_dir: str, colab_mount_point: str = "/content/workspace"):
+    def __init__(self, local_dir: str, colab_mount_point: str = "/content/workspace",
+                 transfer_mode: str = "bulk", codec: str = "gzip",
+                 delta_threshold: int = DEFAULT_DELTA_THRESHOLD,
+                 scan_index: Optional[ScanIndex] = None):
         self.local_dir = Path(local_dir).resolve()
         self.colab_mount = colab_mount_point
         self.bridge = UniversalColabBridge(tool_name="file_sync")
         
+        # 'bulk': one compressed archive + one command per sync direction
+        # 'exec': one base64-in-exec round trip per file (processors without bulk support)
+        self.transfer_mode = transfer_mode
+        self.codec = codec
+        
+        # Files at least delta_threshold bytes are sent as content-defined chunk
+        # deltas against the version Colab already has (bulk mode only)
+        self.delta_threshold = delta_threshold
+        self.manifests = ManifestStore.for_directory(self.local_dir)
+        
+        # Persistent (size, mtime_ns, inode) -> hash cache, opened on first scan
+        self.scan_index = scan_index
+        
         # Sync state
         self.local_state = {}
         self.colab_state = {}
@@ -43,50 +74,123 @@ class FileSyncManager:
         print(f"📁 FileSyncManager: {self.local_dir} ↔ {self.colab_mount}")
     
     def should_sync_file(self, file_path: Path) -> bool:
-        """Check if file should be synced based on patterns"""
-        file_name = file_path.name
-        file_str = str(file_path)
-        
-        # Check exclude patterns
-        for pattern in self.sync_patterns["exclude"]:
-            if pattern in file_str or file_name.startswith('.'):
-                return False
-        
-        # Check include patterns
-        for pattern in self.sync_patterns["include"]:
-            if pattern == "*" or file_name.endswith(pattern.replace("*", "")):
-                return True
-        
-        return False
+        """Check if file should be synced based on patterns (the processor applies the same rules to pulls)"""
+        return should_sync_path(str(file_path), self.sync_patterns)
     
     def get_file_hash(self, file_path: Path) -> str:
         """Get file hash for change detection"""
         try:
+            digest = hashlib.md5()
             with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            return digest.hexdigest()
         except:
             return ""
     
-    def scan_local_files(self) -> Dict[str, Dict]:
-        """Scan local directory for files"""
+    def scan_local_files(self, rel_paths: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Scan local directory for files (or only rel_paths, for watch events).
+        Only files whose (size, mtime_ns, inode) changed since the last scan
+        are re-hashed; the rest reuse the hash from the persistent index.
+        """
+        if self.scan_index is None:
+            self.scan_index = ScanIndex()
+        
+        root = str(self.local_dir)
+        if rel_paths is None:
+            cached = self.scan_index.load(root)
+            candidates = self._walk_sync_files()
+        else:
+            cached = self.scan_index.get_many(root, rel_paths)
+            candidates = self._stat_sync_files(rel_paths)
         files = {}
+        changed = {}
+        # Hashes of files that have not settled are stored empty (untrusted)
+        settled_before = time.time_ns() - SETTLE_NS
         
-        for file_path in self.local_dir.rglob("*"):
-            if file_path.is_file() and self.should_sync_file(file_path):
-                rel_path = file_path.relative_to(self.local_dir)
-                
-                files[str(rel_path)] = {
-                    "path": str(file_path),
-                    "size": file_path.stat().st_size,
-                    "modified": file_path.stat().st_mtime,
-                    "hash": self.get_file_hash(file_path)
-                }
+        for rel_path, file_path, stat in candidates:
+            signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            entry = cached.get(rel_path)
+            
+            if entry and entry[:3] == signature and entry[3]:
+                file_hash = entry[3]
+            else:
+                file_hash = self.get_file_hash(Path(file_path))
+                stored_hash = file_hash if stat.st_mtime_ns < settled_before else ""
+                if entry != signature + (stored_hash,):
+                    changed[rel_path] = signature + (stored_hash,)
+            
+            files[rel_path] = {
+                "path": file_path,
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+                "hash": file_hash
+            }
+        
+        removed = [rel_path for rel_path in cached if rel_path not in files]
+        if changed or removed:
+            self.scan_index.update(root, changed, removed)
         
         return files
     
-    def get_modified_files(self) -> List[str]:
-        """Get list of locally modified files"""
-        current_state = self.scan_local_files()
+    def input_hashes(self, patterns: List[str]) -> Dict[str, str]:
+        """
+        Content hashes of declared input files (relative paths or glob
+        patterns), from the scan index, for result-cache keys. Listed files
+        that are missing (or not synced) map to "" so creating them changes
+        the key too.
+        """
+        exact = [pattern for pattern in patterns if not any(c in pattern for c in "*?[")]
+        globs = [pattern for pattern in patterns if pattern not in exact]
+        
+        files = self.scan_local_files(exact) if exact else {}
+        hashes = {rel_path: files[rel_path]["hash"] if rel_path in files else "" for rel_path in exact}
+        if globs:
+            for rel_path, info in self.scan_local_files().items():
+                if any(fnmatch.fnmatch(rel_path, pattern) for pattern in globs):
+                    hashes[rel_path] = info["hash"]
+        return hashes
+    
+    def _walk_sync_files(self):
+        """Yield (rel_path, path, stat) for syncable files, one stat call per file"""
+        root = str(self.local_dir)
+        pending = [root]
+        
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Everything below an excluded directory is excluded too
+                        if not is_excluded(entry.path, self.sync_patterns):
+                            pending.append(entry.path)
+                    elif entry.is_file() and self.should_sync_file(Path(entry.path)):
+                        yield entry.path[len(root) + 1:], entry.path, entry.stat()
+                except OSError:
+                    continue
+    
+    def _stat_sync_files(self, rel_paths: List[str]):
+        """Like _walk_sync_files, for specific files; missing files are skipped"""
+        for rel_path in rel_paths:
+            file_path = os.path.join(str(self.local_dir), rel_path)
+            if is_excluded(file_path, self.sync_patterns):
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if os.path.isfile(file_path) and self.should_sync_file(Path(file_path)):
+                yield rel_path, file_path, stat
+    
+    def get_modified_files(self, rel_paths: Optional[List[str]] = None) -> List[str]:
+        """Get list of locally modified files (only among rel_paths, if given)"""
+        current_state = self.scan_local_files(rel_paths)
         modified = []
         
         for rel_path, file_info in current_state.items():
@@ -96,17 +200,24 @@ class FileSyncManager:
                 modified.append(rel_path)  # Modified file
         
         # Update local state
-        self.local_state = current_state
+        if rel_paths is None:
+            self.local_state = current_state
+        else:
+            for rel_path in rel_paths:
+                if rel_path in current_state:
+                    self.local_state[rel_path] = current_state[rel_path]
+                else:
+                    self.local_state.pop(rel_path, None)
         
         return modified
     
-    def sync_to_colab(self) -> bool:
-        """Upload local changes to Colab workspace"""
+    def sync_to_colab(self, rel_paths: Optional[List[str]] = None) -> bool:
+        """Upload local changes to Colab workspace (only rel_paths are checked, if given)"""
         try:
             print("📤 Syncing local files to Colab...")
             
             # Get modified files
-            modified_files = self.get_modified_files()
+            modified_files = self.get_modified_files(rel_paths)
             
             if not modified_files:
                 print("✅ No local changes to sync")
@@ -114,8 +225,143 @@ class FileSyncManager:
             
             print(f"📋 Uploading {len(modified_files)} files to Colab...")
             
-            # Create workspace setup code
-            setup_code = f"""
+            if self.transfer_mode == "bulk":
+                pushed = self._push_bulk(modified_files)
+                if pushed is None:
+                    print("⚠️ Processor does not support bulk transfer - falling back to per-file upload")
+                    self.transfer_mode = "exec"
+                else:
+                    if pushed:
+                        self.last_sync = datetime.now()
+                        print(f"✅ Sync to Colab completed")
+                    return pushed
+            
+            if not self._push_per_file(modified_files):
+                return False
+            
+            self.last_sync = datetime.now()
+            print(f"✅ Sync to Colab completed")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Sync to Colab failed: {e}")
+            return False
+    
+    def _archive_name(self, prefix: str) -> str:
+        return f"{prefix}_{self.bridge.instance_id}_{int(time.time() * 1000)}{ARCHIVE_EXTENSIONS[self.codec]}"
+    
+    def _push_bulk(self, rel_paths: List[str]) -> Optional[bool]:
+        """
+        Upload all files as one compressed archive, unpacked by a single command.
+        Returns None if the processor does not understand bulk transfers.
+        """
+        whole_paths, deltas, whole_manifests, chunk_blobs = self._plan_deltas(rel_paths)
+        
+        extra_files = {DELTA_CHUNKS + chunk_hash: chunk for chunk_hash, chunk in chunk_blobs.items()}
+        if deltas or whole_manifests:
+            index = {'deltas': deltas, 'manifests': whole_manifests}
+            extra_files[DELTA_INDEX] = json.dumps(index).encode('utf-8')
+        
+        data = pack_files(self.local_dir, whole_paths, self.codec, extra_files=extra_files)
+        archive_name = self._archive_name("syncpush")
+        archive_id = self.bridge.upload_blob(archive_name, data, ARCHIVE_MIMETYPES[self.codec])
+        
+        unpacked = False
+        try:
+            result = self.bridge.run_command('sync_push', {
+                'archive_file_id': archive_id,
+                'archive_name': archive_name,
+                'target_dir': self.colab_mount,
+                'codec': self.codec
+            }, timeout=60)
+            unpacked = result.get('status') == 'success' and result.get('transfer') == 'bulk'
+        finally:
+            # The processor deletes archives it unpacked; anything else (old
+            # processor, error, no answer in time) would stay on Drive for good
+            if not unpacked:
+                self.bridge.delete_file(archive_id)
+        
+        if result.get('status') == 'success' and not unpacked:
+            # An older processor ran the command as (empty) code
+            return None
+        
+        if result.get('status') != 'success':
+            print(f"❌ Bulk upload failed: {result.get('error') or result.get('message')}")
+            return False
+        
+        # Remember what Colab now has, so the next change to a large file ships as a delta
+        delta_failed = set(result.get('delta_failed', []))
+        if deltas or whole_manifests:
+            for rel_path, chunks in whole_manifests.items():
+                stat = (self.local_dir / rel_path).stat()
+                self.manifests.set(rel_path, chunks, stat.st_size, stat.st_mtime)
+            for descriptor in deltas:
+                if descriptor['rel_path'] in delta_failed:
+                    self.manifests.discard(descriptor['rel_path'])
+                else:
+                    self.manifests.set(descriptor['rel_path'], descriptor['chunks'],
+                                       descriptor['size'], descriptor['mtime'])
+            self.manifests.save()
+        
+        print(f"✅ Uploaded {len(result.get('files_written', []))} files ({len(data)} bytes) in one transfer")
+        if deltas:
+            delta_bytes = sum(d['size'] for d in deltas)
+            shipped = sum(len(chunk) for chunk in chunk_blobs.values())
+            print(f"🧩 Delta sync: {len(deltas)} large files, {shipped}/{delta_bytes} bytes of chunks shipped")
+        
+        if delta_failed:
+            # Colab's copy was not the expected base - send those files whole
+            print(f"⚠️ Delta base mismatch for {len(delta_failed)} files - re-sending them whole")
+            return self._push_bulk(sorted(delta_failed))
+        return True
+    
+    def _plan_deltas(self, rel_paths: List[str]):
+        """
+        Decide how each file travels. Returns (whole_paths, deltas,
+        whole_manifests, chunk_blobs): large files with a known remote base
+        become delta descriptors plus only their new chunks; large files
+        without one are sent whole along with their chunk manifest.
+        """
+        whole_paths, deltas, whole_manifests, chunk_blobs = [], [], {}, {}
+        
+        for rel_path in rel_paths:
+            local_path = self.local_dir / rel_path
+            if local_path.stat().st_size < self.delta_threshold:
+                whole_paths.append(rel_path)
+                continue
+            
+            chunks = self._chunk_manifest(rel_path, local_path)
+            base = self.manifests.get(rel_path)
+            if base is None:
+                whole_paths.append(rel_path)
+                whole_manifests[rel_path] = chunks
+                continue
+            
+            descriptor, new_chunks, _ = build_delta(local_path, rel_path, base, chunks)
+            deltas.append(descriptor)
+            chunk_blobs.update(new_chunks)
+        
+        return whole_paths, deltas, whole_manifests, chunk_blobs
+    
+    def _chunk_manifest(self, rel_path: str, local_path: Path) -> List:
+        """Chunk manifest of a large file, reused from the scan index while its stat is unchanged"""
+        if self.scan_index is None:
+            self.scan_index = ScanIndex()
+        
+        root = str(self.local_dir)
+        stat = local_path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        chunks = self.scan_index.get_manifest(root, rel_path, signature)
+        if chunks is None:
+            chunks = chunk_file(local_path)
+            if stat.st_mtime_ns < time.time_ns() - SETTLE_NS:
+                self.scan_index.set_manifest(root, rel_path, signature, chunks)
+        return chunks
+    
+    def _push_per_file(self, rel_paths: List[str]) -> bool:
+        """Legacy upload: one base64-in-exec round trip per file"""
+        # Create workspace setup code
+        setup_code = f"""
 import os
 import base64
 import json
@@ -127,28 +373,28 @@ os.chdir(workspace_dir)
 
 print(f"📁 Workspace ready: {{workspace_dir}}")
 """
+        
+        # Execute workspace setup
+        result = self.bridge.execute_code(setup_code, timeout=30)
+        
+        if result.get('status') != 'success':
+            print(f"❌ Failed to setup workspace: {result.get('error')}")
+            return False
+        
+        # Upload each modified file
+        for rel_path in rel_paths:
+            local_path = self.local_dir / rel_path
             
-            # Execute workspace setup
-            result = self.bridge.execute_code(setup_code, timeout=30)
-            
-            if result.get('status') != 'success':
-                print(f"❌ Failed to setup workspace: {result.get('error')}")
-                return False
-            
-            # Upload each modified file
-            for rel_path in modified_files:
-                local_path = self.local_dir / rel_path
+            try:
+                # Read file content
+                with open(local_path, 'rb') as f:
+                    content = f.read()
                 
-                try:
-                    # Read file content
-                    with open(local_path, 'rb') as f:
-                        content = f.read()
-                    
-                    # Encode for transfer
-                    encoded_content = base64.b64encode(content).decode('utf-8')
-                    
-                    # Create upload code
-                    upload_code = f"""
+                # Encode for transfer
+                encoded_content = base64.b64encode(content).decode('utf-8')
+                
+                # Create upload code
+                upload_code = f"""
 import os
 import base64
 
@@ -167,31 +413,32 @@ with open(file_path, 'wb') as f:
 
 print(f"📤 Uploaded: {rel_path} ({{len(content)}} bytes)")
 """
-                    
-                    # Execute upload
-                    result = self.bridge.execute_code(upload_code, timeout=30)
-                    
-                    if result.get('status') == 'success':
-                        print(f"✅ {rel_path}")
-                    else:
-                        print(f"❌ Failed to upload {rel_path}: {result.get('error')}")
                 
-                except Exception as e:
-                    print(f"❌ Error uploading {rel_path}: {e}")
-            
-            self.last_sync = datetime.now()
-            print(f"✅ Sync to Colab completed")
-            return True
+                # Execute upload
+                result = self.bridge.execute_code(upload_code, timeout=30)
+                
+                if result.get('status') == 'success':
+                    print(f"✅ {rel_path}")
+                else:
+                    print(f"❌ Failed to upload {rel_path}: {result.get('error')}")
             
-        except Exception as e:
-            print(f"❌ Sync to Colab failed: {e}")
-            return False
+            except Exception as e:
+                print(f"❌ Error uploading {rel_path}: {e}")
+        
+        return True
     
     def sync_from_colab(self) -> bool:
         """Download Colab changes to local directory"""
         try:
             print("📥 Syncing files from Colab...")
             
+            if self.transfer_mode == "bulk":
+                pulled = self._pull_bulk()
+                if pulled is not None:
+                    return pulled
+                print("⚠️ Processor does not support bulk transfer - falling back to per-file download")
+                self.transfer_mode = "exec"
+            
             # Get list of files in Colab workspace
             list_code = f"""
 import os
@@ -302,6 +549,41 @@ else:
             print(f"❌ Sync from Colab failed: {e}")
             return False
     
+    def _local_mtimes(self) -> Dict[str, float]:
+        """Modification time of every syncable local file, keyed by relative path"""
+        return {rel_path: stat.st_mtime for rel_path, _, stat in self._walk_sync_files()}
+    
+    def _pull_bulk(self) -> Optional[bool]:
+        """
+        Download every new/modified Colab file in one archive.
+        Returns None if the processor does not understand bulk transfers.
+        """
+        result = self.bridge.run_command('sync_pull', {
+            'target_dir': self.colab_mount,
+            'known_files': self._local_mtimes(),
+            'sync_patterns': self.sync_patterns,
+            'codec': self.codec
+        }, timeout=60)
+        
+        if result.get('status') == 'success' and result.get('transfer') != 'bulk':
+            return None
+        
+        if result.get('status') != 'success':
+            print(f"⚠️ Could not pull Colab files: {result.get('error') or result.get('message')}")
+            return False
+        
+        archive_id = result.get('archive_file_id')
+        if not archive_id:
+            print("✅ No new files to download")
+            return True
+        
+        data = self.bridge.download_blob(archive_id)
+        self.bridge.delete_file(archive_id)
+        written = unpack_archive(data, self.local_dir, result.get('codec', self.codec))
+        
+        print(f"✅ Downloaded {len(written)} files from Colab ({len(data)} bytes in one transfer)")
+        return True
+    
     def full_sync(self) -> bool:
         """Perform full bidirectional sync"""
         print("🔄 Performing full sync...")
@@ -317,44 +599,91 @@ else:
         
         return success
     
-    def watch_changes(self, callback=None):
-        """Watch for local file changes (basic implementation)"""
+    def watch_changes(self, callback=None, debounce: float = 0.05, stop_event: Optional[threading.Event] = None):
+        """
+        Watch for local file changes and sync them (or pass them to callback).
+        Uses inotify when available, falling back to a 2 second polling scan.
+        """
         print(f"👀 Watching {self.local_dir} for changes...")
         
-        last_scan = {}
+        watcher = None
+        if inotify_available():
+            try:
+                watcher = InotifyWatcher(self.local_dir, exclude=self.sync_patterns["exclude"])
+            except OSError as e:
+                print(f"⚠️ inotify unavailable ({e}) - falling back to polling")
         
         try:
-            while True:
-                current_scan = self.scan_local_files()
-                
-                # Check for changes
-                changes = []
-                for rel_path, file_info in current_scan.items():
-                    if rel_path not in last_scan:
-                        changes.append(f"Added: {rel_path}")
-                    elif file_info["hash"] != last_scan[rel_path].get("hash"):
-                        changes.append(f"Modified: {rel_path}")
-                
-                for rel_path in last_scan:
-                    if rel_path not in current_scan:
-                        changes.append(f"Deleted: {rel_path}")
-                
-                if changes:
-                    print(f"📝 Detected changes:")
-                    for change in changes:
-                        print(f"  {change}")
-                    
-                    if callback:
-                        callback(changes)
-                    else:
-                        # Auto-sync on changes
-                        self.sync_to_colab()
-                
-                last_scan = current_scan
-                time.sleep(2)  # Check every 2 seconds
-                
+            if watcher:
+                self._watch_events(watcher, callback, debounce, stop_event)
+            else:
+                self._watch_polling(callback, stop_event)
         except KeyboardInterrupt:
             print("\n👋 Stopped watching for changes")
+        finally:
+            if watcher:
+                watcher.close()
+    
+    def _watch_events(self, watcher: InotifyWatcher, callback, debounce: float, stop_event):
+        """Event-driven watch: only paths reported by inotify are rescanned"""
+        last_scan = {}
+        # Initial pass reports everything already there, like the polling scan
+        self._report_changes(last_scan, self.scan_local_files(), None, callback)
+        
+        for batch in watcher.batches(debounce=debounce, stop_event=stop_event):
+            if batch is None:
+                self._report_changes(last_scan, self.scan_local_files(), None, callback)
+            else:
+                rel_paths = sorted(batch)
+                self._report_changes(last_scan, self.scan_local_files(rel_paths), rel_paths, callback)
+    
+    def _watch_polling(self, callback, stop_event):
+        """Fallback watch: full (index-assisted) scan every 2 seconds"""
+        last_scan = {}
+        
+        while stop_event is None or not stop_event.is_set():
+            self._report_changes(last_scan, self.scan_local_files(), None, callback)
+            if stop_event is not None:
+                stop_event.wait(2)
+            else:
+                time.sleep(2)  # Check every 2 seconds
+    
+    def _report_changes(self, last_scan: Dict, current_scan: Dict, rel_paths, callback):
+        """Diff a scan against last_scan (updating it), then sync or call back"""
+        paths = set(current_scan) | set(last_scan) if rel_paths is None else set(rel_paths)
+        
+        changes = []
+        changed_paths = []
+        for rel_path in sorted(paths):
+            before = last_scan.get(rel_path)
+            after = current_scan.get(rel_path)
+            
+            if after is None:
+                if before is not None:
+                    changes.append(f"Deleted: {rel_path}")
+                    del last_scan[rel_path]
+                continue
+            if before is None:
+                changes.append(f"Added: {rel_path}")
+            elif after["hash"] != before["hash"]:
+                changes.append(f"Modified: {rel_path}")
+            else:
+                continue
+            changed_paths.append(rel_path)
+            last_scan[rel_path] = after
+        
+        if not changes:
+            return
+        
+        print(f"📝 Detected changes:")
+        for change in changes:
+            print(f"  {change}")
+        
+        if callback:
+            callback(changes)
+        elif changed_paths:
+            # Auto-sync on changes, checking only the files that changed
+            self.sync_to_colab(changed_paths)
     
     def get_sync_status(self) -> Dict:
         """Get current sync status"""
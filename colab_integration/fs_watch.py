@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Filesystem Watching
+Event-driven change detection for FileSyncManager.watch_changes using
+Linux inotify (through ctypes, no extra dependency). Events are debounced
+and coalesced into batches of changed relative paths.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Iterable, Iterator, List, Optional, Set
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+_libc = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.inotify_init1
+    except (OSError, AttributeError):
+        _libc = None
+
+
+def inotify_available() -> bool:
+    return _libc is not None
+
+
+class InotifyWatcher:
+    """
+    Recursive inotify watch on a directory tree.
+    Paths containing any of the exclude substrings are not watched or reported.
+    """
+
+    def __init__(self, root, exclude: Iterable[str] = ()):
+        if _libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+
+        self.root = os.path.abspath(str(root))
+        self.exclude = list(exclude)
+        self._watches = {}  # wd -> directory path
+
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._add_tree(self.root)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    # Watches -------------------------------------------------------------
+
+    def _excluded(self, path: str) -> bool:
+        return any(pattern in path for pattern in self.exclude)
+
+    def _add_tree(self, directory: str) -> List[str]:
+        """Watch directory and its subdirectories; returns the files already in them"""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not self._excluded(os.path.join(dirpath, d))]
+            self._add_watch(dirpath)
+            found.extend(os.path.join(dirpath, name) for name in filenames)
+        return found
+
+    def _add_watch(self, directory: str):
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+            return  # Directory vanished before we got to it
+        self._watches[wd] = directory
+
+    def _remove_tree(self, directory: str):
+        """Drop watches of a directory that moved away (its wds would report stale paths)"""
+        prefix = directory + os.sep
+        for wd, path in list(self._watches.items()):
+            if path == directory or path.startswith(prefix):
+                _libc.inotify_rm_watch(self.fd, wd)
+                del self._watches[wd]
+
+    def _relative(self, path: str) -> str:
+        return path[len(self.root) + 1:]
+
+    # Events --------------------------------------------------------------
+
+    def read_changes(self, timeout: Optional[float] = None) -> Optional[Set[str]]:
+        """
+        Wait up to timeout seconds for events. Returns the changed relative
+        paths (empty if nothing happened), or None when a full rescan is
+        needed (kernel queue overflow, directory moved out of the tree).
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        rescan = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                raw_name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+                offset += _EVENT_HEADER.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    rescan = True
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._watches[wd]
+                    continue
+
+                name = os.fsdecode(raw_name.rstrip(b'\0'))
+                path = os.path.join(directory, name) if name else directory
+                if self._excluded(path):
+                    continue
+
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may have landed before the new watch existed
+                        changed.update(self._relative(p) for p in self._add_tree(path))
+                    elif mask & (IN_MOVED_FROM | IN_DELETE):
+                        self._remove_tree(path)
+                        rescan = True
+                elif name:
+                    changed.add(self._relative(path))
+
+        return None if rescan else changed
+
+    def batches(self, debounce: float = 0.05, max_delay: float = 1.0,
+                stop_event=None) -> Iterator[Optional[Set[str]]]:
+        """
+        Yield coalesced change batches once the tree has been quiet for
+        `debounce` seconds (or after max_delay of continuous activity).
+        None means "rescan everything".
+        """
+        while stop_event is None or not stop_event.is_set():
+            # Short timeout only so stop_event is noticed; idle cost is one wakeup
+            changed = self.read_changes(timeout=0.5)
+            if changed is not None and not changed:
+                continue
+
+            deadline = time.monotonic() + max_delay
+            while changed is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                more = self.read_changes(timeout=min(debounce, remaining))
+                if more is None:
+                    changed = None
+                elif not more:
+                    break
+                else:
+                    changed |= more
+            yield changed
@@ -8,11 +8,14 @@ import os
 import json
 import time
 import base64
+import inspect
 import requests
 from typing import Dict, Any
 from pathlib import Path
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+
+from .drive_client import get_drive_service
+from . import envelope
+from .protocol import get_protocol
 
 class FullyAutomatedColab:
     """Multiple approaches for zero-click Colab automation"""
@@ -24,11 +27,7 @@ class FullyAutomatedColab:
         
     def initialize(self):
         """Initialize Google Drive service"""
-        credentials = service_account.Credentials.from_service_account_file(
-            self.sa_path,
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.drive_service = get_drive_service(self.sa_path)
     
     def create_self_executing_notebook(self) -> Dict[str, Any]:
         """Create a notebook that executes automatically when opened"""
@@ -112,6 +111,9 @@ setTimeout(() => {
     
     def _get_processor_code(self) -> str:
         """Get the processor code that runs automatically"""
+        # The result envelope codec is stdlib-only, so it is embedded verbatim
+        envelope_source = inspect.getsource(envelope)
+        protocol = get_protocol()
         return f'''# Claude Tools Auto-Processor
 print('🤖 Claude Tools Auto-Processor Starting...')
 print('=' * 50)
@@ -126,8 +128,13 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload
 import io
 
+{envelope_source}
 # Configuration
 FOLDER_ID = '{self.folder_id}'
+# File naming shared with the bridge (colab_integration/protocol.py)
+COMMAND_PREFIX = '{protocol.command_prefix}'
+RESULT_PREFIX = '{protocol.result_prefix}'
+FILE_SUFFIX = '{protocol.suffix}'
 AUTO_RUN_DURATION = 3600  # 1 hour
 POLL_INTERVAL = 2
 
@@ -180,7 +187,7 @@ class AutoProcessor:
     def list_requests(self):
         """Find pending requests"""
         try:
-            query = f"'{{self.folder_id}}' in parents and name contains 'command_' and trashed=false"
+            query = f"'{{self.folder_id}}' in parents and name contains '{{COMMAND_PREFIX}}' and trashed=false"
             results = self.drive_service.files().list(
                 q=query,
                 fields="files(id, name, createdTime)",
@@ -201,15 +208,15 @@ class AutoProcessor:
         """Read request from Drive"""
         try:
             content = self.drive_service.files().get_media(fileId=file_id).execute()
-            return json.loads(content.decode('utf-8'))
+            return unpack(content)
         except Exception as e:
             print(f'❌ Error reading request: {{e}}')
             return None
     
-    def write_response(self, command_id, response_data):
-        """Write response to Drive"""
+    def write_response(self, command_id, response_data, request_data=None):
+        """Write response to Drive, encoded the way the requester accepts"""
         try:
-            response_name = f'result_{{command_id}}.json'
+            response_name = f'{{RESULT_PREFIX}}{{command_id}}{{FILE_SUFFIX}}'
             
             # Create file
             file_metadata = {{
@@ -217,10 +224,8 @@ class AutoProcessor:
                 'parents': [self.folder_id]
             }}
             
-            media = MediaIoBaseUpload(
-                io.BytesIO(json.dumps(response_data, indent=2).encode('utf-8')),
-                mimetype='application/json'
-            )
+            payload, mimetype = encode_reply(response_data, request_data or {{}})
+            media = MediaIoBaseUpload(io.BytesIO(payload), mimetype=mimetype)
             
             self.drive_service.files().create(
                 body=file_metadata,
@@ -235,7 +240,7 @@ class AutoProcessor:
         """Process a single request"""
         try:
             # Extract command ID from filename
-            command_id = request_file['name'].replace('command_', '').replace('.json', '')
+            command_id = request_file['name'][len(COMMAND_PREFIX):-len(FILE_SUFFIX)]
             print(f'\\n📋 Processing: {{command_id}}')
             
             # Read request
@@ -253,7 +258,7 @@ class AutoProcessor:
                 }}
             
             # Write response
-            self.write_response(command_id, result)
+            self.write_response(command_id, result, request_data)
             
             # Mark as processed
             self.processed_requests.add(request_file['id'])
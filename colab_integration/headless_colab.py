@@ -13,6 +13,8 @@ from playwright.async_api import async_playwright
 import threading
 from datetime import datetime
 
+from .protocol import get_protocol
+
 class HeadlessColabManager:
     """Fully automated Colab management - no user interaction needed"""
     
@@ -132,6 +134,7 @@ print('Headless processor ready!')
 '''
         
         # Cell 2: Main processor loop
+        protocol = get_protocol()
         processor_code = '''
 import json
 import time
@@ -139,6 +142,11 @@ import traceback
 from datetime import datetime
 from io import StringIO
 
+# File naming shared with the bridge (colab_integration/protocol.py)
+COMMAND_PREFIX = ''' + repr(protocol.command_prefix) + '''
+RESULT_PREFIX = ''' + repr(protocol.result_prefix) + '''
+FILE_SUFFIX = ''' + repr(protocol.suffix) + '''
+
 # Find colab-bridge folder
 base_paths = [
     '/content/drive/MyDrive/colab-bridge-auto',
@@ -170,6 +178,34 @@ def update_heartbeat():
             'processor': 'headless'
         }, f)
 
+class StreamWriter:
+    """stdout stand-in publishing partial_<id>_<seq>.json files while code runs"""
+    def __init__(self, command_id, interval=0.5):
+        self.command_id = command_id
+        self.interval = interval
+        self.pending = []
+        self.seq = 0
+        self.last_flush = time.time()
+
+    def write(self, text):
+        self.pending.append(text)
+        if time.time() - self.last_flush >= self.interval:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        self.last_flush = time.time()
+        if not self.pending:
+            return
+        self.seq += 1
+        chunk = {'command_id': self.command_id, 'seq': self.seq, 'stdout': ''.join(self.pending),
+                 'stderr': '', 'timestamp': time.time()}
+        self.pending = []
+        path = os.path.join(base_path, f'partial_{self.command_id}_{self.seq:06d}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(chunk, f)
+        os.replace(path + '.tmp', path)
+
 print('⏳ Starting command processor...')
 
 while True:
@@ -179,7 +215,7 @@ while True:
         
         # Look for commands
         for file in os.listdir(base_path):
-            if file.startswith('cmd_') and file.endswith('.json'):
+            if file.startswith(COMMAND_PREFIX) and file.endswith(FILE_SUFFIX):
                 cmd_path = os.path.join(base_path, file)
                 
                 # Read command
@@ -196,16 +232,25 @@ while True:
                     'processor': 'headless'
                 }
                 
-                # Capture output
+                # Capture output (streamed as partial files if requested)
+                streaming = bool(cmd.get('stream'))
                 old_stdout = sys.stdout
-                sys.stdout = output_buffer = StringIO()
+                sys.stdout = output_buffer = StreamWriter(cmd['id']) if streaming else StringIO()
                 
                 try:
                     # Execute code
                     exec(cmd['code'], {'__name__': '__main__'})
-                    result['output'] = output_buffer.getvalue()
+                    if streaming:
+                        output_buffer.flush()
+                        result['output'] = ''
+                        result['streamed_chunks'] = output_buffer.seq
+                    else:
+                        result['output'] = output_buffer.getvalue()
                     print(f'✅ Success: {cmd["id"]}')
                 except Exception as e:
+                    if streaming:
+                        output_buffer.flush()
+                        result['streamed_chunks'] = output_buffer.seq
                     result['status'] = 'error'
                     result['error'] = str(e)
                     result['traceback'] = traceback.format_exc()
@@ -214,7 +259,7 @@ while True:
                     sys.stdout = old_stdout
                 
                 # Write result
-                result_path = cmd_path.replace('cmd_', 'result_')
+                result_path = os.path.join(base_path, f'{RESULT_PREFIX}{cmd["id"]}{FILE_SUFFIX}')
                 with open(result_path, 'w') as f:
                     json.dump(result, f)
                 
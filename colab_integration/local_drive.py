@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Local Directory Drive Service
+FakeDriveService whose files and changes feed live in a local directory,
+so bridges and processors can be run end to end without Google
+credentials - from separate processes, or in one process with separate
+API-call counters and latency profiles per side.
+
+Layout under root: files/<id>.json (metadata), files/<id>.bin (content)
+and changes.log (one JSON change per line, append-only).
+"""
+
+import os
+import json
+from pathlib import Path
+
+from .fake_drive import FakeDriveService
+
+
+class LocalDriveService(FakeDriveService):
+    """Drive v3 subset (files() and changes()) backed by a directory"""
+
+    def __init__(self, root, latency=None, jitter=0.0, seed=None):
+        super().__init__(latency=latency, jitter=jitter, seed=seed)
+        self.root = Path(root)
+        self.files_dir = self.root / "files"
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.changes_path = self.root / "changes.log"
+        self.changes_path.touch()
+        # Parsed changes.log prefix, extended as other writers append
+        self._change_cache = []
+        self._change_offset = 0
+
+    def _meta_path(self, file_id):
+        return self.files_dir / f"{file_id}.json"
+
+    def _content_path(self, file_id):
+        return self.files_dir / f"{file_id}.bin"
+
+    @staticmethod
+    def _write_atomic(path, data):
+        temp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    def _load(self, file_id):
+        try:
+            meta = json.loads(self._meta_path(file_id).read_bytes())
+            content = self._content_path(file_id).read_bytes()
+        except (OSError, ValueError):
+            return None  # Missing, or deleted by another process meanwhile
+        meta.pop('size', None)
+        return {**meta, 'content': content}
+
+    def _store(self, file):
+        # Content first: the metadata file is what makes a file visible
+        self._write_atomic(self._content_path(file['id']), file['content'])
+        meta = {key: value for key, value in file.items() if key != 'content'}
+        meta['size'] = len(file['content'])
+        self._write_atomic(self._meta_path(file['id']), json.dumps(meta).encode('utf-8'))
+
+    def _remove(self, file_id):
+        for path in (self._meta_path(file_id), self._content_path(file_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _records(self):
+        records = []
+        for path in self.files_dir.glob("*.json"):
+            try:
+                records.append(json.loads(path.read_bytes()))
+            except (OSError, ValueError):
+                continue
+        return records
+
+    def _append_change(self, entry):
+        # One O_APPEND write per line keeps concurrent writers from interleaving
+        line = (json.dumps(entry) + "\n").encode('utf-8')
+        fd = os.open(self.changes_path, os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def _read_changes(self, start, count):
+        with open(self.changes_path, 'rb') as f:
+            f.seek(self._change_offset)
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]  # Ignore a line still being written
+        for line in complete.splitlines():
+            self._change_cache.append(json.loads(line))
+        self._change_offset += len(complete)
+        return self._change_cache[start:start + count], len(self._change_cache)
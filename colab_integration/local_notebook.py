@@ -5,8 +5,9 @@ Provides Jupyter-like local experience powered by Google Colab
 """
 
 import os
-import json
 import time
+import atexit
+import weakref
 import threading
 import tempfile
 from typing import Dict, List, Any, Optional
@@ -15,23 +16,125 @@ from datetime import datetime
 
 from .universal_bridge import UniversalColabBridge
 from .file_sync import FileSyncManager
+from .cell_dependencies import find_providers, cell_key
+from .notebook_store import NotebookFile, CellSpan, OutputRef
+from .result_cache import ResultCache
+
+# save_notebook() writes at most this often (seconds); 0 saves immediately
+SAVE_DELAY = 2.0
+
+# Notebooks with a debounced save still pending, flushed at interpreter exit
+_pending_saves = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_pending_saves():
+    for notebook in list(_pending_saves):
+        notebook.flush()
 
 
 class NotebookCell:
-    """Represents a notebook cell"""
+    """Represents a notebook cell
+    
+    Cells loaded from a file are materialized on first use; until then, and
+    while unchanged, saving copies their bytes from the old file. edits
+    counts field changes, so a save only marks the cell clean if it was not
+    edited while the file was being written.
+    """
+    
+    FIELDS = ("cell_type", "source", "outputs", "execution_count", "metadata")
     
     def __init__(self, cell_type: str = "code", source: str = "", outputs: List = None):
+        self._file = None
+        self._span = None
         self.cell_type = cell_type
         self.source = source
         self.outputs = outputs or []
         self.execution_count = None
         self.metadata = {}
+        # Cache key of the last successful run, and the state it left behind
+        # (what dependent cells are keyed on); not saved with the notebook
+        self.run_key = None
+        self.run_state = None
+        # Result-cache key the outputs belong to; replayed: they came from the
+        # cache, so the session lacks this cell's state
+        self.cache_key = None
+        self.replayed = False
     
-    def to_dict(self):
+    @classmethod
+    def from_span(cls, notebook_file: NotebookFile, span: CellSpan):
+        """Cell left on disk until one of its fields is used"""
+        cell = cls.__new__(cls)
+        cell.__dict__.update(_file=notebook_file, _span=span, dirty=False, edits=0, run_key=None,
+                             run_state=None, cache_key=None, replayed=False)
+        return cell
+    
+    @property
+    def materialized(self) -> bool:
+        return self._file is None or "source" in self.__dict__
+    
+    def _materialize(self):
+        with self._file.lock:
+            if "source" in self.__dict__:
+                return  # Another thread got here first
+            # Read the span under the lock: a save re-points it at the new file
+            data, outputs = self._file.read_cell(self._span)
+        source = data.get("source", "")
+        self.__dict__.update(
+            cell_type=data.get("cell_type", "code"),
+            source='\n'.join(source) if isinstance(source, list) else source,
+            outputs=outputs,
+            execution_count=data.get("execution_count"),
+            metadata=data.get("metadata", {})
+        )
+    
+    def __getattr__(self, name):
+        # Only called for missing attributes: fields of a cell still on disk
+        if name in NotebookCell.FIELDS and self.__dict__.get("_file") is not None:
+            self._materialize()
+            return self.__dict__[name]
+        raise AttributeError(name)
+    
+    def __setattr__(self, name, value):
+        if name in NotebookCell.FIELDS:
+            if not self.materialized:
+                self._materialize()
+            self.__dict__["dirty"] = True
+            self.__dict__["edits"] = self.__dict__.get("edits", 0) + 1
+        super().__setattr__(name, value)
+    
+    def mark_dirty(self):
+        """Re-serialize on the next save (after changing outputs/metadata in place)"""
+        if not self.materialized:
+            self._materialize()
+        self.__dict__["edits"] = self.__dict__.get("edits", 0) + 1
+        self.dirty = True
+    
+    def stored_span(self, notebook_file: NotebookFile) -> Optional[CellSpan]:
+        """Byte range to copy when saving to notebook_file, if the cell is unchanged there"""
+        if self._file is not None and not self.dirty and self._file.path == notebook_file.path:
+            return self._span
+        return None
+    
+    def stored(self, notebook_file: NotebookFile, span: CellSpan, edits: int, outputs: Optional[List] = None):
+        """
+        Record where the last save put this cell. edits and outputs are the
+        cell's edit count and outputs when it was serialized (outputs is None
+        if it was copied unmaterialized); it stays dirty if edited since.
+        """
+        for output, (start, end) in zip(outputs or [], span.outputs):
+            if isinstance(output, OutputRef):
+                output.rebind(notebook_file.path, start, end)
+        self.__dict__.update(_file=notebook_file, _span=span)
+        if self.__dict__.get("edits", 0) == edits:
+            self.__dict__["dirty"] = False
+    
+    def to_dict(self, lazy_outputs: bool = False):
+        """nbformat dict; lazy_outputs=True leaves on-disk outputs as OutputRefs"""
         return {
             "cell_type": self.cell_type,
             "source": self.source.split('\n') if isinstance(self.source, str) else self.source,
-            "outputs": self.outputs,
+            "outputs": list(self.outputs) if lazy_outputs else [dict(output) for output in self.outputs],
             "execution_count": self.execution_count,
             "metadata": self.metadata
         }
@@ -54,10 +157,18 @@ class LocalColabNotebook:
     Provides the comfort of local notebooks with cloud compute power
     """
     
-    def __init__(self, notebook_path: str, tool_name: str = "local_notebook"):
+    def __init__(self, notebook_path: str, tool_name: str = "local_notebook", save_delay: float = SAVE_DELAY,
+                 result_cache=None, cache_inputs: Optional[List[str]] = None, cache_environment: Any = None):
         self.notebook_path = Path(notebook_path)
         self.tool_name = tool_name
         self.cells = []
+        
+        # Cells stay on disk until used; saves are debounced and only
+        # re-serialize changed cells
+        self.notebook_file = NotebookFile(self.notebook_path)
+        self.save_delay = save_delay
+        self._save_timer = None
+        self._save_lock = threading.RLock()
         self.metadata = {
             "kernelspec": {
                 "name": "python3",
@@ -76,6 +187,17 @@ class LocalColabNotebook:
             colab_mount_point="/content/workspace"
         )
         
+        # Cells run in one processor session, so variables carry over between them
+        self.session = self._new_session()
+        
+        # Opt-in on-disk result cache (a ResultCache, or True for the default
+        # one): cells whose source, upstream cells, declared input files
+        # (paths/globs relative to the notebook) and environment match an
+        # earlier run get its output without a round trip
+        self.result_cache = ResultCache() if result_cache is True else result_cache or None
+        self.cache_inputs = list(cache_inputs or [])
+        self.cache_environment = cache_environment
+        
         # State management
         self.kernel_state = "idle"  # idle, busy, dead
         self.execution_count = 0
@@ -88,14 +210,15 @@ class LocalColabNotebook:
         else:
             self.create_new_notebook()
     
+    def _new_session(self) -> str:
+        return f"{self.tool_name}_{self.notebook_path.stem}_{int(time.time() * 1000)}"
+    
     def load_notebook(self):
-        """Load notebook from file"""
+        """Load notebook from file (cells and large outputs are read lazily)"""
         try:
-            with open(self.notebook_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            self.cells = [NotebookCell.from_dict(cell_data) for cell_data in data.get("cells", [])]
-            self.metadata.update(data.get("metadata", {}))
+            top, spans = self.notebook_file.scan()
+            self.cells = [NotebookCell.from_span(self.notebook_file, span) for span in spans]
+            self.metadata.update(top.get("metadata", {}))
             
             print(f"📓 Loaded notebook: {self.notebook_path.name} ({len(self.cells)} cells)")
             
@@ -108,23 +231,63 @@ class LocalColabNotebook:
         self.cells = [NotebookCell(source="# Local Colab Notebook\nprint('Hello from local notebook powered by Colab!')")]
         print(f"📝 Created new notebook: {self.notebook_path.name}")
     
-    def save_notebook(self):
-        """Save notebook to file"""
+    def save_notebook(self, immediate: bool = False):
+        """Save notebook to file (within save_delay seconds, or now with immediate=True)"""
+        with self._save_lock:
+            if immediate or self.save_delay <= 0:
+                self._cancel_pending_save()
+                self._write_notebook()
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+                _pending_saves.add(self)
+    
+    def flush(self):
+        """Write a pending debounced save now"""
+        with self._save_lock:
+            if self._cancel_pending_save():
+                self._write_notebook()
+    
+    def _cancel_pending_save(self) -> bool:
+        timer, self._save_timer = self._save_timer, None
+        _pending_saves.discard(self)
+        if timer is None:
+            return False
+        timer.cancel()
+        return True
+    
+    def _write_notebook(self):
         try:
             # Ensure directory exists
             self.notebook_path.parent.mkdir(parents=True, exist_ok=True)
             
-            notebook_data = {
-                "cells": [cell.to_dict() for cell in self.cells],
-                "metadata": self.metadata,
-                "nbformat": 4,
-                "nbformat_minor": 2
-            }
-            
-            with open(self.notebook_path, 'w', encoding='utf-8') as f:
-                json.dump(notebook_data, f, indent=2, ensure_ascii=False)
+            # Cells may be edited meanwhile (the debounced save runs on a timer
+            # thread); the file lock keeps them from reading a moved span
+            with self.notebook_file.lock:
+                entries, written = [], []
+                for cell in list(self.cells):
+                    edits = cell.__dict__.get("edits", 0)
+                    span = cell.stored_span(self.notebook_file)
+                    if span is None:
+                        data = cell.to_dict(lazy_outputs=True)
+                        outputs = data.pop("outputs")
+                        entries.append((data, outputs))
+                    else:
+                        entries.append(span)  # Unchanged: copied byte for byte
+                        outputs = list(cell.outputs) if cell.materialized else None
+                    written.append((cell, edits, outputs))
+                
+                spans = self.notebook_file.write({
+                    "metadata": self.metadata,
+                    "nbformat": 4,
+                    "nbformat_minor": 2
+                }, entries)
+                for (cell, edits, outputs), span in zip(written, spans):
+                    cell.stored(self.notebook_file, span, edits, outputs)
             
-            print(f"💾 Saved notebook: {self.notebook_path.name}")
+            rewritten = sum(1 for entry in entries if not isinstance(entry, CellSpan))
+            print(f"💾 Saved notebook: {self.notebook_path.name} ({rewritten} of {len(entries)} cells re-serialized)")
             
         except Exception as e:
             print(f"❌ Error saving notebook: {e}")
@@ -158,10 +321,14 @@ class LocalColabNotebook:
         print(f"➕ Added {cell_type} cell (total: {len(self.cells)})")
         return len(self.cells) - 1 if index is None else index
     
-    def run_cell(self, cell_index: int, timeout: int = 60) -> Dict:
+    def run_cell(self, cell_index: int, timeout: int = 60, sync: bool = True, use_cache: bool = True) -> Dict:
         """
         Run cell like local Jupyter but execute on Colab
         Provides local comfort with cloud power
+        
+        sync=False skips the file syncs and auto-save around the cell, for
+        callers that do them once for a whole run (run_all_cells).
+        use_cache=False skips the result-cache lookup (results are still stored).
         """
         if cell_index >= len(self.cells):
             return {"status": "error", "error": f"Cell index {cell_index} out of range"}
@@ -171,6 +338,23 @@ class LocalColabNotebook:
         if cell.cell_type != "code":
             return {"status": "success", "output": ""}
         
+        cache_keys = self._cache_keys() if self.result_cache is not None else None
+        if cache_keys is not None and use_cache:
+            cached = self.result_cache.get(cache_keys[cell_index])
+            if cached is not None:
+                print(f"♻️ Cell {cell_index + 1}/{len(self.cells)}: output from the result cache")
+                result = self._record_replay(cell_index, cached, cache_keys[cell_index])
+                if sync:
+                    self.save_notebook()
+                return result
+            
+            # Cells this one reads from must really have run in the session
+            providers = self._with_stale_providers([cell_index], cache_keys)[:-1]
+            if providers:
+                ran = self.run_cells(providers, timeout_per_cell=timeout, sync=sync)
+                if not ran or ran[-1]['status'] != 'success':
+                    return ran[-1] if ran else {"status": "error", "error": "Upstream cells did not run"}
+        
         print(f"🚀 Running cell {cell_index + 1}/{len(self.cells)} on Colab...")
         
         # Update state
@@ -182,40 +366,38 @@ class LocalColabNotebook:
         
         try:
             # Sync local files before execution
-            print("📤 Syncing local files to Colab...")
-            self.file_sync.sync_to_colab()
+            if sync:
+                print("📤 Syncing local files to Colab...")
+                self.file_sync.sync_to_colab()
             
             # Prepare code with workspace setup
             workspace_code = f"""
 # Change to workspace directory
 import os
-os.chdir('/content/workspace')
+os.chdir({self.file_sync.colab_mount!r})
 
 # User code starts here
 {cell.source}
 """
             
             # Execute on Colab
-            result = self.colab_bridge.execute_code(workspace_code, timeout=timeout)
+            run_key = self._cell_key(cell_index)
+            result = self.colab_bridge.execute_code(workspace_code, timeout=timeout, session=self.session)
             
             execution_time = time.time() - start_time
             
             if result.get('status') == 'success':
                 # Update cell with results
-                self.execution_count += 1
-                cell.execution_count = self.execution_count
-                cell.outputs = [{
-                    "output_type": "stream",
-                    "name": "stdout",
-                    "text": result.get('output', '')
-                }]
+                self._record_success(cell_index, result.get('output', ''), self.execution_count + 1, run_key)
+                self._store_result(cache_keys, cell_index)
                 
-                # Sync results back to local
-                print("📥 Syncing results back to local...")
-                self.file_sync.sync_from_colab()
-                
-                # Auto-save notebook
-                self.save_notebook()
+                if sync:
+                    # Sync results back to local
+                    print("📥 Syncing results back to local...")
+                    self.file_sync.sync_from_colab()
+                    
+                    # Auto-save notebook
+                    self.save_notebook()
                 
                 print(f"✅ Cell executed successfully ({execution_time:.2f}s)")
                 
@@ -228,12 +410,7 @@ os.chdir('/content/workspace')
             
             elif result.get('status') == 'error':
                 # Handle errors
-                cell.outputs = [{
-                    "output_type": "error",
-                    "ename": "ExecutionError",
-                    "evalue": result.get('error', 'Unknown error'),
-                    "traceback": [result.get('error', 'Unknown error')]
-                }]
+                self._record_error(cell_index, result.get('error', 'Unknown error'))
                 
                 print(f"❌ Cell execution failed ({execution_time:.2f}s)")
                 return {
@@ -253,6 +430,7 @@ os.chdir('/content/workspace')
         except Exception as e:
             execution_time = time.time() - start_time
             print(f"💥 Execution error: {e}")
+            cell.run_key = cell.run_state = None
             
             cell.outputs = [{
                 "output_type": "error",
@@ -271,20 +449,276 @@ os.chdir('/content/workspace')
             self.kernel_state = "idle"
             self.running_cell = None
     
-    def run_all_cells(self, timeout_per_cell: int = 60):
-        """Run all cells in sequence"""
-        print(f"🔄 Running all {len(self.cells)} cells...")
+    def _record_success(self, cell_index: int, output: str, execution_count: int, run_key: str):
+        cell = self.cells[cell_index]
+        self.execution_count = execution_count
+        cell.execution_count = execution_count
+        cell.outputs = [{
+            "output_type": "stream",
+            "name": "stdout",
+            "text": output
+        }]
+        cell.run_key = run_key
+        cell.run_state = f"{run_key}:{execution_count}"
+        cell.cache_key = None
+        cell.replayed = False
+    
+    def _record_replay(self, cell_index: int, cached: Dict, cache_key: str) -> Dict:
+        """Show a cached result as the cell's output, without running it"""
+        cell = self.cells[cell_index]
+        outputs = [{"output_type": "stream", "name": "stdout", "text": cached.get('output', '')}]
+        # Re-renders of an unchanged notebook leave its cells byte-identical
+        if [dict(output) for output in cell.outputs] != outputs:
+            cell.outputs = outputs
+        if cell.execution_count != cached.get('execution_count'):
+            cell.execution_count = cached.get('execution_count')
+        cell.run_key = self._cell_key(cell_index)
+        cell.run_state = f"{cell.run_key}:replayed"
+        cell.cache_key = cache_key
+        cell.replayed = True
+        return {
+            "status": "success",
+            "cached": True,
+            "output": cached.get('output', ''),
+            "execution_time": 0,
+            "execution_count": cell.execution_count
+        }
+    
+    def _store_result(self, cache_keys: Optional[Dict[int, str]], cell_index: int):
+        if cache_keys is not None:
+            cell = self.cells[cell_index]
+            cell.cache_key = cache_keys[cell_index]
+            self.result_cache.put(cache_keys[cell_index], {
+                "status": "success",
+                "output": "".join(output.get("text", "") for output in cell.outputs),
+                "execution_count": cell.execution_count
+            })
+    
+    def _record_error(self, cell_index: int, error: str):
+        cell = self.cells[cell_index]
+        # The cell may have changed state before failing
+        cell.run_key = cell.run_state = cell.cache_key = None
+        cell.replayed = False
+        cell.outputs = [{
+            "output_type": "error",
+            "ename": "ExecutionError",
+            "evalue": error,
+            "traceback": [error]
+        }]
+    
+    def run_cells(self, cell_indices: List[int], timeout_per_cell: int = 60, sync: bool = True) -> List[Dict]:
+        """
+        Run several code cells in one remote command (shared session, one
+        workspace chdir, stopping at the first error). Returns run_cell-style
+        results for the cells that ran. Falls back to one command per cell
+        on processors without notebook batches.
+        """
+        cell_indices = [i for i in cell_indices if i < len(self.cells) and self.cells[i].cell_type == "code"]
+        if not cell_indices:
+            return []
         
-        results = []
-        for i, cell in enumerate(self.cells):
-            if cell.cell_type == "code":
+        cache_keys = self._cache_keys() if self.result_cache is not None else None
+        print(f"🚀 Running {len(cell_indices)} cells on Colab in one batch...")
+        self.kernel_state = "busy"
+        self.interrupt_requested = False
+        start_time = time.time()
+        
+        try:
+            if sync:
+                print("📤 Syncing local files to Colab...")
+                self.file_sync.sync_to_colab()
+            
+            batch = self.colab_bridge.run_cells(
+                [{"index": i, "code": self.cells[i].source} for i in cell_indices],
+                session=self.session, workdir=self.file_sync.colab_mount,
+                first_execution_count=self.execution_count + 1,
+                timeout=timeout_per_cell * len(cell_indices))
+        except Exception as e:
+            print(f"💥 Execution error: {e}")
+            for i in cell_indices:
+                self.cells[i].run_key = self.cells[i].run_state = None
+            return [{"status": "error", "error": str(e), "execution_time": time.time() - start_time}]
+        finally:
+            self.kernel_state = "idle"
+        
+        if 'cells' not in batch:
+            if batch.get('status') not in ('success', 'error'):
+                return [{"status": "queued", "message": "Execution queued - start Colab notebook",
+                         "execution_time": time.time() - start_time}]
+            # Older processor: one round trip per cell
+            results = []
+            for i in cell_indices:
+                results.append(self.run_cell(i, timeout=timeout_per_cell, sync=False, use_cache=False))
+                if results[-1]['status'] != 'success':
+                    break
+        else:
+            results = []
+            for cell_result in batch['cells']:
+                i = cell_result['index']
+                if cell_result['status'] == 'success':
+                    # Keys in order, so each sees the new state of the cells before it
+                    self._record_success(i, cell_result.get('output', ''), cell_result['execution_count'],
+                                         self._cell_key(i))
+                    self._store_result(cache_keys, i)
+                    results.append({
+                        "status": "success",
+                        "output": cell_result.get('output', ''),
+                        "execution_time": cell_result.get('execution_time', 0),
+                        "execution_count": cell_result['execution_count']
+                    })
+                else:
+                    self._record_error(i, cell_result.get('error', 'Unknown error'))
+                    results.append({
+                        "status": "error",
+                        "error": cell_result.get('error'),
+                        "execution_time": cell_result.get('execution_time', 0)
+                    })
+            failed = results[-1]['status'] == 'error' if results else False
+            print(f"{'❌' if failed else '✅'} Ran {len(results)} of {len(cell_indices)} cells "
+                  f"({time.time() - start_time:.2f}s)")
+        
+        if sync and any(result['status'] == 'success' for result in results):
+            print("📥 Syncing results back to local...")
+            self.file_sync.sync_from_colab()
+            self.save_notebook()
+        return results
+    
+    def _code_cells(self) -> List[int]:
+        return [i for i, cell in enumerate(self.cells) if cell.cell_type == "code"]
+    
+    def _cell_key(self, cell_index: int) -> str:
+        """Cache key of a cell: its source plus the run state of the cells it reads from"""
+        code_cells = self._code_cells()
+        providers = find_providers([self.cells[i].source for i in code_cells])[code_cells.index(cell_index)]
+        return cell_key(self.cells[cell_index].source,
+                        [self.cells[code_cells[p]].run_state for p in providers])
+    
+    def _cache_keys(self) -> Dict[int, str]:
+        """
+        Result-cache key of every code cell: its source, the declared input
+        files, the environment and the keys of the cells it reads from (so
+        the key does not depend on what ran in this session)
+        """
+        code_cells = self._code_cells()
+        providers = find_providers([self.cells[i].source for i in code_cells])
+        inputs = self.file_sync.input_hashes(self.cache_inputs) if self.cache_inputs else None
+        environment = [self.cache_environment, self.file_sync.colab_mount]
+        keys = {}
+        for position, i in enumerate(code_cells):
+            keys[i] = self.colab_bridge.result_cache_key(self.cells[i].source, inputs, environment,
+                                                         [keys[code_cells[p]] for p in providers[position]])
+        return keys
+    
+    def _with_stale_providers(self, cell_indices: List[int], cache_keys: Dict[int, str], replaying=()) -> List[int]:
+        """
+        cell_indices plus the cells they (transitively) read from whose state
+        in the session does not match their current cache key: replayed from
+        the result cache (or about to be), or run before an input changed.
+        In notebook order.
+        """
+        code_cells = self._code_cells()
+        providers = find_providers([self.cells[i].source for i in code_cells])
+        needed = set(cell_indices)
+        pending = list(cell_indices)
+        while pending:
+            position = code_cells.index(pending.pop())
+            for p in providers[position]:
+                i = code_cells[p]
+                cell = self.cells[i]
+                if i not in needed and (i in replaying or cell.replayed or cell.cache_key != cache_keys[i]):
+                    needed.add(i)
+                    pending.append(i)
+        return sorted(needed)
+    
+    def _split_cached(self, stale: List[int]):
+        """
+        (cells to really run, {cell: (cached result, key)}) for the stale
+        cells and those whose cache key changed (e.g. an input file did)
+        """
+        cache_keys = self._cache_keys()
+        due = sorted(set(stale) | {i for i, key in cache_keys.items() if self.cells[i].cache_key != key})
+        hits = {}
+        for i in due:
+            cached = self.result_cache.get(cache_keys[i])
+            if cached is not None:
+                hits[i] = cached
+        live = self._with_stale_providers([i for i in due if i not in hits], cache_keys, replaying=hits)
+        return live, {i: (cached, cache_keys[i]) for i, cached in hits.items() if i not in live}
+    
+    def stale_cells(self) -> List[int]:
+        """Code cells that run_all_cells would execute: changed, never run, or downstream of a re-run"""
+        code_cells = self._code_cells()
+        providers = find_providers([self.cells[i].source for i in code_cells])
+        stale, states = [], {}
+        for position, i in enumerate(code_cells):
+            cell = self.cells[i]
+            key = cell_key(cell.source, [states[p] for p in providers[position]])
+            if cell.run_key == key:
+                states[position] = cell.run_state
+            else:
+                stale.append(i)
+                states[position] = f"{key}:pending"  # Re-running changes its state
+        return stale
+    
+    def run_all_cells(self, timeout_per_cell: int = 60, force: bool = False, batch: bool = True):
+        """
+        Run all cells in sequence, skipping cells whose source and upstream
+        state are unchanged since their last successful run (force=True runs
+        every cell). Cells to run go to Colab in one batch command
+        (batch=False sends one command per cell); files are synced once for
+        the whole run. With a result cache, stale cells whose output is cached
+        are filled in from it instead of running (unless force=True).
+        """
+        code_cells = self._code_cells()
+        to_run = code_cells if force else self.stale_cells()
+        replays = {}
+        if self.result_cache is not None and not force:
+            to_run, replays = self._split_cached(to_run)
+        print(f"🔄 Running {len(to_run)} of {len(code_cells)} code cells "
+              f"({len(code_cells) - len(to_run) - len(replays)} up to date"
+              + (f", {len(replays)} from the result cache)..." if replays else ")..."))
+        
+        if to_run:
+            print("📤 Syncing local files to Colab...")
+            self.file_sync.sync_to_colab()
+        
+        if batch:
+            executed = dict(zip(to_run, self.run_cells(to_run, timeout_per_cell, sync=False)))
+        else:
+            executed = {}
+            for i in to_run:
                 print(f"\n📋 Cell {i + 1}/{len(self.cells)}:")
-                result = self.run_cell(i, timeout=timeout_per_cell)
-                results.append(result)
-                
-                if result['status'] == 'error':
+                executed[i] = self.run_cell(i, timeout=timeout_per_cell, sync=False, use_cache=False)
+                if executed[i]['status'] == 'error':
+                    break
+        
+        results = []
+        for i in code_cells:
+            if i in executed:
+                results.append(executed[i])
+                if executed[i]['status'] == 'error':
                     print(f"⚠️ Stopping execution due to error in cell {i + 1}")
                     break
+            elif i in replays:
+                results.append(self._record_replay(i, *replays[i]))
+            elif i in to_run:
+                break  # Not reached: an earlier cell failed
+            else:
+                cell = self.cells[i]
+                results.append({
+                    "status": "success",
+                    "cached": True,
+                    "output": "".join(output.get("text", "") for output in cell.outputs),
+                    "execution_time": 0,
+                    "execution_count": cell.execution_count
+                })
+        
+        if any(result['status'] == 'success' and not result.get('cached') for result in results):
+            print("📥 Syncing results back to local...")
+            self.file_sync.sync_from_colab()
+            self.save_notebook()
+        elif replays:
+            self.save_notebook()
         
         print(f"✅ Finished running cells")
         return results
@@ -295,9 +729,10 @@ os.chdir('/content/workspace')
             self.interrupt_requested = True
             print("🛑 Interrupting kernel execution...")
             
-            # Note: Actual interruption would require Colab API support
-            # For now, we set a flag and rely on timeout
-            
+            # The processor raises KeyboardInterrupt in the running cell
+            result = self.colab_bridge.cancel()
+            if result.get('status') != 'success':
+                print(f"⚠️ Interrupt not confirmed: {result.get('error') or result.get('message', '')}")
             return True
         else:
             print("ℹ️ No execution to interrupt")
@@ -312,6 +747,11 @@ os.chdir('/content/workspace')
         for cell in self.cells:
             cell.execution_count = None
             cell.outputs = []
+            cell.run_key = cell.run_state = cell.cache_key = None
+            cell.replayed = False
+        
+        # Fresh namespace on the processor
+        self.session = self._new_session()
         
         # Reinitialize Colab
         self.kernel_state = "dead"
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Lazy .ipynb Storage
+Indexes a notebook file by byte ranges instead of parsing it: top-level
+fields are parsed, cells stay on disk until they are used, and outputs
+above LAZY_OUTPUT_BYTES (typically base64 images) stay on disk even then,
+as OutputRef mappings that read their byte range on first access.
+
+Saving writes a temp file and renames it over the notebook. Cells that
+were not changed are copied over byte for byte, so only edited cells are
+re-serialized.
+"""
+
+import os
+import re
+import json
+import mmap
+import threading
+from contextlib import nullcontext
+from collections.abc import Mapping
+from pathlib import Path
+
+# Outputs at least this large are left on disk when their cell is loaded
+LAZY_OUTPUT_BYTES = 64 * 1024
+
+_COPY_CHUNK = 1024 * 1024
+
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_STRUCTURE = re.compile(rb'["{}\[\]]')
+_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+_SCALAR = re.compile(rb'[^,\]}\s]+')
+
+
+def _skip_ws(data, pos):
+    return _WHITESPACE.match(data, pos).end()
+
+
+def _string_end(data, pos):
+    match = _STRING.match(data, pos)
+    if match is None:
+        raise ValueError(f"Unterminated JSON string at byte {pos}")
+    return match.end()
+
+
+def value_end(data, pos):
+    """End offset of the JSON value starting at pos, without parsing it"""
+    first = data[pos:pos + 1]
+    if first == b'"':
+        return _string_end(data, pos)
+    if first not in (b'{', b'['):
+        return _SCALAR.match(data, pos).end()
+    depth = 0
+    while True:
+        match = _STRUCTURE.search(data, pos)
+        if match is None:
+            raise ValueError(f"Unterminated JSON value at byte {pos}")
+        if match.group() == b'"':
+            pos = _string_end(data, match.start())
+            continue
+        depth += 1 if match.group() in (b'{', b'[') else -1
+        pos = match.end()
+        if depth == 0:
+            return pos
+
+
+def array_items(data, pos):
+    """(start, end) spans of the elements of the array starting at pos"""
+    spans = []
+    pos = _skip_ws(data, pos + 1)
+    while data[pos:pos + 1] != b']':
+        end = value_end(data, pos)
+        spans.append((pos, end))
+        pos = _skip_ws(data, end)
+        if data[pos:pos + 1] == b',':
+            pos = _skip_ws(data, pos + 1)
+    return spans
+
+
+def object_members(data, pos):
+    """{key: (start, end)} value spans of the object starting at pos"""
+    members = {}
+    pos = _skip_ws(data, pos + 1)
+    while data[pos:pos + 1] != b'}':
+        key_end = _string_end(data, pos)
+        key = json.loads(data[pos:key_end])
+        start = _skip_ws(data, _skip_ws(data, key_end) + 1)  # Past the ':'
+        end = value_end(data, start)
+        members[key] = (start, end)
+        pos = _skip_ws(data, end)
+        if data[pos:pos + 1] == b',':
+            pos = _skip_ws(data, pos + 1)
+    return members
+
+
+def _parse_without(data, start, end, hole):
+    """Parse data[start:end] with the value at hole replaced by an empty list"""
+    return json.loads(data[start:hole[0]] + b'[]' + data[hole[1]:end])
+
+
+class CellSpan:
+    """Where a cell (and each of its outputs) lives in the notebook file"""
+
+    __slots__ = ('start', 'end', 'outputs', 'outputs_span')
+
+    def __init__(self, start, end, outputs=(), outputs_span=None):
+        self.start = start
+        self.end = end
+        self.outputs = list(outputs)
+        self.outputs_span = outputs_span
+
+    def shifted(self, delta):
+        return CellSpan(self.start + delta, self.end + delta,
+                        [(start + delta, end + delta) for start, end in self.outputs],
+                        self.outputs_span and (self.outputs_span[0] + delta, self.outputs_span[1] + delta))
+
+
+class OutputRef(Mapping):
+    """A cell output kept as a byte range of the notebook file, parsed on first access"""
+
+    def __init__(self, path, start, end, lock=None):
+        self.path = Path(path)
+        self.start = start
+        self.end = end
+        self._value = None
+        # The NotebookFile's lock: its rewrite moves this range
+        self._lock = lock or nullcontext()
+
+    @property
+    def size(self):
+        return self.end - self.start
+
+    @property
+    def loaded(self):
+        return self._value is not None
+
+    def raw(self):
+        with self._lock, open(self.path, 'rb') as f:
+            f.seek(self.start)
+            return f.read(self.size)
+
+    def load(self):
+        if self._value is None:
+            self._value = json.loads(self.raw())
+        return self._value
+
+    def rebind(self, path, start, end):
+        """Point at the output's new location after the notebook was rewritten"""
+        self.path, self.start, self.end = Path(path), start, end
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        return f"OutputRef({self.path.name}[{self.start}:{self.end}])"
+
+
+class NotebookFile:
+    """Byte-range index of one .ipynb file
+
+    Hold lock while rewriting the file and re-pointing spans at the new
+    one: read_cell() and OutputRef reads take it, so none reads a span
+    that no longer matches the file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.RLock()
+
+    def scan(self):
+        """(top-level fields without 'cells', [CellSpan per cell])"""
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"{self.path} is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                root = _skip_ws(data, 0)
+                root_end = value_end(data, root)
+                members = object_members(data, root)
+                if 'cells' not in members:
+                    return json.loads(data[root:root_end]), []
+                top = _parse_without(data, root, root_end, members['cells'])
+                top.pop('cells', None)
+
+                spans = []
+                for start, end in array_items(data, members['cells'][0]):
+                    outputs_span = object_members(data, start).get('outputs')
+                    outputs = array_items(data, outputs_span[0]) if outputs_span else []
+                    spans.append(CellSpan(start, end, outputs, outputs_span))
+                return top, spans
+
+    def read_cell(self, span):
+        """(cell dict without outputs, [output dict or OutputRef]); large outputs are not read"""
+        with self.lock, open(self.path, 'rb') as f:
+            def read(start, end):
+                f.seek(start)
+                return f.read(end - start)
+
+            if span.outputs_span is None:
+                return json.loads(read(span.start, span.end)), []
+            cell = json.loads(read(span.start, span.outputs_span[0]) + b'[]' +
+                              read(span.outputs_span[1], span.end))
+            outputs = []
+            for start, end in span.outputs:
+                if end - start >= LAZY_OUTPUT_BYTES:
+                    outputs.append(OutputRef(self.path, start, end, self.lock))
+                else:
+                    outputs.append(json.loads(read(start, end)))
+            return cell, outputs
+
+    def write(self, top, cells):
+        """
+        Atomically write a notebook. cells holds, per cell, either a CellSpan
+        of this file (copied as-is) or a (cell dict without outputs, outputs)
+        pair to serialize. Returns the CellSpans of the new file.
+        """
+        temp_path = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        source = open(self.path, 'rb') if self.path.exists() else None
+        spans = []
+        try:
+            with open(temp_path, 'wb') as out:
+                out.write(b'{\n "cells": [')
+                for index, cell in enumerate(cells):
+                    out.write(b'\n' if index == 0 else b',\n')
+                    if isinstance(cell, CellSpan):
+                        start = out.tell()
+                        self._copy(source, out, cell.start, cell.end)
+                        spans.append(cell.shifted(start - cell.start))
+                    else:
+                        spans.append(self._write_cell(out, source, *cell))
+                out.write(b'\n ]')
+                for key, value in top.items():
+                    if key != 'cells':
+                        out.write(f',\n {json.dumps(key)}: '.encode('utf-8'))
+                        out.write(json.dumps(value, indent=1, ensure_ascii=False).replace('\n', '\n ').encode('utf-8'))
+                out.write(b'\n}\n')
+                out.flush()
+                os.fsync(out.fileno())
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if source is not None:
+                source.close()
+        os.replace(temp_path, self.path)
+        return spans
+
+    @staticmethod
+    def _copy(source, out, start, end):
+        source.seek(start)
+        remaining = end - start
+        while remaining:
+            chunk = source.read(min(_COPY_CHUNK, remaining))
+            if not chunk:
+                raise ValueError("Notebook file changed while saving")
+            out.write(chunk)
+            remaining -= len(chunk)
+
+    def _write_cell(self, out, source, cell, outputs):
+        start = out.tell()
+        fields = {key: value for key, value in cell.items() if key != 'outputs'}
+        head = json.dumps(fields, indent=1, ensure_ascii=False).replace('\n', '\n  ')
+        out.write(b'  ' + head[:-1].rstrip().encode('utf-8'))
+        out.write(b',\n   "outputs": ' if fields else b'"outputs": ')
+        outputs_start = out.tell()
+        out.write(b'[')
+        output_spans = []
+        for index, output in enumerate(outputs):
+            out.write(b'\n    ' if index == 0 else b',\n    ')
+            output_start = out.tell()
+            if isinstance(output, OutputRef) and output.path == self.path:
+                self._copy(source, out, output.start, output.end)
+            else:
+                out.write(json.dumps(dict(output), ensure_ascii=False).encode('utf-8'))
+            output_spans.append((output_start, out.tell()))
+        out.write(b'\n   ]' if outputs else b']')
+        outputs_end = out.tell()
+        out.write(b'\n  }')
+        # Leading indentation is not part of the cell
+        return CellSpan(start + 2, out.tell(), output_spans, (outputs_start, outputs_end))
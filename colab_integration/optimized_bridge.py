@@ -10,7 +10,7 @@ Based on actual measurements:
 from .universal_bridge import UniversalColabBridge
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 import queue
 
 class OptimizedColabBridge(UniversalColabBridge):
@@ -18,7 +18,6 @@ class OptimizedColabBridge(UniversalColabBridge):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.result_cache = {}
         self.pending_results = queue.Queue()
         self.executor = ThreadPoolExecutor(max_workers=3)
         
@@ -26,26 +25,21 @@ class OptimizedColabBridge(UniversalColabBridge):
         """Optimized polling based on real Drive API timings"""
         start_time = time.time()
         poll_count = 0
+        query = self.protocol.result_query(command_id, self.folder_id)
         
         # Since each poll takes ~400ms, adjust our strategy
         while time.time() - start_time < timeout:
             poll_count += 1
             elapsed = time.time() - start_time
             
-            # Check both patterns
-            files = []
-            for pattern in [f"result_{command_id}.json", f"result_result_{command_id}.json"]:
-                query = f"name='{pattern}' and '{self.folder_id}' in parents and trashed=false"
-                results = self.drive_service.files().list(q=query, fields="files(id)").execute()
-                
-                files = results.get('files', [])
-                if files:
-                    break
-                    
+            # One exact-name lookup per poll
+            results = self.drive_service.files().list(q=query, fields="files(id)").execute()
+            files = results.get('files', [])
+            
             if files:
                 # Read result
                 content = self.drive_service.files().get_media(fileId=files[0]['id']).execute()
-                result = json.loads(content.decode('utf-8'))
+                result = self._read_result(content)
                 
                 # Clean up result file
                 self.drive_service.files().delete(fileId=files[0]['id']).execute()
@@ -74,93 +68,258 @@ class OptimizedColabBridge(UniversalColabBridge):
 
 
 class SmartBatchBridge(UniversalColabBridge):
-    """Bridge that batches operations for efficiency"""
+    """
+    Bridge that multiplexes many commands through Drive: queued commands are
+    written as one batch manifest, the processor runs them and writes one
+    combined result, which is demultiplexed to per-command futures.
+    Drive calls per command drop from ~4 to (4 + polls) / batch size.
+    """
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, max_batch=50, linger=0.05, poll_interval=0.5, **kwargs):
         super().__init__(*args, **kwargs)
         self.command_queue = queue.Queue()
-        self.result_futures = {}
+        self.result_futures = {}     # command id -> Future
+        self.pending_batches = {}    # batch id -> {'entries', 'sessions': {session: last command id}}
+        self.max_batch = max_batch
+        self.linger = linger         # How long to wait for more commands once one arrives
+        self.poll_interval = poll_interval
+        self.batching_supported = True
         self.batch_thread = None
         self.stop_batching = False
+        self._deferred = []
+        self._start_lock = threading.Lock()
         
     def initialize(self):
         """Initialize and start batch processor"""
         super().initialize()
         self.start_batch_processor()
+    
+    def submit_command(self, command_type, payload=None, timeout=30, session=None):
+        """Queue a command for the next batch; returns a Future of its result
+        
+        Commands sharing a session key run in submission order, and never in
+        two batches that are outstanding at the same time. A batch that timed
+        out keeps its sessions blocked until its result shows up; commands
+        still waiting behind it by their deadline fail with 'blocked_by'.
+        """
+        if not self.batching_supported:
+            return super().submit_command(command_type, payload, timeout=timeout, session=session)
+        return self._queue_command(command_type, payload, timeout, session)[1]
+    
+    def _queue_command(self, command_type, payload, timeout, session=None):
+        """Put a command in the batch queue; returns (command id, Future of its result)"""
+        with self._start_lock:
+            if not self.drive_service:
+                self.initialize()
+            if self.batch_thread is None:
+                self.start_batch_processor()
         
+        command = {
+            'id': self._new_command_id(),
+            'type': command_type,
+            **(payload or {}),
+            'timestamp': time.time(),
+            'tool': self.tool_name,
+            **self._result_preferences()
+        }
+        if session is not None:
+            command['session'] = session
+        future = Future()
+        self.result_futures[command['id']] = future
+        self.command_queue.put({
+            'command': command,
+            'future': future,
+            'session': session,
+            'deadline': time.time() + timeout
+        })
+        return command['id'], future
+    
+    def run_command(self, command_type, payload=None, timeout=30, on_submit=None):
+        """Synchronous commands ride along in the next batch too"""
+        if not self.batching_supported:
+            return super().run_command(command_type, payload, timeout, on_submit=on_submit)
+        
+        command_id, future = self._queue_command(command_type, payload, timeout)
+        if on_submit:
+            # Cancellable from here on: the processor skips it if it has not started
+            on_submit(command_id)
+        try:
+            return future.result()
+        except TimeoutError:
+            return {
+                'status': 'pending',
+                'message': f'Batched request not answered within {timeout}s'
+            }
+    
     def start_batch_processor(self):
         """Process commands in batches to reduce API calls"""
         def batch_worker():
             while not self.stop_batching:
-                # Collect commands for batch processing
-                commands_batch = []
-                
-                # Wait up to 100ms to collect multiple commands
                 try:
-                    while len(commands_batch) < 5:  # Max 5 per batch
-                        cmd = self.command_queue.get(timeout=0.1)
-                        commands_batch.append(cmd)
-                except queue.Empty:
-                    pass
-                
-                if commands_batch:
-                    # Process batch
-                    for cmd in commands_batch:
-                        try:
-                            self._write_command(cmd['command'])
-                            cmd['future'].set_result({'status': 'sent'})
-                        except Exception as e:
-                            cmd['future'].set_exception(e)
-                
-                # Check for results in batch
-                try:
-                    # Get ALL result files in one API call
-                    results = self.drive_service.files().list(
-                        q=f"name contains 'result_' and '{self.folder_id}' in parents",
-                        fields='files(id, name)',
-                        pageSize=20
-                    ).execute()
-                    
-                    for file in results.get('files', []):
-                        self._process_result_file(file)
-                        
-                except Exception:
-                    pass
-                    
-                # Wait before next batch
-                time.sleep(0.5)  # Balance API rate limits
+                    entries = self._collect_batch()
+                    if entries:
+                        self._send_batch(entries)
+                    if self.pending_batches:
+                        self._collect_results()
+                        self._expire_batches()
+                except Exception as e:
+                    print(f"⚠️ Batch worker error: {e}")
+                    time.sleep(self.poll_interval)
                 
         self.batch_thread = threading.Thread(target=batch_worker)
         self.batch_thread.daemon = True
         self.batch_thread.start()
+    
+    def _collect_batch(self):
+        """Gather queued commands; also serves as the wait between result polls"""
+        entries, self._deferred = self._deferred, []
+        
+        try:
+            entries.append(self.command_queue.get(timeout=self.poll_interval))
+        except queue.Empty:
+            pass
+        
+        # Linger briefly so commands submitted together share one manifest
+        if entries:
+            deadline = time.time() + self.linger
+            while len(entries) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entries.append(self.command_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        
+        busy_sessions = {}
+        for batch in self.pending_batches.values():
+            busy_sessions.update(batch['sessions'])
+        
+        ready = []
+        now = time.time()
+        for entry in entries:
+            blocked_by = busy_sessions.get(entry['session']) if entry['session'] is not None else None
+            if blocked_by is None:
+                ready.append(entry)
+            elif now > entry['deadline']:
+                # Sending now could overtake the earlier command on the processor
+                self._settle(entry, result={
+                    'status': 'error',
+                    'error': f"Not sent: command {blocked_by} of session '{entry['session']}' has no result yet",
+                    'blocked_by': blocked_by
+                })
+            else:
+                self._deferred.append(entry)
+        return ready
+    
+    def _send_batch(self, entries):
+        """Write one batch manifest for the given queued commands"""
+        batch_id = f"batch_{self.instance_id}_{int(time.time())}_{next(self._command_seq)}"
+        manifest = {
+            'id': batch_id,
+            'type': 'batch',
+            'commands': [entry['command'] for entry in entries],
+            'timestamp': time.time(),
+            'tool': self.tool_name
+        }
+        
+        try:
+            self._write_command(manifest)
+        except Exception as e:
+            for entry in entries:
+                self._settle(entry, exception=e)
+            return
+        
+        self.pending_batches[batch_id] = {
+            'entries': entries,
+            'sessions': {entry['session']: entry['command']['id'] for entry in entries if entry['session'] is not None}
+        }
+    
+    def _collect_results(self):
+        """One list call finds every finished batch of this bridge"""
+        results = self.drive_service.files().list(
+            q=f"name contains '{self.protocol.result_prefix}batch_{self.instance_id}_' and '{self.folder_id}' in parents and trashed=false",
+            fields='files(id, name)',
+            pageSize=100
+        ).execute()
+        
+        for file in results.get('files', []):
+            self._process_result_file(file)
+    
+    def _expire_batches(self):
+        """
+        Time out each command on its own deadline. A batch is dropped once all
+        of them are gone, unless it has sessions: the processor may still be
+        running it, so it blocks their next commands until its result arrives.
+        """
+        now = time.time()
+        for batch_id, batch in list(self.pending_batches.items()):
+            waiting = []
+            for entry in batch['entries']:
+                if now > entry['deadline']:
+                    self._settle(entry, exception=TimeoutError(
+                        f"Command {entry['command']['id']} timed out in {batch_id}"))
+                else:
+                    waiting.append(entry)
+            batch['entries'] = waiting
+            if not waiting and not batch['sessions']:
+                del self.pending_batches[batch_id]
         
     def _process_result_file(self, file):
-        """Process a result file"""
-        file_name = file['name']
-        
-        # Extract command ID
-        for prefix in ['result_result_', 'result_']:
-            if file_name.startswith(prefix):
-                cmd_id = file_name.replace(prefix, '').replace('.json', '')
-                break
-        else:
+        """Demultiplex a combined batch result to the waiting futures"""
+        batch_id = self.protocol.result_id(file['name'])
+        batch = self.pending_batches.pop(batch_id, None)
+        
+        try:
+            if batch is not None:
+                content = self.drive_service.files().get_media(fileId=file['id']).execute()
+                result = self._read_result(content)
+        finally:
+            # Ours either way: delivered now, or an abandoned (timed out) batch
+            self.delete_file(file['id'])
+        
+        if batch is None:
             return
-            
-        # Check if we're waiting for this
-        if cmd_id in self.result_futures:
+        
+        per_command = result.get('results')
+        if per_command is None:
+            # The processor ran the manifest as plain code - send commands one by one
+            print("⚠️ Processor does not support batches - falling back to per-command transport")
+            self.batching_supported = False
+            for entry in batch['entries']:
+                self._resubmit(entry)
+            return
+        
+        for entry in batch['entries']:
+            command_result = per_command.get(entry['command']['id'])
+            if command_result is None:
+                command_result = {'status': 'error', 'error': f"No result for command in {batch_id}"}
+            self._settle(entry, result=command_result)
+    
+    def _resubmit(self, entry):
+        command = dict(entry['command'])
+        command_type = command.pop('type')
+        payload = {k: v for k, v in command.items() if k not in ('id', 'timestamp', 'tool')}
+        timeout = max(1, entry['deadline'] - time.time())
+        inner = UniversalColabBridge.submit_command(self, command_type, payload, timeout=timeout,
+                                                    session=entry['session'])
+        
+        def relay(done):
             try:
-                # Get result
-                content = self.drive_service.files().get_media(fileId=file['id']).execute()
-                result = json.loads(content.decode('utf-8'))
-                
-                # Deliver result
-                self.result_futures[cmd_id].set_result(result)
-                del self.result_futures[cmd_id]
-                
-                # Clean up
-                self.drive_service.files().delete(fileId=file['id']).execute()
-            except:
-                pass
+                self._settle(entry, result=done.result())
+            except Exception as e:
+                self._settle(entry, exception=e)
+        inner.add_done_callback(relay)
+    
+    def _settle(self, entry, result=None, exception=None):
+        self.result_futures.pop(entry['command']['id'], None)
+        future = entry['future']
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
 
 
 def create_optimized_bridge(tool_name='vscode'):
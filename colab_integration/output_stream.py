@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Streaming Output
+Processor side: StreamingOutput stands in for the stdout/stderr capture
+buffers of a running command and publishes what was printed as sequenced
+partial files (partial_<command_id>_<seq>.json) every interval or once
+enough output piled up, so long runs show progress before they finish.
+Bridge side: partial_file_name/parse_partial_name describe the naming.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+
+DEFAULT_STREAM_INTERVAL = 0.5        # seconds between flushes
+DEFAULT_STREAM_CHUNK_BYTES = 64 * 1024  # flush early once this much is pending
+
+_PARTIAL_PATTERN = re.compile(r'^partial_(?P<command_id>.+)_(?P<seq>\d{6})\.json$')
+
+
+def partial_prefix(command_id):
+    return f"partial_{command_id}_"
+
+
+def partial_file_name(command_id, seq):
+    return f"{partial_prefix(command_id)}{seq:06d}.json"
+
+
+def parse_partial_name(name):
+    """(command_id, seq) for a partial file name, or None"""
+    match = _PARTIAL_PATTERN.match(name)
+    if not match:
+        return None
+    return match.group('command_id'), int(match.group('seq'))
+
+
+def stream_options(command):
+    """(interval, chunk_bytes) if the command asked for streaming, else None"""
+    stream = command.get('stream')
+    if not stream:
+        return None
+    stream = stream if isinstance(stream, dict) else {}
+    interval = stream.get('interval_ms')
+    chunk_kb = stream.get('chunk_kb')
+    return (interval / 1000.0 if interval else DEFAULT_STREAM_INTERVAL,
+            int(chunk_kb * 1024) if chunk_kb else DEFAULT_STREAM_CHUNK_BYTES)
+
+
+class _Channel:
+    """File-like writer feeding one stream (stdout or stderr) of a StreamingOutput"""
+
+    def __init__(self, output, name):
+        self._output = output
+        self.name = name
+
+    def write(self, text):
+        self._output._append(self.name, text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def getvalue(self):
+        """Only the part not published yet (published chunks are gone)"""
+        return self._output._pending_text(self.name)
+
+
+class StreamingOutput:
+    """
+    Buffers a command's output and hands chunks to sink(seq, chunk) from a
+    background flusher. chunk is {'command_id', 'seq', 'stdout', 'stderr',
+    'timestamp'}; seq starts at 1. A failing sink keeps the chunk pending
+    and retries on the next flush.
+    """
+
+    def __init__(self, command_id, sink, interval=DEFAULT_STREAM_INTERVAL, chunk_bytes=DEFAULT_STREAM_CHUNK_BYTES):
+        self.command_id = command_id
+        self.sink = sink
+        self.interval = interval
+        self.chunk_bytes = chunk_bytes
+        self.stdout = _Channel(self, 'stdout')
+        self.stderr = _Channel(self, 'stderr')
+        self.chunks_sent = 0
+        self.bytes_sent = 0
+
+        self._pending = {'stdout': [], 'stderr': []}
+        self._pending_bytes = 0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"stream-{command_id}", daemon=True)
+        self._thread.start()
+
+    def _append(self, name, text):
+        if not text:
+            return
+        with self._condition:
+            self._pending[name].append(text)
+            self._pending_bytes += len(text)
+            if self._pending_bytes >= self.chunk_bytes:
+                self._condition.notify()
+
+    def _pending_text(self, name):
+        with self._condition:
+            return ''.join(self._pending[name])
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closed and self._pending_bytes < self.chunk_bytes:
+                    self._condition.wait(self.interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Publish pending output as the next chunk (no-op when nothing is pending)"""
+        with self._flush_lock:
+            with self._condition:
+                if not self._pending_bytes:
+                    return
+                stdout = ''.join(self._pending['stdout'])
+                stderr = ''.join(self._pending['stderr'])
+                self._pending = {'stdout': [], 'stderr': []}
+                self._pending_bytes = 0
+
+            seq = self.chunks_sent + 1
+            chunk = {'command_id': self.command_id, 'seq': seq, 'stdout': stdout, 'stderr': stderr,
+                     'timestamp': time.time()}
+            try:
+                self.sink(seq, chunk)
+            except Exception as e:
+                print(f"⚠️ Could not publish output chunk {seq}: {e}")
+                with self._condition:
+                    self._pending['stdout'].insert(0, stdout)
+                    self._pending['stderr'].insert(0, stderr)
+                    self._pending_bytes += len(stdout) + len(stderr)
+                return
+            self.chunks_sent = seq
+            self.bytes_sent += len(stdout) + len(stderr)
+
+    def close(self):
+        """Stop the flusher and publish whatever is left; returns the number of chunks"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+        return self.chunks_sent
+
+
+def folder_sink(folder):
+    """Sink writing partial files into a (mounted) folder, atomically"""
+    def sink(seq, chunk):
+        path = os.path.join(folder, partial_file_name(chunk['command_id'], seq))
+        with open(path + '.tmp', 'w') as f:
+            json.dump(chunk, f)
+        os.replace(path + '.tmp', path)
+    return sink
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Package Installer
+Installs the packages of an install_package command with one pip
+invocation, so pip resolves them together, and skips requirements that
+are already installed at a compatible version.
+
+With a wheel cache directory (on the Drive mount in Colab) every wheel pip
+downloads or builds is kept there, and later installs - including the
+ones of a freshly started runtime - are served from the cache without
+touching the network when it has everything.
+"""
+
+import os
+import re
+import sys
+import ast
+import sysconfig
+import subprocess
+import importlib
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+except ImportError:
+    Requirement = None
+
+# Wheel cache location when the Colab Drive mount is present
+DRIVE_WHEEL_CACHE = '/content/drive/MyDrive/claude-tools-wheels'
+
+# Import names that differ from the name of the distribution providing them
+IMPORT_TO_DISTRIBUTION = {
+    'sklearn': 'scikit-learn',
+    'skimage': 'scikit-image',
+    'cv2': 'opencv-python',
+    'PIL': 'Pillow',
+    'yaml': 'PyYAML',
+    'bs4': 'beautifulsoup4',
+    'dateutil': 'python-dateutil',
+    'dotenv': 'python-dotenv',
+    'attr': 'attrs',
+    'Crypto': 'pycryptodome',
+}
+
+_NAME_PATTERN = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def default_cache_dir():
+    """COLAB_PROCESSOR_WHEEL_CACHE, else the Drive wheel cache if Drive is mounted"""
+    configured = os.environ.get('COLAB_PROCESSOR_WHEEL_CACHE')
+    if configured is not None:
+        return configured or None  # Empty disables the cache
+    if Path(DRIVE_WHEEL_CACHE).parent.is_dir():
+        return DRIVE_WHEEL_CACHE
+    return None
+
+
+def requirement_name(spec):
+    """Distribution name of a requirement string ('torch>=2.0' -> 'torch')"""
+    match = _NAME_PATTERN.match(spec)
+    if not match:
+        raise ValueError(f"Invalid requirement: {spec!r}")
+    return match.group(1)
+
+
+def installed_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def is_satisfied(spec):
+    """Whether a requirement is already installed at a compatible version"""
+    if Requirement is None:
+        # Without packaging only bare names and exact pins can be checked
+        version = installed_version(requirement_name(spec))
+        rest = spec[_NAME_PATTERN.match(spec).end():].strip()
+        if not rest:
+            return version is not None
+        return version is not None and rest.startswith('==') and rest[2:].strip() == version
+    try:
+        requirement = Requirement(spec)
+    except InvalidRequirement as e:
+        raise ValueError(f"Invalid requirement: {spec!r} ({e})")
+    if requirement.marker is not None and not requirement.marker.evaluate():
+        return True  # Not meant for this interpreter/platform
+    version = installed_version(requirement.name)
+    return version is not None and requirement.specifier.contains(version, prereleases=True)
+
+
+def imported_modules(code):
+    """Top-level module names imported by a piece of code (empty if it does not parse)"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            candidates = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            candidates = [node.module]
+        else:
+            continue
+        for name in candidates:
+            top = name.split('.')[0]
+            if top not in names:
+                names.append(top)
+    return names
+
+
+@lru_cache(maxsize=1)
+def stdlib_modules():
+    """Top-level standard library module names"""
+    names = getattr(sys, 'stdlib_module_names', None)  # Python 3.10+
+    if names is None:
+        # Older interpreters: whatever lives in the stdlib and lib-dynload directories
+        names = set()
+        stdlib = Path(sysconfig.get_paths()['stdlib'])
+        for directory in (stdlib, stdlib / 'lib-dynload'):
+            if not directory.is_dir():
+                continue
+            for entry in directory.iterdir():
+                if entry.name != 'site-packages' and (entry.suffix in ('.py', '.so', '.pyd') or entry.is_dir()):
+                    names.add(entry.name.split('.')[0])
+    return frozenset(names) | frozenset(sys.builtin_module_names)
+
+
+def packages_for_code(code):
+    """Distributions a piece of code needs, from its import statements (standard library excluded)"""
+    # packages_distributions is Python 3.10+; before that import names are taken as distribution names
+    lookup = getattr(metadata, 'packages_distributions', None)
+    installed = lookup() if lookup else {}
+    packages = []
+    for module in imported_modules(code):
+        if module in stdlib_modules():
+            continue
+        if module in IMPORT_TO_DISTRIBUTION:
+            package = IMPORT_TO_DISTRIBUTION[module]
+        elif installed.get(module):
+            package = installed[module][0]
+        else:
+            package = module
+        if package not in packages:
+            packages.append(package)
+    return packages
+
+
+class PackageInstaller:
+    """Resolves and installs requirement lists, optionally through a wheel cache"""
+
+    def __init__(self, cache_dir=None, runner=None):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        # runner(argv) -> CompletedProcess; subprocess.run by default
+        self.runner = runner or self._run
+
+    @staticmethod
+    def _run(argv):
+        return subprocess.run(argv, capture_output=True, text=True)
+
+    def _pip(self, *args):
+        return self.runner([sys.executable, '-m', 'pip', *args, '--disable-pip-version-check'])
+
+    def plan(self, packages):
+        """Split requirements into (missing, already satisfied)"""
+        if isinstance(packages, str):
+            packages = packages.split()
+        missing, satisfied = [], []
+        for spec in packages:
+            spec = spec.strip()
+            if spec and spec not in missing and spec not in satisfied:
+                (satisfied if is_satisfied(spec) else missing).append(spec)
+        return missing, satisfied
+
+    def install(self, packages):
+        """
+        Install whatever is not already satisfied in one pip run.
+        Returns {'success', 'installed', 'skipped', 'from_cache', 'output', 'error'}
+        """
+        missing, satisfied = self.plan(packages)
+        result = {'success': True, 'installed': missing, 'skipped': satisfied, 'from_cache': False,
+                  'output': '', 'error': None}
+        if not missing:
+            result['output'] = f"Already installed: {', '.join(satisfied) or 'nothing requested'}"
+            return result
+
+        if self.cache_dir is None:
+            run = self._pip('install', *missing)
+        else:
+            run = self._install_through_cache(missing, result)
+
+        importlib.invalidate_caches()
+        if run.returncode != 0:
+            result.update(success=False, installed=[],
+                          error=f"Failed to install {', '.join(missing)}: {run.stderr}")
+            return result
+
+        source = ' (from wheel cache)' if result['from_cache'] else ''
+        result['output'] = f"Successfully installed{source}: {', '.join(missing)}"
+        if satisfied:
+            result['output'] += f"\nAlready installed: {', '.join(satisfied)}"
+        return result
+
+    def _install_through_cache(self, missing, result):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        offline = ('install', '--no-index', '--find-links', str(self.cache_dir), *missing)
+
+        # Fresh runtimes: everything may already be in the cache
+        run = self._pip(*offline)
+        if run.returncode == 0:
+            result['from_cache'] = True
+            return run
+
+        # Cache miss: fetch/build wheels for the whole set into the cache, then install from it
+        fetched = self._pip('wheel', '--wheel-dir', str(self.cache_dir), '--find-links', str(self.cache_dir),
+                            *missing)
+        if fetched.returncode != 0:
+            print(f"⚠️ Wheel cache unavailable, installing directly: {fetched.stderr.strip()[-200:]}")
+            return self._pip('install', *missing)
+        return self._pip(*offline)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Per-thread Plot Capture
+Processor workers share one pyplot figure registry and one IPython
+display function. capture_visuals() attributes the figures and display()
+calls of the calling thread to its own command, so concurrent commands
+neither take nor close each other's plots.
+
+pyplot is patched once, as soon as it is imported: while a thread
+captures, figure()/gcf()/close() work on that thread's figures and its own
+current figure. Other threads keep the stock behaviour. IPython's display
+is replaced once by a dispatcher that calls the calling thread's handler.
+"""
+
+import sys
+import threading
+import importlib.abc
+from contextlib import contextmanager
+
+_state = threading.local()      # Per thread: figures, current, on_display
+_install_lock = threading.Lock()
+_figure_lock = threading.RLock()  # pyplot numbers new figures racily
+
+
+def _capture():
+    """The calling thread's capture state, or None outside capture_visuals()"""
+    if getattr(_state, 'figures', None) is None:
+        return None
+    return _state
+
+
+def _is_open(fig):
+    from matplotlib import _pylab_helpers
+    return any(manager.canvas.figure is fig for manager in _pylab_helpers.Gcf.get_all_fig_managers())
+
+
+def _patch_pyplot(plt):
+    if getattr(plt, '_colab_bridge_patched', False):
+        return
+    original_figure, original_gcf, original_close = plt.figure, plt.gcf, plt.close
+
+    def figure(*args, **kwargs):
+        state = _capture()
+        with _figure_lock:
+            before = set(plt.get_fignums())
+            fig = original_figure(*args, **kwargs)
+        if state is not None:
+            if fig.number not in before:
+                state.figures.append(fig)
+            state.current = fig
+        return fig
+
+    def gcf():
+        state = _capture()
+        if state is None:
+            return original_gcf()
+        if state.current is not None and _is_open(state.current):
+            return state.current
+        return figure()
+
+    def close(fig=None):
+        state = _capture()
+        if state is not None and fig is None:
+            fig = state.current
+            if fig is None:
+                return None
+        elif state is not None and fig == 'all':
+            for own in state.figures:
+                original_close(own)
+            return None
+        return original_close(fig)
+
+    for name, function in (('figure', figure), ('gcf', gcf), ('close', close)):
+        function.__doc__ = getattr(plt, name).__doc__
+        function.__wrapped__ = getattr(plt, name)
+        setattr(plt, name, function)
+    plt._colab_bridge_patched = True
+
+
+class _PyplotImportHook(importlib.abc.MetaPathFinder):
+    """Patches matplotlib.pyplot right after it is first imported (it is imported lazily)"""
+
+    def find_spec(self, name, path, target=None):
+        if name != 'matplotlib.pyplot':
+            return None
+        spec = None
+        for finder in sys.meta_path:
+            if finder is not self and hasattr(finder, 'find_spec'):
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+        if spec is None:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            exec_module = spec.loader.exec_module
+
+            def patched_exec_module(module):
+                exec_module(module)
+                _patch_pyplot(module)
+            spec.loader.exec_module = patched_exec_module
+        return spec
+
+
+def _patch_display():
+    try:
+        from IPython import display
+    except ImportError:
+        return  # Not in IPython/Colab environment
+    if getattr(display.display, '_colab_bridge_dispatch', False):
+        return
+    original_display = display.display
+
+    def dispatch(*objs, **kwargs):
+        handler = getattr(_state, 'on_display', None)
+        if handler is not None:
+            handler(objs)
+        # Still call original display
+        return original_display(*objs, **kwargs)
+
+    dispatch.__doc__ = original_display.__doc__
+    dispatch._colab_bridge_dispatch = True
+    display.display = dispatch
+
+
+def install():
+    """Patch pyplot (now or once imported) and IPython display; idempotent"""
+    with _install_lock:
+        if not any(isinstance(finder, _PyplotImportHook) for finder in sys.meta_path):
+            sys.meta_path.insert(0, _PyplotImportHook())
+        plt = sys.modules.get('matplotlib.pyplot')
+        # Another thread may be importing it right now: the hook patches it once loaded
+        if plt is not None and not getattr(getattr(plt, '__spec__', None), '_initializing', False):
+            _patch_pyplot(plt)
+        _patch_display()
+
+
+@contextmanager
+def capture_visuals(on_display=None):
+    """
+    Track the pyplot figures the calling thread creates, and pass its
+    display() calls (a tuple of objects each) to on_display. Yields the list
+    the new figures are collected in.
+    """
+    install()
+    previous = (getattr(_state, 'figures', None), getattr(_state, 'current', None),
+                getattr(_state, 'on_display', None))
+    figures = []
+    _state.figures, _state.current, _state.on_display = figures, None, on_display
+    try:
+        yield figures
+    finally:
+        _state.figures, _state.current, _state.on_display = previous
+
+
+def open_figures(figures):
+    """The figures that were not closed yet"""
+    plt = sys.modules.get('matplotlib.pyplot')
+    if plt is None or not figures:
+        return []
+    return [fig for fig in figures if _is_open(fig)]
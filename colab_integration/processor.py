@@ -8,15 +8,33 @@ import os
 import json
 import time
 import subprocess
-import sys
 from io import StringIO
-from contextlib import redirect_stdout, redirect_stderr
+
+from .execution_engine import ExecutionEngine, capture_output, run_code_in_subprocess
+from .command_feed import IdleBackoff, LocalCommandFeed
+from .protocol import get_protocol
+from .session_namespaces import SessionNamespaces
+from .output_stream import StreamingOutput, folder_sink, stream_options
+from .package_installer import PackageInstaller, default_cache_dir
+
+# How often start_processor rewrites heartbeat.json
+HEARTBEAT_INTERVAL = 10
+
+def engine_session(command):
+    """ExecutionEngine ordering key; sessionless code shares the 'default' namespace, so it stays in order too"""
+    return command.get('session') or 'default'
 
 class ColabProcessor:
     """Processes commands from Claude instances in Google Colab"""
     
-    def __init__(self):
+    def __init__(self, isolation=None):
         self.session_id = f"colab_{int(time.time())}"
+        # 'thread': exec in this interpreter; 'process': a fresh interpreter per command
+        self.isolation = isolation or os.environ.get('COLAB_PROCESSOR_ISOLATION', 'thread')
+        # Sessionless commands share the 'default' session
+        self.sessions = SessionNamespaces()
+        # Where streamed partial output files go (set by start_processor)
+        self.stream_folder = None
         print(f"🚀 Claude Tools Colab Processor: {self.session_id}")
         
     def process_command(self, command):
@@ -25,7 +43,18 @@ class ColabProcessor:
             cmd_type = command.get('type')
             
             if cmd_type == 'execute_code':
-                return self._execute_python_code(command['code'])
+                if command.get('isolation', self.isolation) == 'process':
+                    return self._execute_in_subprocess(command['code'], command.get('timeout'))
+                return self._execute_python_code(command['code'], command.get('session') or 'default',
+                                                 self._open_stream(command))
+            elif cmd_type == 'session_reset':
+                existed = self.sessions.reset(command['session'])
+                return {'success': True, 'output': f"Session reset: {command['session']}" if existed else ''}
+            elif cmd_type == 'session_snapshot':
+                snapshot = self.sessions.describe(command['session'])
+                if snapshot is None:
+                    return {'success': False, 'error': f"No session: {command['session']}"}
+                return {'success': True, 'snapshot': snapshot}
             elif cmd_type == 'install_package':
                 return self._install_packages(command['packages'])
             elif cmd_type == 'shell_command':
@@ -36,57 +65,70 @@ class ColabProcessor:
         except Exception as e:
             return {'error': str(e)}
     
-    def _execute_python_code(self, code):
-        """Execute Python code and capture output"""
-        stdout_capture = StringIO()
-        stderr_capture = StringIO()
+    def _execute_python_code(self, code, session='default', stream=None):
+        """Execute Python code in a session namespace and capture output"""
+        stdout_capture = stream.stdout if stream else StringIO()
+        stderr_capture = stream.stderr if stream else StringIO()
+        failure = None
         
         try:
-            # Capture stdout and stderr
-            with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
+            # Capture stdout and stderr (per worker thread)
+            with capture_output(stdout_capture, stderr_capture):
                 # Execute the code
-                exec(code, globals())
-            
-            output = stdout_capture.getvalue()
-            error = stderr_capture.getvalue()
-            
-            return {
-                'success': True,
-                'output': output,
-                'error': error if error else None
-            }
-            
+                exec(code, self.sessions.get(session))
         except Exception as e:
+            failure = e
+        finally:
+            # Streamed output was already published; only the unsent rest is returned.
+            # Closing here also stops the flusher when the code raises SystemExit
+            streamed = {'streamed_chunks': stream.close()} if stream else {}
+        
+        if failure is not None:
             return {
                 'success': False,
                 'output': stdout_capture.getvalue(),
-                'error': str(e)
+                'error': str(failure),
+                **streamed
             }
+        
+        output = stdout_capture.getvalue()
+        error = stderr_capture.getvalue()
+        warning = self.sessions.record_usage(session)
+        
+        return {
+            'success': True,
+            'output': output,
+            'error': error if error else None,
+            **({'warning': warning} if warning else {}),
+            **streamed
+        }
+    
+    def _open_stream(self, command):
+        """Stream output into partial files next to the result, if the command asked for it"""
+        options = stream_options(command)
+        if options is None or not self.stream_folder or 'id' not in command:
+            return None
+        interval, chunk_bytes = options
+        return StreamingOutput(command['id'], folder_sink(self.stream_folder), interval, chunk_bytes)
+    
+    def _execute_in_subprocess(self, code, timeout=None):
+        """Execute Python code isolated in a fresh interpreter"""
+        run = run_code_in_subprocess(code, timeout=timeout)
+        if run['timed_out']:
+            return {'success': False, 'output': run['stdout'], 'error': 'Command timed out'}
+        return {
+            'success': run['returncode'] == 0,
+            'output': run['stdout'],
+            'error': run['stderr'] or None
+        }
     
     def _install_packages(self, packages):
-        """Install Python packages"""
-        if isinstance(packages, str):
-            packages = [packages]
-        
+        """Install Python packages (one pip run, through the Drive wheel cache when mounted)"""
         try:
-            for package in packages:
-                result = subprocess.run([
-                    sys.executable, '-m', 'pip', 'install', package
-                ], capture_output=True, text=True)
-                
-                if result.returncode != 0:
-                    return {
-                        'success': False,
-                        'error': f'Failed to install {package}: {result.stderr}'
-                    }
-            
-            return {
-                'success': True,
-                'output': f'Successfully installed: {", ".join(packages)}'
-            }
-            
+            result = PackageInstaller(default_cache_dir()).install(packages)
         except Exception as e:
             return {'success': False, 'error': str(e)}
+        return {key: result[key] for key in ('success', 'output', 'error', 'installed', 'skipped', 'from_cache')}
     
     def _execute_shell(self, command):
         """Execute shell command"""
@@ -119,9 +161,23 @@ def setup_drive_integration():
         print("⚠️ Not running in Google Colab")
         return False
 
-def start_processor():
+def write_heartbeat(monitor_folder, engine):
+    """Write liveness and worker queue metrics next to the command files"""
+    heartbeat_path = os.path.join(monitor_folder, 'heartbeat.json')
+    temp_path = heartbeat_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump({
+            'timestamp': time.time(),
+            'status': 'running',
+            'processor': 'colab',
+            'queue': engine.metrics()
+        }, f)
+    os.replace(temp_path, heartbeat_path)
+
+def start_processor(workers=None, protocol=None):
     """Start the command processor loop"""
     processor = ColabProcessor()
+    protocol = get_protocol(protocol)
     drive_mounted = setup_drive_integration()
     
     if not drive_mounted:
@@ -133,40 +189,66 @@ def start_processor():
     os.makedirs(monitor_folder, exist_ok=True)
     
     print(f"👁️ Monitoring folder: {monitor_folder}")
+    processor.stream_folder = monitor_folder
     
-    processed_files = set()
+    def run_command(job):
+        filename, command = job['filename'], job['command']
+        print(f"📝 Processing: {command.get('type', 'unknown')}")
+        result = processor.process_command(command)
+        
+        # Save result
+        result_filename = protocol.result_name(protocol.command_id(filename))
+        result_path = os.path.join(monitor_folder, result_filename)
+        
+        with open(result_path, 'w') as f:
+            json.dump(result, f)
+        
+        print(f"✅ Completed: {result.get('success', False)}")
+    
+    # Long commands no longer block quick ones; a session's commands stay ordered
+    engine = ExecutionEngine(run_command, max_workers=workers)
+    print(f"🧵 {engine.max_workers} workers ({processor.isolation} isolation)")
+    
+    # The folder is only re-listed when it changed; polling slows down while idle
+    feed = LocalCommandFeed(monitor_folder, prefix=protocol.command_prefix, suffix=protocol.suffix)
+    backoff = IdleBackoff(2)
+    last_heartbeat = 0
     
     while True:
         try:
-            # Look for command files
-            for filename in os.listdir(monitor_folder):
-                if filename.startswith('command_') and filename.endswith('.json'):
-                    filepath = os.path.join(monitor_folder, filename)
-                    
-                    if filepath in processed_files:
-                        continue
-                    
-                    # Process command
+            if time.time() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                write_heartbeat(monitor_folder, engine)
+                last_heartbeat = time.time()
+            
+            # Look for new command files
+            filenames = feed.poll()
+            for filename in filenames:
+                filepath = os.path.join(monitor_folder, filename)
+                
+                # Claim the command before handing it to a worker
+                try:
                     with open(filepath, 'r') as f:
                         command = json.load(f)
-                    
-                    print(f"📝 Processing: {command.get('type', 'unknown')}")
-                    result = processor.process_command(command)
-                    
-                    # Save result
-                    result_filename = filename.replace('command_', 'result_')
-                    result_path = os.path.join(monitor_folder, result_filename)
-                    
-                    with open(result_path, 'w') as f:
-                        json.dump(result, f)
-                    
-                    # Clean up command file
                     os.remove(filepath)
-                    processed_files.add(filepath)
-                    
-                    print(f"✅ Completed: {result.get('success', False)}")
+                except FileNotFoundError:
+                    feed.mark_processed(filename)
+                    continue  # Stale listing entry
+                except (ValueError, OSError) as e:
+                    # Usually still being written: try again on a later poll
+                    print(f"⏳ Could not claim {filename} yet: {e}")
+                    feed.retry_later(filename)
+                    continue
+                feed.mark_processed(filename)
+                
+                engine.submit({'filename': filename, 'command': command,
+                               'session': engine_session(command)})
             
-            time.sleep(2)  # Check every 2 seconds
+            queue = engine.metrics()
+            if filenames or queue['running'] or queue['queued']:
+                backoff.activity()
+            else:
+                backoff.idle()
+            backoff.wait()
             
         except KeyboardInterrupt:
             print("\n🛑 Processor stopped")
@@ -174,6 +256,8 @@ def start_processor():
         except Exception as e:
             print(f"❌ Processor error: {e}")
             time.sleep(5)
+    
+    engine.shutdown(wait=False)
 
 if __name__ == "__main__":
     print("🧪 Claude Tools Colab Processor")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Command/Result File Protocol
+One place for the file names bridges and processors exchange through the
+Drive folder: command_<id>.json in, result_<id>.json out, where <id> is
+the command's own ID. Names are deterministic, so a bridge finds its
+result with a single exact `name = '...'` query instead of fuzzy
+`name contains` searches over several spellings.
+
+Other bridge/processor pairs plug in by registering a FileProtocol with
+their own prefixes and selecting it by name (protocol=... or
+COLAB_BRIDGE_PROTOCOL).
+"""
+
+import os
+
+DEFAULT_PROTOCOL = 'drive'
+
+
+class FileProtocol:
+    """File naming of one bridge/processor pair"""
+
+    def __init__(self, name, command_prefix='command_', result_prefix='result_', suffix='.json'):
+        self.name = name
+        self.command_prefix = command_prefix
+        self.result_prefix = result_prefix
+        self.suffix = suffix
+
+    def command_name(self, command_id):
+        return f"{self.command_prefix}{command_id}{self.suffix}"
+
+    def result_name(self, command_id):
+        return f"{self.result_prefix}{command_id}{self.suffix}"
+
+    def command_id(self, file_name):
+        """Command ID of a command file name, or None"""
+        return self._strip(file_name, self.command_prefix)
+
+    def result_id(self, file_name):
+        """Command ID of a result file name, or None"""
+        return self._strip(file_name, self.result_prefix)
+
+    def _strip(self, file_name, prefix):
+        if file_name.startswith(prefix) and file_name.endswith(self.suffix) and \
+                len(file_name) > len(prefix) + len(self.suffix):
+            return file_name[len(prefix):len(file_name) - len(self.suffix)]
+        return None
+
+    def result_query(self, command_id, folder_id):
+        """Exact-match Drive query for one command's result file"""
+        return name_query(self.result_name(command_id), folder_id)
+
+    def commands_query(self, folder_id):
+        """Drive query listing pending command files"""
+        return f"name contains '{self.command_prefix}' and '{folder_id}' in parents and trashed=false"
+
+    def results_query(self, folder_id):
+        """Drive query listing result files (reconciliation only)"""
+        return f"name contains '{self.result_prefix}' and '{folder_id}' in parents and trashed=false"
+
+    def __repr__(self):
+        return f"FileProtocol({self.name!r}, {self.command_prefix!r}, {self.result_prefix!r})"
+
+
+def name_query(name, folder_id):
+    """Drive query for a file by exact name"""
+    return f"name = '{name}' and '{folder_id}' in parents and trashed=false"
+
+
+_PROTOCOLS = {}
+
+
+def register_protocol(protocol):
+    """Make a FileProtocol selectable by name; returns it"""
+    _PROTOCOLS[protocol.name] = protocol
+    return protocol
+
+
+def get_protocol(protocol=None):
+    """Resolve a FileProtocol, a registered name, or the configured default"""
+    if isinstance(protocol, FileProtocol):
+        return protocol
+    name = protocol or os.environ.get('COLAB_BRIDGE_PROTOCOL') or DEFAULT_PROTOCOL
+    try:
+        return _PROTOCOLS[name]
+    except KeyError:
+        raise ValueError(f"Unknown protocol '{name}' (registered: {', '.join(sorted(_PROTOCOLS))})")
+
+
+register_protocol(FileProtocol(DEFAULT_PROTOCOL))
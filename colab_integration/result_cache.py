@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Result Cache
+Opt-in, on-disk cache of successful execution results, so re-running
+identical code against identical inputs returns without a Colab round trip.
+
+Keys hash the normalized source (formatting and comments do not count),
+the content hashes of the files the code declares as inputs (see
+FileSyncManager.input_hashes) and an environment fingerprint. Nothing
+else is known about the runtime: declare what the results depend on
+(package pins, model versions) through the fingerprint or as input files.
+Entries live in one SQLite file and the least recently used ones are
+evicted once the cache outgrows max_bytes.
+"""
+
+import os
+import ast
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bumped when the key or entry format changes, invalidating old entries
+CACHE_FORMAT = 1
+
+# Result fields that describe one particular run rather than its outcome
+VOLATILE_FIELDS = ('command_id', 'request_id', 'execution_time', 'timestamp', 'cached')
+
+
+def default_cache_path() -> Path:
+    return Path.home() / ".colab-bridge" / "result_cache.sqlite3"
+
+
+@lru_cache(maxsize=1024)
+def normalize_source(code):
+    """Source with formatting and comments dropped (its AST), or trimmed lines if it does not parse"""
+    try:
+        return ast.dump(ast.parse(code))
+    except SyntaxError:
+        # Shell escapes and magics: only whitespace is insignificant
+        return '\n'.join(line.rstrip() for line in code.strip().split('\n'))
+
+
+def environment_fingerprint(*parts):
+    """Hash of what results depend on besides code and inputs (COLAB_BRIDGE_CACHE_ENV plus parts)"""
+    payload = [CACHE_FORMAT, os.environ.get('COLAB_BRIDGE_CACHE_ENV', '')] + list(parts)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU of result dicts by cache key"""
+
+    def __init__(self, db_path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path) if db_path else default_cache_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Result cache unavailable ({e}) - caching in memory only")
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+
+    @staticmethod
+    def key(code, inputs=None, environment=None, upstream=()):
+        """
+        Cache key of code run with inputs ({name: content hash}) in an
+        environment (a fingerprint). upstream lists the keys of code whose
+        state this code reads (earlier notebook cells).
+        """
+        digest = hashlib.sha256(normalize_source(code).encode('utf-8'))
+        for name, file_hash in sorted((inputs or {}).items()):
+            digest.update(b'\0in\0' + name.encode('utf-8') + b'\0' + (file_hash or '').encode('utf-8'))
+        digest.update(b'\0env\0' + (environment or environment_fingerprint()).encode('utf-8'))
+        for key in upstream:
+            digest.update(b'\0up\0' + key.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """The cached result for key (marked 'cached'), or None"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        result = json.loads(row[0])
+        result['cached'] = True
+        return result
+
+    def put(self, key, result):
+        """Store a successful result (others are ignored); returns whether it was stored"""
+        if result.get('status') != 'success':
+            return False
+        entry = {name: value for name, value in result.items() if name not in VOLATILE_FIELDS}
+        try:
+            data = json.dumps(entry)
+        except (TypeError, ValueError):
+            return False
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO results (key, result, size, last_used) VALUES (?, ?, ?, ?)",
+                               (key, data, size, time.time()))
+            self._evict()
+        return True
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes (lock held)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            evicted.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
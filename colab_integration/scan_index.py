@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Persistent Scan Index
+SQLite cache of file content hashes keyed on their stat signature
+(size, mtime_ns, inode), so repeated directory scans only re-hash files
+that actually changed - across process restarts too. Chunk manifests of
+large files (delta sync) are cached the same way.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (size, mtime_ns, inode, hash)
+IndexEntry = Tuple[int, int, int, str]
+
+
+def default_index_path() -> Path:
+    return Path.home() / ".colab-bridge" / "scan_index.sqlite3"
+
+
+class ScanIndex:
+    """Stat-signature -> hash index shared by every synced directory"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else default_index_path()
+        self._lock = threading.Lock()
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except (OSError, sqlite3.Error) as e:
+            # Read-only home etc. - still avoid re-hashing within this process
+            print(f"⚠️ Scan index unavailable ({e}) - using in-memory index")
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    root TEXT NOT NULL,
+                    rel_path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    hash TEXT NOT NULL,
+                    PRIMARY KEY (root, rel_path)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunk_manifests (
+                    root TEXT NOT NULL,
+                    rel_path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    chunks TEXT NOT NULL,
+                    PRIMARY KEY (root, rel_path)
+                )
+            """)
+
+    def load(self, root: str) -> Dict[str, IndexEntry]:
+        """All cached entries under one synced directory"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rel_path, size, mtime_ns, inode, hash FROM file_hashes WHERE root = ?", (root,)
+            ).fetchall()
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def get_many(self, root: str, rel_paths: Iterable[str]) -> Dict[str, IndexEntry]:
+        """Cached entries for specific files (incremental rescans)"""
+        entries = {}
+        with self._lock:
+            for rel_path in rel_paths:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, inode, hash FROM file_hashes WHERE root = ? AND rel_path = ?",
+                    (root, rel_path)
+                ).fetchone()
+                if row:
+                    entries[rel_path] = tuple(row)
+        return entries
+
+    def update(self, root: str, entries: Dict[str, IndexEntry], removed: Iterable[str] = ()):
+        """Upsert changed entries and drop files that disappeared, in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes (root, rel_path, size, mtime_ns, inode, hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(root, rel_path) + tuple(entry) for rel_path, entry in entries.items()]
+            )
+            for table in ("file_hashes", "chunk_manifests"):
+                self._conn.executemany(
+                    f"DELETE FROM {table} WHERE root = ? AND rel_path = ?",
+                    [(root, rel_path) for rel_path in removed]
+                )
+
+    def get_manifest(self, root: str, rel_path: str, signature: Tuple[int, int, int]) -> Optional[List]:
+        """Chunk manifest of a file, if recorded for this (size, mtime_ns, inode)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, chunks FROM chunk_manifests WHERE root = ? AND rel_path = ?",
+                (root, rel_path)
+            ).fetchone()
+        if row is None or tuple(row[:3]) != tuple(signature):
+            return None
+        return [tuple(chunk) for chunk in json.loads(row[3])]
+
+    def set_manifest(self, root: str, rel_path: str, signature: Tuple[int, int, int], chunks: List):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunk_manifests (root, rel_path, size, mtime_ns, inode, chunks) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (root, rel_path) + tuple(signature) + (json.dumps([list(c) for c in chunks]),)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
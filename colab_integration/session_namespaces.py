@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Session Namespaces
+Named execution namespaces kept alive across commands, so a model or
+dataset loaded by one command can be reused by the next ones of the same
+session. The least recently used sessions are evicted beyond max_sessions
+or when the estimated memory of all sessions exceeds the configured cap.
+"""
+
+import os
+import sys
+import time
+import pickle
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_SESSIONS = 8
+
+# Variables the processor puts into every namespace (not part of snapshots)
+_RESERVED_NAMES = {'__name__', '__builtins__'}
+
+# Leads dump() payloads holding each variable pickled on its own
+_SNAPSHOT_HEADER = ('session-snapshot', 2)
+
+
+def _env_megabytes(name):
+    value = os.environ.get(name)
+    return int(float(value) * 1024 * 1024) if value else None
+
+
+def estimate_size(value, _depth=0):
+    """
+    Rough memory footprint of a value: array-likes report their buffers
+    (numpy, pandas, torch), containers are summed one level deep
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        try:
+            return int(value.memory_usage(deep=True).sum())
+        except Exception:
+            pass
+    if hasattr(value, 'element_size') and hasattr(value, 'nelement'):
+        try:
+            return value.element_size() * value.nelement()
+        except Exception:
+            pass
+
+    size = sys.getsizeof(value, 0)
+    if _depth < 2:
+        if isinstance(value, dict):
+            size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            size += sum(estimate_size(item, _depth + 1) for item in value)
+    return size
+
+
+def namespace_size(namespace):
+    return sum(estimate_size(value) for name, value in list(namespace.items())
+               if name not in _RESERVED_NAMES and not _is_module(value))
+
+
+def _is_module(value):
+    return type(value).__name__ == 'module'
+
+
+class SessionNamespaces:
+    """
+    LRU store of exec() namespaces keyed by session ID.
+    Commands of one session are serialized by the ExecutionEngine, so a
+    namespace is never used by two commands at once.
+    """
+
+    def __init__(self, max_sessions=None, max_session_bytes=None, max_total_bytes=None):
+        self.max_sessions = int(max_sessions or os.environ.get('COLAB_PROCESSOR_MAX_SESSIONS') or DEFAULT_MAX_SESSIONS)
+        self.max_session_bytes = max_session_bytes or _env_megabytes('COLAB_PROCESSOR_SESSION_MEMORY_MB')
+        self.max_total_bytes = max_total_bytes or _env_megabytes('COLAB_PROCESSOR_TOTAL_SESSION_MEMORY_MB')
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session -> {'namespace', 'size', 'created', 'last_used', 'commands'}
+        self.evictions = 0
+
+    @staticmethod
+    def new_namespace():
+        return {'__name__': '__main__'}
+
+    def get(self, session):
+        """The session's namespace, created on first use"""
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is None:
+                entry = {'namespace': self.new_namespace(), 'size': 0, 'created': time.time(), 'commands': 0}
+                self._sessions[session] = entry
+            self._sessions.move_to_end(session)
+            entry['last_used'] = time.time()
+            entry['commands'] += 1
+            evicted = self._evict_over_count()
+        self._report_evictions(evicted, 'session limit')
+        return entry['namespace']
+
+    def record_usage(self, session):
+        """
+        Re-measure a session after a command and enforce the memory caps.
+        Returns a warning message if the session itself had to be dropped.
+        """
+        if not (self.max_session_bytes or self.max_total_bytes):
+            return None  # Measuring walks every variable: only done when there is a cap to enforce
+        with self._lock:
+            entry = self._sessions.get(session)
+        if entry is None:
+            return None
+        # Outside the lock: other sessions' commands must not wait for this walk
+        size = namespace_size(entry['namespace'])
+
+        with self._lock:
+            if self._sessions.get(session) is not entry:
+                return None  # Reset or evicted meanwhile
+            entry['size'] = size
+
+            if self.max_session_bytes and entry['size'] > self.max_session_bytes:
+                del self._sessions[session]
+                self.evictions += 1
+                return (f"Session '{session}' was reset: it holds ~{entry['size'] // (1024 * 1024)} MB, "
+                        f"over the {self.max_session_bytes // (1024 * 1024)} MB per-session limit")
+
+            evicted = []
+            if self.max_total_bytes:
+                total = sum(e['size'] for e in self._sessions.values())
+                for name in list(self._sessions):
+                    if total <= self.max_total_bytes:
+                        break
+                    if name == session:
+                        continue
+                    total -= self._sessions.pop(name)['size']
+                    self.evictions += 1
+                    evicted.append(name)
+        self._report_evictions(evicted, 'memory limit')
+        return None
+
+    def reset(self, session):
+        """Drop a session's variables; returns whether it existed"""
+        with self._lock:
+            return self._sessions.pop(session, None) is not None
+
+    def describe(self, session):
+        """Variables of a session: name -> type and estimated size"""
+        with self._lock:
+            entry = self._sessions.get(session)
+        if entry is None:
+            return None
+        variables = {}
+        for name, value in list(entry['namespace'].items()):
+            if name in _RESERVED_NAMES or name.startswith('__'):
+                continue
+            variables[name] = {'type': type(value).__name__, 'size': estimate_size(value)}
+        return {
+            'session': session,
+            'variables': variables,
+            'size': namespace_size(entry['namespace']),
+            'commands': entry['commands'],
+            'created': entry['created'],
+            'last_used': entry['last_used'],
+        }
+
+    def dump(self, session):
+        """
+        Pickle a session's picklable variables, each one on its own (so it is
+        serialized once; references shared between variables are not kept).
+        Returns (pickle_bytes, skipped_names) or (None, []) if the session does not exist.
+        """
+        with self._lock:
+            entry = self._sessions.get(session)
+        if entry is None:
+            return None, []
+        pickled, skipped = {}, []
+        for name, value in list(entry['namespace'].items()):
+            if name in _RESERVED_NAMES or name.startswith('__'):
+                continue
+            if _is_module(value):
+                skipped.append(name)
+                continue
+            try:
+                pickled[name] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                skipped.append(name)
+        return pickle.dumps(_SNAPSHOT_HEADER + (pickled,), protocol=pickle.HIGHEST_PROTOCOL), skipped
+
+    def load(self, session, data):
+        """Merge variables from dump() into a session; returns the restored names"""
+        payload = pickle.loads(data)
+        if isinstance(payload, tuple) and payload[:2] == _SNAPSHOT_HEADER:
+            variables = {name: pickle.loads(blob) for name, blob in payload[2].items()}
+        else:
+            variables = payload  # Snapshots pickled as one dict of variables
+        namespace = self.get(session)
+        namespace.update(variables)
+        self.record_usage(session)
+        return sorted(variables)
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions)
+
+    def _evict_over_count(self):
+        evicted = []
+        while len(self._sessions) > self.max_sessions:
+            name, _ = self._sessions.popitem(last=False)
+            self.evictions += 1
+            evicted.append(name)
+        return evicted
+
+    def _report_evictions(self, names, reason):
+        for name in names:
+            print(f"♻️ Evicted session '{name}' ({reason})")
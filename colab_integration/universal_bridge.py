@@ -5,14 +5,30 @@ Works with any coding assistant, CLI tool, or Python application
 """
 
 import os
-import json
 import time
+import base64
+import hashlib
+import itertools
+import threading
 from pathlib import Path
-from google.oauth2 import service_account
+from concurrent.futures import Future, ThreadPoolExecutor
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaIoBaseUpload
 import io
 
+from .drive_changes import DriveChangesWatcher
+from .drive_client import get_client_factory
+from .drive_io import upload_json, decode_json, RESUMABLE_THRESHOLD
+from .output_stream import parse_partial_name, partial_prefix
+from .artifacts import ArtifactCache
+from .result_cache import ResultCache, environment_fingerprint
+from .protocol import get_protocol
+from .envelope import PROTOCOL_VERSION, negotiate, supported_encodings, supported_formats
+
+# stream_code polling cadence, and how long to wait for chunks listed after the result
+STREAM_POLL_INTERVAL = 0.5
+STREAM_GRACE = 10
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -34,18 +50,61 @@ except ImportError:
 class UniversalColabBridge:
     """Universal bridge for any tool to execute code in Google Colab"""
     
-    def __init__(self, tool_name="universal", config_path=None):
+    def __init__(self, tool_name="universal", config_path=None, result_delivery=None, max_in_flight=None,
+                 protocol=None, result_cache=None):
         self.tool_name = tool_name
         self.config = self._load_config(config_path)
+        # Command/result file naming shared with the processor (see protocol.py)
+        self.protocol = get_protocol(protocol)
         self.drive_service = None
+        self.credentials = None
+        self.client_factory = None
         self.folder_id = self.config.get('google_drive_folder_id')
         self.instance_id = f"{tool_name}_{int(time.time())}"
+        self._command_seq = itertools.count(1)
+        # 'poll': per-command files().list polling
+        # 'changes': shared Drive changes-feed watcher for all in-flight commands
+        self.result_delivery = result_delivery or self.config.get('result_delivery', 'poll')
+        
+        # Pipelined submission (submit_code/execute_many): at most max_in_flight
+        # commands are on Drive at once; further submits block (back-pressure)
+        self.max_in_flight = int(max_in_flight or self.config.get('max_in_flight') or 8)
+        self._window = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = None
+        self._local = threading.local()
+        self._submit_lock = threading.Lock()
+        self._session_tails = {}
+        
+        # Plots arrive as artifact references, downloaded on demand
+        self.artifact_cache = ArtifactCache()
+        
+        # Capabilities the processor advertised in its results; until one
+        # arrives commands are written as plain JSON (older processors)
+        self.peer_protocol = {}
+        
+        # Commands waiting for their result (id -> type, oldest first), for cancel()
+        self.in_flight = {}
+        
+        # Opt-in on-disk result cache (a ResultCache, or True for the default
+        # one): execute_code then reuses results of identical sessionless code
+        if result_cache is True or (result_cache is None and self.config.get('result_cache')):
+            result_cache = ResultCache()
+        self.result_cache = result_cache or None
         
     def _load_config(self, config_path):
         """Load configuration from environment or file"""
         return {
             'service_account_path': os.getenv('SERVICE_ACCOUNT_PATH'),
             'google_drive_folder_id': os.getenv('GOOGLE_DRIVE_FOLDER_ID'),
+            'result_delivery': os.getenv('COLAB_BRIDGE_RESULT_DELIVERY', 'poll'),
+            # Only enable with processors that understand gzip-compressed commands
+            'gzip_commands': os.getenv('COLAB_BRIDGE_GZIP_COMMANDS', '').lower() in ('1', 'true', 'yes'),
+            'max_in_flight': os.getenv('COLAB_BRIDGE_MAX_IN_FLIGHT'),
+            # Requested plot encoding (the processor's defaults otherwise)
+            'plot_format': os.getenv('COLAB_BRIDGE_PLOT_FORMAT'),
+            'plot_dpi': os.getenv('COLAB_BRIDGE_PLOT_DPI'),
+            # Cache results of sessionless execute_code calls on disk
+            'result_cache': os.getenv('COLAB_BRIDGE_RESULT_CACHE', '').lower() in ('1', 'true', 'yes'),
             'tool_name': self.tool_name
         }
     
@@ -54,38 +113,96 @@ class UniversalColabBridge:
         if not self.config['service_account_path']:
             raise ValueError("SERVICE_ACCOUNT_PATH environment variable required")
         
-        credentials = service_account.Credentials.from_service_account_file(
-            self.config['service_account_path'],
-            scopes=['https://www.googleapis.com/auth/drive']
-        )
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        # Credentials and discovery are shared process-wide; the service is per thread
+        self.client_factory = get_client_factory(self.config['service_account_path'])
+        self.credentials = self.client_factory.credentials
+        self.drive_service = self.client_factory.service()
         # Only print in debug mode to avoid breaking tool parsing
         if os.environ.get('COLAB_BRIDGE_DEBUG'):
             import sys
             print(f"✅ Universal Colab Bridge initialized: {self.instance_id}", file=sys.stderr)
         
-    def execute_code(self, code, timeout=30, return_format='dict'):
+    def execute_code(self, code, timeout=30, return_format='dict', session=None, on_output=None,
+                     cache=None, inputs=None, environment=None, on_submit=None):
         """Execute Python code in Colab
         
         Args:
             code: Python code to execute
             timeout: Timeout in seconds
             return_format: 'dict' for normal dict, 'vscode' for VS Code compatible output
+            session: Run in this named session, keeping variables between commands
+            on_output: Stream output while the code runs, calling on_output(chunk)
+                with each {'seq', 'stdout', 'stderr'} chunk
+            cache: Reuse the stored result of identical code, inputs and environment
+                (default: on for sessionless code when the bridge has a result_cache;
+                session state is not part of the key)
+            inputs: {name: content hash} of files the code reads, e.g.
+                FileSyncManager.input_hashes(['data/*.csv'])
+            environment: Anything else results depend on (package pins, ...)
+            on_submit: Called with the command id once the command is on Drive,
+                e.g. to cancel() exactly this execution later
+        """
+        cache_key = None
+        if cache or (cache is None and self.result_cache is not None and session is None):
+            if self.result_cache is None:
+                self.result_cache = ResultCache()
+            cache_key = self.result_cache_key(code, inputs, environment)
+        result = self.result_cache.get(cache_key) if cache_key else None
+        
+        if result is not None:
+            if on_output is not None:
+                on_output({'seq': 1, 'stdout': result.get('output', ''), 'stderr': result.get('stderr', '')})
+        elif on_output is not None:
+            result = None
+            for event in self.stream_code(code, timeout=timeout, session=session, on_submit=on_submit):
+                if event['type'] == 'output':
+                    on_output(event)
+                else:
+                    result = event['result']
+        else:
+            payload = {'code': code}
+            if session is not None:
+                payload['session'] = session
+            result = self.run_command('execute', payload, timeout=timeout, on_submit=on_submit)
+        
+        if cache_key and not result.get('cached') and self._keep_artifacts(result):
+            self.result_cache.put(cache_key, result)
+        
+        # If VS Code format requested, convert visualizations to text
+        if return_format == 'vscode' and result.get('visualizations'):
+            # For now, add a note about visualizations in text output
+            viz_count = len(result['visualizations'])
+            result['output'] = result.get('output', '') + f"\n\n[{viz_count} visualization(s) captured - enhanced display coming soon]"
+            
+        return result
+    
+    def result_cache_key(self, code, inputs=None, environment=None, upstream=()):
+        """Result-cache key of code on this bridge's runtime, with its output settings"""
+        fingerprint = environment_fingerprint(self.folder_id, self.config.get('plot_format'),
+                                              self.config.get('plot_dpi'), environment)
+        return ResultCache.key(code, inputs, fingerprint, upstream)
+    
+    def run_command(self, command_type, payload=None, timeout=30, on_submit=None):
+        """Send a typed command to the processor and wait for its result
+        
+        Args:
+            command_type: Processor command type ('execute', 'sync_push', ...)
+            payload: Extra command fields
+            timeout: Timeout in seconds
+            on_submit: Called with the command id once the command file is written
         """
         if not self.drive_service:
             self.initialize()
             
-        # Create command
-        command = {
-            'id': f"cmd_{self.instance_id}_{int(time.time())}",
-            'type': 'execute',
-            'code': code,
-            'timestamp': time.time(),
-            'tool': self.tool_name
-        }
+        command = self._new_command(command_type, payload)
+        if command_type != 'cancel':
+            self.in_flight[command['id']] = command_type
         
-        # Store command_id for reference
-        self.command_id = command['id']
+        # Register with the changes watcher before uploading, so the feed
+        # cursor is guaranteed to predate the result file
+        watcher = self._get_changes_watcher() if self.result_delivery == 'changes' else None
+        if watcher:
+            watcher.register(command['id'])
         
         # Write command file to Drive (takes ~2 seconds)
         try:
@@ -97,57 +214,394 @@ class UniversalColabBridge:
                 import sys
                 print(f"📤 Command uploaded in {upload_time:.1f}s", file=sys.stderr)
         except Exception as e:
+            if watcher:
+                watcher.unregister(command['id'])
+            self.in_flight.pop(command['id'], None)
             print(f"❌ Error writing command: {e}")
             raise
         
         # Wait for result
         try:
-            result = self._wait_for_result(command['id'], timeout)
-            
-            # If VS Code format requested, convert visualizations to text
-            if return_format == 'vscode' and result.get('visualizations'):
-                # For now, add a note about visualizations in text output
-                viz_count = len(result['visualizations'])
-                result['output'] = result.get('output', '') + f"\n\n[{viz_count} visualization(s) captured - enhanced display coming soon]"
-                
-            return result
+            if on_submit:
+                on_submit(command['id'])
+            if watcher:
+                return self._wait_for_result_via_changes(watcher, command['id'], timeout)
+            return self._wait_for_result(command['id'], timeout)
         except TimeoutError:
             return {
                 'status': 'pending',
                 'request_id': command['id'],
                 'message': f'Request queued for processing by {self.tool_name}'
             }
+        finally:
+            self.in_flight.pop(command['id'], None)
     
-    def _write_command(self, command):
-        """Write command to Google Drive"""
-        file_name = f"command_{command['id']}.json"
+    def stream_code(self, code, timeout=300, session=None, interval_ms=None, on_submit=None):
+        """Execute code, yielding its output while it runs
         
-        file_metadata = {
-            'name': file_name,
-            'parents': [self.folder_id]
-        }
-        
-        # Create temporary file for upload
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(command, f, indent=2)
-            temp_path = f.name
+        Yields {'type': 'output', 'seq', 'stdout', 'stderr'} events as the
+        processor publishes partial output, then one {'type': 'result',
+        'result': ...} event whose output is the whole run's output.
+        """
+        if not self.drive_service:
+            self.initialize()
         
+        payload = {'code': code, 'stream': {'interval_ms': interval_ms} if interval_ms else True}
+        if session is not None:
+            payload['session'] = session
+        command = self._new_command('execute', payload)
+        self.in_flight[command['id']] = 'execute'
         try:
-            media = MediaFileUpload(temp_path, mimetype='application/json')
+            self._write_command(command)
+            if on_submit:
+                on_submit(command['id'])
+            yield from self._follow_stream(command['id'], timeout)
+        finally:
+            self.in_flight.pop(command['id'], None)
+    
+    def _follow_stream(self, command_id, timeout):
+        """Collect partial_<id>_<seq> files in order until the result (and every chunk) arrived"""
+        start_time = time.time()
+        # Drive matches 'name contains' on name prefixes only: list the partials
+        # by their prefix and look the result up by its exact name
+        partials_query = (f"name contains '{partial_prefix(command_id)}' and '{self.folder_id}' in parents"
+                          f" and trashed=false")
+        result_query = self.protocol.result_query(command_id, self.folder_id)
+        next_seq, received, stdout, stderr = 1, {}, [], []
+        result, result_seen_at = None, None
+        
+        while True:
+            files = self.drive_service.files().list(q=partials_query, fields="files(id, name)").execute().get('files', [])
+            for file in sorted(files, key=lambda f: f['name']):
+                partial = parse_partial_name(file['name'])
+                if partial and partial[0] == command_id:
+                    if partial[1] >= next_seq and partial[1] not in received:
+                        received[partial[1]] = decode_json(self.download_blob(file['id']))
+                    self.delete_file(file['id'])
+            if result is None:
+                found = self.drive_service.files().list(q=result_query, fields="files(id, name)").execute().get('files', [])
+                if found:
+                    result = self._read_result(self.download_blob(found[0]['id']))
+                    result_seen_at = time.time()
+                    self.delete_file(found[0]['id'])
+            
+            while next_seq in received:
+                chunk = received.pop(next_seq)
+                stdout.append(chunk.get('stdout', ''))
+                stderr.append(chunk.get('stderr', ''))
+                yield {'type': 'output', 'seq': next_seq, 'stdout': chunk.get('stdout', ''),
+                       'stderr': chunk.get('stderr', '')}
+                next_seq += 1
             
-            self.drive_service.files().create(
-                body=file_metadata,
-                media_body=media
-            ).execute()
+            if result is not None:
+                # Listings can lag behind the result; give late chunks a moment
+                if next_seq > (result.get('streamed_chunks') or 0) or time.time() - result_seen_at > STREAM_GRACE:
+                    break
+            elif time.time() - start_time > timeout:
+                yield {'type': 'result', 'result': {
+                    'status': 'pending',
+                    'request_id': command_id,
+                    'output': ''.join(stdout),
+                    'message': f'Request queued for processing by {self.tool_name}'
+                }}
+                return
+            time.sleep(STREAM_POLL_INTERVAL)
+        
+        result['output'] = ''.join(stdout) + (result.get('output') or '')
+        if any(stderr):
+            result['stderr'] = ''.join(stderr) + (result.get('stderr') or '')
+        yield {'type': 'result', 'result': result}
+    
+    def cancel(self, command_id=None, timeout=30):
+        """Interrupt a command on the processor (default: this bridge's latest in-flight one)
+        
+        The result's 'state' says what happened: 'interrupted' (KeyboardInterrupt
+        raised in the running code), 'killed' (its isolated interpreter was
+        killed), 'requested', 'pending' (skipped once dequeued) or 'finished'.
+        """
+        if command_id is None:
+            running = list(self.in_flight)
+            if not running:
+                return {'status': 'success', 'state': 'idle', 'output': "ℹ️ No command to cancel\n"}
+            command_id = running[-1]
+        return self.run_command('cancel', {'target': command_id}, timeout=timeout)
+    
+    def reset_session(self, session, timeout=30):
+        """Drop every variable of a processor session"""
+        return self.run_command('session_reset', {'session': session}, timeout=timeout)
+    
+    def snapshot_session(self, session, persist=False, timeout=30):
+        """List a session's variables; persist=True also pickles them to Drive for restore_session"""
+        return self.run_command('session_snapshot', {'session': session, 'persist': persist}, timeout=timeout)
+    
+    def restore_session(self, session, snapshot_file_id, timeout=60):
+        """Load a persisted snapshot into a (possibly new) session"""
+        return self.run_command('session_restore', {'session': session, 'snapshot_file_id': snapshot_file_id},
+                                timeout=timeout)
+    
+    def warmup(self, manifest=None, wait=False, timeout=300):
+        """Start a warm-up manifest on the processor (or, without one, report warm-up progress)
+        
+        wait=True returns only once every module and model is loaded.
+        """
+        payload = {'wait': wait, 'wait_timeout': timeout}
+        if manifest:
+            payload['manifest'] = manifest
+        return self.run_command('warmup', payload, timeout=timeout + 30 if wait else 30)
+    
+    def run_cells(self, cells, session=None, workdir=None, first_execution_count=1, timeout=300):
+        """Run notebook cells (a list of {'index', 'code'}) in one command, stopping at the first error
+        
+        The result carries a 'cells' list with each executed cell's output
+        and execution count.
+        """
+        payload = {'cells': list(cells), 'first_execution_count': first_execution_count}
+        if session is not None:
+            payload['session'] = session
+        if workdir is not None:
+            payload['workdir'] = workdir
+        return self.run_command('run_cells', payload, timeout=timeout)
+    
+    def install_packages(self, packages, timeout=600):
+        """pip-install packages in the runtime; already satisfied requirements are skipped"""
+        if isinstance(packages, str):
+            packages = [packages]
+        return self.run_command('install_package', {'packages': list(packages)}, timeout=timeout)
+    
+    def submit_code(self, code, timeout=30, session=None):
+        """Queue code for execution without waiting; returns a Future of the result dict
+        
+        Commands sharing a session key run one after another in submission
+        order; commands without one are pipelined freely.
+        """
+        return self.submit_command('execute', {'code': code}, timeout=timeout, session=session)
+    
+    def submit_command(self, command_type, payload=None, timeout=30, session=None):
+        """Pipelined run_command: blocks only while max_in_flight commands are pending"""
+        if session is not None:
+            # Lets the processor serialize the session on its side too
+            payload = {**(payload or {}), 'session': session}
+        with self._submit_lock:
+            if not self.drive_service:
+                self.initialize()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                    thread_name_prefix=f"colab-{self.tool_name}")
+        
+        self._window.acquire()
+        future = Future()
+        
+        with self._submit_lock:
+            previous = self._session_tails.get(session) if session is not None else None
+            if session is not None:
+                self._session_tails[session] = future
+        
+        def start(_=None):
+            self._executor.submit(self._run_submitted, future, command_type, payload, timeout, session, previous)
+        
+        if previous is None:
+            start()
+        else:
+            # Upload only once the previous command of the session has finished
+            previous.add_done_callback(start)
+        return future
+    
+    @staticmethod
+    def _unfinished_predecessor(previous):
+        """Id of the earlier session command that may still be queued or running remotely, or None"""
+        if previous is None or previous.cancelled() or previous.exception() is not None:
+            return None
+        result = previous.result()
+        if not isinstance(result, dict):
+            return None
+        if result.get('status') == 'pending':
+            return result.get('request_id')
+        return result.get('blocked_by')  # Its own predecessor never finished either
+    
+    def execute_many(self, codes, timeout=30, session=None):
+        """Execute many snippets with up to max_in_flight in flight; results keep input order"""
+        futures = [self.submit_code(code, timeout=timeout, session=session) for code in codes]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'status': 'error', 'error': str(e)})
+        return results
+    
+    def _run_submitted(self, future, command_type, payload, timeout, session, previous=None):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    blocked_by = self._unfinished_predecessor(previous)
+                    if blocked_by:
+                        # Uploading now could overtake the earlier command on the processor
+                        future.set_result({
+                            'status': 'error',
+                            'error': f"Not sent: command {blocked_by} of session '{session}' has no result yet",
+                            'blocked_by': blocked_by
+                        })
+                        return
+                    future.set_result(self._thread_bridge().run_command(command_type, payload, timeout))
+                except BaseException as e:
+                    future.set_exception(e)
         finally:
-            # Clean up temporary file
-            os.unlink(temp_path)
+            self._window.release()
+            with self._submit_lock:
+                if session is not None and self._session_tails.get(session) is future:
+                    del self._session_tails[session]
+    
+    def _thread_bridge(self):
+        """This bridge's clone for the current worker thread"""
+        bridge = getattr(self._local, 'bridge', None)
+        if bridge is None:
+            bridge = self.clone_for_thread()
+            self._local.bridge = bridge
+        return bridge
+    
+    def clone_for_thread(self):
+        """
+        Bridge sharing this one's identity, folder and credentials, with its own
+        Drive service: googleapiclient services are not thread-safe.
+        """
+        bridge = UniversalColabBridge(tool_name=self.tool_name, result_delivery=self.result_delivery,
+                                      protocol=self.protocol)
+        bridge.instance_id = self.instance_id
+        bridge._command_seq = self._command_seq
+        bridge.folder_id = self.folder_id
+        bridge.credentials = self.credentials
+        bridge.client_factory = self.client_factory
+        bridge.artifact_cache = self.artifact_cache
+        bridge.peer_protocol = self.peer_protocol
+        bridge.in_flight = self.in_flight
+        bridge.result_cache = self.result_cache
+        if self.client_factory is not None:
+            bridge.drive_service = self.client_factory.service()
+        elif self.credentials is not None:
+            bridge.drive_service = build('drive', 'v3', credentials=self.credentials)
+        else:
+            bridge.drive_service = self.drive_service
+        return bridge
+    
+    def close(self):
+        """Stop the submission worker pool (waits for in-flight commands)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def _new_command(self, command_type, payload=None):
+        """Build a command dict (not uploaded yet)"""
+        command = {
+            'id': self._new_command_id(),
+            'type': command_type,
+            **(payload or {}),
+            'timestamp': time.time(),
+            'tool': self.tool_name
+        }
+        
+        # Store command_id for reference
+        self.command_id = command['id']
+        return command
+    
+    def _new_command_id(self):
+        """Unique command ID (several commands may be sent within one second)"""
+        return f"cmd_{self.instance_id}_{int(time.time())}_{next(self._command_seq)}"
+    
+    def upload_blob(self, name, data, mimetype='application/octet-stream'):
+        """Upload binary data to the Drive folder, returning the new file ID"""
+        if not self.drive_service:
+            self.initialize()
+        
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype, resumable=len(data) > RESUMABLE_THRESHOLD)
+        file = self.drive_service.files().create(
+            body={'name': name, 'parents': [self.folder_id]},
+            media_body=media,
+            fields='id'
+        ).execute()
+        return file['id']
+    
+    def download_blob(self, file_id):
+        """Download a Drive file's content as bytes"""
+        if not self.drive_service:
+            self.initialize()
+        return self.drive_service.files().get_media(fileId=file_id).execute()
+    
+    def delete_file(self, file_id):
+        """Delete a Drive file, ignoring files that are already gone"""
+        try:
+            self.drive_service.files().delete(fileId=file_id).execute()
+        except Exception:
+            pass
+    
+    def _result_preferences(self):
+        """Command fields telling the processor how results may be encoded"""
+        preferences = {
+            # Results may come back as envelopes or gzip-compressed; decode_json handles all
+            'protocol': PROTOCOL_VERSION,
+            'accept_encoding': supported_encodings(),
+            'accept_formats': supported_formats(),
+            # Plots as artifact references instead of inline base64
+            'accept_artifacts': True,
+        }
+        if self.config.get('plot_format'):
+            preferences['plot_format'] = self.config['plot_format']
+        if self.config.get('plot_dpi'):
+            preferences['plot_dpi'] = int(self.config['plot_dpi'])
+        return preferences
+    
+    def fetch_artifact(self, ref):
+        """Download an artifact referenced by a result (a visualization or its 'artifact' ref)"""
+        ref = ref.get('artifact', ref)
+        data = self.artifact_cache.get(ref['sha256'])
+        if data is None:
+            data = self.download_blob(ref['id'])
+            if hashlib.sha256(data).hexdigest() != ref['sha256']:
+                raise ValueError(f"Artifact {ref['id']} does not match its hash")
+            self.artifact_cache.put(ref['sha256'], data)
+        return data
+    
+    def inline_artifacts(self, result):
+        """Fill in base64 'data' for artifact visualizations (for consumers expecting inline plots)"""
+        for visual in result.get('visualizations') or []:
+            if 'artifact' in visual and 'data' not in visual:
+                visual['data'] = base64.b64encode(self.fetch_artifact(visual)).decode('utf-8')
+        return result
+    
+    def _keep_artifacts(self, result):
+        """Download a result's artifacts before caching it: Drive copies expire, cache hits must not"""
+        try:
+            for visual in result.get('visualizations') or []:
+                if 'artifact' in visual:
+                    self.fetch_artifact(visual)
+        except Exception as e:
+            if os.environ.get('COLAB_BRIDGE_DEBUG'):
+                import sys
+                print(f"⚠️ Not caching a result whose artifacts could not be downloaded: {e}", file=sys.stderr)
+            return False
+        return True
+    
+    def _write_command(self, command):
+        """Write command to Google Drive (streamed from memory)"""
+        for key, value in self._result_preferences().items():
+            command.setdefault(key, value)
+        envelope = None
+        if int(self.peer_protocol.get('protocol') or 1) >= PROTOCOL_VERSION:
+            envelope = negotiate(self.peer_protocol.get('accept_encoding'), self.peer_protocol.get('accept_formats'))
+        upload_json(self.drive_service, self.folder_id, self.protocol.command_name(command['id']), command,
+                    compress=self.config.get('gzip_commands', False), envelope=envelope)
+    
+    def _read_result(self, content):
+        """Decode a result file, remembering the protocol capabilities the processor advertised"""
+        result = decode_json(content)
+        if isinstance(result, dict) and 'protocol' in result:
+            self.peer_protocol.update({key: result.pop(key, None)
+                                       for key in ('protocol', 'accept_encoding', 'accept_formats')})
+        return result
     
     def _create_command_file(self, code):
         """Create command file (compatibility method)"""
         command = {
-            'id': f"cmd_{self.instance_id}_{int(time.time())}",
+            'id': self._new_command_id(),
             'type': 'execute',
             'code': code,
             'timestamp': time.time(),
@@ -161,21 +615,19 @@ class UniversalColabBridge:
         """Wait for result file with instant polling"""
         start_time = time.time()
         poll_count = 0
+        # One exact-name lookup per poll: result names are deterministic
+        query = self.protocol.result_query(command_id, self.folder_id)
         
         while time.time() - start_time < timeout:
             poll_count += 1
             
-            # Look for result file - use contains to catch any pattern
-            # The processor might create result_result_ID or other variations
-            base_id = command_id.replace('cmd_', '')
-            query = f"name contains '{base_id}' and name contains 'result' and '{self.folder_id}' in parents and trashed=false"
             results = self.drive_service.files().list(q=query, fields="files(id, name)").execute()
             files = results.get('files', [])
                     
             if files:
                 # Read result
                 content = self.drive_service.files().get_media(fileId=files[0]['id']).execute()
-                result = json.loads(content.decode('utf-8'))
+                result = self._read_result(content)
                 
                 # Clean up result file
                 self.drive_service.files().delete(fileId=files[0]['id']).execute()
@@ -206,6 +658,45 @@ class UniversalColabBridge:
                 time.sleep(1.6)  # Total ~2s between polls
         
         raise TimeoutError(f"Command {command_id} timed out after {timeout}s")
+    
+    def _get_changes_watcher(self):
+        """Get the process-wide changes-feed watcher for this bridge's folder"""
+        credentials = self.credentials
+        if self.client_factory is not None:
+            # Called on the watcher thread, which gets its own service
+            service_factory = self.client_factory.service
+        elif credentials is not None:
+            def service_factory():
+                return build('drive', 'v3', credentials=credentials)
+        else:
+            # Injected services (e.g. FakeDriveService) are shared as-is
+            drive_service = self.drive_service
+            def service_factory():
+                return drive_service
+        return DriveChangesWatcher.shared(self.folder_id, service_factory, protocol=self.protocol)
+    
+    def _wait_for_result_via_changes(self, watcher, command_id, timeout):
+        """Wait for the shared watcher to spot our result file, then fetch it"""
+        start_time = time.time()
+        try:
+            file = watcher.wait(command_id, timeout)
+        finally:
+            watcher.unregister(command_id)
+        
+        if file is None:
+            raise TimeoutError(f"Command {command_id} timed out after {timeout}s")
+        
+        content = self.drive_service.files().get_media(fileId=file['id']).execute()
+        result = self._read_result(content)
+        
+        # Clean up result file
+        self.drive_service.files().delete(fileId=file['id']).execute()
+        
+        if os.environ.get('COLAB_BRIDGE_DEBUG'):
+            import sys
+            print(f"⚡ Got result in {time.time() - start_time:.3f}s via changes feed", file=sys.stderr)
+        
+        return result
 
 # Backward compatibility alias
 ClaudeColabBridge = UniversalColabBridge
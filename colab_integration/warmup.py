@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Runtime Warm-up
+A warm-up manifest lists modules to pre-import and models to preload into
+session namespaces, so the first commands after a runtime start do not
+pay for heavy imports and weight loading. Warm-up runs in a background
+thread; commands of a session that is still being warmed wait for it, and
+progress is reported in the processor heartbeat.
+
+    {
+        "modules": ["torch", "pandas", "transformers"],
+        "models": [
+            {"name": "model", "loader": "transformers.AutoModel.from_pretrained",
+             "args": ["bert-base-uncased"], "kwargs": {}, "session": "nlp"}
+        ],
+        "session": "default"
+    }
+
+"session" is where models without their own session are loaded.
+"""
+
+import os
+import json
+import time
+import importlib
+import threading
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_WARMUP_SESSION = 'default'
+
+
+def load_manifest(source=None):
+    """
+    Manifest from a dict, a JSON string or the path of a JSON file;
+    None reads COLAB_PROCESSOR_WARMUP (either form). Returns None if unset.
+    """
+    if source is None:
+        source = os.environ.get('COLAB_PROCESSOR_WARMUP')
+    if not source:
+        return None
+    if not isinstance(source, dict):
+        text = str(source).strip()
+        if not text.startswith('{'):
+            text = Path(text).expanduser().read_text()
+        source = json.loads(text)
+    return normalize_manifest(source)
+
+
+def normalize_manifest(manifest):
+    """Validate a manifest and fill in defaults"""
+    if not isinstance(manifest, dict):
+        raise ValueError("Warm-up manifest must be a JSON object")
+    modules = manifest.get('modules') or []
+    if not all(isinstance(name, str) and name for name in modules):
+        raise ValueError("Warm-up 'modules' must be a list of module names")
+
+    default_session = manifest.get('session') or DEFAULT_WARMUP_SESSION
+    models = []
+    for entry in manifest.get('models') or []:
+        if not isinstance(entry, dict) or not entry.get('name') or not entry.get('loader'):
+            raise ValueError(f"Warm-up model entries need a 'name' and a 'loader': {entry!r}")
+        models.append({
+            'name': entry['name'],
+            'loader': entry['loader'],
+            'args': list(entry.get('args') or []),
+            'kwargs': dict(entry.get('kwargs') or {}),
+            'session': entry.get('session') or default_session,
+        })
+    return {'modules': list(modules), 'models': models}
+
+
+def resolve_callable(path):
+    """Import 'package.module.attr[.attr...]', trying the longest module prefix first"""
+    parts = path.split('.')
+    for split in range(len(parts) - 1, 0, -1):
+        try:
+            target = importlib.import_module('.'.join(parts[:split]))
+        except ImportError:
+            continue
+        for attr in parts[split:]:
+            target = getattr(target, attr)
+        return target
+    raise ImportError(f"Cannot resolve loader '{path}'")
+
+
+class Warmup:
+    """Runs manifests in the background and tracks what is ready"""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.state = 'idle'      # idle, running, ready
+        self.modules = {}        # name -> {'status', 'seconds' | 'error'}
+        self.models = {}         # session.name -> {'status', 'seconds' | 'error'}
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._session_events = {}
+        self._thread = None
+
+    def start(self, manifest):
+        """Start warming up; returns the status. Only one manifest runs at a time"""
+        manifest = normalize_manifest(manifest)
+        with self._lock:
+            if self.state == 'running':
+                raise RuntimeError("A warm-up is already running")
+            self.state = 'running'
+            self.started, self.finished = time.time(), None
+            for model in manifest['models']:
+                self._session_events.setdefault(model['session'], threading.Event()).clear()
+            self._thread = threading.Thread(target=self._run, args=(manifest,), name="processor-warmup",
+                                            daemon=True)
+            self._thread.start()
+        return self.describe()
+
+    def _run(self, manifest):
+        remaining = Counter(model['session'] for model in manifest['models'])
+        try:
+            for name in manifest['modules']:
+                self.modules[name] = self._timed(importlib.import_module, name)
+
+            for model in manifest['models']:
+                try:
+                    self.models[f"{model['session']}.{model['name']}"] = self._timed(self._load_model, model)
+                finally:
+                    remaining[model['session']] -= 1
+                    if not remaining[model['session']]:
+                        self._session_events[model['session']].set()
+        finally:
+            with self._lock:
+                for event in self._session_events.values():
+                    event.set()
+                self.state = 'ready'
+                self.finished = time.time()
+            summary = ', '.join(f"{name} {info['status']}" for name, info in {**self.modules, **self.models}.items())
+            print(f"🔥 Warm-up finished in {self.finished - self.started:.1f}s: {summary or 'nothing to do'}")
+
+    def _load_model(self, model):
+        value = resolve_callable(model['loader'])(*model['args'], **model['kwargs'])
+        self.sessions.get(model['session'])[model['name']] = value
+        self.sessions.record_usage(model['session'])
+
+    @staticmethod
+    def _timed(func, *args):
+        start = time.time()
+        try:
+            func(*args)
+        except Exception as e:
+            return {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        return {'status': 'ready', 'seconds': round(time.time() - start, 3)}
+
+    def wait(self, session=None, timeout=None):
+        """Block until a session's models (or, without a session, the whole warm-up) are loaded"""
+        if session is None:
+            thread = self._thread
+            if thread is not None:
+                thread.join(timeout)
+            return self.state != 'running'
+        event = self._session_events.get(session)
+        return event.wait(timeout) if event is not None else True
+
+    def describe(self):
+        info = {'state': self.state, 'modules': dict(self.modules), 'models': dict(self.models)}
+        if self.started:
+            info['elapsed'] = round((self.finished or time.time()) - self.started, 3)
+        info['errors'] = sum(1 for entry in list(self.modules.values()) + list(self.models.values())
+                             if entry['status'] == 'error')
+        return info
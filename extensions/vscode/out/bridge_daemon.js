@@ -0,0 +1,148 @@
+"use strict";
+var __createBinding = (this && this.__createBinding) || (Object.create ? (function(o, m, k, k2) {
+    if (k2 === undefined) k2 = k;
+    var desc = Object.getOwnPropertyDescriptor(m, k);
+    if (!desc || ("get" in desc ? !m.__esModule : desc.writable || desc.configurable)) {
+      desc = { enumerable: true, get: function() { return m[k]; } };
+    }
+    Object.defineProperty(o, k2, desc);
+}) : (function(o, m, k, k2) {
+    if (k2 === undefined) k2 = k;
+    o[k2] = m[k];
+}));
+var __setModuleDefault = (this && this.__setModuleDefault) || (Object.create ? (function(o, v) {
+    Object.defineProperty(o, "default", { enumerable: true, value: v });
+}) : function(o, v) {
+    o["default"] = v;
+});
+var __importStar = (this && this.__importStar) || (function () {
+    var ownKeys = function(o) {
+        ownKeys = Object.getOwnPropertyNames || function (o) {
+            var ar = [];
+            for (var k in o) if (Object.prototype.hasOwnProperty.call(o, k)) ar[ar.length] = k;
+            return ar;
+        };
+        return ownKeys(o);
+    };
+    return function (mod) {
+        if (mod && mod.__esModule) return mod;
+        var result = {};
+        if (mod != null) for (var k = ownKeys(mod), i = 0; i < k.length; i++) if (k[i] !== "default") __createBinding(result, mod, k[i]);
+        __setModuleDefault(result, mod);
+        return result;
+    };
+})();
+Object.defineProperty(exports, "__esModule", { value: true });
+exports.BridgeDaemon = void 0;
+const child_process_1 = require("child_process");
+const events_1 = require("events");
+const readline = __importStar(require("readline"));
+/**
+ * Client for the long-lived `colab_integration.daemon` process.
+ * One Python interpreter (with googleapiclient, credentials and the Drive
+ * service already loaded) serves every execute and result request over
+ * line-delimited JSON-RPC on stdio.
+ */
+class BridgeDaemon extends events_1.EventEmitter {
+    constructor() {
+        super(...arguments);
+        this.nextId = 1;
+        this.pending = new Map();
+    }
+    async request(options, method, params = {}) {
+        await this.ensureStarted(options);
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject });
+            this.child.stdin.write(JSON.stringify({ jsonrpc: '2.0', id, method, params }) + '\n');
+        });
+    }
+    dispose() {
+        if (this.child) {
+            this.child.kill();
+            this.child = undefined;
+        }
+        this.ready = undefined;
+    }
+    ensureStarted(options) {
+        // Restart when settings that affect the Python side change
+        if (this.child && this.options && !sameOptions(this.options, options)) {
+            this.dispose();
+        }
+        if (this.child && this.ready) {
+            return this.ready;
+        }
+        this.options = { ...options };
+        const env = { ...process.env };
+        if (options.serviceAccountPath) {
+            env.SERVICE_ACCOUNT_PATH = options.serviceAccountPath;
+        }
+        if (options.driveFolder) {
+            env.GOOGLE_DRIVE_FOLDER_ID = options.driveFolder;
+        }
+        const child = (0, child_process_1.spawn)(options.pythonPath, ['-m', 'colab_integration.daemon', '--tool', 'vscode'], { env });
+        this.child = child;
+        this.ready = new Promise((resolve, reject) => {
+            const lines = readline.createInterface({ input: child.stdout });
+            lines.on('line', (line) => {
+                let message;
+                try {
+                    message = JSON.parse(line);
+                }
+                catch (e) {
+                    console.log(`[Colab Bridge] daemon: ${line}`);
+                    return;
+                }
+                if (message.method === 'ready') {
+                    console.log(`[Colab Bridge] Daemon ready (pid ${message.params.pid})`);
+                    resolve();
+                }
+                else if (message.method) {
+                    this.emit(message.method, message.params);
+                }
+                else {
+                    this.settle(message);
+                }
+            });
+            let stderr = '';
+            child.stderr.on('data', (data) => {
+                stderr += data.toString();
+                console.log(`[Colab Bridge] daemon: ${data.toString().trimEnd()}`);
+            });
+            child.on('error', (err) => reject(err));
+            child.on('exit', (code) => {
+                const error = new Error(`Colab Bridge daemon exited (code ${code}): ${stderr.trim()}`);
+                reject(error);
+                for (const request of this.pending.values()) {
+                    request.reject(error);
+                }
+                this.pending.clear();
+                if (this.child === child) {
+                    this.child = undefined;
+                    this.ready = undefined;
+                }
+            });
+        });
+        return this.ready;
+    }
+    settle(message) {
+        const request = this.pending.get(message.id);
+        if (!request) {
+            return;
+        }
+        this.pending.delete(message.id);
+        if (message.error) {
+            request.reject(new Error(message.error.message));
+        }
+        else {
+            request.resolve(message.result);
+        }
+    }
+}
+exports.BridgeDaemon = BridgeDaemon;
+function sameOptions(a, b) {
+    return a.pythonPath === b.pythonPath
+        && a.serviceAccountPath === b.serviceAccountPath
+        && a.driveFolder === b.driveFolder;
+}
+//# sourceMappingURL=bridge_daemon.js.map
\ No newline at end of file
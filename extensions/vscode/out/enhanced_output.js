@@ -15,20 +15,48 @@ var __setModuleDefault = (this && this.__setModuleDefault) || (Object.create ? (
 }) : function(o, v) {
     o["default"] = v;
 });
-var __importStar = (this && this.__importStar) || function (mod) {
-    if (mod && mod.__esModule) return mod;
-    var result = {};
-    if (mod != null) for (var k in mod) if (k !== "default" && Object.prototype.hasOwnProperty.call(mod, k)) __createBinding(result, mod, k);
-    __setModuleDefault(result, mod);
-    return result;
-};
+var __importStar = (this && this.__importStar) || (function () {
+    var ownKeys = function(o) {
+        ownKeys = Object.getOwnPropertyNames || function (o) {
+            var ar = [];
+            for (var k in o) if (Object.prototype.hasOwnProperty.call(o, k)) ar[ar.length] = k;
+            return ar;
+        };
+        return ownKeys(o);
+    };
+    return function (mod) {
+        if (mod && mod.__esModule) return mod;
+        var result = {};
+        if (mod != null) for (var k = ownKeys(mod), i = 0; i < k.length; i++) if (k[i] !== "default") __createBinding(result, mod, k[i]);
+        __setModuleDefault(result, mod);
+        return result;
+    };
+})();
 Object.defineProperty(exports, "__esModule", { value: true });
-exports.savePlotsToFiles = exports.showEnhancedOutput = void 0;
+exports.resolveArtifacts = resolveArtifacts;
+exports.showEnhancedOutput = showEnhancedOutput;
+exports.savePlotsToFiles = savePlotsToFiles;
 const vscode = __importStar(require("vscode"));
 const path = __importStar(require("path"));
 const fs = __importStar(require("fs"));
 const os = __importStar(require("os"));
-async function showEnhancedOutput(result) {
+/** Fetch the content of artifact visualizations (each distinct artifact once) */
+async function resolveArtifacts(result, resolve) {
+    const fetched = new Map();
+    for (const viz of result.visualizations || []) {
+        if (viz.artifact && !viz.data) {
+            const artifact = viz.artifact;
+            if (!fetched.has(artifact.sha256)) {
+                fetched.set(artifact.sha256, resolve(artifact));
+            }
+            viz.data = await fetched.get(artifact.sha256);
+        }
+    }
+}
+async function showEnhancedOutput(result, resolve) {
+    if (resolve) {
+        await resolveArtifacts(result, resolve);
+    }
     if (!result.visualizations || result.visualizations.length === 0) {
         // No visualizations, show text output
         if (result.output && result.output.trim()) {
@@ -52,7 +80,6 @@ async function showEnhancedOutput(result) {
     });
     panel.webview.html = html;
 }
-exports.showEnhancedOutput = showEnhancedOutput;
 function createHtmlOutput(result) {
     let html = `<!DOCTYPE html>
 <html>
@@ -112,9 +139,9 @@ function createHtmlOutput(result) {
     <div class="section">
         <div class="section-title">Visualizations:</div>`;
         result.visualizations.forEach((viz, index) => {
-            if (viz.type === 'image/png') {
+            if (viz.type.startsWith('image/') && viz.data) {
                 html += `
-        <img src="data:image/png;base64,${viz.data}" alt="Plot ${index + 1}">`;
+        <img src="data:${viz.type};base64,${viz.data}" alt="Plot ${index + 1}">`;
             }
         });
         html += `
@@ -144,20 +171,29 @@ function escapeHtml(text) {
     return text.replace(/[&<>"']/g, m => map[m]);
 }
 // Also export a function to save plots to files
-async function savePlotsToFiles(result) {
+async function savePlotsToFiles(result, resolve) {
     const savedFiles = [];
     if (!result.visualizations || result.visualizations.length === 0) {
         return savedFiles;
     }
+    if (resolve) {
+        await resolveArtifacts(result, resolve);
+    }
     // Create temp directory for plots
     const tempDir = path.join(os.tmpdir(), `colab_plots_${Date.now()}`);
     if (!fs.existsSync(tempDir)) {
         fs.mkdirSync(tempDir, { recursive: true });
     }
     // Save each visualization
+    const extensions = {
+        'image/png': '.png',
+        'image/svg+xml': '.svg',
+        'image/webp': '.webp',
+        'image/jpeg': '.jpg'
+    };
     result.visualizations.forEach((viz, index) => {
-        if (viz.type === 'image/png') {
-            const filename = path.join(tempDir, `plot_${index + 1}.png`);
+        if (extensions[viz.type] && viz.data) {
+            const filename = path.join(tempDir, `plot_${index + 1}${extensions[viz.type]}`);
             const buffer = Buffer.from(viz.data, 'base64');
             fs.writeFileSync(filename, buffer);
             savedFiles.push(filename);
@@ -172,5 +208,4 @@ async function savePlotsToFiles(result) {
     }
     return savedFiles;
 }
-exports.savePlotsToFiles = savePlotsToFiles;
 //# sourceMappingURL=enhanced_output.js.map
\ No newline at end of file
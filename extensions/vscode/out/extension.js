@@ -15,21 +15,35 @@ var __setModuleDefault = (this && this.__setModuleDefault) || (Object.create ? (
 }) : function(o, v) {
     o["default"] = v;
 });
-var __importStar = (this && this.__importStar) || function (mod) {
-    if (mod && mod.__esModule) return mod;
-    var result = {};
-    if (mod != null) for (var k in mod) if (k !== "default" && Object.prototype.hasOwnProperty.call(mod, k)) __createBinding(result, mod, k);
-    __setModuleDefault(result, mod);
-    return result;
-};
+var __importStar = (this && this.__importStar) || (function () {
+    var ownKeys = function(o) {
+        ownKeys = Object.getOwnPropertyNames || function (o) {
+            var ar = [];
+            for (var k in o) if (Object.prototype.hasOwnProperty.call(o, k)) ar[ar.length] = k;
+            return ar;
+        };
+        return ownKeys(o);
+    };
+    return function (mod) {
+        if (mod && mod.__esModule) return mod;
+        var result = {};
+        if (mod != null) for (var k = ownKeys(mod), i = 0; i < k.length; i++) if (k[i] !== "default") __createBinding(result, mod, k[i]);
+        __setModuleDefault(result, mod);
+        return result;
+    };
+})();
 Object.defineProperty(exports, "__esModule", { value: true });
-exports.deactivate = exports.activate = void 0;
+exports.activate = activate;
+exports.deactivate = deactivate;
 const vscode = __importStar(require("vscode"));
-const child_process_1 = require("child_process");
-const path = __importStar(require("path"));
-const fs = __importStar(require("fs"));
-const os = __importStar(require("os"));
+const enhanced_output_1 = require("./enhanced_output");
+const bridge_daemon_1 = require("./bridge_daemon");
 let statusBar;
+let outputChannel;
+let nextStreamId = 1;
+const daemon = new bridge_daemon_1.BridgeDaemon();
+// Executions started from this window, by stream id, in start order
+const running = new Map();
 function activate(context) {
     console.log('Colab Bridge extension is now active!');
     // Create status bar item
@@ -53,7 +67,11 @@ function activate(context) {
     const configure = vscode.commands.registerCommand('colab-bridge.configure', async () => {
         await configureIntegration();
     });
-    context.subscriptions.push(executeFile, executeSelection, openNotebook, configure);
+    const cancelExecution = vscode.commands.registerCommand('colab-bridge.cancelExecution', async () => {
+        await cancelColabExecution();
+    });
+    context.subscriptions.push(executeFile, executeSelection, openNotebook, configure, cancelExecution);
+    context.subscriptions.push({ dispose: () => daemon.dispose() });
     // Show welcome message on first activation
     const hasShownWelcome = context.globalState.get('hasShownWelcome', false);
     if (!hasShownWelcome) {
@@ -61,7 +79,6 @@ function activate(context) {
         context.globalState.update('hasShownWelcome', true);
     }
 }
-exports.activate = activate;
 async function executeInColab(selectionOnly) {
     const editor = vscode.window.activeTextEditor;
     if (!editor) {
@@ -87,11 +104,10 @@ async function executeInColab(selectionOnly) {
     }
     // Check configuration
     const config = vscode.workspace.getConfiguration('colab-bridge');
-    const pythonPath = config.get('pythonPath', 'python3');
     const timeout = config.get('timeout', 60);
     const showOutput = config.get('showOutput', true);
-    const serviceAccountPath = config.get('serviceAccountPath', '');
-    const driveFolder = config.get('driveFolder', '');
+    const streamOutput = config.get('streamOutput', true);
+    const options = getDaemonOptions();
     // Update status bar to show executing
     statusBar.text = "$(rocket) Sending...";
     statusBar.tooltip = "Sending code to Google Colab...";
@@ -101,171 +117,174 @@ async function executeInColab(selectionOnly) {
         title: "Executing in Colab",
         cancellable: true
     }, async (progress, token) => {
-        return new Promise((resolve, reject) => {
-            // Flash "Sending..." for just 100ms since it's instant
-            progress.report({ message: "Sending code..." });
-            // After 100ms, switch to "Executing..." since that's what takes time
-            setTimeout(() => {
-                statusBar.text = "$(sync~spin) Executing...";
-                statusBar.tooltip = "Executing code in Google Colab...";
-                progress.report({ message: "Executing in Colab..." });
-            }, 100);
-            // Create Python command as a file to avoid escaping issues
-            const pythonCommand = `
-from colab_integration.universal_bridge import UniversalColabBridge
-import sys
-import os
-
-# Suppress bridge initialization output
-import io
-from contextlib import redirect_stdout
-
-try:
-    with redirect_stdout(io.StringIO()):
-        bridge = UniversalColabBridge(tool_name='vscode')
-        bridge.initialize()
-    
-    code = '''${code.replace(/'''/g, "\\'\\'\\'")}'''
-    result = bridge.execute_code(code, timeout=${timeout})
-    
-    if result.get('status') == 'success':
-        print('SUCCESS')
-        print('---OUTPUT---')
-        print(result.get('output', ''))
-        print('---END---')
-    elif result.get('status') == 'error':
-        print('ERROR')
-        print('---ERROR---')
-        print(result.get('error', 'Unknown error'))
-        print('---END---')
-    else:
-        print('PENDING')
-        print('---INFO---')
-        print(f"Request queued: {result.get('request_id', 'unknown')}")
-        print('Make sure Colab notebook is running!')
-        print('---END---')
-        
-except Exception as e:
-    print('EXCEPTION')
-    print('---ERROR---')
-    print(f"Failed to execute: {str(e)}")
-    print('---END---')
-`;
-            // Write to temp file to avoid shell escaping issues
-            const tempFile = path.join(os.tmpdir(), `colab_bridge_${Date.now()}.py`);
-            fs.writeFileSync(tempFile, pythonCommand);
-            // Prepare environment variables
-            const env = { ...process.env };
-            if (serviceAccountPath) {
-                env.SERVICE_ACCOUNT_PATH = serviceAccountPath;
+        progress.report({ message: "Sending code..." });
+        // After 100ms, switch to "Executing..." since that's what takes time
+        const executingTimer = setTimeout(() => {
+            statusBar.text = "$(sync~spin) Executing...";
+            statusBar.tooltip = "Executing code in Google Colab...";
+            progress.report({ message: "Executing in Colab..." });
+        }, 100);
+        // Output chunks arrive as 'output' notifications while the code runs,
+        // and the command id to cancel in a 'submitted' notification
+        const streamId = `vscode-${nextStreamId++}`;
+        const execution = { cancelRequested: false };
+        running.set(streamId, execution);
+        const onOutput = (params) => {
+            if (params.stream_id === streamId) {
+                const channel = getOutputChannel();
+                channel.append(params.stdout || '');
+                channel.append(params.stderr || '');
             }
-            if (driveFolder) {
-                env.GOOGLE_DRIVE_FOLDER_ID = driveFolder;
-            }
-            // Execute command
-            const child = (0, child_process_1.exec)(`${pythonPath} "${tempFile}"`, {
-                timeout: (timeout + 10) * 1000,
-                env: env
-            }, (error, stdout, stderr) => {
-                // Clean up temp file
-                try {
-                    fs.unlinkSync(tempFile);
-                }
-                catch (e) {
-                    // Ignore cleanup errors
-                }
-                if (token.isCancellationRequested) {
-                    resolve();
-                    return;
+        };
+        const onSubmitted = (params) => {
+            if (params.stream_id === streamId) {
+                execution.commandId = params.command_id;
+                if (execution.cancelRequested) {
+                    cancelColabExecution(streamId);
                 }
-                if (error) {
-                    if (error.message.includes('ModuleNotFoundError') && error.message.includes('colab_integration')) {
-                        vscode.window.showErrorMessage('Colab Bridge not installed. Run: pip install -e /var/projects/colab-bridge', 'Install Guide').then(selection => {
-                            if (selection === 'Install Guide') {
-                                vscode.env.openExternal(vscode.Uri.parse('https://github.com/colab-bridge/colab-integration#installation'));
-                            }
-                        });
-                    }
-                    else {
-                        vscode.window.showErrorMessage(`Execution failed: ${error.message}`);
-                    }
-                    resolve();
-                    return;
-                }
-                // Parse output
-                const output = stdout.toString();
-                const lines = output.split('\n');
-                const status = lines[0];
-                let content = '';
-                let startCapture = false;
-                for (const line of lines) {
-                    if (line === '---OUTPUT---' || line === '---ERROR---' || line === '---INFO---') {
-                        startCapture = true;
-                        continue;
-                    }
-                    if (line === '---END---') {
-                        break;
-                    }
-                    if (startCapture) {
-                        content += line + '\n';
-                    }
-                }
-                // Show results immediately
-                if (status === 'SUCCESS') {
-                    statusBar.text = "$(check) Colab GPU";
-                    statusBar.tooltip = "Last execution: Success";
-                    vscode.window.showInformationMessage('✅ Execution completed!');
-                    if (showOutput && content.trim()) {
-                        showOutputDocument('Colab Output', content);
-                    }
-                }
-                else if (status === 'ERROR') {
-                    statusBar.text = "$(error) Colab GPU";
-                    statusBar.tooltip = "Last execution: Failed";
-                    vscode.window.showErrorMessage('❌ Execution failed');
-                    if (content.trim()) {
-                        showOutputDocument('Colab Error', content);
-                    }
+            }
+        };
+        daemon.on('submitted', onSubmitted);
+        let cancelled = false;
+        token.onCancellationRequested(() => {
+            cancelled = true;
+            // Free the runtime too, not just this notification
+            cancelColabExecution(streamId);
+        });
+        try {
+            // The daemon already holds an initialized bridge - no interpreter startup here
+            let result;
+            if (streamOutput) {
+                const channel = getOutputChannel();
+                channel.clear();
+                if (showOutput) {
+                    channel.show(true);
                 }
-                else if (status === 'PENDING') {
-                    // Immediately show executing status
-                    statusBar.text = "$(sync~spin) Executing...";
-                    statusBar.tooltip = "Executing in Colab...";
-                    // Extract request ID from content
-                    const requestIdMatch = content.match(/Request queued: (cmd_\w+_\d+)/);
-                    if (requestIdMatch) {
-                        const requestId = requestIdMatch[1];
-                        // Show quick notification that sending is done
-                        vscode.window.showInformationMessage(`✅ Code sent! Now executing in Colab...`);
-                        console.log(`[Colab Bridge] Starting poll for request: ${requestId}`);
-                        // Start polling for result immediately
-                        pollForResult(pythonPath, requestId, timeout, showOutput, serviceAccountPath, driveFolder);
-                    }
-                    else {
-                        vscode.window.showWarningMessage('Request queued for Colab processing', 'Open Colab').then(selection => {
-                            if (selection === 'Open Colab') {
-                                vscode.commands.executeCommand('colab-bridge.openColabNotebook');
-                            }
-                        });
-                    }
+                daemon.on('output', onOutput);
+                result = await daemon.request(options, 'execute_stream', { code, timeout, stream_id: streamId });
+            }
+            else {
+                result = await daemon.request(options, 'execute', { code, timeout, stream_id: streamId });
+            }
+            if (cancelled) {
+                return;
+            }
+            if (result.status === 'pending') {
+                const requestId = result.request_id;
+                if (requestId) {
+                    vscode.window.showInformationMessage(`✅ Code sent! Now executing in Colab...`);
+                    console.log(`[Colab Bridge] Waiting for request: ${requestId}`);
+                    pollForResult(requestId, timeout, showOutput);
                 }
                 else {
-                    statusBar.text = "$(cloud) Colab GPU";
-                    statusBar.tooltip = "Click to execute current file in Colab";
-                    vscode.window.showErrorMessage('Unexpected response from Colab integration');
+                    vscode.window.showWarningMessage('Request queued for Colab processing', 'Open Colab').then(selection => {
+                        if (selection === 'Open Colab') {
+                            vscode.commands.executeCommand('colab-bridge.openColabNotebook');
+                        }
+                    });
                 }
-                // Don't reset status bar here - let the polling handle it or keep the status visible
-                resolve();
-            });
-            // Handle cancellation
-            token.onCancellationRequested(() => {
-                child.kill();
-                vscode.window.showInformationMessage('Colab execution cancelled');
-                resolve();
-            });
-        });
+                return;
+            }
+            showResult(result, showOutput, streamOutput);
+        }
+        catch (error) {
+            if (cancelled) {
+                return;
+            }
+            statusBar.text = "$(error) Colab GPU";
+            statusBar.tooltip = "Last execution: Failed";
+            const message = String(error && error.message || error);
+            if (message.includes('ModuleNotFoundError') && message.includes('colab_integration')) {
+                vscode.window.showErrorMessage('Colab Bridge not installed. Run: pip install -e /var/projects/colab-bridge', 'Install Guide').then(selection => {
+                    if (selection === 'Install Guide') {
+                        vscode.env.openExternal(vscode.Uri.parse('https://github.com/colab-bridge/colab-integration#installation'));
+                    }
+                });
+            }
+            else {
+                vscode.window.showErrorMessage(`Execution failed: ${message}`);
+            }
+        }
+        finally {
+            clearTimeout(executingTimer);
+            daemon.removeListener('output', onOutput);
+            daemon.removeListener('submitted', onSubmitted);
+            running.delete(streamId);
+        }
     });
 }
+async function cancelColabExecution(streamId) {
+    // The command palette cancels the most recently started execution
+    const target = streamId || Array.from(running.keys()).pop();
+    const execution = target ? running.get(target) : undefined;
+    if (!execution) {
+        vscode.window.showInformationMessage('No Colab execution to cancel');
+        return;
+    }
+    if (!execution.commandId) {
+        // Not on Drive yet - cancelled as soon as its 'submitted' notification arrives
+        execution.cancelRequested = true;
+        return;
+    }
+    try {
+        // Only this execution's command: others running in parallel keep going
+        await daemon.request(getDaemonOptions(), 'cancel', { command_id: execution.commandId });
+        vscode.window.showInformationMessage('Colab execution cancelled');
+    }
+    catch (error) {
+        vscode.window.showErrorMessage(`Cancel failed: ${String(error && error.message || error)}`);
+    }
+}
+function getOutputChannel() {
+    if (!outputChannel) {
+        outputChannel = vscode.window.createOutputChannel('Colab Output');
+    }
+    return outputChannel;
+}
+function getDaemonOptions() {
+    const config = vscode.workspace.getConfiguration('colab-bridge');
+    return {
+        pythonPath: config.get('pythonPath', 'python3'),
+        serviceAccountPath: config.get('serviceAccountPath', ''),
+        driveFolder: config.get('driveFolder', '')
+    };
+}
+function showResult(result, showOutput, streamed = false) {
+    console.log(`[Colab Bridge] Got result with status: ${result.status}`);
+    if (result.status === 'success') {
+        statusBar.text = "$(check) Colab GPU";
+        statusBar.tooltip = "Last execution: Success";
+        vscode.window.showInformationMessage('✅ Execution completed!');
+        if (showOutput) {
+            // Check if we have visualizations
+            if (result.visualizations && result.visualizations.length > 0) {
+                console.log(`[Colab Bridge] Showing enhanced output with ${result.visualizations.length} visualization(s)`);
+                // Plots are artifact references; the daemon downloads them (cached by hash)
+                (0, enhanced_output_1.showEnhancedOutput)(result, async (artifact) => {
+                    const content = await daemon.request(getDaemonOptions(), 'get_artifact', { artifact });
+                    return content.data;
+                });
+            }
+            else if (result.output && result.output.trim() && !streamed) {
+                // Streamed text output is already in the output channel
+                showOutputDocument('Colab Output', result.output);
+            }
+        }
+    }
+    else if (result.status === 'error') {
+        statusBar.text = "$(error) Colab GPU";
+        statusBar.tooltip = "Last execution: Failed";
+        vscode.window.showErrorMessage('❌ Execution failed');
+        if (result.error && result.error.trim()) {
+            showOutputDocument('Colab Error', result.error);
+        }
+    }
+    // Keep status visible for 3 seconds
+    setTimeout(() => {
+        statusBar.text = "$(cloud) Colab GPU";
+        statusBar.tooltip = "Click to execute current file in Colab";
+    }, 3000);
+}
 async function showOutputDocument(title, content) {
     const doc = await vscode.workspace.openTextDocument({
         content: content,
@@ -276,189 +295,45 @@ async function showOutputDocument(title, content) {
         preview: false
     });
 }
-async function pollForResult(pythonPath, requestId, timeout, showOutput, serviceAccountPath, driveFolder) {
-    let pollCount = 0;
+async function pollForResult(requestId, timeout, showOutput) {
     const startTime = Date.now();
     const maxTime = timeout * 1000; // Convert to milliseconds
-    // More aggressive polling for faster response
-    const getPollDelay = () => {
-        if (pollCount < 10)
-            return 100; // First 10 polls: 100ms (1 second total)
-        if (pollCount < 20)
-            return 200; // Next 10 polls: 200ms (2 seconds total)
-        if (pollCount < 30)
-            return 500; // Next 10 polls: 500ms (5 seconds total)
-        if (pollCount < 40)
-            return 1000; // Next 10 polls: 1s (10 seconds total)
-        return 2000; // After that: 2s intervals
-    };
-    const poll = () => {
-        pollCount++;
+    // Show elapsed time while the daemon waits on Drive
+    const ticker = setInterval(() => {
         const elapsed = Math.floor((Date.now() - startTime) / 1000);
-        // Always show "Executing..." with elapsed time
-        if (elapsed < 3) {
-            statusBar.text = `$(sync~spin) Executing...`;
-            statusBar.tooltip = `Executing in Colab...`;
-        }
-        else {
-            statusBar.text = `$(sync~spin) Executing... (${elapsed}s)`;
-            statusBar.tooltip = `Executing in Colab... (${elapsed}s elapsed)`;
-        }
-        // Create Python command to check for result
-        const checkCommand = `
-import os
-import sys
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-import json
-
-try:
-    # Get credentials from environment
-    creds_path = os.environ.get('SERVICE_ACCOUNT_PATH', '')
-    folder_id = os.environ.get('GOOGLE_DRIVE_FOLDER_ID', '')
-    
-    if not creds_path or not folder_id:
-        print('NOTFOUND')
-        print('---INFO---')
-        print('Missing configuration')
-        print('---END---')
-        sys.exit(0)
-    
-    # Setup Drive API
-    creds = service_account.Credentials.from_service_account_file(
-        creds_path,
-        scopes=['https://www.googleapis.com/auth/drive']
-    )
-    service = build('drive', 'v3', credentials=creds)
-    
-    # Look for result file - match what actually gets created
-    base_id = '${requestId}'.replace('cmd_', '')
-    # Search for files containing both 'result' and the base_id
-    query = f"'{folder_id}' in parents and name contains 'result' and name contains '{base_id}'"
-    results = service.files().list(q=query, fields='files(id, name)').execute()
-    
-    if results.get('files'):
-        # Found result!
-        file = results['files'][0]
-        content = service.files().get_media(fileId=file['id']).execute()
-        result_data = json.loads(content.decode('utf-8'))
-        
-        if result_data.get('status') == 'success':
-            print('SUCCESS')
-            print('---OUTPUT---')
-            print(result_data.get('output', ''))
-            print('---END---')
-        else:
-            print('ERROR')
-            print('---ERROR---')
-            print(result_data.get('error', 'Unknown error'))
-            print('---END---')
-            
-        # Delete result file
-        try:
-            service.files().delete(fileId=file['id']).execute()
-        except:
-            pass
-    else:
-        print('NOTFOUND')
-        print('---INFO---')
-        print(f'Still processing... ({pollCount}/{maxPolls})')
-        print('---END---')
-        
-except Exception as e:
-    print('EXCEPTION')
-    print('---ERROR---')
-    print(f'Poll error: {str(e)}')
-    print('---END---')
-`;
-        // Write to temp file
-        const tempFile = path.join(os.tmpdir(), `colab_poll_${Date.now()}.py`);
-        fs.writeFileSync(tempFile, checkCommand);
-        // Prepare environment variables for polling
-        const pollEnv = { ...process.env };
-        if (serviceAccountPath) {
-            pollEnv.SERVICE_ACCOUNT_PATH = serviceAccountPath;
-        }
-        if (driveFolder) {
-            pollEnv.GOOGLE_DRIVE_FOLDER_ID = driveFolder;
-        }
-        (0, child_process_1.exec)(`${pythonPath} "${tempFile}"`, { env: pollEnv }, (error, stdout, stderr) => {
-            // Clean up temp file
-            try {
-                fs.unlinkSync(tempFile);
-            }
-            catch (e) {
-                // Ignore cleanup errors
-            }
-            if (error) {
-                // Stop polling
-                statusBar.text = "$(error) Colab GPU";
-                statusBar.tooltip = "Polling failed";
+        statusBar.text = `$(sync~spin) Executing... (${elapsed}s)`;
+        statusBar.tooltip = `Executing in Colab... (${elapsed}s elapsed)`;
+    }, 1000);
+    try {
+        // Each request blocks in the daemon until the result arrives or the slice expires
+        while (Date.now() - startTime < maxTime) {
+            const remaining = Math.max(1, Math.ceil((maxTime - (Date.now() - startTime)) / 1000));
+            const result = await daemon.request(getDaemonOptions(), 'get_result', {
+                request_id: requestId,
+                timeout: Math.min(remaining, 30)
+            });
+            if (result.status !== 'pending') {
+                showResult(result, showOutput);
                 return;
             }
-            const output = stdout.toString();
-            const lines = output.split('\n');
-            const status = lines[0];
-            if (status === 'SUCCESS' || status === 'ERROR') {
-                // Stop polling - we got a result
-                // Stop polling
-                console.log(`[Colab Bridge] Got result with status: ${status}`);
-                let content = '';
-                let startCapture = false;
-                for (const line of lines) {
-                    if (line === '---OUTPUT---' || line === '---ERROR---') {
-                        startCapture = true;
-                        continue;
-                    }
-                    if (line === '---END---') {
-                        break;
-                    }
-                    if (startCapture) {
-                        content += line + '\n';
-                    }
-                }
-                console.log(`[Colab Bridge] Captured output length: ${content.length}`);
-                if (status === 'SUCCESS') {
-                    statusBar.text = "$(check) Colab GPU";
-                    statusBar.tooltip = "Last execution: Success";
-                    vscode.window.showInformationMessage('✅ Execution completed!');
-                    if (showOutput && content.trim()) {
-                        console.log(`[Colab Bridge] Showing output document`);
-                        showOutputDocument('Colab Output', content);
-                    }
-                }
-                else {
-                    statusBar.text = "$(error) Colab GPU";
-                    statusBar.tooltip = "Last execution: Failed";
-                    vscode.window.showErrorMessage('❌ Execution failed');
-                    if (content.trim()) {
-                        showOutputDocument('Colab Error', content);
-                    }
-                }
-                // Keep status visible for 3 seconds instead of 5
-                setTimeout(() => {
-                    statusBar.text = "$(cloud) Colab GPU";
-                    statusBar.tooltip = "Click to execute current file in Colab";
-                }, 3000);
-            }
-            else if (status === 'NOTFOUND' && (Date.now() - startTime) >= maxTime) {
-                // Timeout
-                statusBar.text = "$(warning) Colab GPU";
-                statusBar.tooltip = "Execution timed out";
-                vscode.window.showWarningMessage('⏱️ Execution timed out. The notebook may still be processing.');
-                setTimeout(() => {
-                    statusBar.text = "$(cloud) Colab GPU";
-                    statusBar.tooltip = "Click to execute current file in Colab";
-                }, 3000);
-            }
-            else if (status === 'NOTFOUND') {
-                // Continue polling - schedule next poll immediately with adaptive timing
-                setTimeout(poll, getPollDelay());
-            }
-        });
-    };
-    // Start polling immediately
-    poll();
+        }
+        // Timeout
+        statusBar.text = "$(warning) Colab GPU";
+        statusBar.tooltip = "Execution timed out";
+        vscode.window.showWarningMessage('⏱️ Execution timed out. The notebook may still be processing.');
+        setTimeout(() => {
+            statusBar.text = "$(cloud) Colab GPU";
+            statusBar.tooltip = "Click to execute current file in Colab";
+        }, 3000);
+    }
+    catch (error) {
+        statusBar.text = "$(error) Colab GPU";
+        statusBar.tooltip = "Polling failed";
+        console.error('[Colab Bridge] Waiting for result failed:', error);
+    }
+    finally {
+        clearInterval(ticker);
+    }
 }
 async function openColabNotebook() {
     const notebookUrl = 'https://colab.research.google.com/drive/1XhtEroHqX5Y8hetP-xCN_FMF-Ea81tAA';
@@ -578,7 +453,7 @@ print("✅ Example completed!")`,
     });
 }
 function deactivate() {
+    daemon.dispose();
     console.log('Colab Bridge extension deactivated');
 }
-exports.deactivate = deactivate;
 //# sourceMappingURL=extension.js.map
\ No newline at end of file
@@ -0,0 +1,128 @@
+import { spawn, ChildProcess } from 'child_process';
+import { EventEmitter } from 'events';
+import * as readline from 'readline';
+
+interface PendingRequest {
+    resolve: (value: any) => void;
+    reject: (reason: Error) => void;
+}
+
+export interface DaemonOptions {
+    pythonPath: string;
+    serviceAccountPath: string;
+    driveFolder: string;
+}
+
+/**
+ * Client for the long-lived `colab_integration.daemon` process.
+ * One Python interpreter (with googleapiclient, credentials and the Drive
+ * service already loaded) serves every execute and result request over
+ * line-delimited JSON-RPC on stdio.
+ */
+export class BridgeDaemon extends EventEmitter {
+    private child: ChildProcess | undefined;
+    private options: DaemonOptions | undefined;
+    private nextId = 1;
+    private pending = new Map<number, PendingRequest>();
+    private ready: Promise<void> | undefined;
+
+    async request(options: DaemonOptions, method: string, params: object = {}): Promise<any> {
+        await this.ensureStarted(options);
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject });
+            this.child!.stdin!.write(JSON.stringify({ jsonrpc: '2.0', id, method, params }) + '\n');
+        });
+    }
+
+    dispose() {
+        if (this.child) {
+            this.child.kill();
+            this.child = undefined;
+        }
+        this.ready = undefined;
+    }
+
+    private ensureStarted(options: DaemonOptions): Promise<void> {
+        // Restart when settings that affect the Python side change
+        if (this.child && this.options && !sameOptions(this.options, options)) {
+            this.dispose();
+        }
+        if (this.child && this.ready) {
+            return this.ready;
+        }
+
+        this.options = { ...options };
+        const env = { ...process.env };
+        if (options.serviceAccountPath) {
+            env.SERVICE_ACCOUNT_PATH = options.serviceAccountPath;
+        }
+        if (options.driveFolder) {
+            env.GOOGLE_DRIVE_FOLDER_ID = options.driveFolder;
+        }
+
+        const child = spawn(options.pythonPath, ['-m', 'colab_integration.daemon', '--tool', 'vscode'], { env });
+        this.child = child;
+
+        this.ready = new Promise<void>((resolve, reject) => {
+            const lines = readline.createInterface({ input: child.stdout! });
+            lines.on('line', (line) => {
+                let message: any;
+                try {
+                    message = JSON.parse(line);
+                } catch (e) {
+                    console.log(`[Colab Bridge] daemon: ${line}`);
+                    return;
+                }
+                if (message.method === 'ready') {
+                    console.log(`[Colab Bridge] Daemon ready (pid ${message.params.pid})`);
+                    resolve();
+                } else if (message.method) {
+                    this.emit(message.method, message.params);
+                } else {
+                    this.settle(message);
+                }
+            });
+
+            let stderr = '';
+            child.stderr!.on('data', (data) => {
+                stderr += data.toString();
+                console.log(`[Colab Bridge] daemon: ${data.toString().trimEnd()}`);
+            });
+
+            child.on('error', (err) => reject(err));
+            child.on('exit', (code) => {
+                const error = new Error(`Colab Bridge daemon exited (code ${code}): ${stderr.trim()}`);
+                reject(error);
+                for (const request of this.pending.values()) {
+                    request.reject(error);
+                }
+                this.pending.clear();
+                if (this.child === child) {
+                    this.child = undefined;
+                    this.ready = undefined;
+                }
+            });
+        });
+        return this.ready;
+    }
+
+    private settle(message: any) {
+        const request = this.pending.get(message.id);
+        if (!request) {
+            return;
+        }
+        this.pending.delete(message.id);
+        if (message.error) {
+            request.reject(new Error(message.error.message));
+        } else {
+            request.resolve(message.result);
+        }
+    }
+}
+
+function sameOptions(a: DaemonOptions, b: DaemonOptions): boolean {
+    return a.pythonPath === b.pythonPath
+        && a.serviceAccountPath === b.serviceAccountPath
+        && a.driveFolder === b.driveFolder;
+}
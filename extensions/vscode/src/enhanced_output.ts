@@ -3,11 +3,22 @@ import * as path from 'path';
 import * as fs from 'fs';
 import * as os from 'os';
 
+export interface ArtifactRef {
+    id: string;
+    sha256: string;
+    size: number;
+    type: string;
+}
+
 export interface Visualization {
     type: string;
-    data: string;  // base64 encoded
+    data?: string;  // base64 encoded (inline)
+    artifact?: ArtifactRef;  // stored next to the result, fetched on demand
 }
 
+/** Downloads an artifact's content, base64-encoded */
+export type ArtifactResolver = (artifact: ArtifactRef) => Promise<string>;
+
 export interface EnhancedResult {
     status: string;
     output?: string;
@@ -16,7 +27,25 @@ export interface EnhancedResult {
     output_type?: 'text' | 'rich';
 }
 
-export async function showEnhancedOutput(result: EnhancedResult) {
+/** Fetch the content of artifact visualizations (each distinct artifact once) */
+export async function resolveArtifacts(result: EnhancedResult, resolve: ArtifactResolver): Promise<void> {
+    const fetched = new Map<string, Promise<string>>();
+    for (const viz of result.visualizations || []) {
+        if (viz.artifact && !viz.data) {
+            const artifact = viz.artifact;
+            if (!fetched.has(artifact.sha256)) {
+                fetched.set(artifact.sha256, resolve(artifact));
+            }
+            viz.data = await fetched.get(artifact.sha256)!;
+        }
+    }
+}
+
+export async function showEnhancedOutput(result: EnhancedResult, resolve?: ArtifactResolver) {
+    if (resolve) {
+        await resolveArtifacts(result, resolve);
+    }
+
     if (!result.visualizations || result.visualizations.length === 0) {
         // No visualizations, show text output
         if (result.output && result.output.trim()) {
@@ -111,9 +140,9 @@ function createHtmlOutput(result: EnhancedResult): string {
         <div class="section-title">Visualizations:</div>`;
         
         result.visualizations.forEach((viz, index) => {
-            if (viz.type === 'image/png') {
+            if (viz.type.startsWith('image/') && viz.data) {
                 html += `
-        <img src="data:image/png;base64,${viz.data}" alt="Plot ${index + 1}">`;
+        <img src="data:${viz.type};base64,${viz.data}" alt="Plot ${index + 1}">`;
             }
         });
         
@@ -149,12 +178,15 @@ function escapeHtml(text: string): string {
 }
 
 // Also export a function to save plots to files
-export async function savePlotsToFiles(result: EnhancedResult): Promise<string[]> {
+export async function savePlotsToFiles(result: EnhancedResult, resolve?: ArtifactResolver): Promise<string[]> {
     const savedFiles: string[] = [];
     
     if (!result.visualizations || result.visualizations.length === 0) {
         return savedFiles;
     }
+    if (resolve) {
+        await resolveArtifacts(result, resolve);
+    }
 
     // Create temp directory for plots
     const tempDir = path.join(os.tmpdir(), `colab_plots_${Date.now()}`);
@@ -163,9 +195,15 @@ export async function savePlotsToFiles(result: EnhancedResult): Promise<string[]
     }
 
     // Save each visualization
+    const extensions: { [type: string]: string } = {
+        'image/png': '.png',
+        'image/svg+xml': '.svg',
+        'image/webp': '.webp',
+        'image/jpeg': '.jpg'
+    };
     result.visualizations.forEach((viz, index) => {
-        if (viz.type === 'image/png') {
-            const filename = path.join(tempDir, `plot_${index + 1}.png`);
+        if (extensions[viz.type] && viz.data) {
+            const filename = path.join(tempDir, `plot_${index + 1}${extensions[viz.type]}`);
             const buffer = Buffer.from(viz.data, 'base64');
             fs.writeFileSync(filename, buffer);
             savedFiles.push(filename);
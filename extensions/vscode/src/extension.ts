@@ -1,11 +1,19 @@
 import * as vscode from 'vscode';
-import { exec } from 'child_process';
-import * as path from 'path';
-import * as fs from 'fs';
-import * as os from 'os';
 import { showEnhancedOutput, EnhancedResult } from './enhanced_output';
+import { BridgeDaemon, DaemonOptions } from './bridge_daemon';
 
 let statusBar: vscode.StatusBarItem;
+let outputChannel: vscode.OutputChannel | undefined;
+let nextStreamId = 1;
+const daemon = new BridgeDaemon();
+
+interface RunningExecution {
+    commandId?: string;
+    cancelRequested: boolean;
+}
+
+// Executions started from this window, by stream id, in start order
+const running = new Map<string, RunningExecution>();
 
 export function activate(context: vscode.ExtensionContext) {
     console.log('Colab Bridge extension is now active!');
@@ -36,7 +44,12 @@ export function activate(context: vscode.ExtensionContext) {
         await configureIntegration();
     });
 
-    context.subscriptions.push(executeFile, executeSelection, openNotebook, configure);
+    const cancelExecution = vscode.commands.registerCommand('colab-bridge.cancelExecution', async () => {
+        await cancelColabExecution();
+    });
+
+    context.subscriptions.push(executeFile, executeSelection, openNotebook, configure, cancelExecution);
+    context.subscriptions.push({ dispose: () => daemon.dispose() });
 
     // Show welcome message on first activation
     const hasShownWelcome = context.globalState.get('hasShownWelcome', false);
@@ -73,11 +86,10 @@ async function executeInColab(selectionOnly: boolean) {
 
     // Check configuration
     const config = vscode.workspace.getConfiguration('colab-bridge');
-    const pythonPath = config.get<string>('pythonPath', 'python3');
     const timeout = config.get<number>('timeout', 60);
     const showOutput = config.get<boolean>('showOutput', true);
-    const serviceAccountPath = config.get<string>('serviceAccountPath', '');
-    const driveFolder = config.get<string>('driveFolder', '');
+    const streamOutput = config.get<boolean>('streamOutput', true);
+    const options = getDaemonOptions();
 
     // Update status bar to show executing
     statusBar.text = "$(rocket) Sending...";
@@ -89,195 +101,184 @@ async function executeInColab(selectionOnly: boolean) {
         title: "Executing in Colab",
         cancellable: true
     }, async (progress, token) => {
-        return new Promise<void>((resolve, reject) => {
-            // Flash "Sending..." for just 100ms since it's instant
-            progress.report({ message: "Sending code..." });
-            
-            // After 100ms, switch to "Executing..." since that's what takes time
-            setTimeout(() => {
-                statusBar.text = "$(sync~spin) Executing...";
-                statusBar.tooltip = "Executing code in Google Colab...";
-                progress.report({ message: "Executing in Colab..." });
-            }, 100);
-
-            // Create Python command as a file to avoid escaping issues
-            const pythonCommand = `
-from colab_integration.universal_bridge import UniversalColabBridge
-import sys
-import os
-
-# Suppress bridge initialization output
-import io
-from contextlib import redirect_stdout
-
-try:
-    with redirect_stdout(io.StringIO()):
-        bridge = UniversalColabBridge(tool_name='vscode')
-        bridge.initialize()
-    
-    code = '''${code.replace(/'''/g, "\\'\\'\\'")}'''
-    result = bridge.execute_code(code, timeout=${timeout})
-    
-    # Return the full JSON result
-    import json
-    print('RESULT_JSON')
-    print('---JSON_START---')
-    print(json.dumps(result))
-    print('---JSON_END---')
+        progress.report({ message: "Sending code..." });
         
-except Exception as e:
-    # Return error as JSON
-    result = {
-        'status': 'error',
-        'error': f"Failed to execute: {str(e)}"
-    }
-    print('RESULT_JSON')
-    print('---JSON_START---')
-    print(json.dumps(result))
-    print('---JSON_END---')
-`;
-
-            // Write to temp file to avoid shell escaping issues
-            const tempFile = path.join(os.tmpdir(), `colab_bridge_${Date.now()}.py`);
-            fs.writeFileSync(tempFile, pythonCommand);
-
-            // Prepare environment variables
-            const env = { ...process.env };
-            if (serviceAccountPath) {
-                env.SERVICE_ACCOUNT_PATH = serviceAccountPath;
+        // After 100ms, switch to "Executing..." since that's what takes time
+        const executingTimer = setTimeout(() => {
+            statusBar.text = "$(sync~spin) Executing...";
+            statusBar.tooltip = "Executing code in Google Colab...";
+            progress.report({ message: "Executing in Colab..." });
+        }, 100);
+
+        // Output chunks arrive as 'output' notifications while the code runs,
+        // and the command id to cancel in a 'submitted' notification
+        const streamId = `vscode-${nextStreamId++}`;
+        const execution: RunningExecution = { cancelRequested: false };
+        running.set(streamId, execution);
+        const onOutput = (params: any) => {
+            if (params.stream_id === streamId) {
+                const channel = getOutputChannel();
+                channel.append(params.stdout || '');
+                channel.append(params.stderr || '');
             }
-            if (driveFolder) {
-                env.GOOGLE_DRIVE_FOLDER_ID = driveFolder;
+        };
+        const onSubmitted = (params: any) => {
+            if (params.stream_id === streamId) {
+                execution.commandId = params.command_id;
+                if (execution.cancelRequested) {
+                    cancelColabExecution(streamId);
+                }
             }
+        };
+        daemon.on('submitted', onSubmitted);
+
+        let cancelled = false;
+        token.onCancellationRequested(() => {
+            cancelled = true;
+            // Free the runtime too, not just this notification
+            cancelColabExecution(streamId);
+        });
 
-            // Execute command
-            const child = exec(`${pythonPath} "${tempFile}"`, {
-                timeout: (timeout + 10) * 1000, // Add buffer to timeout
-                env: env
-            }, (error, stdout, stderr) => {
-                // Clean up temp file
-                try {
-                    fs.unlinkSync(tempFile);
-                } catch (e) {
-                    // Ignore cleanup errors
+        try {
+            // The daemon already holds an initialized bridge - no interpreter startup here
+            let result: EnhancedResult;
+            if (streamOutput) {
+                const channel = getOutputChannel();
+                channel.clear();
+                if (showOutput) {
+                    channel.show(true);
                 }
+                daemon.on('output', onOutput);
+                result = await daemon.request(options, 'execute_stream', { code, timeout, stream_id: streamId }) as EnhancedResult;
+            } else {
+                result = await daemon.request(options, 'execute', { code, timeout, stream_id: streamId }) as EnhancedResult;
+            }
+            if (cancelled) {
+                return;
+            }
 
-                if (token.isCancellationRequested) {
-                    resolve();
-                    return;
+            if (result.status === 'pending') {
+                const requestId = (result as any).request_id;
+                if (requestId) {
+                    vscode.window.showInformationMessage(`✅ Code sent! Now executing in Colab...`);
+                    console.log(`[Colab Bridge] Waiting for request: ${requestId}`);
+                    pollForResult(requestId, timeout, showOutput);
+                } else {
+                    vscode.window.showWarningMessage(
+                        'Request queued for Colab processing',
+                        'Open Colab'
+                    ).then(selection => {
+                        if (selection === 'Open Colab') {
+                            vscode.commands.executeCommand('colab-bridge.openColabNotebook');
+                        }
+                    });
                 }
+                return;
+            }
 
-                if (error) {
-                    if (error.message.includes('ModuleNotFoundError') && error.message.includes('colab_integration')) {
-                        vscode.window.showErrorMessage(
-                            'Colab Bridge not installed. Run: pip install -e /var/projects/colab-bridge',
-                            'Install Guide'
-                        ).then(selection => {
-                            if (selection === 'Install Guide') {
-                                vscode.env.openExternal(vscode.Uri.parse('https://github.com/colab-bridge/colab-integration#installation'));
-                            }
-                        });
-                    } else {
-                        vscode.window.showErrorMessage(`Execution failed: ${error.message}`);
+            showResult(result, showOutput, streamOutput);
+        } catch (error: any) {
+            if (cancelled) {
+                return;
+            }
+            statusBar.text = "$(error) Colab GPU";
+            statusBar.tooltip = "Last execution: Failed";
+            const message = String(error && error.message || error);
+            if (message.includes('ModuleNotFoundError') && message.includes('colab_integration')) {
+                vscode.window.showErrorMessage(
+                    'Colab Bridge not installed. Run: pip install -e /var/projects/colab-bridge',
+                    'Install Guide'
+                ).then(selection => {
+                    if (selection === 'Install Guide') {
+                        vscode.env.openExternal(vscode.Uri.parse('https://github.com/colab-bridge/colab-integration#installation'));
                     }
-                    resolve();
-                    return;
-                }
+                });
+            } else {
+                vscode.window.showErrorMessage(`Execution failed: ${message}`);
+            }
+        } finally {
+            clearTimeout(executingTimer);
+            daemon.removeListener('output', onOutput);
+            daemon.removeListener('submitted', onSubmitted);
+            running.delete(streamId);
+        }
+    });
+}
 
-                // Parse output
-                const output = stdout.toString();
-                const lines = output.split('\n');
-                const status = lines[0];
-
-                if (status === 'RESULT_JSON') {
-                    // Extract JSON content
-                    let jsonContent = '';
-                    let startCapture = false;
-                    
-                    for (const line of lines) {
-                        if (line === '---JSON_START---') {
-                            startCapture = true;
-                            continue;
-                        }
-                        if (line === '---JSON_END---') {
-                            break;
-                        }
-                        if (startCapture) {
-                            jsonContent += line + '\n';
-                        }
-                    }
+async function cancelColabExecution(streamId?: string) {
+    // The command palette cancels the most recently started execution
+    const target = streamId || Array.from(running.keys()).pop();
+    const execution = target ? running.get(target) : undefined;
+    if (!execution) {
+        vscode.window.showInformationMessage('No Colab execution to cancel');
+        return;
+    }
+    if (!execution.commandId) {
+        // Not on Drive yet - cancelled as soon as its 'submitted' notification arrives
+        execution.cancelRequested = true;
+        return;
+    }
+    try {
+        // Only this execution's command: others running in parallel keep going
+        await daemon.request(getDaemonOptions(), 'cancel', { command_id: execution.commandId });
+        vscode.window.showInformationMessage('Colab execution cancelled');
+    } catch (error: any) {
+        vscode.window.showErrorMessage(`Cancel failed: ${String(error && error.message || error)}`);
+    }
+}
 
-                    try {
-                        const result = JSON.parse(jsonContent) as EnhancedResult;
-                        
-                        if (result.status === 'success') {
-                            statusBar.text = "$(check) Colab GPU";
-                            statusBar.tooltip = "Last execution: Success";
-                            vscode.window.showInformationMessage('✅ Execution completed!');
-                            
-                            if (showOutput) {
-                                // Check if we have visualizations
-                                if (result.visualizations && result.visualizations.length > 0) {
-                                    console.log(`[Colab Bridge] Showing enhanced output with ${result.visualizations.length} visualization(s)`);
-                                    showEnhancedOutput(result);
-                                } else if (result.output && result.output.trim()) {
-                                    showOutputDocument('Colab Output', result.output);
-                                }
-                            }
-                        } else if (result.status === 'error') {
-                            statusBar.text = "$(error) Colab GPU";
-                            statusBar.tooltip = "Last execution: Failed";
-                            vscode.window.showErrorMessage('❌ Execution failed');
-                            if (result.error && result.error.trim()) {
-                                showOutputDocument('Colab Error', result.error);
-                            }
-                        } else if (result.status === 'pending') {
-                            // Handle pending status
-                            statusBar.text = "$(sync~spin) Executing...";
-                            statusBar.tooltip = "Executing in Colab...";
-                            
-                            const requestId = (result as any).request_id;
-                            if (requestId) {
-                                vscode.window.showInformationMessage(`✅ Code sent! Now executing in Colab...`);
-                                console.log(`[Colab Bridge] Starting poll for request: ${requestId}`);
-                                pollForResult(pythonPath, requestId, timeout, showOutput, serviceAccountPath, driveFolder);
-                            } else {
-                                vscode.window.showWarningMessage(
-                                    'Request queued for Colab processing',
-                                    'Open Colab'
-                                ).then(selection => {
-                                    if (selection === 'Open Colab') {
-                                        vscode.commands.executeCommand('colab-bridge.openColabNotebook');
-                                    }
-                                });
-                            }
-                        }
-                    } catch (e) {
-                        console.error('[Colab Bridge] Failed to parse JSON result:', e);
-                        statusBar.text = "$(error) Colab GPU";
-                        statusBar.tooltip = "Parse error";
-                        vscode.window.showErrorMessage('Failed to parse Colab response');
-                    }
-                } else {
-                    // Fallback to old parsing for backward compatibility
-                    statusBar.text = "$(cloud) Colab GPU";
-                    statusBar.tooltip = "Click to execute current file in Colab";
-                    vscode.window.showErrorMessage('Unexpected response format from Colab integration');
-                }
+function getOutputChannel(): vscode.OutputChannel {
+    if (!outputChannel) {
+        outputChannel = vscode.window.createOutputChannel('Colab Output');
+    }
+    return outputChannel;
+}
 
-                // Don't reset status bar here - let the polling handle it or keep the status visible
+function getDaemonOptions(): DaemonOptions {
+    const config = vscode.workspace.getConfiguration('colab-bridge');
+    return {
+        pythonPath: config.get<string>('pythonPath', 'python3'),
+        serviceAccountPath: config.get<string>('serviceAccountPath', ''),
+        driveFolder: config.get<string>('driveFolder', '')
+    };
+}
 
-                resolve();
-            });
+function showResult(result: EnhancedResult, showOutput: boolean, streamed = false) {
+    console.log(`[Colab Bridge] Got result with status: ${result.status}`);
 
-            // Handle cancellation
-            token.onCancellationRequested(() => {
-                child.kill();
-                vscode.window.showInformationMessage('Colab execution cancelled');
-                resolve();
-            });
-        });
-    });
+    if (result.status === 'success') {
+        statusBar.text = "$(check) Colab GPU";
+        statusBar.tooltip = "Last execution: Success";
+        vscode.window.showInformationMessage('✅ Execution completed!');
+        
+        if (showOutput) {
+            // Check if we have visualizations
+            if (result.visualizations && result.visualizations.length > 0) {
+                console.log(`[Colab Bridge] Showing enhanced output with ${result.visualizations.length} visualization(s)`);
+                // Plots are artifact references; the daemon downloads them (cached by hash)
+                showEnhancedOutput(result, async (artifact) => {
+                    const content = await daemon.request(getDaemonOptions(), 'get_artifact', { artifact });
+                    return content.data;
+                });
+            } else if (result.output && result.output.trim() && !streamed) {
+                // Streamed text output is already in the output channel
+                showOutputDocument('Colab Output', result.output);
+            }
+        }
+    } else if (result.status === 'error') {
+        statusBar.text = "$(error) Colab GPU";
+        statusBar.tooltip = "Last execution: Failed";
+        vscode.window.showErrorMessage('❌ Execution failed');
+        if (result.error && result.error.trim()) {
+            showOutputDocument('Colab Error', result.error);
+        }
+    }
+
+    // Keep status visible for 3 seconds
+    setTimeout(() => {
+        statusBar.text = "$(cloud) Colab GPU";
+        statusBar.tooltip = "Click to execute current file in Colab";
+    }, 3000);
 }
 
 async function showOutputDocument(title: string, content: string) {
@@ -292,204 +293,48 @@ async function showOutputDocument(title: string, content: string) {
     });
 }
 
-async function pollForResult(pythonPath: string, requestId: string, timeout: number, showOutput: boolean, serviceAccountPath: string, driveFolder: string) {
-    let pollCount = 0;
+async function pollForResult(requestId: string, timeout: number, showOutput: boolean) {
     const startTime = Date.now();
     const maxTime = timeout * 1000; // Convert to milliseconds
-    
-    // More aggressive polling for faster response
-    const getPollDelay = () => {
-        if (pollCount < 10) return 100;   // First 10 polls: 100ms (1 second total)
-        if (pollCount < 20) return 200;   // Next 10 polls: 200ms (2 seconds total)
-        if (pollCount < 30) return 500;   // Next 10 polls: 500ms (5 seconds total)
-        if (pollCount < 40) return 1000;  // Next 10 polls: 1s (10 seconds total)
-        return 2000;                      // After that: 2s intervals
-    };
-    
-    const poll = () => {
-        pollCount++;
-        const elapsed = Math.floor((Date.now() - startTime) / 1000);
-        
-        // Always show "Executing..." with elapsed time
-        if (elapsed < 3) {
-            statusBar.text = `$(sync~spin) Executing...`;
-            statusBar.tooltip = `Executing in Colab...`;
-        } else {
-            statusBar.text = `$(sync~spin) Executing... (${elapsed}s)`;
-            statusBar.tooltip = `Executing in Colab... (${elapsed}s elapsed)`;
-        }
-        
-        // Create Python command to check for result
-        const checkCommand = `
-import os
-import sys
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-import json
-
-try:
-    # Get credentials from environment
-    creds_path = os.environ.get('SERVICE_ACCOUNT_PATH', '')
-    folder_id = os.environ.get('GOOGLE_DRIVE_FOLDER_ID', '')
-    
-    if not creds_path or not folder_id:
-        print('NOTFOUND')
-        print('---INFO---')
-        print('Missing configuration')
-        print('---END---')
-        sys.exit(0)
-    
-    # Setup Drive API
-    creds = service_account.Credentials.from_service_account_file(
-        creds_path,
-        scopes=['https://www.googleapis.com/auth/drive']
-    )
-    service = build('drive', 'v3', credentials=creds)
-    
-    # Look for result file - match what actually gets created
-    base_id = '${requestId}'.replace('cmd_', '')
-    # Search for files containing both 'result' and the base_id
-    query = f"'{folder_id}' in parents and name contains 'result' and name contains '{base_id}'"
-    results = service.files().list(q=query, fields='files(id, name)').execute()
-    
-    if results.get('files'):
-        # Found result!
-        file = results['files'][0]
-        content = service.files().get_media(fileId=file['id']).execute()
-        result_data = json.loads(content.decode('utf-8'))
-        
-        # Return the full JSON result
-        print('RESULT_JSON')
-        print('---JSON_START---')
-        print(json.dumps(result_data))
-        print('---JSON_END---')
-            
-        # Delete result file
-        try:
-            service.files().delete(fileId=file['id']).execute()
-        except:
-            pass
-    else:
-        print('NOTFOUND')
-        print('---INFO---')
-        print(f'Still processing... ({pollCount}/{maxPolls})')
-        print('---END---')
-        
-except Exception as e:
-    print('EXCEPTION')
-    print('---ERROR---')
-    print(f'Poll error: {str(e)}')
-    print('---END---')
-`;
-
-        // Write to temp file
-        const tempFile = path.join(os.tmpdir(), `colab_poll_${Date.now()}.py`);
-        fs.writeFileSync(tempFile, checkCommand);
-
-        // Prepare environment variables for polling
-        const pollEnv = { ...process.env };
-        if (serviceAccountPath) {
-            pollEnv.SERVICE_ACCOUNT_PATH = serviceAccountPath;
-        }
-        if (driveFolder) {
-            pollEnv.GOOGLE_DRIVE_FOLDER_ID = driveFolder;
-        }
-
-        exec(`${pythonPath} "${tempFile}"`, { env: pollEnv }, (error, stdout, stderr) => {
-            // Clean up temp file
-            try {
-                fs.unlinkSync(tempFile);
-            } catch (e) {
-                // Ignore cleanup errors
-            }
 
-            if (error) {
-                // Stop polling
-                statusBar.text = "$(error) Colab GPU";
-                statusBar.tooltip = "Polling failed";
+    // Show elapsed time while the daemon waits on Drive
+    const ticker = setInterval(() => {
+        const elapsed = Math.floor((Date.now() - startTime) / 1000);
+        statusBar.text = `$(sync~spin) Executing... (${elapsed}s)`;
+        statusBar.tooltip = `Executing in Colab... (${elapsed}s elapsed)`;
+    }, 1000);
+
+    try {
+        // Each request blocks in the daemon until the result arrives or the slice expires
+        while (Date.now() - startTime < maxTime) {
+            const remaining = Math.max(1, Math.ceil((maxTime - (Date.now() - startTime)) / 1000));
+            const result = await daemon.request(getDaemonOptions(), 'get_result', {
+                request_id: requestId,
+                timeout: Math.min(remaining, 30)
+            }) as EnhancedResult;
+
+            if (result.status !== 'pending') {
+                showResult(result, showOutput);
                 return;
             }
+        }
 
-            const output = stdout.toString();
-            const lines = output.split('\n');
-            const status = lines[0];
-
-            if (status === 'RESULT_JSON') {
-                // Extract JSON content
-                let jsonContent = '';
-                let startCapture = false;
-                
-                for (const line of lines) {
-                    if (line === '---JSON_START---') {
-                        startCapture = true;
-                        continue;
-                    }
-                    if (line === '---JSON_END---') {
-                        break;
-                    }
-                    if (startCapture) {
-                        jsonContent += line + '\n';
-                    }
-                }
-
-                try {
-                    const result = JSON.parse(jsonContent) as EnhancedResult;
-                    console.log(`[Colab Bridge] Got result with status: ${result.status}`);
-                    
-                    if (result.status === 'success') {
-                        statusBar.text = "$(check) Colab GPU";
-                        statusBar.tooltip = "Last execution: Success";
-                        vscode.window.showInformationMessage('✅ Execution completed!');
-                        
-                        if (showOutput) {
-                            // Check if we have visualizations
-                            if (result.visualizations && result.visualizations.length > 0) {
-                                console.log(`[Colab Bridge] Showing enhanced output with ${result.visualizations.length} visualization(s)`);
-                                showEnhancedOutput(result);
-                            } else if (result.output && result.output.trim()) {
-                                console.log(`[Colab Bridge] Showing text output`);
-                                showOutputDocument('Colab Output', result.output);
-                            }
-                        }
-                    } else if (result.status === 'error') {
-                        statusBar.text = "$(error) Colab GPU";
-                        statusBar.tooltip = "Last execution: Failed";
-                        vscode.window.showErrorMessage('❌ Execution failed');
-                        if (result.error && result.error.trim()) {
-                            showOutputDocument('Colab Error', result.error);
-                        }
-                    }
-                    
-                    // Keep status visible for 3 seconds
-                    setTimeout(() => {
-                        statusBar.text = "$(cloud) Colab GPU";
-                        statusBar.tooltip = "Click to execute current file in Colab";
-                    }, 3000);
-                } catch (e) {
-                    console.error('[Colab Bridge] Failed to parse JSON result:', e);
-                    statusBar.text = "$(error) Colab GPU";
-                    statusBar.tooltip = "Parse error";
-                    vscode.window.showErrorMessage('Failed to parse Colab response');
-                }
-            } else if (status === 'NOTFOUND' && (Date.now() - startTime) >= maxTime) {
-                // Timeout
-                statusBar.text = "$(warning) Colab GPU";
-                statusBar.tooltip = "Execution timed out";
-                vscode.window.showWarningMessage('⏱️ Execution timed out. The notebook may still be processing.');
-                
-                setTimeout(() => {
-                    statusBar.text = "$(cloud) Colab GPU";
-                    statusBar.tooltip = "Click to execute current file in Colab";
-                }, 3000);
-            } else if (status === 'NOTFOUND') {
-                // Continue polling - schedule next poll immediately with adaptive timing
-                setTimeout(poll, getPollDelay());
-            }
-        });
-    };
-    
-    // Start polling immediately
-    poll();
+        // Timeout
+        statusBar.text = "$(warning) Colab GPU";
+        statusBar.tooltip = "Execution timed out";
+        vscode.window.showWarningMessage('⏱️ Execution timed out. The notebook may still be processing.');
+        
+        setTimeout(() => {
+            statusBar.text = "$(cloud) Colab GPU";
+            statusBar.tooltip = "Click to execute current file in Colab";
+        }, 3000);
+    } catch (error: any) {
+        statusBar.text = "$(error) Colab GPU";
+        statusBar.tooltip = "Polling failed";
+        console.error('[Colab Bridge] Waiting for result failed:', error);
+    } finally {
+        clearInterval(ticker);
+    }
 }
 
 async function openColabNotebook() {
@@ -630,5 +475,6 @@ print("✅ Example completed!")`,
 }
 
 export function deactivate() {
+    daemon.dispose();
     console.log('Colab Bridge extension deactivated');
 }
\ No newline at end of file
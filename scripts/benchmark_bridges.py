@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark every bridge variant end to end without Google credentials
+Bridge and EnhancedColabProcessor talk through a local directory that
+stands in for the Drive folder, with measured Drive latencies injected
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from colab_integration.benchmark import BRIDGE_VARIANTS, run_variant, format_table
+from colab_integration.fake_drive import LATENCY_PROFILES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bridge variants over a local Drive stand-in")
+    parser.add_argument("--variants", nargs="+", default=list(BRIDGE_VARIANTS), choices=list(BRIDGE_VARIANTS))
+    parser.add_argument("--commands", type=int, default=20, help="Commands per variant")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent callers (batch: all in flight)")
+    parser.add_argument("--profile", default="drive", choices=list(LATENCY_PROFILES), help="Latency profile")
+    parser.add_argument("--scale", type=float, default=0.05, help="Scale factor applied to the profile's latencies")
+    parser.add_argument("--code", default="print('ok')", help="Code each command runs")
+    parser.add_argument("--root", help="Directory standing in for the Drive folder (temporary by default)")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for variant in args.variants:
+        root = str(Path(args.root) / variant) if args.root else None
+        rows.append(run_variant(variant, commands=args.commands, concurrency=args.concurrency,
+                                profile=args.profile, scale=args.scale, code=args.code, root=root))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print("📊 Bridge benchmark (LocalDriveService + EnhancedColabProcessor)")
+    print("=" * 64)
+    print(f"Commands: {args.commands}, concurrency: {args.concurrency}, "
+          f"profile: {args.profile} x{args.scale}")
+    print()
+    print(format_table(rows))
+    print()
+    print("bridge/cmd and proc/cmd are Drive API calls per command on each side")
+
+
+if __name__ == "__main__":
+    main()
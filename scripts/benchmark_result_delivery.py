@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark result delivery offline: per-command polling vs shared changes feed
+Runs concurrent callers against FakeDriveService with measured Drive latencies
+"""
+
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from colab_integration.drive_changes import DriveChangesWatcher
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor, DRIVE_LATENCY
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'benchmark-folder'
+
+
+def run_mode(mode, callers, processing_time, scale):
+    """Run `callers` concurrent commands with the given delivery mode"""
+    DriveChangesWatcher.reset_shared()
+    latency = {op: seconds * scale for op, seconds in DRIVE_LATENCY.items()}
+    service = FakeDriveService(latency=latency)
+    attach_echo_processor(service, FOLDER_ID, delay=processing_time)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def caller(i):
+        bridge = UniversalColabBridge(tool_name=f"{mode}{i}", result_delivery=mode)
+        bridge.drive_service = service
+        bridge.folder_id = FOLDER_ID
+        start = time.time()
+        result = bridge.execute_code(f"print({i})", timeout=120)
+        with lock:
+            latencies.append((time.time() - start, result.get('status')))
+
+    start = time.time()
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.time() - start
+
+    queries = service.calls['files.list'] + service.calls['changes.list']
+    return {
+        'mode': mode,
+        'wall': wall,
+        'mean_latency': sum(l for l, _ in latencies) / len(latencies),
+        'ok': sum(1 for _, status in latencies if status == 'success'),
+        'queries': queries,
+        'total_calls': service.total_calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark polling vs changes-feed result delivery")
+    parser.add_argument("--callers", type=int, default=20, help="Concurrent callers")
+    parser.add_argument("--processing-time", type=float, default=5.0, help="Simulated execution time (s)")
+    parser.add_argument("--scale", type=float, default=0.1, help="Scale factor applied to Drive latencies")
+    args = parser.parse_args()
+
+    print("📊 Result delivery benchmark (FakeDriveService)")
+    print("=" * 60)
+    print(f"Callers: {args.callers}, processing: {args.processing_time}s, latency scale: {args.scale}")
+    print()
+    print(f"{'mode':<10}{'ok':>5}{'wall (s)':>11}{'mean (s)':>11}{'queries':>10}{'calls':>8}")
+    for mode in ('poll', 'changes'):
+        stats = run_mode(mode, args.callers, args.processing_time, args.scale)
+        print(f"{stats['mode']:<10}{stats['ok']:>5}{stats['wall']:>11.2f}{stats['mean_latency']:>11.2f}"
+              f"{stats['queries']:>10}{stats['total_calls']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the offline tests (FakeDriveService, no Google credentials needed)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+
+@pytest.fixture
+def isolated_home(tmp_path, monkeypatch):
+    """Scan index, manifests and caches live under ~/.colab-bridge - keep them inside the test dir"""
+    monkeypatch.setenv('HOME', str(tmp_path / "home"))
+    monkeypatch.delenv('COLAB_BRIDGE_PROTOCOL', raising=False)
+    return tmp_path / "home"
+
+
+@pytest.fixture
+def make_bridge():
+    """Factory for bridges wired to a fake Drive service
+
+    Test modules override this fixture with their own defaults
+    (bridge class, tool name, delivery mode) where they differ.
+    """
+    def make(service, tool_name='test_bridge', bridge_class=UniversalColabBridge, **kwargs):
+        bridge = bridge_class(tool_name=tool_name, **kwargs)
+        bridge.drive_service = service
+        bridge.folder_id = FOLDER_ID
+        return bridge
+
+    return make
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Offline tests for out-of-band plot artifacts (content-addressed files
+referenced from results instead of inline base64)
+"""
+
+import sys
+import json
+import base64
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+matplotlib = pytest.importorskip('matplotlib')
+matplotlib.use('Agg')
+
+from colab_integration import artifacts
+from colab_integration.artifacts import ArtifactStore, render_figure
+from colab_integration.daemon import BridgeDaemon
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.result_cache import ResultCache
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+PLOTS_CODE = """
+import matplotlib.pyplot as plt
+for values in ([1, 2, 3], [1, 2, 3], [3, 2, 1]):
+    plt.figure()
+    plt.plot(values)
+"""
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+@pytest.fixture
+def processor():
+    return EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+
+
+def run(processor, code, **options):
+    return processor.dispatch_command({'id': 'cmd', 'type': 'execute', 'code': code, **options})
+
+
+def test_plots_become_deduplicated_artifacts(processor):
+    result = run(processor, PLOTS_CODE, accept_artifacts=True)
+
+    visuals = result['visualizations']
+    assert len(visuals) == 3
+    assert all('data' not in v and v['type'] == 'image/png' for v in visuals)
+    hashes = [v['artifact']['sha256'] for v in visuals]
+    assert len(set(hashes)) == 2
+    assert processor.artifacts.uploads == 2
+    assert len(processor.service.find_files('artifact_')) == 2
+    assert len(json.dumps(result)) < 2000
+
+    # A restarted processor finds the stored copies instead of re-uploading
+    restarted = EnhancedColabProcessor(service=processor.service, folder_id=FOLDER_ID)
+    run(restarted, PLOTS_CODE, accept_artifacts=True)
+    assert restarted.artifacts.uploads == 0
+
+
+def test_concurrent_puts_of_one_plot_upload_it_once():
+    service = FakeDriveService(latency={'files.list': 0.05, 'files.create': 0.05})
+    store = ArtifactStore(lambda: service, FOLDER_ID)
+    barrier = threading.Barrier(4)
+    refs = []
+
+    def put():
+        barrier.wait()
+        refs.append(store.put(b'\x89PNG same plot', 'image/png'))
+
+    threads = [threading.Thread(target=put) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert store.uploads == 1 and len(service.find_files('artifact_')) == 1
+    assert len({ref['id'] for ref in refs}) == 1 and store._hash_locks == {}
+
+
+def test_large_artifacts_use_resumable_uploads(monkeypatch):
+    uploads = []
+
+    class RecordingUpload(artifacts.MediaIoBaseUpload):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            uploads.append(self)
+
+    monkeypatch.setattr(artifacts, 'MediaIoBaseUpload', RecordingUpload)
+    monkeypatch.setattr(artifacts, 'RESUMABLE_THRESHOLD', 50)
+    store = ArtifactStore(lambda: FakeDriveService(), FOLDER_ID)
+
+    store.put(b'<svg>small</svg>', 'image/svg+xml')
+    store.put(b'<svg>' + b'x' * 100 + b'</svg>', 'image/svg+xml')
+    assert [upload.resumable() for upload in uploads] == [False, True]
+
+
+def test_unused_artifacts_expire_after_the_retention_window(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(artifacts, 'time', SimpleNamespace(time=lambda: clock.now))
+    service = FakeDriveService()
+    store = ArtifactStore(lambda: service, FOLDER_ID, retention=60)
+    kept = store.put(b'kept', 'image/png')
+    dropped = store.put(b'dropped', 'image/png')
+    # Left behind by an earlier processor: its window starts when first listed
+    earlier = service.files().create(body={'name': artifacts.artifact_name('0' * 64, 'image/png'),
+                                           'parents': [FOLDER_ID]}, media_body=b'old').execute()
+
+    clock.now = 1030
+    assert store.collect_garbage() == 0
+    clock.now = 1050
+    assert store.put(b'kept', 'image/png')['id'] == kept['id']
+
+    clock.now = 1070
+    assert store.collect_garbage() == 1
+    assert {f['id'] for f in service.find_files('artifact_')} == {kept['id'], earlier['id']}
+    clock.now = 1100
+    assert store.collect_garbage() == 1
+    assert [f['id'] for f in service.find_files('artifact_')] == [kept['id']]
+
+    # Expired content is uploaded again rather than referenced
+    assert store.put(b'dropped', 'image/png')['id'] != dropped['id'] and store.uploads == 3
+
+
+def test_old_clients_still_get_inline_plots(processor):
+    result = run(processor, PLOTS_CODE)
+    assert all(base64.b64decode(v['data']).startswith(b'\x89PNG') for v in result['visualizations'])
+    assert processor.service.find_files('artifact_') == []
+
+
+@pytest.mark.parametrize('fmt,mimetype,magic', [
+    ('svg', 'image/svg+xml', b'<?xml'),
+    ('webp', 'image/webp', b'RIFF'),
+])
+def test_configurable_format(processor, fmt, mimetype, magic):
+    result = run(processor, PLOTS_CODE, plot_format=fmt, plot_dpi=50)
+    visual = result['visualizations'][0]
+    assert visual['type'] == mimetype
+    assert base64.b64decode(visual['data']).startswith(magic)
+
+
+def test_rendering_is_deterministic():
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    plt.plot([1, 2])
+    for fmt in ('png', 'svg'):
+        assert render_figure(fig, fmt, 72) == render_figure(fig, fmt, 72)
+    plt.close(fig)
+
+
+def test_bridge_fetches_artifacts_lazily():
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    service.add_listener(on_create)
+    bridge = UniversalColabBridge(tool_name="artifact_test")
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+
+    result = bridge.execute_code(PLOTS_CODE, timeout=10)
+    visual = result['visualizations'][0]
+    assert 'artifact' in visual and 'data' not in visual
+
+    service.reset_calls()
+    assert bridge.fetch_artifact(visual).startswith(b'\x89PNG')
+    assert bridge.fetch_artifact(visual['artifact']).startswith(b'\x89PNG')
+    assert service.calls['files.get_media'] == 1
+
+    bridge.inline_artifacts(result)
+    assert base64.b64decode(result['visualizations'][2]['data']).startswith(b'\x89PNG')
+
+    daemon = BridgeDaemon(tool_name="artifact_test")
+    daemon.bridge = bridge
+    content = daemon.dispatch('get_artifact', {'artifact': visual['artifact']})
+    assert content['type'] == 'image/png' and content['data'] == result['visualizations'][0]['data']
+
+
+def test_cached_results_keep_their_artifacts_after_drive_expiry(tmp_path):
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    service.add_listener(on_create)
+    bridge = UniversalColabBridge(tool_name="artifact_cache_test",
+                                  result_cache=ResultCache(tmp_path / "results.sqlite3"))
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+
+    bridge.execute_code(PLOTS_CODE, timeout=10)
+    # The processor's garbage collection removed the Drive copies
+    for file in service.find_files('artifact_'):
+        service.files().delete(fileId=file['id']).execute()
+
+    result = bridge.execute_code(PLOTS_CODE, timeout=10)
+    assert result['cached']
+    for visual in result['visualizations']:
+        assert bridge.fetch_artifact(visual).startswith(b'\x89PNG')
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the SmartBatchBridge batch transport
+(FakeDriveService + EnhancedColabProcessor, no Google credentials needed)
+"""
+
+import sys
+import time
+import threading
+import functools
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+from colab_integration.optimized_bridge import SmartBatchBridge
+
+FOLDER_ID = 'fake-folder'
+
+
+def attach_processor(service):
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+    lock = threading.Lock()
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            def run():
+                with lock:
+                    processor.process_command(file)
+            threading.Thread(target=run, daemon=True).start()
+
+    service.add_listener(on_create)
+    return processor
+
+
+@pytest.fixture
+def make_bridge(make_bridge):
+    return functools.partial(make_bridge, tool_name='batch', bridge_class=SmartBatchBridge, poll_interval=0.05)
+
+
+def test_batched_results_are_demultiplexed(make_bridge):
+    service = FakeDriveService()
+    attach_processor(service)
+    bridge = make_bridge(service)
+
+    futures = [bridge.submit_code(f"print({i} * 2)") for i in range(100)]
+    results = [f.result(timeout=10) for f in futures]
+
+    assert [r['output'] for r in results] == [f"{i * 2}\n" for i in range(100)]
+    assert bridge.result_futures == {}
+    # Client and processor together stay well under one Drive call per command
+    assert service.total_calls / len(futures) < 0.5
+    assert service.find_files('result_') == []
+
+
+def test_session_order_across_batches(make_bridge):
+    service = FakeDriveService()
+    processor = attach_processor(service)
+    executed = []
+    run_code = processor.execute_code_with_capture
+
+    def recording(code, *args):
+        executed.append(code)
+        return run_code(code, *args)
+    processor.execute_code_with_capture = recording
+
+    bridge = make_bridge(service, max_batch=3)
+    codes = [f"print({i})" for i in range(7)]
+    results = bridge.execute_many(codes, session='s')
+
+    assert [r['output'] for r in results] == [f"{i}\n" for i in range(7)]
+    assert executed == codes
+
+
+def test_orphaned_batch_results_are_deleted(make_bridge):
+    service = FakeDriveService()
+    attach_processor(service)
+    bridge = make_bridge(service)
+    stale = service.put_file(f"result_batch_{bridge.instance_id}_0_0.json", "{}", parents=[FOLDER_ID])
+
+    assert bridge.execute_code("print('hi')")['output'] == "hi\n"
+    assert service.find_files(stale['name']) == []
+
+
+def test_commands_in_one_batch_expire_on_their_own_deadlines(make_bridge):
+    service = FakeDriveService()  # No processor: nothing ever comes back
+    bridge = make_bridge(service, linger=0.2)
+
+    short = bridge.submit_code("print('short')", timeout=0.5)
+    long = bridge.submit_code("print('long')", timeout=30)
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        short.result(timeout=5)
+    assert time.time() - start < 3
+
+    # The batch stays pending for the command that still has time left
+    assert not long.done()
+    [batch] = bridge.pending_batches.values()
+    assert [entry['future'] for entry in batch['entries']] == [long]
+    bridge.stop_batching = True
+
+
+def test_expired_batch_blocks_its_session_until_the_result_arrives(make_bridge):
+    service = FakeDriveService()  # The processor only shows up after the first command expired
+    bridge = make_bridge(service, linger=0.01)
+
+    first = bridge.submit_code("print('first')", timeout=0.5, session='s')
+    with pytest.raises(TimeoutError):
+        first.result(timeout=5)
+    [batch] = bridge.pending_batches.values()
+    first_id = batch['sessions']['s']
+
+    # Still possibly running remotely: later commands of the session are held back
+    second = bridge.submit_code("print('second')", timeout=30, session='s')
+    late = bridge.submit_code("print('late')", timeout=0.3, session='s')
+    assert late.result(timeout=5)['blocked_by'] == first_id
+    assert not second.done()
+    assert len(service.find_files('command_')) == 1
+
+    processor = attach_processor(service)
+    [manifest] = service.find_files('command_')
+    processor.process_command(manifest)
+    assert second.result(timeout=10)['output'] == "second\n"
+    bridge.stop_batching = True
+
+
+def test_falls_back_when_processor_lacks_batches(make_bridge):
+    service = FakeDriveService()
+    attach_echo_processor(service, FOLDER_ID)
+    bridge = make_bridge(service, result_delivery='changes')
+
+    result = bridge.submit_code("print(1)").result(timeout=10)
+
+    assert result['status'] == 'success'
+    assert not bridge.batching_supported
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Offline tests for bulk archive transfer in FileSyncManager
+(FakeDriveService + EnhancedColabProcessor, no Google credentials needed)
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import enhanced_processor
+from colab_integration.bulk_transfer import pack_files, unpack_archive
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+from colab_integration.file_sync import FileSyncManager
+
+FOLDER_ID = 'fake-folder'
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+def attach_processor(service):
+    """Run an EnhancedColabProcessor against the fake Drive, one command at a time"""
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+    lock = threading.Lock()
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            def run():
+                with lock:
+                    processor.process_command(file)
+            threading.Thread(target=run, daemon=True).start()
+
+    service.add_listener(on_create)
+    return processor
+
+
+def make_sync(tmp_path, service):
+    local_dir = tmp_path / "local"
+    sync = FileSyncManager(str(local_dir), colab_mount_point=str(tmp_path / "colab"))
+    sync.bridge.drive_service = service
+    sync.bridge.folder_id = FOLDER_ID
+    return sync, local_dir
+
+
+def test_pack_and_unpack_round_trip(tmp_path):
+    src = tmp_path / "src"
+    (src / "pkg").mkdir(parents=True)
+    (src / "a.py").write_text("print('a')")
+    (src / "pkg" / "b.csv").write_text("x,y\n1,2\n")
+
+    data = pack_files(src, ["a.py", "pkg/b.csv"])
+    written = unpack_archive(data, tmp_path / "dst")
+
+    assert sorted(written) == ["a.py", "pkg/b.csv"]
+    assert (tmp_path / "dst" / "pkg" / "b.csv").read_text() == "x,y\n1,2\n"
+
+
+def test_unpack_rejects_path_traversal(tmp_path):
+    data = pack_files(tmp_path, [], extra_files={"../escape.txt": b"x"})
+    with pytest.raises(ValueError):
+        unpack_archive(data, tmp_path / "dst")
+
+
+def test_push_many_files_in_constant_round_trips(tmp_path):
+    service = FakeDriveService()
+    attach_processor(service)
+    sync, local_dir = make_sync(tmp_path, service)
+
+    for i in range(300):
+        (local_dir / f"mod_{i}.py").write_text(f"value = {i}\n")
+
+    assert sync.sync_to_colab()
+    assert (tmp_path / "colab" / "mod_299.py").read_text() == "value = 299\n"
+    # archive + command from the client, result from the processor
+    assert service.calls['files.create'] == 3
+    assert service.find_files('syncpush_') == []
+
+
+def test_pull_downloads_only_newer_files(tmp_path):
+    service = FakeDriveService()
+    attach_processor(service)
+    sync, local_dir = make_sync(tmp_path, service)
+
+    (local_dir / "shared.txt").write_text("local")
+    assert sync.sync_to_colab()
+
+    colab_dir = tmp_path / "colab"
+    (colab_dir / "results").mkdir()
+    (colab_dir / "results" / "metrics.json").write_text('{"acc": 0.9}')
+
+    assert sync.sync_from_colab()
+    assert (local_dir / "results" / "metrics.json").read_text() == '{"acc": 0.9}'
+    assert service.find_files('syncpull_') == []
+
+    service.reset_calls()
+    assert sync.sync_from_colab()
+    # processor reads the command, client reads the result - no archive
+    assert service.calls['files.get_media'] == 2
+
+
+def test_pull_only_compares_and_fetches_synced_files(tmp_path):
+    service = FakeDriveService()
+    attach_processor(service)
+    sync, local_dir = make_sync(tmp_path, service)
+
+    (local_dir / ".git" / "objects").mkdir(parents=True)
+    (local_dir / ".git" / "objects" / "ab.txt").write_text("blob")
+    (local_dir / "node_modules").mkdir()
+    (local_dir / "node_modules" / "index.json").write_text("{}")
+    (local_dir / "train.py").write_text("fit()")
+    assert sorted(sync._local_mtimes()) == ["train.py"]
+
+    colab_dir = tmp_path / "colab"
+    (colab_dir / "__pycache__").mkdir(parents=True)
+    (colab_dir / "__pycache__" / "notes.txt").write_text("cache")
+    (colab_dir / "weights.bin").write_bytes(b"\0" * 10)
+    (colab_dir / "report.md").write_text("# done")
+
+    assert sync.sync_from_colab()
+    assert (local_dir / "report.md").read_text() == "# done"
+    assert not (local_dir / "weights.bin").exists()
+    assert not (local_dir / "__pycache__").exists()
+
+
+def test_large_pull_archives_use_resumable_uploads(tmp_path, monkeypatch):
+    uploads = []
+
+    class RecordingUpload(enhanced_processor.MediaIoBaseUpload):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            uploads.append(self)
+
+    monkeypatch.setattr(enhanced_processor, 'MediaIoBaseUpload', RecordingUpload)
+    monkeypatch.setattr(enhanced_processor, 'RESUMABLE_THRESHOLD', 10)
+    service = FakeDriveService()
+    attach_processor(service)
+    sync, local_dir = make_sync(tmp_path, service)
+    (tmp_path / "colab").mkdir()
+    (tmp_path / "colab" / "data.csv").write_text("x\n" * 1000)
+
+    assert sync.sync_from_colab()
+    assert (local_dir / "data.csv").read_text() == "x\n" * 1000
+    assert [upload.resumable() for upload in uploads] == [True]
+
+
+def test_archive_is_deleted_when_the_push_fails(tmp_path):
+    service = FakeDriveService()
+    processor = attach_processor(service)
+    processor.command_handlers['sync_push'] = lambda command: {'status': 'error', 'error': "disk full"}
+    sync, local_dir = make_sync(tmp_path, service)
+    (local_dir / "a.py").write_text("print(1)")
+
+    assert not sync.sync_to_colab()
+    assert service.find_files('syncpush_') == []
+
+
+def test_falls_back_to_per_file_for_old_processors(tmp_path):
+    service = FakeDriveService()
+    attach_echo_processor(service, FOLDER_ID)
+    sync, local_dir = make_sync(tmp_path, service)
+    (local_dir / "a.py").write_text("print(1)")
+
+    assert sync.sync_to_colab()
+    assert sync.transfer_mode == "exec"
+    assert service.find_files('syncpush_') == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
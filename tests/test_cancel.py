@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Offline tests for cancelling running commands on the processor
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import cli
+from colab_integration.daemon import BridgeDaemon, JsonRpcError
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.execution_engine import _set_async_exc
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+RUNAWAY = "open({marker!r}, 'w').close()\nprint('started')\nwhile True:\n    pass\n"
+
+
+def connect(processor, tool_name):
+    def on_create(file):
+        if processor.protocol.command_id(file['name']):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    processor.service.add_listener(on_create)
+    bridge = UniversalColabBridge(tool_name=tool_name)
+    bridge.drive_service = processor.service
+    bridge.folder_id = FOLDER_ID
+    return bridge
+
+
+def run_in_background(function, *args, **kwargs):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function(*args, **kwargs)), daemon=True)
+    thread.start()
+    return thread, results
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out waiting"
+        time.sleep(0.02)
+
+
+def test_runaway_code_is_interrupted(tmp_path):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    bridge = connect(processor, "cancel_test")
+    assert bridge.execute_code("x = 41", session='s', timeout=10)['status'] == 'success'
+
+    marker = tmp_path / "started"
+    thread, results = run_in_background(bridge.execute_code, RUNAWAY.format(marker=str(marker)),
+                                        session='s', timeout=30)
+    wait_for(marker.exists)
+
+    start = time.time()
+    cancel = bridge.cancel()
+    assert cancel['status'] == 'success' and cancel['state'] == 'interrupted'
+    thread.join(10)
+    assert time.time() - start < 10
+
+    result = results[0]
+    assert result['status'] == 'error' and result['cancelled']
+    assert result['error'] == "KeyboardInterrupt: Execution cancelled"
+    assert result['output'] == 'started\n'
+    assert bridge.in_flight == {}
+
+    # The worker and the session's variables survive the interrupt
+    assert bridge.execute_code("print(x + 1)", session='s', timeout=10)['output'] == '42\n'
+    assert bridge.cancel()['state'] == 'idle'
+
+
+def test_a_command_is_interrupted_once_per_cancel_block(tmp_path):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    bridge = connect(processor, "cancel_test")
+    marker = tmp_path / "started"
+    thread, results = run_in_background(bridge.execute_code, RUNAWAY.format(marker=str(marker)),
+                                        session='s', timeout=30)
+    wait_for(marker.exists)
+    command_id = list(bridge.in_flight)[-1]
+
+    # A second cancel must not raise again while the captures are restored
+    assert processor.canceller.cancel(command_id) == 'interrupted'
+    assert processor.canceller.cancel(command_id) in ('requested', 'finished')
+    thread.join(10)
+    assert results[0]['cancelled'] and results[0]['output'] == 'started\n'
+    assert bridge.execute_code("print('next')", session='s', timeout=10)['output'] == 'next\n'
+
+
+def test_cancelled_commands_are_skipped_before_they_start():
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    bridge = connect(processor, "cancel_test")
+
+    assert bridge.cancel('cmd_later')['state'] == 'pending'
+    processor.run_and_respond({'id': 'cmd_later', 'type': 'execute', 'code': "print('ran')"})
+    result = bridge._wait_for_result('cmd_later', 10)
+    assert result['status'] == 'error' and result['cancelled'] and result['output'] == ''
+
+    assert bridge.cancel('cmd_later')['state'] == 'finished'
+    processor.run_and_respond({'id': 'cmd_next', 'type': 'execute', 'code': "print('ran')"})
+    assert bridge._wait_for_result('cmd_next', 10)['output'] == 'ran\n'
+
+
+def test_isolated_interpreters_are_killed(tmp_path):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID, isolation='process')
+    bridge = connect(processor, "cancel_test")
+
+    marker = tmp_path / "started"
+    code = f"import time\nopen({str(marker)!r}, 'w').close()\nwhile True:\n    time.sleep(1)\n"
+    thread, results = run_in_background(bridge.execute_code, code, timeout=30)
+    wait_for(marker.exists)
+
+    assert bridge.cancel()['state'] == 'killed'
+    thread.join(10)
+    assert results[0]['status'] == 'error' and results[0]['cancelled']
+
+
+def test_daemon_cancels_only_the_named_command(tmp_path):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    daemon = BridgeDaemon(tool_name="cancel_test")
+    daemon.bridge = connect(processor, "cancel_test")
+    with pytest.raises(JsonRpcError):
+        daemon.dispatch('cancel', {})
+
+    submitted = {}
+
+    def execute(stream_id, marker):
+        # What serve_lines installs for each request on a connection
+        daemon._local.notify = lambda method, params: submitted.setdefault(params['stream_id'], params['command_id'])
+        return daemon.dispatch('execute', {'code': RUNAWAY.format(marker=str(marker)), 'timeout': 30,
+                                           'stream_id': stream_id})
+
+    markers = {'first': tmp_path / "first", 'second': tmp_path / "second"}
+    runs = {name: run_in_background(execute, name, marker) for name, marker in markers.items()}
+    wait_for(lambda: all(marker.exists() for marker in markers.values()) and len(submitted) == 2)
+
+    assert daemon.dispatch('cancel', {'command_id': submitted['first']})['state'] == 'interrupted'
+    thread, results = runs['first']
+    thread.join(10)
+    assert results[0]['cancelled']
+
+    # The other execution keeps running until it is cancelled by its own id
+    assert runs['second'][0].is_alive()
+    assert daemon.dispatch('cancel', {'command_id': submitted['second']})['state'] == 'interrupted'
+    thread, results = runs['second']
+    thread.join(10)
+    assert results[0]['cancelled']
+
+
+def test_stdio_daemon_exits_without_waiting_out_running_commands(tmp_path, monkeypatch):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    daemon = BridgeDaemon(tool_name="shutdown_test", max_workers=1)
+    daemon.bridge = connect(processor, "shutdown_test")
+    marker = tmp_path / "started"
+    read_fd, write_fd = os.pipe()
+    client = os.fdopen(write_fd, 'w')
+    output = []
+    monkeypatch.setattr(sys, 'stdin', os.fdopen(read_fd))
+    monkeypatch.setattr(sys, 'stdout', SimpleNamespace(write=output.append, flush=lambda: None))
+
+    for request_id, code in ((1, RUNAWAY.format(marker=str(marker))), (2, "print('queued')")):
+        client.write(json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': 'execute',
+                                 'params': {'code': code, 'timeout': 60, 'stream_id': str(request_id)}}) + "\n")
+    client.flush()
+    server, _ = run_in_background(daemon.serve_stdio)
+    wait_for(lambda: marker.exists() and any('"submitted"' in line for line in output))
+
+    client.close()  # EOF: the IDE went away
+    server.join(10)
+    assert not server.is_alive()
+    # Interrupted rather than waited out for 60 s; the queued request never ran
+    wait_for(lambda: any('"id": 1' in line for line in output))
+    response = json.loads(next(line for line in output if '"id": 1' in line))
+    assert response['result']['cancelled']
+    daemon.executor.shutdown(wait=True)
+    assert not any('"id": 2' in line for line in output)
+
+
+
+def test_ctrl_c_in_the_cli_cancels_the_remote_command(tmp_path, monkeypatch, capsys):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    bridge = connect(processor, "cli_test")
+    monkeypatch.setattr(bridge, 'initialize', lambda: None)
+    monkeypatch.setattr(cli, 'UniversalColabBridge', lambda tool_name: bridge)
+    marker = tmp_path / "started"
+    args = SimpleNamespace(code=RUNAWAY.format(marker=str(marker)), file=None, tool='cli',
+                           timeout=30, output='text', stream=False)
+
+    thread, exits = run_in_background(lambda: pytest.raises(SystemExit, cli.execute_command, args).value.code)
+    # The processor can start the command before the CLI has printed its id
+    printed = []
+
+    def command_id_printed():
+        printed.append(capsys.readouterr().err)
+        return marker.exists() and 'Command ID:' in ''.join(printed)
+
+    wait_for(command_id_printed)
+    _set_async_exc(thread.ident, KeyboardInterrupt)  # Ctrl-C
+    thread.join(10)
+
+    assert exits == [130]
+    err = ''.join(printed) + capsys.readouterr().err
+    [command_id] = [line.split()[2] for line in err.splitlines() if line.startswith('Command ID:')]
+    assert f"Interrupted {command_id}" in err
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
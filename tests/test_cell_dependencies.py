@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Offline tests for dependency-aware incremental notebook execution
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.cell_dependencies import analyze_cell, find_providers
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.local_notebook import LocalColabNotebook
+
+FOLDER_ID = 'fake-folder'
+
+
+class CountingSync:
+    """FileSyncManager stand-in that only counts sync passes"""
+
+    def __init__(self, colab_mount):
+        self.colab_mount = colab_mount
+        self.pushes = 0
+        self.pulls = 0
+
+    def sync_to_colab(self, rel_paths=None):
+        self.pushes += 1
+        return True
+
+    def sync_from_colab(self):
+        self.pulls += 1
+        return True
+
+
+@pytest.fixture
+def notebook(tmp_path, monkeypatch, isolated_home):
+    monkeypatch.chdir(tmp_path)  # Cells chdir into the workspace
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+    commands = []
+
+    def on_create(file):
+        if processor.protocol.command_id(file['name']):
+            commands.append(file['name'])
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    service.add_listener(on_create)
+    notebook = LocalColabNotebook(str(tmp_path / "analysis.ipynb"), tool_name="nb_test")
+    notebook.colab_bridge.drive_service = service
+    notebook.colab_bridge.folder_id = FOLDER_ID
+    notebook.file_sync = CountingSync(str(tmp_path))
+    notebook.commands = commands
+    notebook.cells = []
+    return notebook
+
+
+def test_cells_define_and_read_names():
+    info = analyze_cell("import numpy as np\ndata = load(path)\ndata['x'] = 1\nmodel.fit(data)\n"
+                        "def f(a):\n    return a + scale\nfor i in range(3):\n    total = i\n")
+    assert info.defines == {'np', 'data', 'model', 'f', 'i', 'total'}
+    assert {'load', 'path', 'model', 'scale', 'range'} <= info.reads
+    assert 'data' not in info.reads  # Defined before use in the same cell
+
+    assert analyze_cell("x = x + 1").reads == {'x'}
+    assert analyze_cell("!pip install torch\ny = 2").defines == {'y'}
+    assert analyze_cell("%%time\ny = 2").opaque
+    assert analyze_cell("from math import *").opaque
+    assert analyze_cell("exec('z = 1')").opaque
+
+
+def test_providers_follow_the_latest_definition():
+    sources = ["a = 1", "b = 2", "a = a + b", "print(a)", "print(b)", "%%bash\necho hi", "c = 3"]
+    assert find_providers(sources) == [set(), set(), {0, 1}, {2}, {1}, {1, 2}, {5}]
+
+
+def test_only_stale_cells_and_dependents_rerun(notebook):
+    for source in ["base = 10", "offset = 5", "scaled = base * 2", "print(scaled + offset)", "print(base)"]:
+        notebook.add_cell("code", source)
+
+    results = notebook.run_all_cells()
+    assert [r['status'] for r in results] == ['success'] * 5
+    assert results[3]['output'] == '25\n'
+    assert len(notebook.commands) == 1
+    assert (notebook.file_sync.pushes, notebook.file_sync.pulls) == (1, 1)
+
+    # Nothing changed: no round trips, no syncs
+    results = notebook.run_all_cells()
+    assert all(r.get('cached') for r in results) and results[3]['output'] == '25\n'
+    assert len(notebook.commands) == 1 and notebook.file_sync.pushes == 1
+
+    # Editing the last cell costs one command
+    notebook.cells[4].source = "print(base + 1)"
+    results = notebook.run_all_cells()
+    assert len(notebook.commands) == 2 and results[4]['output'] == '11\n'
+
+    # Editing the first cell re-runs its dependents only
+    notebook.cells[0].source = "base = 20"
+    assert notebook.stale_cells() == [0, 2, 3, 4]
+    results = notebook.run_all_cells()
+    assert len(notebook.commands) == 3
+    assert results[1].get('cached') and results[3]['output'] == '45\n'
+
+    # Re-running a cell by hand invalidates what reads from it
+    notebook.run_cell(1)
+    assert notebook.stale_cells() == [3]
+
+    assert len(notebook.run_all_cells(force=True)) == 5
+    assert len(notebook.commands) == 5
+
+
+def test_failed_cells_stay_stale(notebook):
+    notebook.add_cell("code", "value = 1")
+    notebook.add_cell("code", "print(missing_name)")
+    notebook.add_cell("code", "print(value)")
+
+    results = notebook.run_all_cells()
+    assert [r['status'] for r in results] == ['success', 'error']
+    assert notebook.stale_cells() == [1, 2]
+
+    notebook.cells[1].source = "missing_name = value"
+    results = notebook.run_all_cells()
+    assert results[0].get('cached') and [r['status'] for r in results] == ['success'] * 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
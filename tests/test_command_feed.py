@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Offline tests for processor command discovery: changes-feed cursor,
+cached directory listings, bounded processed IDs and idle back-off
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.command_feed import DriveCommandFeed, IdleBackoff, LocalCommandFeed, ProcessedIds
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+
+FOLDER_ID = 'fake-folder'
+
+
+def put_command(service, command_id, code="print('hi')"):
+    command = {'id': command_id, 'type': 'execute', 'code': code}
+    return service.put_file(f"command_{command_id}.json", json.dumps(command), parents=[FOLDER_ID])
+
+
+def test_processed_ids_are_bounded():
+    processed = ProcessedIds(capacity=3)
+    for i in range(10):
+        processed.add(i)
+    processed.add(8)  # refreshed, so 7 is evicted first
+    processed.add(10)
+
+    assert len(processed) == 3
+    assert 8 in processed and 9 in processed and 10 in processed
+    assert 7 not in processed
+
+
+def test_idle_backoff_grows_and_snaps_back():
+    backoff = IdleBackoff(0.5, max_interval=4)
+    delays = []
+    for _ in range(6):
+        backoff.idle()
+        delays.append(backoff.delay)
+    assert delays == [1, 2, 4, 4, 4, 4]
+
+    backoff.activity()
+    assert backoff.delay == 0.5
+
+
+def test_drive_feed_uses_one_cursor():
+    service = FakeDriveService()
+    queued = put_command(service, 'early')
+    service.put_file('result_other.json', '{}', parents=[FOLDER_ID])
+    feed = DriveCommandFeed(lambda: service, FOLDER_ID)
+
+    assert [f['id'] for f in feed.poll()] == [queued['id']]
+    feed.mark_processed(queued['id'])
+
+    service.reset_calls()
+    for _ in range(5):
+        assert feed.poll() == []
+    assert service.calls == {'changes.list': 5}
+
+    later = put_command(service, 'later')
+    service.put_file('command_elsewhere.json', '{}', parents=['other-folder'])
+    assert [f['id'] for f in feed.poll()] == [later['id']]
+
+    # Not marked (claim failed): the reconcile listing brings it back
+    assert feed.poll() == []
+    feed.last_reconcile = 0
+    assert [f['id'] for f in feed.poll()] == [later['id']]
+
+
+def test_drive_feed_retries_failed_claims_with_backoff(monkeypatch):
+    service = FakeDriveService()
+    feed = DriveCommandFeed(lambda: service, FOLDER_ID, retry_delay=1.0)
+    assert feed.poll() == []
+    clock = [time.time()]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+
+    command = put_command(service, 'flaky')
+    [file] = feed.poll()
+    feed.retry_later(file)  # e.g. get_media failed
+    assert feed.poll() == []
+
+    clock[0] += 1.0
+    assert [f['id'] for f in feed.poll()] == [command['id']]
+    feed.retry_later(file)  # Failed again: twice the wait
+    clock[0] += 1.0
+    assert feed.poll() == []
+    clock[0] += 1.0
+    assert [f['id'] for f in feed.poll()] == [command['id']]
+
+    feed.mark_processed(command['id'])
+    clock[0] += 60
+    assert feed.poll() == []
+
+
+def test_local_feed_reuses_unchanged_listing(tmp_path):
+    (tmp_path / 'command_a.json').write_text('{}')
+    (tmp_path / 'result_a.json').write_text('{}')
+    past = time.time() - 10
+    os.utime(tmp_path, (past, past))
+    feed = LocalCommandFeed(str(tmp_path))
+
+    assert feed.poll() == ['command_a.json']
+    feed.mark_processed('command_a.json')
+    for _ in range(5):
+        assert feed.poll() == []
+    assert feed.listing_count == 1
+
+    (tmp_path / 'command_b.json').write_text('{}')
+    assert feed.poll() == ['command_b.json']
+    assert feed.listing_count == 2
+
+
+def test_local_feed_retries_files_that_could_not_be_claimed(tmp_path, monkeypatch):
+    (tmp_path / 'command_a.json').write_text('{"id": "a", "ty')  # Still being written
+    past = time.time() - 10
+    os.utime(tmp_path, (past, past))
+    feed = LocalCommandFeed(str(tmp_path), retry_delay=1.0)
+    clock = [time.time()]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+
+    assert feed.poll() == ['command_a.json']
+    feed.retry_later('command_a.json')
+    assert feed.poll() == []
+
+    # Finishing the write leaves the directory mtime alone
+    (tmp_path / 'command_a.json').write_text('{"id": "a", "type": "execute"}')
+    clock[0] += 1.0
+    assert feed.poll() == ['command_a.json']
+    feed.retry_later('command_a.json')  # Failed again: twice the wait
+    clock[0] += 1.0
+    assert feed.poll() == []
+    clock[0] += 1.0
+    assert feed.poll() == ['command_a.json']
+    assert feed.listing_count == 1
+
+    feed.mark_processed('command_a.json')
+    clock[0] += 60
+    assert feed.poll() == []
+
+
+def test_idle_processor_backs_off_and_wakes_on_commands():
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+    stop = threading.Event()
+    thread = threading.Thread(target=processor.run, daemon=True,
+                              kwargs={'poll_interval': 0.01, 'max_idle_interval': 0.16, 'stop_event': stop})
+    thread.start()
+
+    try:
+        time.sleep(1.0)
+        # Without back-off this would be ~100 polls
+        assert service.calls['changes.list'] < 15
+        assert service.calls['files.list'] == 1
+
+        put_command(service, 'wake')
+        deadline = time.time() + 2
+        while time.time() < deadline and not service.find_files('result_wake'):
+            time.sleep(0.01)
+        assert service.find_files('result_wake')
+        assert not service.find_files('command_wake')
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the JSON-RPC bridge daemon (uses FakeDriveService)
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from colab_integration.daemon import BridgeDaemon, INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, SERVER_ERROR
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+
+def make_daemon(delay=0.0):
+    service = FakeDriveService()
+    attach_echo_processor(service, FOLDER_ID, delay=delay)
+    bridge = UniversalColabBridge(tool_name="daemon_test")
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+    daemon = BridgeDaemon(tool_name="daemon_test")
+    daemon.bridge = bridge
+    return daemon, service
+
+
+def serve(daemon, requests):
+    output = []
+    daemon.serve_lines([json.dumps(r) for r in requests], output.append)
+    daemon.executor.shutdown(wait=True)
+    messages = [json.loads(line) for line in output]
+    return {m.get('id'): m for m in messages if 'id' in m}, messages
+
+
+def test_ready_notification_and_ping():
+    daemon, _ = make_daemon()
+    responses, messages = serve(daemon, [{'jsonrpc': '2.0', 'id': 1, 'method': 'ping'}])
+    assert messages[0]['method'] == 'ready'
+    assert responses[1]['result'] == 'pong'
+
+
+def test_execute_reuses_one_bridge_for_many_requests():
+    daemon, service = make_daemon()
+    requests = [{'jsonrpc': '2.0', 'id': i, 'method': 'execute', 'params': {'code': f"print({i})", 'timeout': 5}}
+                for i in range(1, 6)]
+    responses, _ = serve(daemon, requests)
+    for i in range(1, 6):
+        assert responses[i]['result']['status'] == 'success'
+    assert service.calls['files.create'] == 5
+
+
+def test_pending_then_get_result():
+    daemon, _ = make_daemon(delay=0.5)
+    responses, _ = serve(daemon, [{'jsonrpc': '2.0', 'id': 1, 'method': 'execute',
+                                   'params': {'code': "print(1)", 'timeout': 0.1}}])
+    pending = responses[1]['result']
+    assert pending['status'] == 'pending'
+
+    daemon.executor = type(daemon.executor)(max_workers=1)
+    responses, _ = serve(daemon, [{'jsonrpc': '2.0', 'id': 2, 'method': 'get_result',
+                                   'params': {'request_id': pending['request_id'], 'timeout': 5}}])
+    assert responses[2]['result']['status'] == 'success'
+
+
+def test_errors():
+    daemon, _ = make_daemon()
+    output = []
+    daemon.serve_lines(['not json', json.dumps({'jsonrpc': '2.0', 'id': 7, 'method': 'nope'})], output.append)
+    daemon.executor.shutdown(wait=True)
+    errors = [json.loads(line)['error']['code'] for line in output if 'error' in line]
+    assert sorted(errors) == sorted([PARSE_ERROR, METHOD_NOT_FOUND])
+
+
+def test_type_errors_inside_methods_are_not_blamed_on_the_params():
+    daemon, _ = make_daemon()
+    daemon.methods['broken'] = lambda: None + 1
+    bad_params = daemon.handle_message(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'ping', 'params': [1]}))
+    assert bad_params['error']['code'] == INVALID_PARAMS
+    broken = daemon.handle_message(json.dumps({'jsonrpc': '2.0', 'id': 2, 'method': 'broken'}))
+    assert broken['error']['code'] == SERVER_ERROR
+
+
+def test_shutdown_returns_while_stdin_stays_open():
+    daemon = subprocess.Popen([sys.executable, '-m', 'colab_integration.daemon'], cwd=str(Path(__file__).parent.parent),
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert json.loads(daemon.stdout.readline())['method'] == 'ready'
+        daemon.stdin.write(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'shutdown'}) + "\n")
+        daemon.stdin.flush()
+        assert json.loads(daemon.stdout.readline()) == {'jsonrpc': '2.0', 'id': 1, 'result': True}
+        # The client keeps stdin open; the daemon must exit anyway
+        assert daemon.wait(timeout=10) == 0
+    finally:
+        daemon.kill()
+        daemon.stdin.close()
+        daemon.stdout.close()
+
+
+if __name__ == "__main__":
+    test_ready_notification_and_ping()
+    test_execute_reuses_one_bridge_for_many_requests()
+    test_pending_then_get_result()
+    test_errors()
+    test_type_errors_inside_methods_are_not_blamed_on_the_params()
+    test_shutdown_returns_while_stdin_stays_open()
+    print("✅ All daemon tests passed")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Offline tests for content-defined chunking and delta sync of large files
+(FakeDriveService + EnhancedColabProcessor, no Google credentials needed)
+"""
+
+import io
+import os
+import json
+import time
+import random
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import delta_sync, file_sync
+from colab_integration.bulk_transfer import pack_files
+from colab_integration.delta_sync import DELTA_INDEX, ManifestStore, apply_delta, iter_chunks, chunk_file
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.file_sync import FileSyncManager
+
+FOLDER_ID = 'fake-folder'
+THRESHOLD = 1024 * 1024
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+def random_bytes(size, seed):
+    return random.Random(seed).getrandbits(8 * size).to_bytes(size, 'little')
+
+
+def attach_processor(service):
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+    lock = threading.Lock()
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            def run():
+                with lock:
+                    processor.process_command(file)
+            threading.Thread(target=run, daemon=True).start()
+
+    service.add_listener(on_create)
+    return processor
+
+
+def make_sync(tmp_path, service):
+    local_dir = tmp_path / "local"
+    sync = FileSyncManager(str(local_dir), colab_mount_point=str(tmp_path / "colab"),
+                           delta_threshold=THRESHOLD)
+    sync.sync_patterns["include"].append("*.bin")
+    sync.bridge.drive_service = service
+    sync.bridge.folder_id = FOLDER_ID
+    return sync, local_dir
+
+
+def archive_sizes(service):
+    """Bytes of every sync archive uploaded so far"""
+    return [len(f['content']) for f in service._files.values() if f['name'].startswith('syncpush_')]
+
+
+def test_chunk_boundaries_survive_insert():
+    data = random_bytes(3 * 1024 * 1024, seed=1)
+    edited = data[:1000] + b"inserted bytes" + data[1000:]
+
+    before = [chunk for _, chunk in iter_chunks(io.BytesIO(data))]
+    after = [chunk for _, chunk in iter_chunks(io.BytesIO(edited))]
+
+    assert b"".join(after) == edited
+    # Only the chunk containing the insert changes
+    assert len(set(before) - set(after)) == 1
+
+
+def test_vectorized_boundaries_match_the_python_loop(monkeypatch):
+    pytest.importorskip("numpy")
+    data = random_bytes(2 * 1024 * 1024, seed=5) + bytes(1024 * 1024) + random_bytes(100_000, seed=6)
+    sizes = dict(avg_size=16 * 1024, min_size=4 * 1024, max_size=64 * 1024)
+    vectorized = [(offset, len(chunk)) for offset, chunk in iter_chunks(io.BytesIO(data), **sizes)]
+
+    monkeypatch.setattr(delta_sync, '_GEAR_ARRAY', None)
+    assert [(offset, len(chunk)) for offset, chunk in iter_chunks(io.BytesIO(data), **sizes)] == vectorized
+    assert any(length == sizes['max_size'] for _, length in vectorized)  # The zero run never cuts
+
+
+def test_manifests_of_unchanged_files_come_from_the_scan_index(tmp_path, monkeypatch):
+    sync, local_dir = make_sync(tmp_path, FakeDriveService())
+    path = local_dir / "data.bin"
+    path.write_bytes(random_bytes(2 * 1024 * 1024, seed=7))
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+    chunked = []
+    monkeypatch.setattr(file_sync, 'chunk_file', lambda path: chunked.append(path) or chunk_file(path))
+    first = sync._plan_deltas(["data.bin"])[2]["data.bin"]
+    assert sync._plan_deltas(["data.bin"])[2]["data.bin"] == first
+    assert len(chunked) == 1
+
+    path.write_bytes(random_bytes(2 * 1024 * 1024, seed=8))
+    os.utime(path, (old + 1, old + 1))
+    assert sync._plan_deltas(["data.bin"])[2]["data.bin"] != first
+    assert len(chunked) == 2
+
+
+@pytest.mark.parametrize("rel_path", ["../outside.bin", "/tmp/outside.bin", "sub/../../outside.bin"])
+def test_deltas_cannot_write_outside_the_target(tmp_path, rel_path):
+    store = ManifestStore(tmp_path / "manifests.json")
+    descriptor = {'rel_path': rel_path, 'base': '', 'chunks': [], 'size': 0, 'mtime': 0}
+    with pytest.raises(ValueError, match="outside target directory"):
+        apply_delta(tmp_path / "colab", descriptor, {}, store)
+
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    (tmp_path / "outside.bin").write_bytes(b"x")
+    index = json.dumps({'deltas': [], 'manifests': {rel_path: []}}).encode('utf-8')
+    data = pack_files(tmp_path, [], extra_files={DELTA_INDEX: index})
+    archive = processor.service.files().create(body={'name': 'syncpush_test.tar.gz'},
+                                               media_body=data).execute()
+    with pytest.raises(ValueError, match="outside target directory"):
+        processor.handle_sync_push({'archive_file_id': archive['id'], 'target_dir': str(tmp_path / "colab")})
+
+
+def test_modified_large_file_ships_only_new_chunks(tmp_path):
+    service = FakeDriveService()
+    attach_processor(service)
+    sync, local_dir = make_sync(tmp_path, service)
+
+    original = random_bytes(3 * 1024 * 1024, seed=2)
+    (local_dir / "data.bin").write_bytes(original)
+    assert sync.sync_to_colab()
+
+    # Keep uploaded archives around so their sizes can be inspected
+    service._delete = lambda file_id: ''
+    edited = original[:2_000_000] + b"appended row" + original[2_000_000:]
+    (local_dir / "data.bin").write_bytes(edited)
+    assert sync.sync_to_colab()
+
+    assert (tmp_path / "colab" / "data.bin").read_bytes() == edited
+    assert max(archive_sizes(service)) < len(edited) // 2
+    assert ManifestStore.for_directory(local_dir).get("data.bin")['chunks'] == \
+        [list(c) for c in chunk_file(local_dir / "data.bin")]
+
+
+def test_base_mismatch_falls_back_to_whole_file(tmp_path):
+    service = FakeDriveService()
+    attach_processor(service)
+    sync, local_dir = make_sync(tmp_path, service)
+
+    (local_dir / "data.bin").write_bytes(random_bytes(2 * 1024 * 1024, seed=3))
+    assert sync.sync_to_colab()
+
+    # Someone changed the Colab copy behind our back
+    (tmp_path / "colab" / "data.bin").write_bytes(b"changed in colab")
+
+    edited = random_bytes(2 * 1024 * 1024, seed=4)
+    (local_dir / "data.bin").write_bytes(edited)
+    assert sync.sync_to_colab()
+
+    assert (tmp_path / "colab" / "data.bin").read_bytes() == edited
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
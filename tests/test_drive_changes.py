@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Offline tests for changes-feed result delivery (uses FakeDriveService)
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from colab_integration.drive_changes import DriveChangesWatcher, result_key_candidates
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+
+FOLDER_ID = 'fake-folder'
+
+
+def run_concurrently(bridges, timeout=10):
+    results = [None] * len(bridges)
+
+    def worker(i):
+        results[i] = bridges[i].execute_code(f"print({i})", timeout=timeout)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(bridges))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_result_key_candidates():
+    assert result_key_candidates('result_cmd_a_1.json') == ['cmd_a_1', 'cmd_cmd_a_1']
+    assert 'cmd_a_1' in result_key_candidates('result_result_cmd_a_1.json')
+    assert 'cmd_a_1' in result_key_candidates('result_a_1.json')
+    assert result_key_candidates('command_cmd_a_1.json') == []
+
+
+def test_changes_delivery_returns_result_and_cleans_up(make_bridge):
+    DriveChangesWatcher.reset_shared()
+    service = FakeDriveService()
+    attach_echo_processor(service, FOLDER_ID, delay=0.1)
+
+    bridge = make_bridge(service, 'changes_single', result_delivery='changes')
+    result = bridge.execute_code("print('hi')", timeout=5)
+
+    assert result['status'] == 'success'
+    assert result['command_id'] == bridge.command_id
+    assert service.find_files('result_') == []
+
+
+def test_changes_delivery_times_out_as_pending(make_bridge):
+    DriveChangesWatcher.reset_shared()
+    service = FakeDriveService()
+
+    bridge = make_bridge(service, 'changes_timeout', result_delivery='changes')
+    result = bridge.execute_code("print('nobody home')", timeout=0.5)
+
+    assert result['status'] == 'pending'
+    assert DriveChangesWatcher.shared(FOLDER_ID, lambda: service).in_flight == 0
+
+
+def test_changes_delivery_uses_fewer_calls_than_polling(make_bridge):
+    callers = 10
+    latency = {'files.list': 0.02, 'changes.list': 0.02}
+
+    DriveChangesWatcher.reset_shared()
+    polled = FakeDriveService(latency=latency)
+    attach_echo_processor(polled, FOLDER_ID, delay=0.5)
+    poll_results = run_concurrently([make_bridge(polled, f"poll{i}", result_delivery='poll') for i in range(callers)])
+
+    DriveChangesWatcher.reset_shared()
+    watched = FakeDriveService(latency=latency)
+    attach_echo_processor(watched, FOLDER_ID, delay=0.5)
+    watch_results = run_concurrently([make_bridge(watched, f"watch{i}", result_delivery='changes') for i in range(callers)])
+
+    assert all(r['status'] == 'success' for r in poll_results + watch_results)
+    poll_queries = polled.calls['files.list']
+    watch_queries = watched.calls['files.list'] + watched.calls['changes.list']
+    assert watch_queries * 5 < poll_queries
+
+
+if __name__ == "__main__":
+    test_result_key_candidates()
+    test_changes_delivery_returns_result_and_cleans_up()
+    test_changes_delivery_times_out_as_pending()
+    test_changes_delivery_uses_fewer_calls_than_polling()
+    print("✅ All changes-feed tests passed")
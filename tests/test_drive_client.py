@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared Drive client factory (generated key, no network)
+"""
+
+import sys
+import json
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+pytest.importorskip('cryptography')
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from colab_integration import drive_client
+from colab_integration.drive_client import get_client_factory, reset_client_factories, REFRESH_MARGIN
+
+
+@pytest.fixture
+def key_file(tmp_path):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode('ascii')
+    path = tmp_path / "service-account.json"
+    path.write_text(json.dumps({
+        'type': 'service_account',
+        'project_id': 'test',
+        'private_key_id': 'abc',
+        'private_key': pem,
+        'client_email': 'bridge@test.iam.gserviceaccount.com',
+        'client_id': '1',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+    }))
+    reset_client_factories()
+    yield path
+    reset_client_factories()
+
+
+@pytest.fixture
+def fake_refresh(monkeypatch):
+    """Token refreshes that never touch the network"""
+    refreshes = []
+
+    def refresh(self, request):
+        refreshes.append(self)
+        self.token = f"token-{len(refreshes)}"
+        self.expiry = drive_client._utcnow() + timedelta(hours=1)
+
+    monkeypatch.setattr(drive_client.service_account.Credentials, 'refresh', refresh)
+    return refreshes
+
+
+def test_credentials_are_loaded_once_per_key(key_file, fake_refresh, monkeypatch):
+    loads = []
+    original = drive_client.service_account.Credentials.from_service_account_file
+
+    def counting(*args, **kwargs):
+        loads.append(args)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(drive_client.service_account.Credentials, 'from_service_account_file', counting)
+
+    factories = [get_client_factory(key_file) for _ in range(5)]
+
+    assert all(f is factories[0] for f in factories)
+    assert len(loads) == 1
+
+
+def test_each_thread_gets_its_own_service(key_file, fake_refresh):
+    factory = get_client_factory(key_file)
+    main_service = factory.service()
+    assert factory.service() is main_service
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(factory.service()))
+    thread.start()
+    thread.join()
+
+    assert other[0] is not main_service
+    assert other[0]._http is not main_service._http
+    assert other[0]._http.credentials is main_service._http.credentials
+
+
+def test_token_is_refreshed_ahead_of_expiry(key_file, fake_refresh):
+    factory = get_client_factory(key_file)
+    factory.refresh()
+    assert len(fake_refresh) == 1
+    assert not factory.needs_refresh()
+
+    # Token about to expire: the next proactive refresh renews it
+    factory.credentials.expiry = drive_client._utcnow() + REFRESH_MARGIN / 2
+    assert factory.needs_refresh()
+    factory.refresh()
+    assert len(fake_refresh) == 2
+    assert factory._refresh_timer.interval > 3000
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Offline tests for in-memory, compact and gzip-compressed command/result uploads
+"""
+
+import sys
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.drive_io import encode_json, decode_json
+from colab_integration.envelope import ENVELOPE_MAGIC, GZIP_MAGIC
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+
+def attach_processor(service):
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+    stored = []
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+        elif file['name'].startswith('result_'):
+            stored.append(service._get(file['id'])['content'])
+
+    service.add_listener(on_create)
+    return stored
+
+
+def test_encode_is_compact_and_round_trips():
+    data = {'code': "print('x')", 'values': list(range(5))}
+    payload, mimetype = encode_json(data)
+    assert payload == json.dumps(data, separators=(',', ':')).encode('utf-8')
+    assert mimetype == 'application/json'
+
+    big = {'output': 'x' * 100_000}
+    compressed, mimetype = encode_json(big, compress=True)
+    assert compressed[:2] == GZIP_MAGIC
+    assert mimetype == 'application/gzip'
+    assert len(compressed) < 1000
+    assert decode_json(compressed) == big
+    assert decode_json(payload) == data
+
+
+def test_large_results_travel_compressed_without_temp_files(monkeypatch):
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("temp file used for upload")
+    monkeypatch.setattr(tempfile, 'NamedTemporaryFile', no_temp_files)
+
+    service = FakeDriveService()
+    stored = attach_processor(service)
+
+    bridge = UniversalColabBridge(tool_name='io_test')
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+    result = bridge.execute_code("print('y' * 200000)", timeout=10)
+
+    assert result['status'] == 'success'
+    assert result['output'] == 'y' * 200000 + '\n'
+    # Current bridges negotiate the compressed envelope
+    assert stored[0][:4] == ENVELOPE_MAGIC
+    assert len(stored[0]) < 5000
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the versioned command/result envelope and its
+negotiation with older processors
+"""
+
+import sys
+import json
+import functools
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import envelope
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+
+FOLDER_ID = 'fake-folder'
+
+DATAFRAME_CODE = """
+for i in range(3000):
+    print(f"{i:>6}  sensor_{i % 7}  {i * 0.25:>10.2f}  {'ok' if i % 3 else 'retry'}")
+"""
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+@pytest.fixture
+def make_bridge(make_bridge):
+    return functools.partial(make_bridge, tool_name="envelope_test")
+
+
+def created_commands(service):
+    """Raw content of every command file the bridge wrote"""
+    commands = []
+    service.add_listener(lambda file: commands.append(service._get(file['id'])['content'])
+                         if file['name'].startswith('command_') else None)
+    return commands
+
+
+def test_round_trip_and_legacy_payloads():
+    data = {'output': 'x' * 5000, 'nested': {'values': [1, 2.5, None, True]}}
+    for codec in ('none', 'gzip'):
+        packed = envelope.pack(data, codec, 'json')
+        assert packed.startswith(envelope.ENVELOPE_MAGIC)
+        assert envelope.unpack(packed) == data
+    # Small payloads are never compressed
+    assert envelope.unpack(envelope.pack({'a': 1}, 'gzip')) == {'a': 1}
+    # Files written before the envelope still decode
+    assert envelope.unpack(json.dumps(data).encode()) == data
+
+    future = bytearray(envelope.pack(data))
+    future[4] = envelope.ENVELOPE_VERSION + 1
+    with pytest.raises(ValueError):
+        envelope.unpack(bytes(future))
+
+
+def test_negotiation_falls_back_to_what_both_sides_support():
+    assert envelope.negotiate(['gzip'], ['json']) == ('gzip', 'json')
+    assert envelope.negotiate([], None) == ('none', 'json')
+    assert envelope.negotiate(['brotli'], ['cbor']) == ('none', 'json')
+
+    # Clients that predate the envelope get gzip (if they asked for it) or plain JSON
+    result = {'output': 'z' * 4000}
+    assert envelope.encode_reply(result, {'accept_encoding': ['gzip']})[0][:2] == envelope.GZIP_MAGIC
+    assert json.loads(envelope.encode_reply(result, {})[0])['output'] == result['output']
+
+
+def test_old_processor_keeps_getting_plain_json(make_bridge):
+    service = FakeDriveService()
+    commands = created_commands(service)
+    attach_echo_processor(service, FOLDER_ID)
+    bridge = make_bridge(service)
+
+    for _ in range(2):
+        assert bridge.execute_code("print(1)", timeout=5)['status'] == 'success'
+    assert bridge.peer_protocol == {}
+    assert all(json.loads(content)['protocol'] == envelope.PROTOCOL_VERSION for content in commands)
+
+
+def test_enhanced_processor_negotiates_envelopes(make_bridge):
+    service = FakeDriveService()
+    commands = created_commands(service)
+    results = []
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+        elif file['name'].startswith('result_'):
+            results.append(service._get(file['id'])['content'])
+
+    service.add_listener(on_create)
+    bridge = make_bridge(service)
+
+    first = bridge.execute_code(DATAFRAME_CODE, timeout=10)
+    second = bridge.execute_code(DATAFRAME_CODE, timeout=10)
+    assert first['output'] == second['output'] and first['output'].count('\n') == 3000
+    assert 'protocol' not in first and 'accept_encoding' not in first
+    assert bridge.peer_protocol['protocol'] == envelope.PROTOCOL_VERSION
+
+    # The first command predates negotiation; after that commands are enveloped too
+    assert not commands[0].startswith(envelope.ENVELOPE_MAGIC)
+    assert commands[1].startswith(envelope.ENVELOPE_MAGIC)
+
+    assert all(content.startswith(envelope.ENVELOPE_MAGIC) for content in results)
+    plain_size = len(json.dumps(envelope.unpack(results[0])).encode())
+    assert plain_size >= 5 * len(results[0])
+
+
+@pytest.mark.parametrize('codec,fmt,module', [('zstd', 'json', 'zstandard'), ('gzip', 'msgpack', 'msgpack')])
+def test_optional_codecs(codec, fmt, module):
+    pytest.importorskip(module)
+    data = {'output': 'row\n' * 2000, 'data': [1, 2, 3]}
+    assert envelope.unpack(envelope.pack(data, codec, fmt)) == data
+    assert codec in envelope.supported_encodings() or fmt in envelope.supported_formats()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
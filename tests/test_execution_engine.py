@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the processor worker pool (ExecutionEngine) and its use
+by EnhancedColabProcessor.run
+"""
+
+import io
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.drive_io import decode_json
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.execution_engine import ExecutionEngine, capture_output
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.processor import ColabProcessor, engine_session
+
+FOLDER_ID = 'fake-folder'
+
+
+def test_independent_sessions_run_in_parallel():
+    finished = []
+
+    def runner(command):
+        time.sleep(command['duration'])
+        finished.append(command['name'])
+        return command['name']
+
+    engine = ExecutionEngine(runner, max_workers=2)
+    slow = engine.submit({'name': 'training', 'duration': 0.5, 'session': 'a'})
+    quick = engine.submit({'name': 'print', 'duration': 0.01, 'session': 'b'})
+
+    assert quick.result(timeout=5) == 'print'
+    assert finished == ['print']
+    assert slow.result(timeout=5) == 'training'
+    engine.shutdown()
+
+
+def test_session_commands_are_serialized_in_order():
+    lock = threading.Lock()
+    running = []
+    overlaps = []
+    order = []
+
+    def runner(command):
+        with lock:
+            if running:
+                overlaps.append(command['step'])
+            running.append(command['step'])
+        time.sleep(0.02)
+        with lock:
+            running.remove(command['step'])
+            order.append(command['step'])
+
+    engine = ExecutionEngine(runner, max_workers=4)
+    futures = [engine.submit({'step': i, 'session': 'notebook'}) for i in range(6)]
+    metrics = engine.metrics()
+    for future in futures:
+        future.result(timeout=5)
+
+    assert order == list(range(6))
+    assert overlaps == []
+    assert metrics['queued_behind_sessions'] >= 4
+    assert engine.metrics()['completed'] == 6
+    engine.shutdown()
+
+
+def test_sessionless_commands_keep_their_order_in_the_default_namespace():
+    processor = ColabProcessor()
+
+    def runner(item):
+        time.sleep(item['delay'])
+        return processor.process_command(item['command'])
+
+    engine = ExecutionEngine(runner, max_workers=4)
+    commands = [{'type': 'execute_code', 'code': "x = 1"},
+                {'type': 'execute_code', 'code': "x += 1"},
+                {'type': 'execute_code', 'code': "print(x)"}]
+    futures = [engine.submit({'command': command, 'delay': delay, 'session': engine_session(command)})
+               for command, delay in zip(commands, (0.2, 0.1, 0))]
+
+    assert futures[-1].result(timeout=5)['output'] == '2\n'
+    engine.shutdown()
+
+
+def test_capture_output_is_per_thread():
+    buffers = [io.StringIO(), io.StringIO()]
+    barrier = threading.Barrier(2)
+
+    def work(i):
+        with capture_output(buffers[i], io.StringIO()):
+            barrier.wait()
+            for _ in range(50):
+                print(f"thread {i}")
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert buffers[0].getvalue() == "thread 0\n" * 50
+    assert buffers[1].getvalue() == "thread 1\n" * 50
+
+
+PLOT_A = """
+import matplotlib.pyplot as plt
+from IPython.display import display
+plt.figure()
+plt.plot([1, 2])
+barrier.wait()              # Both sessions have a figure open
+plt.subplots()
+display(Picture())
+barrier.wait()
+"""
+
+PLOT_B = """
+import matplotlib.pyplot as plt
+plt.plot([3, 4])            # Implicit figure: must not be session a's
+barrier.wait()
+barrier.wait()
+time.sleep(0.2)             # Still plotting after session a finished
+plt.title("b")
+assert len(plt.gca().lines) == 1
+"""
+
+
+class Picture:
+    def _repr_png_(self):
+        return b"\x89PNG fake"
+
+
+def test_plots_are_captured_per_command():
+    pytest.importorskip('matplotlib')
+    pytest.importorskip('IPython')
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    barrier = threading.Barrier(2, timeout=10)
+    for session in ('a', 'b'):
+        processor.sessions.get(session).update(barrier=barrier, Picture=Picture, time=time)
+
+    results = {}
+
+    def run(session, code):
+        results[session] = processor.dispatch_command({'id': session, 'code': code, 'session': session})
+
+    threads = [threading.Thread(target=run, args=('a', PLOT_A)), threading.Thread(target=run, args=('b', PLOT_B))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results['a']['status'] == 'success' and results['b']['status'] == 'success', results
+    assert len(results['a']['visualizations']) == 3  # Two figures and the displayed picture
+    assert len(results['b']['visualizations']) == 1
+    assert sys.modules['matplotlib.pyplot'].get_fignums() == []
+
+
+def test_subprocess_isolation():
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+
+    ok = processor.dispatch_command({'id': 'a', 'code': "import os; print(os.getpid())", 'isolation': 'process'})
+    failed = processor.dispatch_command({'id': 'b', 'code': "1 / 0", 'isolation': 'process'})
+
+    assert ok['status'] == 'success'
+    assert int(ok['output']) != __import__('os').getpid()
+    assert failed['status'] == 'error'
+    assert 'ZeroDivisionError' in failed['error']
+
+
+def test_processor_run_loop_does_not_block_on_long_commands():
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID, workers=4)
+    stop = threading.Event()
+    thread = threading.Thread(target=processor.run, kwargs={'poll_interval': 0.02, 'stop_event': stop},
+                              daemon=True)
+    thread.start()
+
+    def send(command_id, code, session):
+        command = {'id': command_id, 'type': 'execute', 'code': code, 'session': session}
+        service.put_file(f"command_{command_id}.json", json.dumps(command), parents=[FOLDER_ID])
+
+    try:
+        send('slow', "import time; time.sleep(1); print('trained')", 'train')
+        time.sleep(0.2)
+        send('quick', "print('hi')", 'repl')
+
+        deadline = time.time() + 5
+        while time.time() < deadline and not service.find_files('result_quick'):
+            time.sleep(0.02)
+        assert service.find_files('result_quick')
+        assert not service.find_files('result_slow')
+
+        heartbeat = service.find_files('heartbeat.json')
+        assert decode_json(service._get(heartbeat[0]['id'])['content'])['queue']['workers'] == 4
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
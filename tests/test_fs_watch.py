@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Offline tests for event-driven (inotify) and polling watch modes of FileSyncManager
+"""
+
+import sys
+import time
+import queue
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import file_sync
+from colab_integration.file_sync import FileSyncManager
+from colab_integration.fs_watch import InotifyWatcher, inotify_available
+
+needs_inotify = pytest.mark.skipif(not inotify_available(), reason="inotify not available")
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+def start_watch(sync, **kwargs):
+    """Run watch_changes in a thread; returns (change batches queue, stop event)"""
+    batches = queue.Queue()
+    stop = threading.Event()
+    thread = threading.Thread(target=sync.watch_changes,
+                              kwargs=dict(callback=batches.put, stop_event=stop, **kwargs), daemon=True)
+    thread.start()
+    return batches, stop
+
+
+@needs_inotify
+def test_inotify_batches_coalesce_changes(tmp_path):
+    (tmp_path / "node_modules").mkdir()
+    watcher = InotifyWatcher(tmp_path, exclude=["node_modules"])
+    try:
+        (tmp_path / "a.py").write_text("a")
+        (tmp_path / "a.py").write_text("a2")
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "b.py").write_text("b")
+        (tmp_path / "node_modules" / "c.py").write_text("c")
+
+        batch = next(watcher.batches(debounce=0.1))
+    finally:
+        watcher.close()
+
+    assert batch == {"a.py", "pkg/b.py"}
+
+
+@needs_inotify
+def test_watch_reports_changes_quickly(tmp_path):
+    sync = FileSyncManager(str(tmp_path / "local"))
+    (sync.local_dir / "existing.py").write_text("x = 1")
+    batches, stop = start_watch(sync, debounce=0.02)
+    try:
+        assert batches.get(timeout=5) == ["Added: existing.py"]
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        (sync.local_dir / "existing.py").write_text("x = 2")
+        assert batches.get(timeout=5) == ["Modified: existing.py"]
+        assert time.monotonic() - started < 0.5
+
+        (sync.local_dir / "existing.py").unlink()
+        assert batches.get(timeout=5) == ["Deleted: existing.py"]
+    finally:
+        stop.set()
+
+
+def test_polling_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_sync, 'inotify_available', lambda: False)
+    sync = FileSyncManager(str(tmp_path / "local"))
+    (sync.local_dir / "a.py").write_text("a")
+    batches, stop = start_watch(sync)
+    try:
+        assert batches.get(timeout=5) == ["Added: a.py"]
+    finally:
+        stop.set()
+
+
+def test_incremental_modified_files(tmp_path):
+    sync = FileSyncManager(str(tmp_path / "local"))
+    (sync.local_dir / "a.py").write_text("a")
+    (sync.local_dir / "b.py").write_text("b")
+    assert sorted(sync.get_modified_files()) == ["a.py", "b.py"]
+
+    (sync.local_dir / "a.py").write_text("a2")
+    (sync.local_dir / "b.py").write_text("b2")
+    assert sync.get_modified_files(["a.py"]) == ["a.py"]
+    # b.py was not among the checked paths, so it is still pending
+    assert sync.get_modified_files() == ["b.py"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the local-directory Drive stand-in, latency profiles
+and the end-to-end bridge benchmark
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.benchmark import percentile, run_variant
+from colab_integration.fake_drive import FakeDriveService, latency_profile
+from colab_integration.local_drive import LocalDriveService
+from colab_integration.universal_bridge import UniversalColabBridge
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+
+FOLDER_ID = 'local-folder'
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+def test_two_clients_share_one_directory(tmp_path):
+    writer = LocalDriveService(tmp_path / "drive")
+    reader = LocalDriveService(tmp_path / "drive")
+    cursor = reader.changes().getStartPageToken().execute()['startPageToken']
+
+    created = writer.put_file('command_a.json', '{"id": "a"}', parents=[FOLDER_ID])
+    writer.put_file('other.txt', 'x', parents=['elsewhere'])
+
+    listed = reader.files().list(
+        q=f"name = 'command_a.json' and '{FOLDER_ID}' in parents and trashed=false").execute()['files']
+    assert [f['id'] for f in listed] == [created['id']] and listed[0]['size'] == '11'
+    assert reader.files().get_media(fileId=created['id']).execute() == b'{"id": "a"}'
+
+    changes = reader.changes().list(pageToken=cursor).execute()
+    assert [c['file']['name'] for c in changes['changes']] == ['command_a.json', 'other.txt']
+
+    reader.files().delete(fileId=created['id']).execute()
+    assert writer.find_files('command_') == []
+    with pytest.raises(FileNotFoundError):
+        writer.files().get_media(fileId=created['id']).execute()
+    assert reader.calls['files.list'] == 1 and writer.total_calls == 1
+
+
+def test_bridge_and_processor_run_end_to_end(tmp_path):
+    processor = EnhancedColabProcessor(service=LocalDriveService(tmp_path), folder_id=FOLDER_ID)
+    bridge_service = LocalDriveService(tmp_path)
+    bridge_service.add_listener(lambda file: processor.process_command(file)
+                                if file['name'].startswith('command_') else None)
+
+    bridge = UniversalColabBridge(tool_name="local_test")
+    bridge.drive_service = bridge_service
+    bridge.folder_id = FOLDER_ID
+    assert bridge.execute_code("print(6 * 7)", timeout=5)['output'] == '42\n'
+    assert bridge_service.find_files('') == []
+
+
+def test_latency_profiles_with_jitter():
+    profile = latency_profile('drive-jitter', scale=0.01)
+    assert profile['latency']['files.create'] == pytest.approx(0.02)
+    service = FakeDriveService(seed=1, **profile)
+
+    start = time.time()
+    for _ in range(5):
+        service.files().list(q=None).execute()
+    elapsed = time.time() - start
+    assert 0.5 * 5 * 0.004 <= elapsed < 0.5
+
+    with pytest.raises(ValueError):
+        latency_profile('satellite')
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.parametrize('variant', ['poll', 'changes', 'batch'])
+def test_benchmark_reports_latency_and_calls(variant):
+    stats = run_variant(variant, commands=4, concurrency=2, profile='instant')
+    assert stats['ok'] == 4
+    assert stats['throughput'] > 0 and 0 < stats['p50'] <= stats['p99']
+    assert stats['bridge_call_breakdown']['files.create'] <= 4
+    assert stats['bridge_calls'] >= 1 / 4
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Offline tests for running notebook cells in one remote command
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.local_notebook import LocalColabNotebook
+
+FOLDER_ID = 'fake-folder'
+
+
+class CountingSync:
+    """FileSyncManager stand-in that only counts sync passes"""
+
+    def __init__(self, colab_mount):
+        self.colab_mount = colab_mount
+        self.pushes = 0
+        self.pulls = 0
+
+    def sync_to_colab(self, rel_paths=None):
+        self.pushes += 1
+        return True
+
+    def sync_from_colab(self):
+        self.pulls += 1
+        return True
+
+
+@pytest.fixture
+def processor():
+    return EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+
+
+@pytest.fixture
+def notebook(processor, tmp_path, monkeypatch, isolated_home):
+    monkeypatch.chdir(tmp_path)
+    commands = []
+
+    def on_create(file):
+        if processor.protocol.command_id(file['name']):
+            commands.append(file['name'])
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    processor.service.add_listener(on_create)
+    notebook = LocalColabNotebook(str(tmp_path / "batch.ipynb"), tool_name="batch_test")
+    notebook.colab_bridge.drive_service = processor.service
+    notebook.colab_bridge.folder_id = FOLDER_ID
+    notebook.file_sync = CountingSync(str(tmp_path / "workspace"))
+    (tmp_path / "workspace").mkdir()
+    notebook.commands = commands
+    notebook.cells = []
+    return notebook
+
+
+def test_processor_runs_cells_until_the_first_error(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = processor.dispatch_command({'id': 'nb', 'type': 'run_cells', 'first_execution_count': 4,
+                                         'workdir': str(tmp_path), 'cells': [
+        {'index': 0, 'code': "import os\nx = 2\nprint(os.getcwd())"},
+        {'index': 2, 'code': "print(x * 3)"},
+        {'index': 3, 'code': "1 / 0"},
+        {'index': 5, 'code': "print('never')"},
+    ]})
+
+    assert result['status'] == 'error' and result['error'].startswith('Cell 3: ZeroDivisionError')
+    assert [cell['index'] for cell in result['cells']] == [0, 2, 3]
+    assert result['cells'][0]['output'] == f"{tmp_path}\n"
+    assert result['cells'][1]['output'] == '6\n'
+    assert [cell.get('execution_count') for cell in result['cells']] == [4, 5, None]
+    assert processor.sessions.sessions() == []  # Throwaway namespace is dropped
+
+
+def test_workdir_is_restored_and_never_seen_by_other_commands(processor, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    workdir = tmp_path / "workspace"
+    workdir.mkdir()
+    results = {}
+    monkeypatch.setattr(processor, '_write_result', lambda name, data, command: results.__setitem__(command['id'], data))
+
+    # run_cells waits for the running command, so the cwd never changes under it
+    started, release = threading.Event(), threading.Event()
+    processor.sessions.get('other').update(started=started, release=release)
+    blocker = threading.Thread(target=processor.run_and_respond, args=({
+        'id': 'blocker', 'type': 'execute', 'session': 'other',
+        'code': "import os\nstarted.set()\nrelease.wait(10)\nprint(os.getcwd())"},))
+    blocker.start()
+    assert started.wait(10)
+    cells = threading.Thread(target=processor.run_and_respond, args=({
+        'id': 'cells', 'type': 'run_cells', 'workdir': str(workdir),
+        'cells': [{'index': 0, 'code': "import os\nprint(os.getcwd())"}]},))
+    cells.start()
+    cells.join(0.3)
+    assert cells.is_alive()
+    release.set()
+    blocker.join(10)
+    cells.join(10)
+
+    assert results['blocker']['output'] == f"{tmp_path}\n"
+    assert results['cells']['cells'][0]['output'] == f"{workdir}\n"
+    assert Path.cwd() == tmp_path
+
+
+def test_named_sessions_keep_their_variables(processor):
+    first = processor.dispatch_command({'id': 'a', 'type': 'run_cells', 'session': 'nb',
+                                        'cells': [{'index': 0, 'code': "y = 7"}]})
+    second = processor.dispatch_command({'id': 'b', 'type': 'run_cells', 'session': 'nb',
+                                         'cells': [{'index': 1, 'code': "print(y)"}]})
+    assert first['status'] == second['status'] == 'success'
+    assert second['cells'][0]['output'] == '7\n'
+
+
+def test_notebook_runs_all_cells_in_one_command(notebook, tmp_path):
+    for source in ["import os\nprint(os.getcwd())", "a = 1", "print(a + 1)", "print(undefined)", "print('after')"]:
+        notebook.add_cell("code", source)
+
+    results = notebook.run_all_cells()
+    assert [r['status'] for r in results] == ['success', 'success', 'success', 'error']
+    assert len(notebook.commands) == 1
+    assert (notebook.file_sync.pushes, notebook.file_sync.pulls) == (1, 1)
+    assert results[0]['output'] == f"{tmp_path / 'workspace'}\n"
+    assert [cell.execution_count for cell in notebook.cells] == [1, 2, 3, None, None]
+    assert notebook.cells[2].outputs[0]['text'] == '2\n'
+    assert notebook.cells[3].outputs[0]['output_type'] == 'error'
+
+    notebook.cells[3].source = "print(a * 10)"
+    results = notebook.run_all_cells()
+    assert [r.get('cached', False) for r in results] == [True, True, True, False, False]
+    assert results[3]['output'] == '10\n' and results[4]['execution_count'] == 5
+    assert len(notebook.commands) == 2
+
+
+def test_processors_without_batches_fall_back_to_one_command_per_cell(notebook, processor):
+    del processor.command_handlers['run_cells']
+    for source in ["a = 1", "print(a)"]:
+        notebook.add_cell("code", source)
+
+    results = notebook.run_all_cells()
+    assert [r['status'] for r in results] == ['success', 'success']
+    assert results[1]['output'] == '1\n'
+    assert len(notebook.commands) == 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Offline tests for lazy .ipynb loading and incremental, debounced saving
+"""
+
+import sys
+import json
+import time
+import base64
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.local_notebook import LocalColabNotebook, NotebookCell
+from colab_integration.notebook_store import LAZY_OUTPUT_BYTES, NotebookFile, OutputRef
+
+IMAGE = base64.b64encode(bytes(range(256)) * 1024).decode('ascii')
+
+
+def write_notebook(path):
+    notebook = {
+        "cells": [
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Tricky \"strings\" ] } [ {"]},
+            {"cell_type": "code", "execution_count": 1, "metadata": {"tags": ["plot"]},
+             "source": ["import matplotlib.pyplot as plt", "plt.plot([1, 2])"],
+             "outputs": [{"output_type": "stream", "name": "stdout", "text": "plotted \\o/ ✓\n"},
+                         {"output_type": "display_data", "metadata": {}, "data": {"image/png": IMAGE}}]},
+            {"cell_type": "code", "execution_count": 2, "metadata": {}, "source": ["print('hi')"],
+             "outputs": [{"output_type": "stream", "name": "stdout", "text": "hi\n"}]},
+        ],
+        "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path.write_text(json.dumps(notebook, indent=1, ensure_ascii=False), encoding='utf-8')
+    return notebook
+
+
+@pytest.fixture
+def notebook_path(tmp_path, isolated_home):
+    path = tmp_path / "big.ipynb"
+    write_notebook(path)
+    return path
+
+
+def test_cells_and_large_outputs_load_lazily(notebook_path):
+    notebook = LocalColabNotebook(str(notebook_path), save_delay=0)
+    assert len(notebook.cells) == 3
+    assert not any(cell.materialized for cell in notebook.cells)
+    assert notebook.metadata["kernelspec"]["display_name"] == "Python 3"
+
+    plot_cell = notebook.cells[1]
+    assert plot_cell.source == "import matplotlib.pyplot as plt\nplt.plot([1, 2])"
+    assert plot_cell.metadata == {"tags": ["plot"]}
+    assert not notebook.cells[2].materialized
+
+    text, image = plot_cell.outputs
+    assert text["text"] == "plotted \\o/ ✓\n"
+    assert isinstance(image, OutputRef) and image.size >= LAZY_OUTPUT_BYTES and not image.loaded
+    assert image["data"]["image/png"] == IMAGE
+    assert notebook.cells[0].source == '# Tricky "strings" ] } [ {'
+
+
+def test_saves_copy_unchanged_cells_and_rewrite_changed_ones(notebook_path):
+    original = notebook_path.read_bytes()
+    notebook = LocalColabNotebook(str(notebook_path), save_delay=0)
+    spans = [(cell._span.start, cell._span.end) for cell in notebook.cells]
+
+    notebook.cells[1].source = "plt.plot([3, 4])"
+    notebook.add_cell("code", "x = 1")
+    notebook.save_notebook()
+
+    saved = notebook_path.read_bytes()
+    data = json.loads(saved)
+    assert [cell["source"] for cell in data["cells"]] == [
+        ['# Tricky "strings" ] } [ {'], ["plt.plot([3, 4])"], ["print('hi')"], ["x = 1"]]
+    assert data["cells"][1]["outputs"][1]["data"]["image/png"] == IMAGE
+    assert data["metadata"]["kernelspec"]["name"] == "python3"
+
+    # Untouched cells are byte-for-byte copies
+    for index in (0, 2):
+        start, end = spans[index]
+        new = notebook.cells[index]._span
+        assert saved[new.start:new.end] == original[start:end]
+    assert not list(notebook_path.parent.glob("*.tmp"))
+
+    # Outputs left on disk follow the rewrite
+    image = notebook.cells[1].outputs[1]
+    assert isinstance(image, OutputRef) and image["data"]["image/png"] == IMAGE
+    assert saved[image.start:image.end] == image.raw()
+
+    reloaded = LocalColabNotebook(str(notebook_path), save_delay=0)
+    assert [cell.source for cell in reloaded.cells][1:] == ["plt.plot([3, 4])", "print('hi')", "x = 1"]
+    assert reloaded.cells[1].outputs[1]["data"]["image/png"] == IMAGE
+
+
+def test_saves_are_debounced(notebook_path):
+    notebook = LocalColabNotebook(str(notebook_path), save_delay=0.2)
+    writes = []
+    original_write = notebook.notebook_file.write
+    notebook.notebook_file.write = lambda *args: writes.append(1) or original_write(*args)
+
+    for i in range(5):
+        notebook.set_cell_source(2, f"print({i})")
+    assert writes == []
+    time.sleep(0.5)
+    assert len(writes) == 1
+    assert json.loads(notebook_path.read_text())["cells"][2]["source"] == ["print(4)"]
+
+    notebook.set_cell_source(2, "print('flushed')")
+    notebook.flush()
+    assert len(writes) == 2
+    notebook.flush()
+    assert len(writes) == 2
+
+
+def test_edits_and_reads_during_a_save_are_not_lost(notebook_path):
+    notebook = LocalColabNotebook(str(notebook_path), save_delay=0)
+    notebook.cells[2].source = "print('saving')"
+    original_write = notebook.notebook_file.write
+    readers, sources = [], []
+
+    def write_while_editing(*args):
+        # An unmaterialized cell read mid-save waits for the rebind instead of reading moved bytes
+        reader = threading.Thread(target=lambda: sources.append(notebook.cells[0].source))
+        reader.start()
+        reader.join(0.2)
+        readers.append(reader)
+        spans = original_write(*args)
+        notebook.cells[2].source = "print('edited while saving')"
+        return spans
+
+    notebook.notebook_file.write = write_while_editing
+    notebook.save_notebook()
+    readers[0].join(5)
+    assert sources == ['# Tricky "strings" ] } [ {']
+    assert notebook.cells[2].dirty
+
+    notebook.notebook_file.write = original_write
+    notebook.save_notebook()
+    assert json.loads(notebook_path.read_text())["cells"][2]["source"] == ["print('edited while saving')"]
+    assert not notebook.cells[2].dirty
+    assert notebook.cells[1].outputs[1]["data"]["image/png"] == IMAGE
+
+
+def test_failed_saves_leave_the_notebook_intact(notebook_path):
+    original = notebook_path.read_bytes()
+    notebook = LocalColabNotebook(str(notebook_path), save_delay=0)
+    notebook.metadata["unserializable"] = object()
+    notebook.save_notebook()
+    assert notebook_path.read_bytes() == original
+    assert not list(notebook_path.parent.glob("*.tmp"))
+
+
+def test_scan_matches_a_full_parse(notebook_path):
+    expected = json.loads(notebook_path.read_text())
+    top, spans = NotebookFile(notebook_path).scan()
+    assert top == {key: value for key, value in expected.items() if key != "cells"}
+    cells = [NotebookCell.from_span(NotebookFile(notebook_path), span) for span in spans]
+    assert [cell.to_dict()["outputs"] for cell in cells] == [cell.get("outputs", []) for cell in expected["cells"]]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
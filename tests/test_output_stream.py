@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Offline tests for streaming partial output (processor StreamingOutput,
+UniversalColabBridge.stream_code and the daemon's execute_stream)
+"""
+
+import sys
+import json
+import functools
+import time
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import universal_bridge
+from colab_integration.daemon import BridgeDaemon
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.output_stream import StreamingOutput, parse_partial_name, partial_file_name
+from colab_integration.processor import ColabProcessor
+
+FOLDER_ID = 'fake-folder'
+
+SLOW_CODE = """
+import time
+for step in range(3):
+    print(f"epoch {step}")
+    time.sleep(0.3)
+print("done")
+"""
+
+
+@pytest.fixture(autouse=True)
+def fast_stream_polling(monkeypatch):
+    monkeypatch.setattr(universal_bridge, 'STREAM_POLL_INTERVAL', 0.02)
+
+
+def attach_processor(service):
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+
+    def on_create(file):
+        if file['name'].startswith('command_'):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    service.add_listener(on_create)
+    return processor
+
+
+@pytest.fixture
+def make_bridge(make_bridge):
+    return functools.partial(make_bridge, tool_name="stream_test")
+
+
+def test_partial_names_round_trip():
+    name = partial_file_name('cmd_abc_12_3', 7)
+    assert name == 'partial_cmd_abc_12_3_000007.json'
+    assert parse_partial_name(name) == ('cmd_abc_12_3', 7)
+    assert parse_partial_name('result_cmd_abc_12_3.json') is None
+
+
+def test_streaming_output_chunks_in_order():
+    chunks = []
+    stream = StreamingOutput('c1', lambda seq, chunk: chunks.append(chunk), interval=0.05, chunk_bytes=1024)
+    stream.stdout.write("first\n")
+    time.sleep(0.15)
+    stream.stdout.write("x" * 2000)   # over chunk_bytes: flushed without waiting
+    time.sleep(0.1)
+    assert len(chunks) == 2
+    stream.stderr.write("warning\n")
+    stream.stdout.write("last\n")
+
+    assert stream.close() == 3
+    assert [c['seq'] for c in chunks] == [1, 2, 3]
+    assert ''.join(c['stdout'] for c in chunks) == "first\n" + "x" * 2000 + "last\n"
+    assert chunks[2]['stderr'] == "warning\n"
+    assert stream.stdout.getvalue() == ''
+
+
+def test_failed_chunks_are_retried():
+    chunks, failures = [], []
+
+    def flaky_sink(seq, chunk):
+        if not failures:
+            failures.append(seq)
+            raise IOError("quota")
+        chunks.append(chunk)
+
+    stream = StreamingOutput('c2', flaky_sink, interval=10)
+    stream.stdout.write("a")
+    stream.flush()
+    stream.stdout.write("b")
+    stream.close()
+
+    assert [(c['seq'], c['stdout']) for c in chunks] == [(1, "ab")]
+
+
+def test_stream_code_yields_output_before_the_result(make_bridge):
+    service = FakeDriveService()
+    attach_processor(service)
+    bridge = make_bridge(service)
+
+    events = []
+    for event in bridge.stream_code(SLOW_CODE, timeout=10, interval_ms=50):
+        events.append((time.time(), event))
+
+    outputs = [e for _, e in events if e['type'] == 'output']
+    result = events[-1][1]['result']
+    assert len(outputs) >= 3
+    assert outputs[0]['stdout'] == "epoch 0\n"
+    # The first epoch is visible well before the run completes
+    assert events[-1][0] - events[0][0] > 0.5
+    assert result['status'] == 'success'
+    assert result['output'] == "epoch 0\nepoch 1\nepoch 2\ndone\n"
+    assert service.find_files('partial_') == [] and service.find_files('result_') == []
+
+
+def test_execute_code_callback(make_bridge):
+    service = FakeDriveService()
+    attach_processor(service)
+    bridge = make_bridge(service)
+
+    seen = []
+    result = bridge.execute_code("print('a')\nprint('b')", timeout=10, on_output=lambda c: seen.append(c['stdout']))
+    assert ''.join(seen) == "a\nb\n"
+    assert result['output'] == "a\nb\n"
+
+
+def test_stream_lookups_match_drive_prefix_semantics(make_bridge):
+    service = FakeDriveService()
+    attach_processor(service)
+    bridge = make_bridge(service)
+    queries = []
+    list_files = service._list
+    service._list = lambda q, *args: queries.append(q) or list_files(q, *args)
+
+    assert bridge.execute_code("print('a')", timeout=10, on_output=lambda c: None)['output'] == "a\n"
+    lookups = [q for q in queries if bridge.command_id in q]
+    # Drive only prefix-matches 'name contains', so the bare id would never match
+    assert lookups and all(f"contains 'partial_{bridge.command_id}_'" in q or
+                           f"name = 'result_{bridge.command_id}" in q for q in lookups)
+
+
+def test_stream_flusher_stops_when_code_exits():
+    code = "print('bye')\nimport sys\nsys.exit(3)"
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    stream = StreamingOutput('cmd_exit', lambda seq, chunk: None, interval=0.01)
+    with pytest.raises(SystemExit):
+        processor.execute_code_with_capture(code, stream=stream)
+
+    local = ColabProcessor()
+    local_stream = StreamingOutput('cmd_exit_local', lambda seq, chunk: None, interval=0.01)
+    with pytest.raises(SystemExit):
+        local._execute_python_code(code, stream=local_stream)
+
+    time.sleep(0.1)
+    assert not [t for t in threading.enumerate() if t.name.startswith('stream-cmd_exit')]
+
+
+def test_daemon_sends_output_notifications(make_bridge):
+    service = FakeDriveService()
+    attach_processor(service)
+    daemon = BridgeDaemon(tool_name="stream_test")
+    daemon.bridge = make_bridge(service)
+
+    output = []
+    request = {'jsonrpc': '2.0', 'id': 1, 'method': 'execute_stream',
+               'params': {'code': SLOW_CODE, 'timeout': 10, 'stream_id': 'ide-1'}}
+    daemon.serve_lines([json.dumps(request)], output.append)
+    daemon.executor.shutdown(wait=True)
+
+    messages = [json.loads(line) for line in output]
+    notifications = [m['params'] for m in messages if m.get('method') == 'output']
+    response = [m for m in messages if m.get('id') == 1][0]
+    assert notifications and all(n['stream_id'] == 'ide-1' for n in notifications)
+    assert ''.join(n['stdout'] for n in notifications) == response['result']['output']
+    assert messages.index(response) == len(messages) - 1
+
+
+def test_mounted_processor_writes_partial_files(tmp_path):
+    processor = ColabProcessor()
+    processor.stream_folder = str(tmp_path)
+    result = processor.process_command({'id': 'cmd_local', 'type': 'execute_code', 'code': "print('hi')",
+                                        'stream': {'interval_ms': 10}})
+
+    assert result['success'] and result['streamed_chunks'] == 1 and result['output'] == ''
+    chunk = json.loads((tmp_path / partial_file_name('cmd_local', 1)).read_text())
+    assert chunk['stdout'] == "hi\n"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the package installer (pip is replaced by a recording runner)
+"""
+
+import sys
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration import package_installer
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.package_installer import PackageInstaller, is_satisfied, packages_for_code
+from colab_integration.processor import ColabProcessor
+
+MISSING = 'no-such-package-xyz'
+
+
+class RecordingPip:
+    """Runner standing in for pip: records argv and models the wheel cache
+
+    Offline installs only succeed once the cache holds wheels; 'pip wheel'
+    fills it unless can_build is False.
+    """
+
+    def __init__(self, cached=True, can_build=True):
+        self.calls = []
+        self.cached = cached
+        self.can_build = can_build
+
+    def __call__(self, argv):
+        args = argv[3:]
+        self.calls.append(args)
+        ok = True
+        if args[0] == 'wheel':
+            ok = self.cached = self.can_build
+        elif '--no-index' in args:
+            ok = self.cached
+        return subprocess.CompletedProcess(argv, 0 if ok else 1, '', '' if ok else 'boom')
+
+
+def test_satisfied_requirements_are_skipped():
+    assert is_satisfied('pytest')
+    assert is_satisfied('pytest>=1.0')
+    assert not is_satisfied('pytest<1.0')
+    assert not is_satisfied(MISSING)
+    assert is_satisfied(f'{MISSING}; python_version < "2"')
+
+    pip = RecordingPip()
+    result = PackageInstaller(runner=pip).install(['pytest', 'pytest>=1.0'])
+    assert result['success'] and result['skipped'] == ['pytest', 'pytest>=1.0']
+    assert pip.calls == []
+
+
+def test_missing_packages_are_resolved_in_one_pip_run():
+    pip = RecordingPip()
+    result = PackageInstaller(runner=pip).install(['pytest', MISSING, 'pytest<1.0'])
+
+    assert result['installed'] == [MISSING, 'pytest<1.0'] and result['skipped'] == ['pytest']
+    assert pip.calls == [['install', MISSING, 'pytest<1.0', '--disable-pip-version-check']]
+
+
+def test_wheel_cache_serves_fresh_runtimes(tmp_path):
+    cache = tmp_path / "wheels"
+
+    # Warm cache: one offline install, no network
+    pip = RecordingPip()
+    result = PackageInstaller(cache, runner=pip).install([MISSING])
+    assert result['from_cache']
+    assert pip.calls == [['install', '--no-index', '--find-links', str(cache), MISSING,
+                          '--disable-pip-version-check']]
+
+    # Cold cache: wheels are fetched into the cache, then installed from it
+    pip = RecordingPip(cached=False)
+    result = PackageInstaller(cache, runner=pip).install([MISSING])
+    assert result['success'] and not result['from_cache']
+    assert [call[0] for call in pip.calls] == ['install', 'wheel', 'install']
+    assert pip.calls[1][:3] == ['wheel', '--wheel-dir', str(cache)]
+
+    # No way to build wheels: plain install
+    pip = RecordingPip(cached=False, can_build=False)
+    assert PackageInstaller(cache, runner=pip).install([MISSING])['success']
+    assert pip.calls[-1] == ['install', MISSING, '--disable-pip-version-check']
+
+
+def test_processors_report_install_results(monkeypatch):
+    monkeypatch.setenv('COLAB_PROCESSOR_WHEEL_CACHE', '')
+    result = ColabProcessor().process_command({'type': 'install_package', 'packages': 'pytest'})
+    assert result['success'] and result['skipped'] == ['pytest']
+
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id='fake-folder')
+    result = processor.dispatch_command({'id': 'cmd', 'type': 'install_package', 'packages': ['pytest>=1']})
+    assert result['status'] == 'success' and result['skipped'] == ['pytest>=1']
+    assert 'Already installed' in result['output']
+
+
+def test_packages_are_detected_from_imports():
+    code = "import os\nimport numpy as np\nfrom sklearn.linear_model import Ridge\nimport torch.nn\nfrom . import x\n"
+    assert packages_for_code(code) == ['numpy', 'scikit-learn', 'torch']
+    assert packages_for_code("print('np.array')") == []
+
+
+def test_package_detection_without_python_310_metadata(monkeypatch):
+    # sys.stdlib_module_names and packages_distributions do not exist before Python 3.10
+    monkeypatch.delattr(sys, 'stdlib_module_names', raising=False)
+    monkeypatch.delattr(package_installer.metadata, 'packages_distributions', raising=False)
+    package_installer.stdlib_modules.cache_clear()
+    try:
+        code = "import os, json, collections.abc\nimport numpy\nfrom sklearn import svm\n"
+        assert packages_for_code(code) == ['numpy', 'scikit-learn']
+    finally:
+        package_installer.stdlib_modules.cache_clear()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Offline tests for pipelined command submission (submit_code / execute_many)
+"""
+
+import sys
+import time
+import functools
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.drive_changes import DriveChangesWatcher
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+
+FOLDER_ID = 'fake-folder'
+
+
+@pytest.fixture(autouse=True)
+def fresh_watchers():
+    DriveChangesWatcher.reset_shared()
+    yield
+    DriveChangesWatcher.reset_shared()
+
+
+@pytest.fixture
+def make_bridge(make_bridge):
+    return functools.partial(make_bridge, tool_name='pipeline', result_delivery='changes')
+
+
+class InFlightCounter:
+    """Processor handler tracking how many commands were pending at once"""
+
+    def __init__(self, service):
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+        self.order = []
+        service.add_listener(self.on_create)
+
+    def on_create(self, file):
+        if file['name'].startswith('command_'):
+            with self.lock:
+                self.pending += 1
+                self.max_pending = max(self.max_pending, self.pending)
+
+    def __call__(self, command):
+        with self.lock:
+            self.pending -= 1
+            self.order.append(command['code'])
+        return {'status': 'success', 'output': command['code']}
+
+
+def test_execute_many_overlaps_round_trips(make_bridge):
+    service = FakeDriveService()
+    counter = InFlightCounter(service)
+    attach_echo_processor(service, FOLDER_ID, delay=0.3, handler=counter)
+    bridge = make_bridge(service, max_in_flight=10)
+
+    started = time.time()
+    results = bridge.execute_many([f"print({i})" for i in range(20)], timeout=10)
+    elapsed = time.time() - started
+    bridge.close()
+
+    assert [r['output'] for r in results] == [f"print({i})" for i in range(20)]
+    # Serially this would take 20 * 0.3s
+    assert elapsed < 3
+    assert counter.max_pending <= 10
+
+
+def test_submit_applies_back_pressure(make_bridge):
+    service = FakeDriveService()
+    counter = InFlightCounter(service)
+    attach_echo_processor(service, FOLDER_ID, delay=0.1, handler=counter)
+    bridge = make_bridge(service, max_in_flight=3)
+
+    futures = [bridge.submit_code(f"x = {i}", timeout=10) for i in range(12)]
+    assert all(f.result(timeout=10)['status'] == 'success' for f in futures)
+    bridge.close()
+
+    assert counter.max_pending <= 3
+
+
+def test_session_commands_run_in_submission_order(make_bridge):
+    service = FakeDriveService()
+    counter = InFlightCounter(service)
+    attach_echo_processor(service, FOLDER_ID, delay=0.05, handler=counter)
+    bridge = make_bridge(service, max_in_flight=8)
+
+    codes = [f"step_{i}()" for i in range(8)]
+    results = bridge.execute_many(codes, timeout=10, session='notebook')
+    bridge.close()
+
+    assert [r['output'] for r in results] == codes
+    assert counter.order == codes
+    assert counter.max_pending == 1
+
+
+
+def test_session_commands_never_overtake_a_pending_one(make_bridge):
+    service = FakeDriveService()
+    counter = InFlightCounter(service)
+    attach_echo_processor(service, FOLDER_ID, delay=1.0, handler=counter)
+    bridge = make_bridge(service, max_in_flight=4)
+
+    first, second, third = bridge.execute_many(["a()", "b()", "c()"], timeout=0.3, session='notebook')
+    other = bridge.submit_code("d()", timeout=10, session='other').result(timeout=10)
+    bridge.close()
+
+    assert first['status'] == 'pending'
+    # Still queued or running remotely: the rest of the session is not sent
+    assert second['status'] == 'error' and second['blocked_by'] == first['request_id']
+    assert third['blocked_by'] == first['request_id']
+    assert other['status'] == 'success'
+    assert "b()" not in counter.order and "c()" not in counter.order
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared command/result file protocol
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.drive_changes import result_key_candidates
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService, attach_echo_processor
+from colab_integration.optimized_bridge import OptimizedColabBridge
+from colab_integration.protocol import FileProtocol, get_protocol, register_protocol
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+def record_queries(service):
+    queries = []
+    original = service._list
+
+    def list_files(q, *args):
+        queries.append(q)
+        return original(q, *args)
+
+    service._list = list_files
+    return queries
+
+
+def test_names_are_deterministic_and_parse_back():
+    protocol = get_protocol()
+    assert protocol.command_name('cmd_a_1') == 'command_cmd_a_1.json'
+    assert protocol.result_name('cmd_a_1') == 'result_cmd_a_1.json'
+    assert protocol.command_id('command_cmd_a_1.json') == 'cmd_a_1'
+    assert protocol.result_id('result_cmd_a_1.json') == 'cmd_a_1'
+    assert protocol.command_id('result_cmd_a_1.json') is None
+    assert protocol.result_id('result_.json') is None
+    assert protocol.result_query('cmd_a_1', FOLDER_ID) == \
+        f"name = 'result_cmd_a_1.json' and '{FOLDER_ID}' in parents and trashed=false"
+
+    with pytest.raises(ValueError):
+        get_protocol('no-such-protocol')
+
+
+@pytest.mark.parametrize('bridge_class', [UniversalColabBridge, OptimizedColabBridge])
+def test_polling_uses_one_exact_lookup_per_poll(bridge_class):
+    service = FakeDriveService()
+    attach_echo_processor(service, FOLDER_ID, delay=0.3)
+    queries = record_queries(service)
+
+    bridge = bridge_class(tool_name="protocol_test")
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+    result = bridge.execute_code("print(1)", timeout=5)
+
+    assert result['status'] == 'success'
+    assert len(queries) > 1
+    assert set(queries) == {bridge.protocol.result_query(result['command_id'], FOLDER_ID)}
+    assert service.calls['files.list'] == len(queries)
+
+
+def test_registered_protocol_plugs_bridge_and_processor_together():
+    protocol = register_protocol(FileProtocol('jobs', command_prefix='job_', result_prefix='done_'))
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID, protocol='jobs')
+    names = []
+
+    def on_create(file):
+        names.append(file['name'])
+        if protocol.command_id(file['name']):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    service.add_listener(on_create)
+    bridge = UniversalColabBridge(tool_name="protocol_test", protocol='jobs')
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+
+    result = bridge.execute_code("print('hi')", timeout=5)
+    assert result['output'] == 'hi\n'
+    assert names == [f"job_{result['command_id']}.json", f"done_{result['command_id']}.json"]
+    assert bridge.clone_for_thread().protocol is protocol
+    assert result_key_candidates(f"done_{result['command_id']}.json", protocol)[0] == result['command_id']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the on-disk result cache of executions and notebook cells
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.file_sync import FileSyncManager
+from colab_integration.local_notebook import LocalColabNotebook
+from colab_integration.result_cache import ResultCache
+from colab_integration.universal_bridge import UniversalColabBridge
+
+FOLDER_ID = 'fake-folder'
+
+
+class CountingSync(FileSyncManager):
+    """FileSyncManager that hashes inputs for real but only counts sync passes"""
+
+    def __init__(self, local_dir):
+        super().__init__(local_dir, colab_mount_point=str(local_dir))
+        self.pushes = 0
+        self.pulls = 0
+
+    def sync_to_colab(self, rel_paths=None):
+        self.pushes += 1
+        return True
+
+    def sync_from_colab(self):
+        self.pulls += 1
+        return True
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch, isolated_home):
+    monkeypatch.chdir(tmp_path)
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+    processor.commands = []
+
+    def on_create(file):
+        if processor.protocol.command_id(file['name']):
+            processor.commands.append(file['name'])
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    processor.service.add_listener(on_create)
+    return processor
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "results.sqlite3")
+
+
+def connect(bridge, processor):
+    bridge.drive_service = processor.service
+    bridge.folder_id = FOLDER_ID
+    return bridge
+
+
+def open_notebook(path, processor, cache, tool_name):
+    # Distinct tool names: bridges created within the same second would share command ids
+    notebook = LocalColabNotebook(str(path), tool_name=tool_name, save_delay=0,
+                                  result_cache=cache, cache_inputs=["data.csv"])
+    connect(notebook.colab_bridge, processor)
+    notebook.file_sync = CountingSync(path.parent)
+    return notebook
+
+
+def test_keys_ignore_formatting_but_not_inputs_or_environment():
+    key = ResultCache.key("x = 1  # set x\nprint( x )", {'data.csv': 'abc'}, 'env')
+    assert key == ResultCache.key("x=1\n\nprint(x)\n", {'data.csv': 'abc'}, 'env')
+    assert key != ResultCache.key("x = 2\nprint(x)", {'data.csv': 'abc'}, 'env')
+    assert key != ResultCache.key("x = 1\nprint(x)", {'data.csv': 'def'}, 'env')
+    assert key != ResultCache.key("x = 1\nprint(x)", {'data.csv': 'abc'}, 'other')
+    assert key != ResultCache.key("x = 1\nprint(x)", {'data.csv': 'abc'}, 'env', upstream=['parent'])
+    assert ResultCache.key("!ls  \n") == ResultCache.key("!ls")
+
+
+def test_entries_persist_and_are_evicted_least_recently_used(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    cache = ResultCache(path, max_bytes=1000)
+    assert not cache.put('failed', {'status': 'error', 'error': 'boom'})
+    for name in ('a', 'b', 'c'):
+        assert cache.put(name, {'status': 'success', 'output': name * 300, 'command_id': 'cmd_1'})
+    assert cache.get('a') is None  # Evicted: a, b and c do not fit together
+    assert cache.get('b')['output'] == 'b' * 300
+
+    cache.put('d', {'status': 'success', 'output': 'd' * 300})
+    assert cache.get('c') is None and cache.get('b') is not None  # b was used more recently
+    assert not cache.put('huge', {'status': 'success', 'output': 'x' * 2000})
+
+    reopened = ResultCache(path, max_bytes=1000)
+    result = reopened.get('d')
+    assert result == {'status': 'success', 'output': 'd' * 300, 'cached': True}
+    assert reopened.stats()['entries'] == 2
+
+
+def test_input_hashes_come_from_the_scan_index(tmp_path, isolated_home):
+    (tmp_path / "data.csv").write_text("a,b\n1,2\n")
+    (tmp_path / "conf").mkdir()
+    (tmp_path / "conf" / "model.json").write_text("{}")
+    sync = FileSyncManager(str(tmp_path))
+
+    hashes = sync.input_hashes(["data.csv", "missing.csv", "conf/*.json"])
+    assert set(hashes) == {"data.csv", "missing.csv", "conf/model.json"}
+    assert hashes["data.csv"] and hashes["missing.csv"] == ""
+
+    (tmp_path / "data.csv").write_text("a,b\n3,4\n")
+    assert sync.input_hashes(["data.csv"])["data.csv"] != hashes["data.csv"]
+
+
+def test_bridge_reuses_results_of_sessionless_code(processor, cache):
+    bridge = connect(UniversalColabBridge(tool_name="cache_test", result_cache=cache), processor)
+    code = "import random\nprint(random.random())"
+
+    first = bridge.execute_code(code, timeout=10)
+    second = bridge.execute_code(code + "  # comment", timeout=10)
+    assert second['cached'] and second['output'] == first['output']
+    assert len(processor.commands) == 1
+
+    chunks = []
+    streamed = bridge.execute_code(code, timeout=10, on_output=chunks.append)
+    assert streamed['cached'] and chunks[0]['stdout'] == first['output']
+
+    assert not bridge.execute_code(code, timeout=10, inputs={'data.csv': 'v2'}).get('cached')
+    assert not bridge.execute_code(code, timeout=10, session='s').get('cached')
+    assert not bridge.execute_code(code, timeout=10, cache=False).get('cached')
+    assert len(processor.commands) == 4
+
+    # Opt-in per call on a bridge without a cache
+    plain = connect(UniversalColabBridge(tool_name="cache_test"), processor)
+    plain.result_cache = cache
+    assert plain.execute_code(code, timeout=10, session='s', cache=True)['cached']
+
+
+def test_notebook_reruns_come_from_the_cache(processor, cache, tmp_path):
+    (tmp_path / "data.csv").write_text("1\n2\n3\n")
+    sources = ["rows = open('data.csv').read().split()", "total = sum(map(int, rows))",
+               "print(total)", "print(len(rows))"]
+    notebook = open_notebook(tmp_path / "report.ipynb", processor, cache, "first_run")
+    notebook.cells = []
+    for source in sources:
+        notebook.add_cell("code", source)
+    assert [r['status'] for r in notebook.run_all_cells()] == ['success'] * 4
+    assert len(processor.commands) == 1
+    notebook.flush()
+
+    # A fresh process (CI re-run) gets every output without a round trip
+    rerun = open_notebook(tmp_path / "report.ipynb", processor, cache, "second_run")
+    results = rerun.run_all_cells()
+    assert all(r['cached'] for r in results) and results[2]['output'] == '6\n'
+    assert len(processor.commands) == 1 and rerun.file_sync.pushes == 0
+    assert rerun.stale_cells() == []
+
+    # A changed cell re-runs for real, together with the replayed cells it reads from
+    rerun.cells[3].source = "print(len(rows) * 10)"
+    results = rerun.run_all_cells()
+    assert results[3]['output'] == '30\n' and not results[3].get('cached')
+    assert len(processor.commands) == 2
+    assert rerun.cells[0].execution_count is not None and not rerun.cells[0].replayed
+    assert rerun.cells[2].replayed
+
+    # run_cell uses the cache too, and changed inputs change the key
+    assert rerun.run_cell(2)['cached']
+    (tmp_path / "data.csv").write_text("1\n2\n3\n4\n")
+    result = rerun.run_cell(2)
+    assert result['status'] == 'success' and result['output'] == '10\n'
+    assert len(processor.commands) == 4  # Providers 0 and 1 (stale state), then cell 2
+
+    results = rerun.run_all_cells()
+    assert [r.get('cached', False) for r in results] == [True, True, True, False]
+    assert results[3]['output'] == '40\n' and len(processor.commands) == 5
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the persistent stat-based scan index used by FileSyncManager
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.file_sync import FileSyncManager
+from colab_integration.scan_index import ScanIndex
+
+
+pytestmark = pytest.mark.usefixtures("isolated_home")
+
+
+def make_tree(local_dir, count):
+    """Files with settled (old) modification times"""
+    (local_dir / "pkg").mkdir(parents=True, exist_ok=True)
+    (local_dir / "node_modules").mkdir(exist_ok=True)
+    (local_dir / "node_modules" / "skip.py").write_text("ignored")
+    old = time.time() - 60
+    for i in range(count):
+        path = local_dir / "pkg" / f"mod_{i}.py"
+        path.write_text(f"value = {i}\n")
+        os.utime(path, (old, old))
+
+
+def count_hashes(sync, monkeypatch):
+    hashed = []
+    original = sync.get_file_hash
+
+    def counting_hash(file_path):
+        hashed.append(Path(file_path).name)
+        return original(file_path)
+
+    monkeypatch.setattr(sync, 'get_file_hash', counting_hash)
+    return hashed
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path, monkeypatch):
+    sync = FileSyncManager(str(tmp_path / "local"))
+    make_tree(sync.local_dir, 20)
+    hashed = count_hashes(sync, monkeypatch)
+
+    first = sync.scan_local_files()
+    assert len(first) == 20
+    assert "node_modules/skip.py" not in first
+    assert len(hashed) == 20
+
+    hashed.clear()
+    second = sync.scan_local_files()
+    assert hashed == []
+    assert second == first
+
+
+def test_only_changed_files_are_rehashed(tmp_path, monkeypatch):
+    sync = FileSyncManager(str(tmp_path / "local"))
+    make_tree(sync.local_dir, 5)
+    before = sync.scan_local_files()
+    hashed = count_hashes(sync, monkeypatch)
+
+    (sync.local_dir / "pkg" / "mod_3.py").write_text("value = 'changed'\n")
+    os.remove(sync.local_dir / "pkg" / "mod_4.py")
+    after = sync.scan_local_files()
+
+    assert hashed == ["mod_3.py"]
+    assert after["pkg/mod_3.py"]["hash"] != before["pkg/mod_3.py"]["hash"]
+    assert "pkg/mod_4.py" not in after
+    assert "pkg/mod_4.py" not in sync.scan_index.load(str(sync.local_dir))
+
+
+def test_index_survives_restart(tmp_path, monkeypatch):
+    local_dir = tmp_path / "local"
+    make_tree(local_dir, 10)
+    FileSyncManager(str(local_dir)).scan_local_files()
+
+    restarted = FileSyncManager(str(local_dir), scan_index=ScanIndex())
+    hashed = count_hashes(restarted, monkeypatch)
+    assert len(restarted.scan_local_files()) == 10
+    assert hashed == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Offline tests for persistent per-session execution namespaces
+"""
+
+import sys
+import time
+import pickle
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.processor import ColabProcessor
+from colab_integration.session_namespaces import SessionNamespaces, estimate_size
+
+FOLDER_ID = 'fake-folder'
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def processor():
+    return EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID)
+
+
+def run(processor, code, session=None, **extra):
+    return processor.dispatch_command({'id': 'cmd', 'type': 'execute', 'code': code, 'session': session, **extra})
+
+
+def test_variables_persist_within_a_session(processor):
+    assert run(processor, "model = {'weights': [1, 2, 3]}", session='a')['status'] == 'success'
+    assert run(processor, "print(sum(model['weights']))", session='a')['output'] == '6\n'
+
+    other = run(processor, "print(model)", session='b')
+    assert other['status'] == 'error' and 'NameError' in other['error']
+
+    run(processor, "x = 1")
+    assert 'NameError' in run(processor, "print(x)")['error']
+
+
+def test_least_recently_used_sessions_are_evicted():
+    sessions = SessionNamespaces(max_sessions=2)
+    sessions.get('a')['v'] = 1
+    sessions.get('b')['v'] = 2
+    sessions.get('a')
+    sessions.get('c')
+
+    assert sessions.sessions() == ['a', 'c']
+    assert sessions.get('a')['v'] == 1
+    assert 'v' not in sessions.get('b')
+
+
+def test_memory_caps():
+    sessions = SessionNamespaces(max_total_bytes=3 * MB)
+    sessions.get('old')['data'] = bytearray(2 * MB)
+    assert sessions.record_usage('old') is None
+    sessions.get('new')['data'] = bytearray(2 * MB)
+    assert sessions.record_usage('new') is None
+    assert sessions.sessions() == ['new']
+
+    capped = SessionNamespaces(max_session_bytes=1 * MB)
+    capped.get('big')['data'] = bytearray(2 * MB)
+    assert 'per-session limit' in capped.record_usage('big')
+    assert capped.sessions() == []
+
+
+class SlowToMeasure:
+    """Value whose size takes a while to estimate"""
+
+    measured = 0
+
+    @property
+    def nbytes(self):
+        SlowToMeasure.measured += 1
+        time.sleep(0.5)
+        return MB
+
+
+class CountsPickling:
+    pickled = 0
+
+    def __reduce__(self):
+        CountsPickling.pickled += 1
+        return (CountsPickling, ())
+
+
+def test_sizes_are_measured_only_under_a_cap_and_outside_the_lock():
+    SlowToMeasure.measured = 0
+    uncapped = SessionNamespaces()
+    uncapped.get('a')['model'] = SlowToMeasure()
+    assert uncapped.record_usage('a') is None and SlowToMeasure.measured == 0
+
+    capped = SessionNamespaces(max_total_bytes=100 * MB)
+    capped.get('a')['model'] = SlowToMeasure()
+    measuring = threading.Thread(target=capped.record_usage, args=('a',))
+    measuring.start()
+    time.sleep(0.1)
+    start = time.time()
+    capped.get('b')  # Another session's command is not held up by the measurement
+    assert time.time() - start < 0.2
+    measuring.join()
+    assert SlowToMeasure.measured == 1
+
+
+def test_dump_pickles_each_variable_once():
+    sessions = SessionNamespaces()
+    sessions.get('a').update(value=CountsPickling(), rows=[1, 2])
+    CountsPickling.pickled = 0
+    data, skipped = sessions.dump('a')
+    assert CountsPickling.pickled == 1 and skipped == []
+    assert sorted(sessions.load('b', data)) == ['rows', 'value']
+    assert isinstance(sessions.get('b')['value'], CountsPickling)
+
+    # Snapshots pickled as one dict still load
+    assert sessions.load('c', pickle.dumps({'x': 1})) == ['x'] and sessions.get('c')['x'] == 1
+
+
+def test_estimate_size_uses_buffers():
+    numpy = pytest.importorskip('numpy')
+    assert estimate_size(numpy.zeros(1000, dtype='float64')) == 8000
+    assert estimate_size([bytes(1000)] * 3) > 3000
+
+
+def test_reset_snapshot_and_restore(processor):
+    run(processor, "import math\nrows = list(range(100))\ngen = (i for i in rows)", session='data')
+
+    snapshot = processor.dispatch_command({'id': 's1', 'type': 'session_snapshot', 'session': 'data', 'persist': True})
+    assert snapshot['status'] == 'success'
+    assert snapshot['snapshot']['variables']['rows']['type'] == 'list'
+    assert sorted(snapshot['skipped']) == ['gen', 'math']
+
+    reset = processor.dispatch_command({'id': 'r1', 'type': 'session_reset', 'session': 'data'})
+    assert reset['existed']
+    assert 'NameError' in run(processor, "print(len(rows))", session='data')['error']
+
+    restored = processor.dispatch_command({'id': 'r2', 'type': 'session_restore', 'session': 'copy',
+                                           'snapshot_file_id': snapshot['snapshot_file_id']})
+    assert restored['restored'] == ['rows']
+    assert run(processor, "print(len(rows))", session='copy')['output'] == '100\n'
+
+    missing = processor.dispatch_command({'id': 's2', 'type': 'session_snapshot', 'session': 'nope'})
+    assert missing['status'] == 'error'
+
+
+def test_basic_processor_sessions():
+    processor = ColabProcessor()
+    processor.process_command({'type': 'execute_code', 'code': "counter = 1"})
+    processor.process_command({'type': 'execute_code', 'code': "counter = 10", 'session': 'other'})
+    result = processor.process_command({'type': 'execute_code', 'code': "print(counter)"})
+    assert result['output'] == '1\n'
+
+    processor.process_command({'type': 'session_reset', 'session': 'default'})
+    assert not processor.process_command({'type': 'execute_code', 'code': "print(counter)"})['success']
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
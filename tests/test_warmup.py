@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the processor warm-up manifest and lazy matplotlib import
+"""
+
+import sys
+import json
+import time
+import threading
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from colab_integration.drive_io import decode_json
+from colab_integration.enhanced_processor import EnhancedColabProcessor
+from colab_integration.fake_drive import FakeDriveService
+from colab_integration.universal_bridge import UniversalColabBridge
+from colab_integration.warmup import load_manifest
+
+FOLDER_ID = 'fake-folder'
+
+SLOW_MODULE = '''
+import time
+
+def load(size, delay=0.5):
+    time.sleep(delay)
+    return list(range(size))
+'''
+
+
+@pytest.fixture
+def slow_loader(tmp_path, monkeypatch):
+    (tmp_path / "slow_models.py").write_text(SLOW_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'slow_models', raising=False)
+    return 'slow_models.load'
+
+
+def test_manifest_sources(tmp_path, monkeypatch):
+    manifest = {'modules': ['json'], 'models': [{'name': 'm', 'loader': 'builtins.dict'}], 'session': 'nlp'}
+    expected = {'modules': ['json'],
+                'models': [{'name': 'm', 'loader': 'builtins.dict', 'args': [], 'kwargs': {}, 'session': 'nlp'}]}
+    path = tmp_path / "warmup.json"
+    path.write_text(json.dumps(manifest))
+
+    assert load_manifest(manifest) == expected
+    assert load_manifest(json.dumps(manifest)) == expected
+    assert load_manifest(str(path)) == expected
+
+    monkeypatch.delenv('COLAB_PROCESSOR_WARMUP', raising=False)
+    assert load_manifest() is None
+    monkeypatch.setenv('COLAB_PROCESSOR_WARMUP', str(path))
+    assert load_manifest() == expected
+
+    with pytest.raises(ValueError):
+        load_manifest({'models': [{'name': 'no-loader'}]})
+    with pytest.raises(ValueError):
+        load_manifest({'modules': [3]})
+
+
+def test_session_commands_wait_for_preloaded_models(slow_loader):
+    processor = EnhancedColabProcessor(service=FakeDriveService(), folder_id=FOLDER_ID, warmup={
+        'modules': ['json', 'no_such_module_xyz'],
+        'models': [{'name': 'weights', 'loader': slow_loader, 'args': [4], 'session': 'nlp'}],
+    })
+    assert processor.warmup.describe()['state'] == 'running'
+
+    result = processor.dispatch_command({'id': 'cmd', 'type': 'execute', 'code': "print(sum(weights))",
+                                        'session': 'nlp'})
+    assert result['status'] == 'success' and result['output'] == '6\n'
+
+    # Commands outside warmed sessions do not wait
+    started = time.time()
+    processor.dispatch_command({'id': 'other', 'type': 'execute', 'code': "x = 1", 'session': 'other'})
+    assert time.time() - started < 0.5
+
+    assert processor.warmup.wait(timeout=5)
+    status = processor.warmup.describe()
+    assert status['state'] == 'ready'
+    assert status['modules']['json']['status'] == 'ready'
+    assert status['modules']['no_such_module_xyz']['status'] == 'error'
+    assert status['models']['nlp.weights']['status'] == 'ready'
+    assert status['errors'] == 1
+
+    processor.write_heartbeat()
+    heartbeat = next(f for f in processor.service._files.values() if f['name'] == 'heartbeat.json')
+    assert decode_json(heartbeat['content'])['warmup']['state'] == 'ready'
+
+
+def test_bridge_warmup_command(slow_loader, isolated_home):
+    service = FakeDriveService()
+    processor = EnhancedColabProcessor(service=service, folder_id=FOLDER_ID)
+
+    def on_create(file):
+        if processor.protocol.command_id(file['name']):
+            threading.Thread(target=processor.process_command, args=(file,), daemon=True).start()
+
+    service.add_listener(on_create)
+    bridge = UniversalColabBridge(tool_name="warmup_test")
+    bridge.drive_service = service
+    bridge.folder_id = FOLDER_ID
+
+    assert bridge.warmup()['warmup']['state'] == 'idle'
+    manifest = {'models': [{'name': 'weights', 'loader': slow_loader, 'args': [3], 'kwargs': {'delay': 0.2}}]}
+    result = bridge.warmup(manifest, wait=True, timeout=10)
+    assert result['status'] == 'success'
+    assert result['warmup']['state'] == 'ready'
+    assert result['warmup']['models']['default.weights']['status'] == 'ready'
+
+    assert bridge.execute_code("print(weights)", timeout=5, session='default')['output'] == '[0, 1, 2]\n'
+
+
+def test_importing_the_processor_does_not_import_matplotlib():
+    code = ("import sys; import colab_integration.enhanced_processor; "
+            "print('matplotlib' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'False'
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))